@@ -45,6 +45,33 @@ class CategoryManager(ActiveMixin, models.Manager):
             self
         ).get_queryset().exclude(status=STATUS.deleted)
 
+    def get_changes(self, project, updated_at=None):
+        """
+        Returns all categories of a project, including deleted ones, that
+        changed after a time.
+
+        Parameters
+        ----------
+        project : geokey.projects.models.Project
+            Project the categories are queried for
+        updated_at : datetime.datetime
+            Time of the last sync
+
+        Returns
+        -------
+        django.db.models.Queryset
+            All changed categories
+        """
+        changes = super(
+            CategoryManager,
+            self
+        ).get_queryset().filter(project=project)
+
+        if updated_at is not None:
+            changes = changes.filter(updated_at__gt=updated_at)
+
+        return changes
+
     def get_list(self, user, project_id):
         """
         Returns all category objects the user is allowed to access. Project
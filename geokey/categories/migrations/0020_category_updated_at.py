@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0019_auto_20181028_1638'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(null=True, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalcategory',
+            name='updated_at',
+            field=models.DateTimeField(null=True, blank=True),
+        ),
+        migrations.RunSQL(
+            'UPDATE categories_category SET updated_at = created_at;',
+            migrations.RunSQL.noop
+        ),
+    ]
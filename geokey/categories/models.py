@@ -3,12 +3,16 @@
 import json
 
 import time
+from datetime import datetime
 from iso8601 import parse_date
 from iso8601.iso8601 import ParseError
 
 from django.apps import apps
 from django.conf import settings
 from django.db import models
+from django.dispatch import receiver
+from django.db.models.signals import pre_save, post_save
+from django.utils import timezone
 
 from simple_history.models import HistoricalRecords
 
@@ -25,6 +29,40 @@ else:
     NUM_TYPES = (int, float, complex)
 
 
+def parse_rule_date(value, key):
+    """
+    Parses the date of a rule filtering by the creation of contributions,
+    so it is compared with `created_at` as a time in UTC. Comparing with a
+    constant, the index on `created_at` can be used.
+
+    Parameters
+    ----------
+    value : str
+        Date and time, e.g. `2015-01-31 9:30` or `2015-01-31 09:30:00`, or
+        date.
+    key : str
+        `min_date` or `max_date`.
+
+    Returns
+    -------
+    str
+        Date and time, formatted as `2015-01-31 09:30:00`.
+
+    Raises
+    ------
+    InputError
+        When the date is not valid.
+    """
+    for date_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            parsed = datetime.strptime(str(value).strip(), date_format)
+            return parsed.strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+
+    raise InputError('The %s of the filter is not a valid date.' % key)
+
+
 class Category(models.Model):
     """
     Defines the data structure of a certain type of features.
@@ -33,6 +71,7 @@ class Category(models.Model):
     description = models.TextField(null=True, blank=True)
     project = models.ForeignKey('projects.Project', related_name='categories')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
     creator = models.ForeignKey(settings.AUTH_USER_MODEL)
     order = models.IntegerField(default=0)
     status = models.CharField(
@@ -94,15 +133,13 @@ class Category(models.Model):
         """
         queries = ['(category_id = %s)' % self.id]
 
-        if 'min_date' in rule:
-            queries.append('("contributions_observation".created_at >= to_date(\'' +
-                           rule['min_date'] +
-                           '\', \'YYYY-MM-DD HH24:MI\'))')
-
-        if 'max_date' in rule:
-            queries.append('("contributions_observation".created_at <= to_date(\'' +
-                           rule['max_date'] +
-                           '\', \'YYYY-MM-DD HH24:MI\'))')
+        for key, operator in (('min_date', '>='), ('max_date', '<=')):
+            if key in rule:
+                queries.append(
+                    '("contributions_observation".created_at %s (\'%s\''
+                    '::timestamp AT TIME ZONE \'UTC\'))' %
+                    (operator, parse_rule_date(rule[key], key))
+                )
 
         for key in rule:
             if key not in ['min_date', 'max_date']:
@@ -968,3 +1005,43 @@ class MultipleLookupValue(models.Model):
         """
         self.status = STATUS.inactive
         self.save()
+
+
+@receiver(pre_save, sender=Category)
+def pre_save_category_update(sender, instance, **kwargs):
+    """
+    Receiver that is called before a category is saved. Updates
+    `updated_at`, so clients can sync changes of the schema.
+    """
+    instance.updated_at = timezone.now()
+
+
+def post_save_schema_update(sender, instance, **kwargs):
+    """
+    Receiver that is called after a field or lookup value is saved. Updates
+    `updated_at` of the category, without adding to its history.
+    """
+    if isinstance(instance, Field):
+        category_id = instance.category_id
+    else:
+        category_id = Field.objects.filter(
+            pk=instance.field_id
+        ).values_list('category_id', flat=True).first()
+
+    Category.objects.filter(pk=category_id).update(
+        updated_at=timezone.now()
+    )
+
+
+for schema_model in (
+        Field,
+        TextField,
+        NumericField,
+        DateTimeField,
+        DateField,
+        TimeField,
+        LookupField,
+        LookupValue,
+        MultipleLookupField,
+        MultipleLookupValue):
+    post_save.connect(post_save_schema_update, sender=schema_model)
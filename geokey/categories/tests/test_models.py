@@ -141,8 +141,8 @@ class CategoryTest(TestCase):
         self.assertEqual(
             query,
             '((category_id = %s) AND ("contributions_observation".created_at '
-            '>= to_date(\'2014-01-05 00:00\', \'YYYY-MM-DD HH24:MI\'))'
-            ')' % category.id
+            '>= (\'2014-01-05 00:00:00\'::timestamp AT TIME ZONE \'UTC\')))'
+            % category.id
         )
 
         category = CategoryFactory.create()
@@ -152,8 +152,8 @@ class CategoryTest(TestCase):
         self.assertEqual(
             query,
             '((category_id = %s) AND ("contributions_observation".created_at '
-            '<= to_date(\'2014-01-05 00:00\', \'YYYY-MM-DD HH24:MI\'))'
-            ')' % category.id
+            '<= (\'2014-01-05 00:00:00\'::timestamp AT TIME ZONE \'UTC\')))'
+            % category.id
         )
 
         category = CategoryFactory.create()
@@ -164,9 +164,9 @@ class CategoryTest(TestCase):
         self.assertEqual(
             query,
             '((category_id = %s) AND ("contributions_observation".created_at '
-            '>= to_date(\'2014-01-01 00:00\', \'YYYY-MM-DD HH24:MI\')) AND '
-            '("contributions_observation".created_at <= to_date(\'2014-01-05 '
-            '00:00\', \'YYYY-MM-DD HH24:MI\')))' % category.id
+            '>= (\'2014-01-01 00:00:00\'::timestamp AT TIME ZONE \'UTC\')) '
+            'AND ("contributions_observation".created_at <= (\'2014-01-05 '
+            '00:00:00\'::timestamp AT TIME ZONE \'UTC\')))' % category.id
         )
 
         category = CategoryFactory.create()
@@ -179,12 +179,35 @@ class CategoryTest(TestCase):
         self.assertEqual(
             query,
             "((category_id = %s) AND (\"contributions_observation\".created_at"
-            " >= to_date(\'2014-01-01 00:00', 'YYYY-MM-DD HH24:MI')) AND "
-            "(\"contributions_observation\".created_at <= to_"
-            "date('2014-01-05 00:00', 'YYYY-MM-DD HH24:MI')) AND (cast(prop"
+            " >= ('2014-01-01 00:00:00'::timestamp AT TIME ZONE 'UTC')) AND "
+            "(\"contributions_observation\".created_at <= ('2014-01-05 "
+            "00:00:00'::timestamp AT TIME ZONE 'UTC')) AND (cast(prop"
             "erties ->> 'number' as double precision) >= 20))" % category.id
         )
 
+        category = CategoryFactory.create()
+        query = category.get_query({'max_date': '2014-01-05 9:30'})
+        self.assertEqual(
+            query,
+            '((category_id = %s) AND ("contributions_observation".created_at '
+            '<= (\'2014-01-05 09:30:00\'::timestamp AT TIME ZONE \'UTC\')))'
+            % category.id
+        )
+
+        category = CategoryFactory.create()
+        query = category.get_query({'min_date': '2013-05-01 00:00:15'})
+        self.assertEqual(
+            query,
+            '((category_id = %s) AND ("contributions_observation".created_at '
+            '>= (\'2013-05-01 00:00:15\'::timestamp AT TIME ZONE \'UTC\')))'
+            % category.id
+        )
+
+    @raises(InputError)
+    def test_get_query_with_invalid_date(self):
+        category = CategoryFactory.create()
+        category.get_query({'min_date': "2014-01-05'); DROP TABLE x; --"})
+
 
 class FieldTest(TestCase):
     @raises(NotImplementedError)
@@ -4,10 +4,17 @@ from model_utils import Choices
 
 
 LOCATION_STATUS = Choices('active', 'review')
-OBSERVATION_STATUS = Choices('active', 'draft', 'review', 'pending', 'deleted')
+OBSERVATION_STATUS = Choices(
+    'active', 'draft', 'review', 'pending', 'deleted', 'expired')
+# Contributions with these statuses expire when their expiry date passes
+EXPIRING_STATUSES = (OBSERVATION_STATUS.active, OBSERVATION_STATUS.review)
 COMMENT_STATUS = Choices('active', 'deleted')
 COMMENT_REVIEW = Choices('open', 'resolved')
 MEDIA_STATUS = Choices('active', 'deleted')
+MEDIA_PROCESSING = Choices('queued', 'processing', 'ready', 'failed')
+EXPORT_STATUS = Choices('queued', 'processing', 'ready', 'failed')
+THUMBNAIL_PENDING = '/static/img/ajax-loader.gif'
+THUMBNAIL_SIZE = (300, 300)
 ACCEPTED_AUDIO_TYPES = (
     ('MPEG ADTS, layer III', 'mp3'),
     ('Audio file', 'mp3'),
@@ -0,0 +1,292 @@
+"""Protected delivery of media files."""
+
+import re
+import mimetypes
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models.fields.files import FieldFile
+
+from geokey.projects.models import Project
+
+from .models import (
+    ImageFile,
+    DocumentFile,
+    VideoFile,
+    AudioFile
+)
+
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    """Thrown when the requested range is outside of the file."""
+
+    pass
+
+
+def get_derivative_key(derivative):
+    """
+    Returns the key identifying a derivative of an image in the manifest,
+    e.g. `600.webp`.
+    """
+    return '%s.%s' % (derivative['size'], derivative['format'])
+
+
+def get_derivative_file(media_file, key):
+    """
+    Returns the stored file of a derivative of an image.
+
+    Parameter
+    ---------
+    media_file : geokey.contributions.models.MediaFile
+        The image the derivative is created for
+    key : str
+        Identifies the derivative, as returned by `get_derivative_key`
+
+    Return
+    ------
+    django.db.models.fields.files.FieldFile
+        The stored derivative; None if the image has no such derivative
+    """
+    if not isinstance(media_file, ImageFile):
+        return None
+
+    for derivative in media_file.derivatives or []:
+        if get_derivative_key(derivative) == key:
+            return FieldFile(
+                media_file,
+                media_file.image.field,
+                derivative['name']
+            )
+
+    return None
+
+
+def get_file_field(media_file, variant=None, derivative=None):
+    """
+    Returns the stored file of a media file.
+
+    Parameter
+    ---------
+    media_file : geokey.contributions.models.MediaFile
+        The media file delivered
+    variant : str
+        `thumbnail` for the thumbnail; the original file when not set
+    derivative : str
+        Identifies a derivative of an image, e.g. `600.webp`
+
+    Return
+    ------
+    django.db.models.fields.files.FieldFile
+        The stored file; None if nothing is stored, e.g. for videos on
+        YouTube
+    """
+    if derivative is not None:
+        field_file = get_derivative_file(media_file, derivative)
+    elif variant == 'thumbnail':
+        field_file = media_file.thumb
+    elif isinstance(media_file, ImageFile):
+        field_file = media_file.image
+    elif isinstance(media_file, DocumentFile):
+        field_file = media_file.document
+    elif isinstance(media_file, AudioFile):
+        field_file = media_file.audio
+    elif isinstance(media_file, VideoFile):
+        field_file = media_file.video
+    else:
+        field_file = None
+
+    return field_file or None
+
+
+def can_access(user, project_id, contribution_id):
+    """
+    Checks if the user can access a contribution, using the same rules as
+    the API for contributions. The result is cached for
+    `settings.MEDIA_ACCESS_CACHE_TIMEOUT` seconds, so requests for several
+    files of the same contribution (or ranges of the same file) only check
+    once.
+
+    Parameter
+    ---------
+    user : geokey.users.models.User
+        User requesting the file
+    project_id : int
+        Identifies the project in the database
+    contribution_id : int
+        Identifies the contribution in the database
+
+    Return
+    ------
+    Boolean
+        indicating if the user can access the contribution
+    """
+    cache_key = 'media-access:%s:%s:%s' % (
+        'anonymous' if user.is_anonymous() else user.id,
+        project_id,
+        contribution_id
+    )
+
+    access = cache.get(cache_key)
+    if access is None:
+        try:
+            project = Project.objects.get_single(user, project_id)
+            contributions = project.get_all_contributions(user)
+
+            if project.can_moderate(user):
+                contributions = contributions.for_moderator(user)
+            else:
+                contributions = contributions.for_viewer(user)
+
+            access = contributions.filter(pk=contribution_id).exists()
+        except Project.DoesNotExist:
+            access = False
+
+        cache.set(cache_key, access, settings.MEDIA_ACCESS_CACHE_TIMEOUT)
+
+    return access
+
+
+def parse_range(header, size):
+    """
+    Parses a single byte range of the `Range` header.
+
+    Parameter
+    ---------
+    header : str
+        Value of the header, e.g. `bytes=0-1023` or `bytes=-500`
+    size : int
+        Size of the file in bytes
+
+    Return
+    ------
+    tuple
+        First and last byte of the range; None if the header is not set or
+        not supported, the whole file is delivered then
+
+    Raises
+    ------
+    RangeNotSatisfiable
+        if the range is outside of the file
+    """
+    match = RANGE_HEADER.match(header.strip()) if header else None
+    if match is None:
+        return None
+
+    start, end = match.groups()
+
+    if start == '':
+        if end == '':
+            return None
+
+        # Suffix range: the last bytes of the file
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+
+    if end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+
+    return start, min(end, size - 1)
+
+
+def read_file(field_file, start, length):
+    """
+    Reads a part of the file in chunks.
+    """
+    with open(field_file.path, 'rb') as the_file:
+        the_file.seek(start)
+
+        while length > 0:
+            chunk = the_file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+
+            length -= len(chunk)
+            yield chunk
+
+
+def deliver_file(request, field_file):
+    """
+    Responds with a stored file. Depending on `settings.MEDIA_DELIVERY`, the
+    transfer is handed to the web server in front of the platform, or the
+    file is streamed by Django:
+
+    `nginx`
+        Sets `X-Accel-Redirect` to the file within
+        `settings.MEDIA_DELIVERY_PREFIX`, which must be an internal location
+        serving `MEDIA_ROOT`; files of private storage use its own prefix
+    `sendfile`
+        Sets `X-Sendfile` to the path of the file, for Apache with
+        mod_xsendfile or lighttpd
+    `django`
+        Streams the file, to be used for tests and development
+
+    The web servers handle `Range` requests themselves; Django responds to
+    a single range with the partial content.
+
+    Parameter
+    ---------
+    request : django.http.HttpRequest
+        Object representing the request
+    field_file : django.db.models.fields.files.FieldFile
+        The stored file
+
+    Return
+    ------
+    django.http.HttpResponse
+        Response delivering the file
+    """
+    content_type = mimetypes.guess_type(field_file.name)[0] or \
+        'application/octet-stream'
+
+    if settings.MEDIA_DELIVERY == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = '%s%s' % (
+            getattr(
+                field_file.storage,
+                'delivery_prefix',
+                settings.MEDIA_DELIVERY_PREFIX
+            ),
+            field_file.name
+        )
+    elif settings.MEDIA_DELIVERY == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = field_file.path
+    else:
+        size = field_file.size
+
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%s' % size
+            return response
+
+        start, end = byte_range or (0, size - 1)
+        response = StreamingHttpResponse(
+            read_file(field_file, start, end - start + 1),
+            content_type=content_type
+        )
+        response['Content-Length'] = str(end - start + 1)
+
+        if byte_range is not None:
+            response.status_code = 206
+            response['Content-Range'] = 'bytes %s-%s/%s' % (start, end, size)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, max-age=%s' % (
+        settings.MEDIA_ACCESS_CACHE_TIMEOUT
+    )
+    return response
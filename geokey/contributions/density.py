@@ -0,0 +1,190 @@
+"""Density of contributions, aggregated in grid cells."""
+
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from geokey.core.exceptions import InputError
+
+from .sync import get_cache_key
+
+
+# Columns and rows of the cells covering a point in Web Mercator, computed
+# arithmetically: squares by dividing the coordinates by the size, hexagons
+# (flat-topped, the size being the length of a side) by rounding the axial
+# coordinates of the point to the nearest centre
+GRID_CELLS = {
+    'hexagon': (
+        'SELECT category_id, '
+        '(CASE WHEN dq > dr AND dq > ds THEN -rr - rs ELSE rq END)::integer '
+        'AS i, '
+        '(CASE WHEN dq > dr AND dq > ds THEN rr WHEN dr > ds THEN -rq - rs '
+        'ELSE rr END)::integer AS j '
+        'FROM (SELECT category_id, rq, rr, rs, abs(rq - q) AS dq, '
+        'abs(rr - r) AS dr, abs(rs + q + r) AS ds '
+        'FROM (SELECT category_id, q, r, round(q) AS rq, round(r) AS rr, '
+        'round(-q - r) AS rs '
+        'FROM (SELECT filtered.category_id, ST_X(geom) * 2 / 3 / size AS q, '
+        '(ST_Y(geom) / sqrt(3) - ST_X(geom) / 3) / size AS r '
+        'FROM filtered, grid) AS axial) AS rounded) AS distances'
+    ),
+    'square': (
+        'SELECT filtered.category_id, '
+        'floor(ST_X(geom) / size)::integer AS i, '
+        'floor(ST_Y(geom) / size)::integer AS j '
+        'FROM filtered, grid'
+    )
+}
+
+# Polygons of the cells, from their columns and rows
+GRID_POLYGONS = {
+    'hexagon': (
+        'ST_Translate(ST_Scale(ST_GeomFromText(\'POLYGON ((1 0, '
+        '0.5 0.8660254037844386, -0.5 0.8660254037844386, -1 0, '
+        '-0.5 -0.8660254037844386, 0.5 -0.8660254037844386, 1 0))\', 3857), '
+        'size, size), size * 1.5 * i, size * sqrt(3) * (j + i / 2.0))'
+    ),
+    'square': (
+        'ST_MakeEnvelope(i * size, j * size, (i + 1) * size, '
+        '(j + 1) * size, 3857)'
+    )
+}
+
+# Each contribution is assigned to the cell of the grid (in Web Mercator)
+# covering a point on its geometry; cells are computed from the points, so
+# the cost does not depend on the extent of the data. Only functions of
+# PostGIS 2 are used.
+DENSITY_SQL = (
+    'WITH grid AS (SELECT %s::double precision AS size), '
+    'filtered AS ('
+    'SELECT o.id, o.category_id, '
+    'ST_Transform(ST_PointOnSurface(l.geometry::geometry), 3857) AS geom '
+    'FROM contributions_observation o '
+    'JOIN contributions_location l ON l.id = o.location_id '
+    'WHERE o.id IN ({contributions}) '
+    'AND ST_Y(ST_PointOnSurface(l.geometry::geometry)) BETWEEN -85 AND 85'
+    '), assigned AS ({cells}) '
+    'SELECT i, j, ST_AsGeoJSON(ST_Transform({polygon}, 4326), 6), '
+    'category_id, COUNT(*) FROM assigned, grid '
+    'GROUP BY i, j, size, category_id ORDER BY i, j'
+)
+
+
+def count_cells(contributions, shape, size):
+    """
+    Counts the contributions in each cell of a grid.
+
+    Parameters
+    ----------
+    contributions : django.db.models.query.QuerySet
+        Contributions filtered.
+    shape : str
+        `hexagon` or `square`.
+    size : float
+        Size of the cells in metres (in Web Mercator).
+
+    Returns
+    -------
+    list
+        Rows of column and row of the cell, its geometry as GeoJSON, the
+        category and the number of contributions.
+    """
+    sql, params = contributions.order_by().values('id').query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            DENSITY_SQL.format(
+                contributions=sql,
+                cells=GRID_CELLS[shape],
+                polygon=GRID_POLYGONS[shape]
+            ),
+            [size] + list(params)
+        )
+        return cursor.fetchall()
+
+
+def serialize_cells(rows, categories=False):
+    """
+    Returns the cells as GeoJSON features.
+
+    Returns
+    -------
+    dict
+        GeoJSON feature collection.
+    """
+    features = []
+    cells = {}
+
+    for i, j, geometry, category_id, count in rows:
+        feature = cells.get((i, j))
+
+        if feature is None:
+            feature = cells[(i, j)] = {
+                'type': 'Feature',
+                'geometry': json.loads(geometry),
+                'properties': {'count': 0}
+            }
+            features.append(feature)
+
+            if categories:
+                feature['properties']['categories'] = {}
+
+        feature['properties']['count'] += count
+
+        if categories:
+            feature['properties']['categories'][category_id] = count
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def get_density(project, contributions, shape, size, categories=False):
+    """
+    Returns the number of contributions in the cells of a hexagon or square
+    grid, with counts per category if requested. Results are cached for
+    `settings.DENSITY_CACHE_TIMEOUT` seconds per project, filters (including
+    the bounding box), cells and version of the data.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        The project.
+    contributions : django.db.models.query.QuerySet
+        Contributions accessible to the user, filtered, e.g. from
+        `Project.get_all_contributions`.
+    shape : str
+        `hexagon` or `square`.
+    size : float
+        Size of the cells in metres (in Web Mercator).
+    categories : bool
+        Indicates if counts per category are added to the cells.
+
+    Returns
+    -------
+    dict
+        GeoJSON feature collection of the cells containing contributions.
+
+    Raises
+    ------
+    InputError
+        When the shape or size is not valid.
+    """
+    if shape not in GRID_CELLS:
+        raise InputError('The parameter shape must be one of %s.' %
+                         ', '.join(sorted(GRID_CELLS)))
+
+    if size < settings.DENSITY_MIN_CELL_SIZE:
+        raise InputError('The parameter size must be at least %s metres.' %
+                         settings.DENSITY_MIN_CELL_SIZE)
+
+    key = get_cache_key(
+        'density', project, contributions, shape, size, categories)
+    density = cache.get(key)
+
+    if density is None:
+        rows = count_cells(contributions, shape, size)
+        density = serialize_cells(rows, categories=categories)
+        cache.set(key, density, settings.DENSITY_CACHE_TIMEOUT)
+
+    return density
@@ -0,0 +1,187 @@
+"""Image derivatives of different sizes and formats."""
+
+import logging
+
+from io import BytesIO
+
+from PIL import Image, features
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .models import ImageFile
+
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_FORMATS = {
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+}
+
+
+def get_formats():
+    """
+    Returns the formats set in `settings.IMAGE_DERIVATIVE_FORMATS` that are
+    supported by the installed Pillow.
+    """
+    return [
+        image_format for image_format in settings.IMAGE_DERIVATIVE_FORMATS
+        if image_format != 'webp' or features.check_module('webp')
+    ]
+
+
+def get_derivative_name(image_name, size, image_format):
+    """
+    Returns the storage name of a derivative, stored next to the original.
+
+    Parameter
+    ---------
+    image_name : str
+        Storage name of the original image
+    size : int
+        Maximum width and height of the derivative
+    image_format : str
+        Format of the derivative, one of `DERIVATIVE_FORMATS`
+
+    Return
+    ------
+    str
+        Storage name of the derivative, e.g.
+        `user-uploads/images/image.jpg.600.webp`
+    """
+    return '%s.%s.%s' % (image_name, size, DERIVATIVE_FORMATS[image_format][1])
+
+
+def create_derivatives(image_file):
+    """
+    Creates scaled-down derivatives of an image in all sizes set in
+    `settings.IMAGE_DERIVATIVE_SIZES` and all supported formats. Sizes larger
+    than the original are skipped, the original is used instead. Existing
+    derivatives are replaced.
+
+    Parameter
+    ---------
+    image_file : geokey.contributions.models.ImageFile
+        The image derivatives are created for
+
+    Return
+    ------
+    list
+        The manifest of the derivatives created; each with `size`, `width`,
+        `height`, `format` and storage `name`
+    """
+    storage = image_file.image.storage
+    manifest = []
+
+    for derivative in image_file.derivatives or []:
+        storage.delete(derivative['name'])
+
+    image_file.image.open('rb')
+    try:
+        original = Image.open(image_file.image)
+        original.load()
+    finally:
+        image_file.image.close()
+
+    formats = get_formats()
+
+    for size in sorted(settings.IMAGE_DERIVATIVE_SIZES):
+        if size >= max(original.size):
+            continue
+
+        image = original.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        for image_format in formats:
+            name = get_derivative_name(image_file.image.name, size, image_format)
+
+            converted = image
+            if image_format == 'jpeg' and image.mode != 'RGB':
+                converted = image.convert('RGB')
+            elif image_format == 'webp' and image.mode not in ['RGB', 'RGBA']:
+                converted = image.convert('RGBA')
+
+            content = BytesIO()
+            converted.save(
+                content,
+                DERIVATIVE_FORMATS[image_format][0],
+                quality=settings.IMAGE_DERIVATIVE_QUALITY
+            )
+
+            name = storage.save(name, ContentFile(content.getvalue()))
+
+            manifest.append({
+                'size': size,
+                'width': image.size[0],
+                'height': image.size[1],
+                'format': image_format,
+                'name': name
+            })
+
+    return manifest
+
+
+def share_derivatives(image_file):
+    """
+    Returns the derivatives of another image with identical content, as
+    stored by `geokey.contributions.storage.ContentAddressedStorage`, so they
+    are only created once. A reference is added to each derivative.
+
+    Parameter
+    ---------
+    image_file : geokey.contributions.models.ImageFile
+        The image derivatives are looked up for
+
+    Return
+    ------
+    list
+        The manifest of the derivatives shared; None if there is no other
+        image with derivatives
+    """
+    storage = image_file.image.storage
+    if not hasattr(storage, 'add_reference'):
+        return None
+
+    # Uses the index on the content-addressed name of images
+    other_files = ImageFile.objects.filter(
+        image=image_file.image.name
+    ).exclude(pk=image_file.pk).order_by('id')
+
+    for other_file in other_files:
+        if other_file.derivatives:
+            for derivative in other_file.derivatives:
+                storage.add_reference(derivative['name'])
+
+            return list(other_file.derivatives)
+
+    return None
+
+
+def regenerate_derivatives(image_file_id):
+    """
+    Creates the derivatives of an image again and stores the manifest.
+
+    Parameter
+    ---------
+    image_file_id : int
+        Identifies the image file in the database
+
+    Return
+    ------
+    bool
+        True if the derivatives were created; False if the image does not
+        exist or cannot be read
+    """
+    try:
+        image_file = ImageFile.objects.get(pk=image_file_id)
+        derivatives = create_derivatives(image_file)
+    except (ImageFile.DoesNotExist, IOError, OSError, ValueError):
+        # Images that cannot be opened or decoded are skipped, other errors,
+        # e.g. of the database, stop the command
+        logger.exception(
+            'Creating derivatives of image file %s failed.', image_file_id)
+        return False
+
+    ImageFile.objects.filter(pk=image_file_id).update(derivatives=derivatives)
+    return True
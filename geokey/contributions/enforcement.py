@@ -0,0 +1,136 @@
+"""Enforcement of geographic extents of projects on new contributions."""
+
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+
+from geokey.projects.models import Project
+
+from .base import OBSERVATION_STATUS
+
+
+EXTENT_ENFORCEMENT_MODES = ('reject', 'flag', 'review')
+
+# Prepared extents of projects in this process by project ID, with the time
+# the project was updated at when each was prepared. Prepared geometries
+# build their indexes lazily, so they are only used while holding the lock.
+_prepared_extents = {}
+_lock = threading.Lock()
+
+
+def get_prepared_extent(project):
+    """
+    Returns the prepared geometry of the geographic extent of a project,
+    prepared once per process. It is prepared again when the project has
+    been updated since, e.g. when the extent has been changed in another
+    process; saves in this process evict it right away.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        The project.
+
+    Returns
+    -------
+    django.contrib.gis.geos.prepared.PreparedGeometry
+        The prepared extent, None when the project has no extent.
+    """
+    extent = project.geographic_extent
+
+    if extent is None:
+        _prepared_extents.pop(project.id, None)
+        return None
+
+    cached = _prepared_extents.get(project.id)
+
+    if cached is None or cached[0] != project.updated_at:
+        cached = (project.updated_at, extent.prepared)
+        _prepared_extents[project.id] = cached
+
+    return cached[1]
+
+
+def check_extent(project, geometries):
+    """
+    Checks if geometries are within the geographic extent of a project. The
+    extent is looked up once for all geometries, so contributions ingested
+    in bulk are checked at once.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        The project.
+    geometries : list
+        GEOS geometries of locations.
+
+    Returns
+    -------
+    list
+        True for each geometry covered by the extent, or for all geometries
+        when the project has no extent.
+    """
+    with _lock:
+        prepared = get_prepared_extent(project)
+
+        if prepared is None:
+            return [True] * len(geometries)
+
+        return [prepared.covers(geometry) for geometry in geometries]
+
+
+def enforce_extent(project, location, status):
+    """
+    Enforces the geographic extent of a project on the location of a new
+    contribution, as set with `settings.EXTENT_ENFORCEMENT`: contributions
+    outside the extent are rejected with `reject`, flagged with `flag`, or
+    flagged and sent to review with `review`.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        Project the contribution is added to.
+    location : geokey.contributions.models.Location
+        Location of the contribution.
+    status : str
+        Status of the contribution.
+
+    Returns
+    -------
+    tuple
+        Status of the contribution, and whether it is outside the extent.
+
+    Raises
+    ------
+    ValidationError
+        When the contribution is outside the extent and is rejected.
+    """
+    mode = settings.EXTENT_ENFORCEMENT
+
+    if mode not in EXTENT_ENFORCEMENT_MODES or location is None:
+        return status, False
+
+    if check_extent(project, [location.geometry])[0]:
+        return status, False
+
+    if mode == 'reject':
+        raise ValidationError(
+            'The location is outside the geographic extent of the project.')
+
+    if mode == 'review' and status == OBSERVATION_STATUS.active:
+        status = OBSERVATION_STATUS.review
+
+    return status, True
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def evict_prepared_extent(sender, instance, **kwargs):
+    """
+    Removes the prepared extent of a project from the cache of this process
+    when the project is saved, e.g. with a new geographic extent.
+    """
+    with _lock:
+        _prepared_extents.pop(instance.id, None)
@@ -0,0 +1,103 @@
+"""Expiry of contributions, processed in the background."""
+
+from pytz import utc
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .base import OBSERVATION_STATUS, EXPIRING_STATUSES
+from .extents import mark_dirty
+from .models import Observation
+from .statistics import count_contribution
+
+
+def expire_batch(now, batch_size):
+    """
+    Expires a batch of contributions past their expiry date. Rows are locked
+    until the batch is committed, so contributions updated at the same time
+    are not overwritten.
+
+    Parameters
+    ----------
+    now : datetime.datetime
+        Time contributions are expired at.
+    batch_size : int
+        Number of contributions expired at most.
+
+    Returns
+    -------
+    int
+        Number of contributions expired.
+    """
+    with transaction.atomic():
+        contributions = list(Observation.objects.select_for_update().filter(
+            status__in=EXPIRING_STATUSES,
+            expiry_field__lte=now
+        ).only(
+            'id', 'project_id', 'category_id', 'creator_id', 'status',
+            'created_at'
+        ).order_by('id')[:batch_size])
+
+        if not contributions:
+            return 0
+
+        # Updated without signals, so counts and extents are updated here
+        Observation.objects.filter(
+            id__in=[contribution.id for contribution in contributions]
+        ).update(
+            status=OBSERVATION_STATUS.expired,
+            status_before_expiry=F('status'),
+            updated_at=now
+        )
+
+        for contribution in contributions:
+            count_contribution(
+                contribution,
+                contribution.status,
+                contribution.category_id,
+                -1
+            )
+            count_contribution(
+                contribution,
+                OBSERVATION_STATUS.expired,
+                contribution.category_id,
+                1
+            )
+
+        mark_dirty(
+            set(contribution.project_id for contribution in contributions),
+            set(contribution.status for contribution in contributions)
+        )
+
+    return len(contributions)
+
+
+def expire_contributions(batch_size=None):
+    """
+    Expires all active contributions and contributions in review that are
+    past their expiry date, in batches of `settings.EXPIRY_BATCH_SIZE`.
+    Expired contributions are only visible to moderators and their creators,
+    and their updates are returned by the sync, so clients remove them.
+
+    Parameters
+    ----------
+    batch_size : int
+        Number of contributions expired at once.
+
+    Returns
+    -------
+    int
+        Number of contributions expired.
+    """
+    batch_size = batch_size or settings.EXPIRY_BATCH_SIZE
+    now = datetime.utcnow().replace(tzinfo=utc)
+    expired = 0
+
+    while True:
+        batch = expire_batch(now, batch_size)
+        expired += batch
+
+        if batch < batch_size:
+            return expired
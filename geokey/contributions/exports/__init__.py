@@ -0,0 +1 @@
+"""Exports of contributions."""
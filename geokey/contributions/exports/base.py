@@ -0,0 +1,36 @@
+"""Base functions for exports of contributions."""
+
+from django.conf import settings
+
+
+def iterate_chunks(contributions, chunk_size=None):
+    """
+    Reads contributions in chunks, paginated by their IDs so each chunk is
+    an indexed query regardless of how far the export has progressed.
+
+    Parameters
+    ----------
+    contributions : django.db.models.query.QuerySet
+        Contributions exported.
+    chunk_size : int
+        Number of contributions read at once; `settings.EXPORT_CHUNK_SIZE`
+        if not set.
+
+    Yields
+    ------
+    list
+        geokey.contributions.models.Observation instances of the chunk.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    last_id = 0
+
+    while True:
+        chunk = list(
+            contributions.filter(id__gt=last_id).order_by('id')[:chunk_size]
+        )
+
+        if not chunk:
+            break
+
+        yield chunk
+        last_id = chunk[-1].id
@@ -0,0 +1,560 @@
+"""Bundles of projects for offline use, stored as GeoPackages."""
+
+import os
+import json
+import uuid
+import shutil
+import struct
+import sqlite3
+import hashlib
+import tempfile
+
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Max
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from geokey.projects.serializers import ProjectSerializer
+from geokey.categories.serializers import CategorySerializer
+from geokey.contributions.base import MEDIA_PROCESSING
+from geokey.contributions.models import MediaFile, ProjectBundle
+from geokey.contributions.serializers import ContributionSerializer
+from geokey.contributions.sync import get_changes, has_changes
+
+
+# "GPKG" as integer, identifies GeoPackages
+APPLICATION_ID = 1196444487
+USER_VERSION = 10200
+
+WGS84 = (
+    'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,'
+    '298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],'
+    'PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",'
+    '0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]'
+)
+
+SCHEMA = (
+    'CREATE TABLE gpkg_spatial_ref_sys ('
+    'srs_name TEXT NOT NULL, srs_id INTEGER NOT NULL PRIMARY KEY, '
+    'organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL, '
+    'definition TEXT NOT NULL, description TEXT)',
+    'CREATE TABLE gpkg_contents ('
+    'table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, '
+    'identifier TEXT UNIQUE, description TEXT DEFAULT \'\', '
+    'last_change DATETIME NOT NULL DEFAULT '
+    '(strftime(\'%Y-%m-%dT%H:%M:%fZ\', \'now\')), '
+    'min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, '
+    'srs_id INTEGER REFERENCES gpkg_spatial_ref_sys(srs_id))',
+    'CREATE TABLE gpkg_geometry_columns ('
+    'table_name TEXT NOT NULL, column_name TEXT NOT NULL, '
+    'geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL, '
+    'z TINYINT NOT NULL, m TINYINT NOT NULL, '
+    'PRIMARY KEY (table_name, column_name))',
+    'CREATE TABLE bundle (key TEXT PRIMARY KEY, value TEXT)',
+    'CREATE TABLE project (id INTEGER PRIMARY KEY, name TEXT, data TEXT)',
+    'CREATE TABLE categories ('
+    'id INTEGER PRIMARY KEY, name TEXT, status TEXT, data TEXT)',
+    'CREATE TABLE fields ('
+    'id INTEGER PRIMARY KEY, category_id INTEGER, key TEXT, '
+    'fieldtype TEXT, data TEXT)',
+    'CREATE TABLE lookupvalues ('
+    'id INTEGER, field_id INTEGER, name TEXT, data TEXT, '
+    'PRIMARY KEY (field_id, id))',
+    'CREATE TABLE contributions ('
+    'id INTEGER PRIMARY KEY, geom GEOMETRY, category_id INTEGER, '
+    'status TEXT, created_at TEXT, updated_at TEXT, data TEXT)',
+    'CREATE INDEX contributions_category ON contributions (category_id)',
+    'CREATE TABLE media ('
+    'id INTEGER PRIMARY KEY, contribution_id INTEGER, name TEXT, '
+    'type TEXT, thumbnail BLOB)',
+    'CREATE INDEX media_contribution ON media (contribution_id)',
+)
+
+SPATIAL_REF_SYS = (
+    ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined'),
+    ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined'),
+    ('WGS 84 geodetic', 4326, 'EPSG', 4326, WGS84),
+)
+
+CONTENTS = (
+    ('contributions', 'features', 4326),
+    ('project', 'attributes', None),
+    ('categories', 'attributes', None),
+    ('fields', 'attributes', None),
+    ('lookupvalues', 'attributes', None),
+    ('media', 'attributes', None),
+)
+
+
+def dumps(data):
+    """
+    Serialises data of a serialiser to JSON.
+    """
+    return json.dumps(data, cls=JSONEncoder)
+
+
+def encode_geometry(geometry):
+    """
+    Encodes a geometry as GeoPackage binary: a header with the spatial
+    reference, followed by the WKB.
+
+    Parameters
+    ----------
+    geometry : django.contrib.gis.geos.GEOSGeometry
+        The geometry.
+
+    Returns
+    -------
+    bytes
+        The geometry in GeoPackage binary.
+    """
+    # Magic, version 0 and flags: little endian, no envelope
+    header = b'GP' + struct.pack('<BBi', 0, 1, geometry.srid or 4326)
+    return header + bytes(geometry.wkb)
+
+
+def get_access(project, user):
+    """
+    Returns a fingerprint of the access of a user to the contributions of a
+    project. Bundles are rebuilt when it changes, e.g. when the user is added
+    to a user group, as contributions that did not change might become
+    accessible.
+
+    Returns
+    -------
+    str
+        SHA-1 hash of the role of the user and the filters of the groups.
+    """
+    clauses = []
+
+    if not user.is_anonymous():
+        clauses = sorted(
+            group.where_clause or ''
+            for group in project.usergroups.filter(users=user)
+        )
+
+    return hashlib.sha1(json.dumps([
+        project.isprivate,
+        project.is_admin(user),
+        project.can_moderate(user),
+        clauses
+    ]).encode('utf-8')).hexdigest()
+
+
+def get_version(project):
+    """
+    Returns a fingerprint of the project itself. Bundles are updated when it
+    changes, e.g. when the description or the geographic extent is edited,
+    as the project is written to the bundle.
+
+    Returns
+    -------
+    str
+        SHA-1 hash of the name, description, geographic extent and settings.
+    """
+    extent = project.geographic_extent
+
+    return hashlib.sha1(json.dumps([
+        project.name,
+        project.description,
+        project.status,
+        project.isprivate,
+        project.islocked,
+        project.everyone_contributes,
+        extent.wkt if extent else None
+    ]).encode('utf-8')).hexdigest()
+
+
+def get_thumbnails(project):
+    """
+    Returns the thumbnails of all media files of a project.
+
+    Returns
+    -------
+    django.db.models.query.QuerySet
+        geokey.contributions.models.MediaFile instances with a thumbnail.
+    """
+    return MediaFile.objects.filter(
+        contribution__project=project,
+        thumbnail_status=MEDIA_PROCESSING.ready
+    ).exclude(thumb='').exclude(thumb__isnull=True)
+
+
+def get_media_fingerprint(project):
+    """
+    Returns a fingerprint of the thumbnails of a project; media files are
+    only added or deleted, so the count and the last ID change with them.
+    """
+    aggregates = get_thumbnails(project).order_by().aggregate(
+        count=Count('id'),
+        last_id=Max('id')
+    )
+
+    return hashlib.sha1(('%s:%s' % (
+        aggregates['count'],
+        aggregates['last_id']
+    )).encode('utf-8')).hexdigest()
+
+
+def create_bundle(path):
+    """
+    Creates an empty GeoPackage with the tables of a bundle.
+    """
+    db = sqlite3.connect(path)
+
+    try:
+        db.execute('PRAGMA application_id = %s' % APPLICATION_ID)
+        db.execute('PRAGMA user_version = %s' % USER_VERSION)
+
+        for statement in SCHEMA:
+            db.execute(statement)
+
+        db.executemany(
+            'INSERT INTO gpkg_spatial_ref_sys (srs_name, srs_id, '
+            'organization, organization_coordsys_id, definition) '
+            'VALUES (?, ?, ?, ?, ?)',
+            SPATIAL_REF_SYS
+        )
+        db.executemany(
+            'INSERT INTO gpkg_contents (table_name, data_type, identifier, '
+            'srs_id) VALUES (?, ?, ?, ?)',
+            [(name, data_type, name, srs) for name, data_type, srs in CONTENTS]
+        )
+        db.execute(
+            'INSERT INTO gpkg_geometry_columns VALUES '
+            '(\'contributions\', \'geom\', \'GEOMETRY\', 4326, 0, 0)'
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def write_project(db, project, user):
+    """
+    Writes the project, serialised as when requested through the API.
+    """
+    data = ProjectSerializer(project, context={'user': user}).data
+
+    db.execute('DELETE FROM project')
+    db.execute(
+        'INSERT INTO project (id, name, data) VALUES (?, ?, ?)',
+        (project.id, project.name, dumps(data))
+    )
+
+
+def write_categories(db, categories, deleted_ids):
+    """
+    Writes changed categories with their fields and lookup values, and
+    removes deleted categories with their contributions.
+
+    Parameters
+    ----------
+    db : sqlite3.Connection
+        Connection to the bundle.
+    categories : list
+        geokey.categories.models.Category instances changed.
+    deleted_ids : list
+        IDs of the categories removed.
+    """
+    category_ids = [category.id for category in categories]
+
+    for category_id in category_ids + list(deleted_ids):
+        db.execute(
+            'DELETE FROM lookupvalues WHERE field_id IN '
+            '(SELECT id FROM fields WHERE category_id = ?)',
+            (category_id,)
+        )
+        db.execute('DELETE FROM fields WHERE category_id = ?', (category_id,))
+        db.execute('DELETE FROM categories WHERE id = ?', (category_id,))
+
+    for category_id in deleted_ids:
+        db.execute(
+            'DELETE FROM contributions WHERE category_id = ?', (category_id,))
+
+    for data in CategorySerializer(categories, many=True).data:
+        fields = data.get('fields') or []
+
+        db.execute(
+            'INSERT INTO categories (id, name, status, data) '
+            'VALUES (?, ?, ?, ?)',
+            (data['id'], data['name'], data['status'], dumps(data))
+        )
+
+        for field in fields:
+            db.execute(
+                'INSERT INTO fields (id, category_id, key, fieldtype, data) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (
+                    field['id'],
+                    data['id'],
+                    field['key'],
+                    field['fieldtype'],
+                    dumps(field)
+                )
+            )
+            db.executemany(
+                'INSERT INTO lookupvalues (id, field_id, name, data) '
+                'VALUES (?, ?, ?, ?)',
+                [
+                    (value['id'], field['id'], value['name'], dumps(value))
+                    for value in field.get('lookupvalues', [])
+                ]
+            )
+
+
+def write_contributions(db, project, user, contributions, deleted_ids):
+    """
+    Writes changed contributions, serialised as when listed through the API,
+    and removes those deleted.
+
+    Parameters
+    ----------
+    db : sqlite3.Connection
+        Connection to the bundle.
+    project : geokey.projects.models.Project
+        Project of the bundle.
+    user : geokey.users.models.User
+        User the bundle is written for.
+    contributions : list
+        geokey.contributions.models.Observation instances changed.
+    deleted_ids : list
+        IDs of the contributions removed.
+    """
+    db.executemany(
+        'DELETE FROM contributions WHERE id = ?',
+        [(deleted_id,) for deleted_id in deleted_ids]
+    )
+
+    serializer = ContributionSerializer(
+        contributions,
+        many=True,
+        context={'user': user, 'project': project}
+    )
+
+    db.executemany(
+        'INSERT OR REPLACE INTO contributions (id, geom, category_id, '
+        'status, created_at, updated_at, data) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [
+            (
+                contribution.id,
+                sqlite3.Binary(encode_geometry(contribution.location.geometry)),
+                contribution.category_id,
+                contribution.status,
+                contribution.created_at.isoformat(),
+                contribution.updated_at.isoformat()
+                if contribution.updated_at else None,
+                dumps(data)
+            )
+            for contribution, data in zip(contributions, serializer.data)
+        ]
+    )
+
+
+def write_thumbnails(db, project):
+    """
+    Adds thumbnails of new media files of the contributions in the bundle,
+    and removes those of media files deleted.
+    """
+    contribution_ids = set(
+        row[0] for row in db.execute('SELECT id FROM contributions'))
+    written_ids = set(row[0] for row in db.execute('SELECT id FROM media'))
+    media_files = [
+        media_file for media_file in get_thumbnails(project)
+        if media_file.contribution_id in contribution_ids
+    ]
+
+    db.executemany(
+        'DELETE FROM media WHERE id = ?',
+        [
+            (media_id,) for media_id in written_ids -
+            set(media_file.id for media_file in media_files)
+        ]
+    )
+
+    for media_file in media_files:
+        if media_file.id in written_ids:
+            continue
+
+        try:
+            media_file.thumb.open('rb')
+            thumbnail = media_file.thumb.read()
+            media_file.thumb.close()
+        except (IOError, OSError):
+            continue
+
+        db.execute(
+            'INSERT INTO media (id, contribution_id, name, type, thumbnail) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (
+                media_file.id,
+                media_file.contribution_id,
+                media_file.name,
+                media_file.type_name,
+                sqlite3.Binary(thumbnail)
+            )
+        )
+
+
+def write_changes(db, project, user, token=None):
+    """
+    Writes all changes since a sync token, page by page.
+
+    Returns
+    -------
+    str
+        Token of the next sync.
+    """
+    while True:
+        changes = get_changes(project, user, token=token)
+
+        write_categories(
+            db,
+            changes['categories'],
+            changes['deleted_categories']
+        )
+        write_contributions(
+            db,
+            project,
+            user,
+            changes['contributions'],
+            changes['deleted']
+        )
+        token = changes['token']
+
+        if not changes['has_more']:
+            return token
+
+
+def update_bundle(bundle, user, access, version, media=None):
+    """
+    Writes the bundle. If the access of the user is the same as when the
+    bundle was written, a copy of the file is updated with the changes since;
+    the bundle is rebuilt from scratch otherwise. The file is stored under a
+    new name once written; the previous one is only removed when the bundle
+    is written again, so downloads in progress are not affected.
+
+    Parameters
+    ----------
+    bundle : geokey.contributions.models.ProjectBundle
+        The bundle.
+    user : geokey.users.models.User
+        User the bundle is written for.
+    access : str
+        Fingerprint of the access of the user, see `get_access`.
+    version : str
+        Fingerprint of the project, see `get_version`.
+    media : str
+        Fingerprint of the thumbnails, see `get_media_fingerprint`.
+    """
+    project = bundle.project
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bundle.gpkg')
+    token = None
+
+    try:
+        if bundle.file and bundle.token and bundle.access == access:
+            bundle.file.open('rb')
+            with open(path, 'wb') as the_file:
+                shutil.copyfileobj(bundle.file, the_file)
+            bundle.file.close()
+            token = bundle.token
+        else:
+            create_bundle(path)
+
+        db = sqlite3.connect(path)
+
+        try:
+            write_project(db, project, user)
+            token = write_changes(db, project, user, token)
+
+            if bundle.thumbnails:
+                write_thumbnails(db, project)
+
+            db.execute(
+                'UPDATE gpkg_contents SET last_change = '
+                'strftime(\'%Y-%m-%dT%H:%M:%fZ\', \'now\')'
+            )
+            db.execute(
+                'INSERT OR REPLACE INTO bundle (key, value) VALUES (?, ?)',
+                ('token', token)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        previous = bundle.file.name if bundle.file else None
+
+        with open(path, 'rb') as the_file:
+            bundle.file.save(
+                '%s.gpkg' % uuid.uuid4().hex,
+                File(the_file),
+                save=False
+            )
+
+        if bundle.previous_file:
+            bundle.file.storage.delete(bundle.previous_file)
+
+        bundle.previous_file = previous
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    bundle.token = token
+    bundle.access = access
+    bundle.version = version
+    bundle.media = media
+    bundle.etag = hashlib.sha1(('%s:%s:%s:%s' % (
+        token,
+        access,
+        version,
+        media
+    )).encode('utf-8')).hexdigest()
+    bundle.save()
+
+
+def get_bundle(project, user, thumbnails=False):
+    """
+    Returns the bundle of a project for a user, updated if the project
+    changed since it was written. Requests for the same bundle wait while it
+    is updated.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        Project of the bundle.
+    user : geokey.users.models.User
+        User the bundle is written for.
+    thumbnails : bool
+        Indicates if thumbnails of media files are included.
+
+    Returns
+    -------
+    geokey.contributions.models.ProjectBundle
+        The bundle.
+    """
+    owner = None if user.is_anonymous() else user
+    bundle, created = ProjectBundle.objects.get_or_create(
+        project=project,
+        user=owner,
+        thumbnails=thumbnails
+    )
+
+    with transaction.atomic():
+        bundle = ProjectBundle.objects.select_for_update().select_related(
+            'project'
+        ).get(pk=bundle.pk)
+
+        access = get_access(project, user)
+        version = get_version(project)
+        media = get_media_fingerprint(project) if thumbnails else None
+
+        if (not bundle.file or
+                not bundle.token or
+                bundle.access != access or
+                bundle.version != version or
+                bundle.media != media or
+                has_changes(project, user, bundle.token)):
+            update_bundle(bundle, user, access, version, media)
+
+    return bundle
@@ -0,0 +1,420 @@
+"""Export jobs, generated in the background."""
+
+import os
+import uuid
+import shutil
+import logging
+import hashlib
+import tempfile
+
+from pytz import utc
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, connections
+from django.db.models import Count, Max, Min
+
+from geokey.contributions.base import EXPORT_STATUS
+from geokey.contributions.models import ExportJob
+
+from .kml import write_kml_part, merge_kml
+from .ogr import write_ogr, merge_csv, merge_ogr, zip_directory
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_stale_time():
+    """
+    Returns the time before which processing jobs are stale, as they have
+    made no progress for `settings.EXPORT_JOB_TIMEOUT` minutes, e.g. because
+    the worker running them died.
+    """
+    return datetime.utcnow().replace(tzinfo=utc) - timedelta(
+        minutes=settings.EXPORT_JOB_TIMEOUT)
+
+
+def get_fingerprint(contributions):
+    """
+    Returns a fingerprint of the contributions exported. It changes when
+    contributions are added, updated or removed, so exports are only reused
+    as long as the fingerprint is the same.
+
+    Parameters
+    ----------
+    contributions : django.db.models.query.QuerySet
+        Contributions exported.
+
+    Returns
+    -------
+    str
+        SHA-1 hash of the number of contributions, the last ID and the last
+        update.
+    """
+    aggregates = contributions.order_by().aggregate(
+        count=Count('id'),
+        last_id=Max('id'),
+        last_update=Max('updated_at')
+    )
+
+    return hashlib.sha1(('%s:%s:%s' % (
+        aggregates['count'],
+        aggregates['last_id'],
+        aggregates['last_update']
+    )).encode('utf-8')).hexdigest()
+
+
+def get_job(project, user, export_format, search=None, subset=None,
+            bbox=None):
+    """
+    Returns an export job of the contributions, reusing a job with the same
+    parameters if the contributions have not changed since. A new job is
+    queued otherwise, also when the job has failed or is stale.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        Project the contributions are exported from.
+    user : geokey.users.models.User
+        User the contributions are exported for.
+    export_format : str
+        Format of the export.
+    search : str
+        Search term the contributions are filtered by.
+    subset : int
+        Subset the contributions are filtered by.
+    bbox : str
+        Bounding box the contributions are filtered by.
+
+    Returns
+    -------
+    geokey.contributions.models.ExportJob
+        The job; can be queued, processing or ready.
+    """
+    creator = None if user.is_anonymous() else user
+    contributions = project.get_all_contributions(
+        user,
+        search=search,
+        subset=subset,
+        bbox=bbox
+    )
+    fingerprint = get_fingerprint(contributions)
+
+    job = ExportJob.objects.filter(
+        project=project,
+        creator=creator,
+        export_format=export_format,
+        search=search,
+        subset=subset,
+        bbox=bbox,
+        fingerprint=fingerprint
+    ).exclude(
+        status=EXPORT_STATUS.failed
+    ).exclude(
+        status=EXPORT_STATUS.processing,
+        updated_at__lt=get_stale_time()
+    ).order_by('-created_at').first()
+
+    if job is None:
+        job = ExportJob.objects.create(
+            project=project,
+            creator=creator,
+            export_format=export_format,
+            search=search,
+            subset=subset,
+            bbox=bbox,
+            fingerprint=fingerprint
+        )
+
+    return job
+
+
+def get_chunks(contributions, chunk_size=None):
+    """
+    Splits the contributions into chunks of the same number of rows, by
+    their IDs. The last ID of each chunk is looked up with the ID index, so
+    gaps in the IDs, e.g. of contributions of other projects, do not add
+    empty chunks.
+
+    Parameters
+    ----------
+    contributions : django.db.models.query.QuerySet
+        Contributions exported.
+    chunk_size : int
+        Number of contributions in each chunk;
+        `settings.EXPORT_JOB_CHUNK_SIZE` if not set.
+
+    Returns
+    -------
+    list
+        Tuples of the first and the last ID of each chunk; one empty chunk if
+        there are no contributions, so the export is still written.
+    """
+    chunk_size = chunk_size or settings.EXPORT_JOB_CHUNK_SIZE
+    ids = contributions.order_by().aggregate(
+        first_id=Min('id'),
+        last_id=Max('id')
+    )
+
+    if ids['first_id'] is None:
+        return [(0, 0)]
+
+    chunks = []
+    first_id = ids['first_id']
+
+    while True:
+        last_id = contributions.filter(id__gte=first_id).order_by(
+            'id').values_list('id', flat=True)[chunk_size - 1:chunk_size]
+        last_id = last_id[0] if last_id else ids['last_id']
+
+        chunks.append((first_id, last_id))
+
+        if last_id >= ids['last_id']:
+            return chunks
+
+        first_id = last_id + 1
+
+
+def write_chunk(job_id, category_ids, first_id, last_id, path):
+    """
+    Writes a chunk of the contributions of a job to a file.
+
+    Parameters
+    ----------
+    job_id : str
+        Identifies the job in the database.
+    category_ids : list
+        Categories of all contributions exported, so all parts share the
+        columns.
+    first_id : int
+        First ID of the chunk.
+    last_id : int
+        Last ID of the chunk.
+    path : str
+        File the chunk is written to.
+
+    Returns
+    -------
+    str
+        The path.
+    """
+    job = ExportJob.objects.select_related('project', 'creator').get(
+        pk=job_id)
+    contributions = job.get_contributions().filter(
+        id__gte=first_id,
+        id__lte=last_id
+    )
+
+    if job.export_format == 'kml':
+        write_kml_part(contributions, job.user, path)
+    else:
+        write_ogr(
+            contributions,
+            job.export_format,
+            path,
+            category_ids=category_ids
+        )
+
+    return path
+
+
+def write_chunk_in_process(args):
+    """
+    Writes a chunk within a worker process, and closes the database
+    connection of the process when done.
+    """
+    try:
+        return write_chunk(*args)
+    finally:
+        connection.close()
+
+
+def merge_chunks(job, paths, path):
+    """
+    Merges the files of all chunks into the file of the export.
+
+    Returns
+    -------
+    str
+        Path of the file, e.g. zipped for Shapefiles.
+    """
+    if job.export_format == 'kml':
+        merge_kml(paths, path)
+    elif job.export_format == 'csv':
+        merge_csv(paths, path)
+    else:
+        merge_ogr(paths, job.export_format, path)
+
+    if job.export_format == 'shp':
+        path = zip_directory(path)
+
+    return path
+
+
+def run_job(job_id, workers=None, chunk_size=None):
+    """
+    Generates the file of a queued export job. The contributions are split
+    into chunks, which are written in parallel by a
+    pool of processes and merged in order then. The progress is stored
+    after each chunk, so it can be polled.
+
+    The job is claimed first, so it is run only once when several workers
+    are running.
+
+    Parameters
+    ----------
+    job_id : str
+        Identifies the job in the database.
+    workers : int
+        Number of worker processes, defaults to
+        `settings.EXPORT_JOB_WORKERS`; chunks are written in the current
+        process when set to 1.
+    chunk_size : int
+        Number of contributions in each chunk.
+
+    Returns
+    -------
+    geokey.contributions.models.ExportJob
+        The job; None if the job is not queued.
+    """
+    claimed = ExportJob.objects.filter(
+        pk=job_id,
+        status=EXPORT_STATUS.queued
+    ).update(
+        status=EXPORT_STATUS.processing,
+        updated_at=datetime.utcnow().replace(tzinfo=utc)
+    )
+
+    if not claimed:
+        return None
+
+    job = ExportJob.objects.select_related('project', 'creator').get(
+        pk=job_id)
+    workers = workers or settings.EXPORT_JOB_WORKERS
+    directory = tempfile.mkdtemp()
+
+    try:
+        contributions = job.get_contributions()
+        job.fingerprint = get_fingerprint(contributions)
+
+        category_ids = list(contributions.order_by().values_list(
+            'category_id', flat=True
+        ).distinct())
+        chunks = get_chunks(contributions, chunk_size)
+
+        # Shapefiles are written as directories
+        extension = '' if job.export_format == 'shp' else \
+            '.%s' % job.export_format
+
+        tasks = [
+            (
+                str(job.id),
+                category_ids,
+                first_id,
+                last_id,
+                os.path.join(directory, 'part-%s%s' % (index, extension))
+            )
+            for index, (first_id, last_id) in enumerate(chunks)
+        ]
+
+        ExportJob.objects.filter(pk=job.id).update(chunks_total=len(tasks))
+        job.chunks_total = len(tasks)
+
+        if workers <= 1 or len(tasks) == 1:
+            results = (write_chunk(*task) for task in tasks)
+            pool = None
+        else:
+            for conn in connections.all():
+                conn.close()
+
+            pool = Pool(workers)
+            results = pool.imap_unordered(write_chunk_in_process, tasks)
+
+        try:
+            for done, result in enumerate(results, start=1):
+                ExportJob.objects.filter(pk=job.id).update(
+                    chunks_done=done,
+                    updated_at=datetime.utcnow().replace(tzinfo=utc)
+                )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        job.chunks_done = len(tasks)
+        path = merge_chunks(
+            job,
+            [task[4] for task in tasks],
+            os.path.join(directory, 'export%s' % extension)
+        )
+
+        with open(path, 'rb') as the_file:
+            job.file.save(
+                '%s%s' % (uuid.uuid4().hex, os.path.splitext(path)[1]),
+                File(the_file),
+                save=False
+            )
+
+        job.status = EXPORT_STATUS.ready
+    except Exception:
+        logger.exception('Export job %s failed.', job_id)
+        job.status = EXPORT_STATUS.failed
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    job.save()
+
+    return job
+
+
+def fail_stale_jobs():
+    """
+    Marks processing jobs as failed when they are stale, so they are not
+    reused and the next export with the same parameters queues a new job.
+
+    Returns
+    -------
+    int
+        Number of jobs marked as failed.
+    """
+    return ExportJob.objects.filter(
+        status=EXPORT_STATUS.processing,
+        updated_at__lt=get_stale_time()
+    ).update(status=EXPORT_STATUS.failed)
+
+
+def process_queued_exports(workers=None):
+    """
+    Runs all queued export jobs, one after another; each job writes its
+    chunks in parallel. Stale jobs are marked as failed first.
+
+    Returns
+    -------
+    int
+        Number of jobs run.
+    """
+    fail_stale_jobs()
+
+    job_ids = list(ExportJob.objects.filter(
+        status=EXPORT_STATUS.queued
+    ).order_by('created_at').values_list('id', flat=True))
+
+    return len([
+        job_id for job_id in job_ids
+        if run_job(job_id, workers=workers)
+    ])
+
+
+def remove_expired_exports():
+    """
+    Removes export jobs created more than `settings.EXPORT_JOB_EXPIRY` hours
+    ago.
+
+    Returns
+    -------
+    int
+        Number of jobs removed.
+    """
+    return ExportJob.objects.remove_expired()
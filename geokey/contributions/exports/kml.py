@@ -0,0 +1,226 @@
+"""Streaming KML export of contributions."""
+
+import six
+import shutil
+
+from django.db.models import Prefetch
+from django.utils.html import escape
+
+from geokey.contributions.models import Comment, MediaFile
+from geokey.contributions.serializers import (
+    ContributionSerializer,
+    FileSerializer
+)
+from geokey.contributions.templatetags.kml_tags import (
+    kml_name,
+    kml_desc,
+    kml_geom,
+    kml_style
+)
+
+from .base import iterate_chunks
+from .schema import ExportSchema
+
+
+KML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<kml xmlns="http://earth.google.com/kml/2.1">\n'
+    '<Document>\n'
+)
+KML_FOOTER = '</Document>\n</kml>\n'
+
+PLACEMARK = (
+    '    <Placemark>\n'
+    '        <name>{name}</name>\n'
+    '        <description>{description}</description>\n'
+    '        {geometry}\n'
+    '        <IconStyle><color>{colour}</color></IconStyle>\n'
+    '    </Placemark>\n'
+)
+
+
+def get_comments(contribution_ids):
+    """
+    Returns the comments of contributions as trees, loaded with one query.
+
+    Returns
+    -------
+    dict
+        Top-level comments of each contribution, with their responses nested.
+    """
+    comments = Comment.objects.filter(
+        commentto_id__in=contribution_ids
+    ).select_related('creator').order_by('id')
+
+    nodes = {}
+    trees = {}
+
+    for comment in comments:
+        nodes[comment.id] = {
+            'text': comment.text,
+            'creator': {'display_name': comment.creator.display_name},
+            'responses': []
+        }
+
+    for comment in comments:
+        node = nodes[comment.id]
+
+        if comment.respondsto_id is None:
+            trees.setdefault(comment.commentto_id, []).append(node)
+        elif comment.respondsto_id in nodes:
+            nodes[comment.respondsto_id]['responses'].append(node)
+
+    return trees
+
+
+def get_place(contribution, comments, serializer, user):
+    """
+    Returns the native representation of a contribution, limited to what the
+    KML template filters use. The geometry is the KML rendered by PostGIS.
+    """
+    return {
+        'properties': contribution.properties,
+        'display_field': serializer.get_display_field(contribution),
+        'meta': {
+            'category': {
+                'id': contribution.category_id,
+                'colour': contribution.category.colour
+            }
+        },
+        'location': {
+            'kml': contribution.location_kml
+        },
+        'media': FileSerializer(
+            contribution.files_attached.all(),
+            many=True,
+            context={'user': user}
+        ).data,
+        'comments': comments.get(contribution.id, [])
+    }
+
+
+def render_placemark(place, schema):
+    """
+    Renders a placemark, same as the `geometries/placemarks.kml` template.
+    """
+    return PLACEMARK.format(
+        name=escape(kml_name(place) or ''),
+        description=kml_desc(place, schema),
+        geometry=kml_geom(place),
+        colour=kml_style(place)
+    )
+
+
+def stream_placemarks(contributions, user, chunk_size=None):
+    """
+    Writes contributions as KML placemarks, reading them in chunks.
+
+    Parameters
+    ----------
+    contributions : django.db.models.query.QuerySet
+        Contributions exported, e.g. from `Project.get_all_contributions`.
+    user : geokey.users.models.User
+        User the contributions are exported for.
+    chunk_size : int
+        Number of contributions read at once.
+
+    Yields
+    ------
+    str
+        Placemarks of a chunk.
+    """
+    contributions = contributions.select_related(
+        'location',
+        'category'
+    ).prefetch_related(
+        Prefetch(
+            'files_attached',
+            queryset=MediaFile.objects.select_related('creator')
+        )
+    ).extra(select={
+        'location_kml': 'ST_AsKML("contributions_location"."geometry")'
+    })
+
+    schema = ExportSchema()
+    serializer = ContributionSerializer(context={'user': user})
+
+    for chunk in iterate_chunks(contributions, chunk_size):
+        schema.load(set(c.category_id for c in chunk))
+        comments = get_comments([c.id for c in chunk])
+
+        yield ''.join(
+            render_placemark(
+                get_place(contribution, comments, serializer, user),
+                schema
+            )
+            for contribution in chunk
+        )
+
+
+def stream_kml(contributions, user, chunk_size=None):
+    """
+    Writes contributions as KML document, one placemark after another, so
+    the export can be sent as streamed response without holding the whole
+    document in memory.
+
+    Parameters
+    ----------
+    contributions : django.db.models.query.QuerySet
+        Contributions exported, e.g. from `Project.get_all_contributions`.
+    user : geokey.users.models.User
+        User the contributions are exported for.
+    chunk_size : int
+        Number of contributions read at once.
+
+    Yields
+    ------
+    str
+        Parts of the KML document.
+    """
+    yield KML_HEADER
+
+    for placemarks in stream_placemarks(contributions, user, chunk_size):
+        yield placemarks
+
+    yield KML_FOOTER
+
+
+def write_kml_part(contributions, user, path):
+    """
+    Writes the placemarks of contributions to a file, to be merged with
+    other parts by `merge_kml`.
+    """
+    with open(path, 'wb') as the_file:
+        for placemarks in stream_placemarks(contributions, user):
+            the_file.write(encode(placemarks))
+
+
+def merge_kml(paths, path):
+    """
+    Writes a KML document with the placemarks of all parts.
+
+    Parameters
+    ----------
+    paths : list
+        Files of the parts, in order.
+    path : str
+        File the document is written to.
+    """
+    with open(path, 'wb') as the_file:
+        the_file.write(encode(KML_HEADER))
+
+        for part in paths:
+            with open(part, 'rb') as part_file:
+                shutil.copyfileobj(part_file, the_file)
+
+        the_file.write(encode(KML_FOOTER))
+
+
+def encode(text):
+    """
+    Returns text as UTF-8 bytes.
+    """
+    if isinstance(text, six.text_type):
+        return text.encode('utf-8')
+
+    return text
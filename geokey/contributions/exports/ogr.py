@@ -0,0 +1,510 @@
+"""Exports of contributions to desktop GIS formats, written with OGR."""
+
+import os
+import shutil
+import zipfile
+import tempfile
+
+from osgeo import ogr, osr
+
+from .base import iterate_chunks
+from .schema import ExportSchema
+
+
+CHUNK_SIZE = 64 * 1024
+
+OGR_FORMATS = {
+    'csv': {
+        'driver': 'CSV',
+        'content_type': 'text/csv',
+        'extension': 'csv',
+        'options': ['GEOMETRY=AS_WKT'],
+    },
+    'shp': {
+        'driver': 'ESRI Shapefile',
+        'content_type': 'application/zip',
+        'extension': 'zip',
+        'options': ['ENCODING=UTF-8'],
+        # Shapefiles can only store dates; other types are written as text
+        'unsupported_types': [ogr.OFTDateTime, ogr.OFTTime],
+    },
+    'gpkg': {
+        'driver': 'GPKG',
+        'content_type': 'application/geopackage+sqlite3',
+        'extension': 'gpkg',
+        'options': [],
+    },
+}
+
+FIELD_TYPES = {
+    'TextField': ogr.OFTString,
+    'NumericField': ogr.OFTReal,
+    'DateTimeField': ogr.OFTDateTime,
+    'DateField': ogr.OFTDate,
+    'TimeField': ogr.OFTTime,
+    'LookupField': ogr.OFTString,
+    'MultipleLookupField': ogr.OFTString,
+}
+
+BASE_COLUMNS = (
+    ('id', ogr.OFTInteger),
+    ('category', ogr.OFTString),
+    ('status', ogr.OFTString),
+    ('creator', ogr.OFTString),
+    ('created', ogr.OFTDateTime),
+    ('updated', ogr.OFTDateTime),
+)
+
+# Shapefiles store one type of geometry per file, single and multi-part
+# geometries can not be mixed
+GEOMETRY_LAYERS = {
+    ogr.wkbPoint: 'points',
+    ogr.wkbMultiPoint: 'multipoints',
+    ogr.wkbLineString: 'lines',
+    ogr.wkbMultiLineString: 'multilines',
+    ogr.wkbPolygon: 'polygons',
+    ogr.wkbMultiPolygon: 'multipolygons',
+}
+
+
+class OGRExportError(Exception):
+    """Thrown when OGR fails to write contributions."""
+
+    pass
+
+
+def get_formats():
+    """
+    Returns the formats supported by the installed GDAL, e.g. GeoPackage
+    requires GDAL 1.11.
+
+    Returns
+    -------
+    list
+        Keys of `OGR_FORMATS`.
+    """
+    return [
+        export_format for export_format, options in OGR_FORMATS.items()
+        if ogr.GetDriverByName(options['driver']) is not None
+    ]
+
+
+def get_columns(schema, export_format):
+    """
+    Flattens the fields of all categories into typed columns. Fields sharing
+    a key but not the type across categories are written as text.
+
+    Parameters
+    ----------
+    schema : geokey.contributions.exports.schema.ExportSchema
+        Fields of the categories exported.
+    export_format : str
+        Key of `OGR_FORMATS`.
+
+    Returns
+    -------
+    list
+        Tuples of property key, column name and OGR field type.
+    """
+    unsupported = OGR_FORMATS[export_format].get('unsupported_types', [])
+    types = {}
+
+    for category_id in sorted(schema.fields.keys()):
+        for key, field in schema.fields[category_id].items():
+            field_type = FIELD_TYPES.get(field.fieldtype, ogr.OFTString)
+
+            if field_type in unsupported:
+                field_type = ogr.OFTString
+
+            if key in types and types[key] != field_type:
+                field_type = ogr.OFTString
+
+            types[key] = field_type
+
+    reserved = set(name for name, field_type in BASE_COLUMNS)
+    columns = []
+
+    for key in sorted(types.keys()):
+        name = key if key not in reserved else 'p_%s' % key
+        columns.append((key, name, types[key]))
+
+    return columns
+
+
+def create_layer(data_source, name, geometry_type, columns, export_format):
+    """
+    Creates a layer with the base columns and columns of all fields.
+    """
+    unsupported = OGR_FORMATS[export_format].get('unsupported_types', [])
+    reference = osr.SpatialReference()
+    reference.ImportFromEPSG(4326)
+
+    layer = data_source.CreateLayer(
+        str(name),
+        reference,
+        geometry_type,
+        OGR_FORMATS[export_format]['options']
+    )
+
+    if layer is None:
+        raise OGRExportError('The layer %s can not be created.' % name)
+
+    for name, field_type in BASE_COLUMNS:
+        if field_type in unsupported:
+            field_type = ogr.OFTString
+
+        layer.CreateField(ogr.FieldDefn(name, field_type))
+
+    for key, name, field_type in columns:
+        layer.CreateField(ogr.FieldDefn(str(name), field_type))
+
+    return layer
+
+
+def set_value(feature, index, value):
+    """
+    Sets the value of a column; values that cannot be converted to the type
+    of the column are left empty. Columns are set by their position, as
+    drivers may change the names, e.g. truncate them for Shapefiles.
+    """
+    if value is None or value == '':
+        return
+
+    field_type = feature.GetFieldDefnRef(index).GetType()
+
+    try:
+        if field_type == ogr.OFTReal:
+            feature.SetField(index, float(value))
+        elif field_type == ogr.OFTInteger:
+            feature.SetField(index, int(value))
+        else:
+            if isinstance(value, list):
+                value = '; '.join(value)
+
+            feature.SetField(index, u'%s' % value)
+    except (TypeError, ValueError):
+        pass
+
+
+def get_parts(geometry):
+    """
+    Splits a geometry collection into its geometries, which are split too if
+    they are collections themselves. Other geometries are not split.
+    """
+    if ogr.GT_Flatten(geometry.GetGeometryType()) != \
+            ogr.wkbGeometryCollection:
+        return [geometry]
+
+    parts = []
+    for index in range(geometry.GetGeometryCount()):
+        parts.extend(get_parts(geometry.GetGeometryRef(index).Clone()))
+
+    return parts
+
+
+def create_feature(layer, feature):
+    """
+    Writes a feature to a layer, raising an error if OGR does not write it,
+    e.g. when the geometry does not match the type of the layer.
+    """
+    if layer.CreateFeature(feature) != ogr.OGRERR_NONE:
+        raise OGRExportError(
+            'The feature %s can not be written to the layer %s.' % (
+                feature.GetField(0), layer.GetName()))
+
+
+def write_feature(layer, geometry, contribution, schema, columns, offset):
+    """
+    Writes a contribution as feature with the geometry.
+    """
+    feature = ogr.Feature(layer.GetLayerDefn())
+    feature.SetGeometry(geometry)
+
+    try:
+        values = (
+            contribution.id,
+            contribution.category.name,
+            contribution.status,
+            contribution.creator.display_name,
+            contribution.created_at.isoformat(),
+            contribution.updated_at.isoformat()
+            if contribution.updated_at else None
+        )
+        for index, value in enumerate(values):
+            set_value(feature, index, value)
+
+        properties = contribution.properties or {}
+        for index, (key, name, field_type) in enumerate(columns):
+            if key in properties:
+                set_value(feature, offset + index, schema.get_value(
+                    contribution.category_id,
+                    key,
+                    properties[key]
+                ))
+
+        create_feature(layer, feature)
+    finally:
+        feature.Destroy()
+
+
+def write_features(layers, contributions, schema, columns, explode=False):
+    """
+    Writes contributions as features.
+
+    Parameters
+    ----------
+    layers : callable
+        Returns the layer for an OGR geometry.
+    contributions : list
+        geokey.contributions.models.Observation instances, annotated with
+        `location_wkb`.
+    schema : geokey.contributions.exports.schema.ExportSchema
+        Fields of the categories exported.
+    columns : list
+        Columns as returned by `get_columns`.
+    explode : bool
+        Indicates if geometry collections are written as one feature for
+        each of their geometries, e.g. for Shapefiles.
+
+    Raises
+    ------
+    OGRExportError
+        When a feature can not be written.
+    """
+    offset = len(BASE_COLUMNS)
+
+    for contribution in contributions:
+        geometry = ogr.CreateGeometryFromWkb(bytes(contribution.location_wkb))
+        parts = get_parts(geometry) if explode else [geometry]
+
+        for part in parts:
+            write_feature(
+                layers(part), part, contribution, schema, columns, offset)
+
+
+def write_ogr(contributions, export_format, path, chunk_size=None,
+              category_ids=None):
+    """
+    Writes contributions to a file, reading them in chunks.
+
+    Parameters
+    ----------
+    contributions : django.db.models.query.QuerySet
+        Contributions exported, e.g. from `Project.get_all_contributions`.
+    export_format : str
+        Key of `OGR_FORMATS`.
+    path : str
+        File the contributions are written to; a directory of files for
+        Shapefiles.
+    chunk_size : int
+        Number of contributions read at once.
+    category_ids : list
+        Categories the columns are created for; those of the contributions
+        if not set. Parts of an export must share the columns.
+    """
+    if category_ids is None:
+        category_ids = list(contributions.order_by().values_list(
+            'category_id', flat=True
+        ).distinct())
+
+    schema = ExportSchema(category_ids)
+    columns = get_columns(schema, export_format)
+
+    contributions = contributions.select_related(
+        'location',
+        'category',
+        'creator'
+    ).extra(select={
+        'location_wkb': 'ST_AsBinary("contributions_location"."geometry")'
+    })
+
+    driver = ogr.GetDriverByName(OGR_FORMATS[export_format]['driver'])
+    data_source = driver.CreateDataSource(str(path))
+    created = {}
+
+    def layers(geometry):
+        if export_format == 'shp':
+            geometry_type = ogr.GT_Flatten(geometry.GetGeometryType())
+            name = GEOMETRY_LAYERS.get(geometry_type)
+
+            if name is None:
+                raise OGRExportError(
+                    'Geometries of type %s can not be written.' %
+                    geometry.GetGeometryName())
+        else:
+            name, geometry_type = ('contributions', ogr.wkbUnknown)
+
+        if name not in created:
+            created[name] = create_layer(
+                data_source, name, geometry_type, columns, export_format)
+
+        return created[name]
+
+    if export_format != 'shp':
+        # The layer is written even if there are no contributions
+        layers(None)
+
+    for chunk in iterate_chunks(contributions, chunk_size):
+        for layer in created.values():
+            layer.StartTransaction()
+
+        write_features(
+            layers, chunk, schema, columns, explode=export_format == 'shp')
+
+        for layer in created.values():
+            layer.CommitTransaction()
+
+    data_source.Destroy()
+
+
+def merge_csv(paths, path):
+    """
+    Concatenates CSV files with the same columns, keeping the header of the
+    first file only.
+
+    Parameters
+    ----------
+    paths : list
+        Files of the parts, in order.
+    path : str
+        File the parts are written to.
+    """
+    with open(path, 'wb') as the_file:
+        for index, part in enumerate(paths):
+            with open(part, 'rb') as part_file:
+                header = part_file.readline()
+
+                if index == 0:
+                    the_file.write(header)
+
+                shutil.copyfileobj(part_file, the_file)
+
+
+def merge_ogr(paths, export_format, path):
+    """
+    Copies the layers of several data sources into one, appending features
+    of layers with the same name.
+
+    Parameters
+    ----------
+    paths : list
+        Data sources of the parts, in order.
+    export_format : str
+        Key of `OGR_FORMATS`.
+    path : str
+        Data source the parts are written to.
+    """
+    driver = ogr.GetDriverByName(OGR_FORMATS[export_format]['driver'])
+    data_source = driver.CreateDataSource(str(path))
+    layers = {}
+
+    for part in paths:
+        part_source = ogr.Open(str(part))
+        if part_source is None:
+            continue
+
+        for index in range(part_source.GetLayerCount()):
+            part_layer = part_source.GetLayer(index)
+            name = part_layer.GetName()
+
+            if name not in layers:
+                layers[name] = data_source.CopyLayer(
+                    part_layer,
+                    name,
+                    OGR_FORMATS[export_format]['options']
+                )
+
+                if layers[name] is None:
+                    raise OGRExportError(
+                        'The layer %s can not be copied.' % name)
+                continue
+
+            layer = layers[name]
+            definition = layer.GetLayerDefn()
+            layer.StartTransaction()
+
+            for part_feature in part_layer:
+                feature = ogr.Feature(definition)
+                feature.SetFrom(part_feature)
+
+                try:
+                    create_feature(layer, feature)
+                finally:
+                    feature.Destroy()
+
+            layer.CommitTransaction()
+
+        part_source.Destroy()
+
+    data_source.Destroy()
+
+
+def read_file(path):
+    """
+    Reads a file in chunks.
+    """
+    with open(path, 'rb') as the_file:
+        while True:
+            chunk = the_file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+
+            yield chunk
+
+
+def stream_ogr(export_format):
+    """
+    Returns a function streaming contributions in a format. The contributions
+    are written to a temporary file, which is streamed and removed then.
+
+    Parameters
+    ----------
+    export_format : str
+        Key of `OGR_FORMATS`.
+
+    Returns
+    -------
+    callable
+        Takes the contributions and the user they are exported for, and
+        yields parts of the file.
+    """
+    def stream(contributions, user, chunk_size=None):
+        directory = tempfile.mkdtemp()
+
+        try:
+            if export_format == 'shp':
+                # Written as directory of Shapefiles, one for each geometry
+                path = os.path.join(directory, 'contributions')
+                write_ogr(contributions, export_format, path, chunk_size)
+                path = zip_directory(path)
+            else:
+                path = os.path.join(
+                    directory, 'contributions.%s' % export_format)
+                write_ogr(contributions, export_format, path, chunk_size)
+
+            for chunk in read_file(path):
+                yield chunk
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    return stream
+
+
+def zip_directory(path):
+    """
+    Compresses all files of a directory, e.g. the files of Shapefiles.
+
+    Returns
+    -------
+    str
+        Path of the zip file.
+    """
+    zip_path = '%s.zip' % path
+
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        names = os.listdir(path) if os.path.isdir(path) else []
+
+        for name in sorted(names):
+            zip_file.write(os.path.join(path, name), name)
+
+    return zip_path
@@ -0,0 +1,125 @@
+"""Field schema shared by all contributions of an export."""
+
+from collections import OrderedDict
+
+from geokey.categories.models import (
+    Field,
+    LookupField,
+    MultipleLookupField,
+    LookupValue,
+    MultipleLookupValue
+)
+
+
+class ExportSchema(object):
+    """
+    Resolves field names and lookup labels of contributions. Fields and lookup
+    values of each category are loaded once, with one query for each model,
+    instead of querying the fields for every property of every contribution.
+    """
+
+    def __init__(self, category_ids=None):
+        self.fields = {}
+        self.lookupvalues = {}
+
+        if category_ids:
+            self.load(category_ids)
+
+    def load(self, category_ids):
+        """
+        Loads fields and lookup values of categories not loaded yet.
+
+        Parameters
+        ----------
+        category_ids : iterable
+            Identifies the categories in the database.
+        """
+        category_ids = set(category_ids) - set(self.fields.keys())
+        if not category_ids:
+            return
+
+        for category_id in category_ids:
+            self.fields[category_id] = OrderedDict()
+
+        for field in Field.objects.filter(category_id__in=category_ids):
+            self.fields[field.category_id][field.key] = field
+
+            if isinstance(field, (LookupField, MultipleLookupField)):
+                self.lookupvalues[field.id] = OrderedDict()
+
+        for model in (LookupValue, MultipleLookupValue):
+            values = model.objects.filter(
+                field__category_id__in=category_ids
+            ).values_list('field_id', 'id', 'name')
+
+            for field_id, value_id, name in values:
+                if field_id in self.lookupvalues:
+                    self.lookupvalues[field_id][value_id] = name
+
+    def get_field(self, category_id, key):
+        """
+        Returns the field of a category.
+
+        Parameters
+        ----------
+        category_id : int
+            Identifies the category in the database.
+        key : str
+            Key of the field.
+
+        Returns
+        -------
+        geokey.categories.models.Field
+            The field; None if the category has no field with the key.
+        """
+        self.load([category_id])
+        return self.fields[category_id].get(key)
+
+    def get_name(self, category_id, key):
+        """
+        Returns the name of a field; the key if the category has no field
+        with the key.
+        """
+        field = self.get_field(category_id, key)
+        return field.name if field is not None else key
+
+    def get_value(self, category_id, key, value):
+        """
+        Returns the value of a property to be displayed, i.e. the labels of
+        lookup values instead of their IDs.
+
+        Parameters
+        ----------
+        category_id : int
+            Identifies the category in the database.
+        key : str
+            Key of the field.
+        value
+            Value of the property.
+
+        Returns
+        -------
+        The value; a list of labels for multiple lookup fields.
+        """
+        field = self.get_field(category_id, key)
+
+        if value is None or field is None:
+            return value
+
+        if isinstance(field, LookupField):
+            try:
+                return self.lookupvalues[field.id].get(int(value), value)
+            except (TypeError, ValueError):
+                return value
+        elif isinstance(field, MultipleLookupField):
+            try:
+                selected = set(int(v) for v in value)
+            except (TypeError, ValueError):
+                return value
+
+            return [
+                name for value_id, name in self.lookupvalues[field.id].items()
+                if value_id in selected
+            ]
+
+        return value
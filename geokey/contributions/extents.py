@@ -0,0 +1,205 @@
+"""Extents of the contributions of projects."""
+
+import json
+
+from django.db import connection
+from django.contrib.gis.geos import GEOSGeometry
+
+from geokey.projects.models import Project, ProjectExtent
+
+from .base import OBSERVATION_STATUS
+from .statistics import has_data_filters
+
+
+# Drafts are only visible to their creators, deleted contributions to no one
+EXTENT_STATUSES = (
+    OBSERVATION_STATUS.active,
+    OBSERVATION_STATUS.review,
+    OBSERVATION_STATUS.pending
+)
+
+EXPAND_SQL = (
+    'UPDATE projects_projectextent AS extent SET '
+    'hull = ST_ConvexHull(CASE WHEN extent.hull IS NULL THEN location.geom '
+    'ELSE ST_Collect(extent.hull, location.geom) END), '
+    'updated_at = now() '
+    'FROM (SELECT geometry::geometry AS geom FROM contributions_location '
+    'WHERE id = %s) AS location '
+    'WHERE extent.project_id = %s AND extent.status = %s'
+)
+
+RECOMPUTE_SQL = (
+    'UPDATE projects_projectextent SET '
+    'hull = (SELECT ST_ConvexHull(ST_Collect(l.geometry::geometry)) '
+    'FROM contributions_observation o '
+    'JOIN contributions_location l ON l.id = o.location_id '
+    'WHERE o.project_id = %s AND o.status = %s), '
+    'dirty = false, updated_at = now() '
+    'WHERE project_id = %s AND status = %s'
+)
+
+LIVE_SQL = (
+    'SELECT o.status, '
+    'ST_AsEWKT(ST_ConvexHull(ST_Collect(l.geometry::geometry))) '
+    'FROM contributions_observation o '
+    'JOIN contributions_location l ON l.id = o.location_id '
+    'WHERE o.id IN (%s) '
+    'GROUP BY o.status'
+)
+
+
+def expand_extent(project_id, status, location_id):
+    """
+    Expands the extent of the contributions of a project with a status by a
+    location, in the database so concurrent updates do not get lost.
+
+    Parameters
+    ----------
+    project_id : int
+        Identifies the project in the database.
+    status : str
+        Status of the contributions.
+    location_id : int
+        Identifies the location added in the database.
+    """
+    if status not in EXTENT_STATUSES:
+        return
+
+    ProjectExtent.objects.get_or_create(project_id=project_id, status=status)
+
+    with connection.cursor() as cursor:
+        cursor.execute(EXPAND_SQL, [location_id, project_id, status])
+
+
+def mark_dirty(project_ids, statuses=EXTENT_STATUSES):
+    """
+    Marks extents to be recomputed in the background, as they might have
+    shrunk.
+
+    Parameters
+    ----------
+    project_ids : list
+        Identify the projects in the database.
+    statuses : list
+        Statuses of the contributions.
+    """
+    ProjectExtent.objects.filter(
+        project_id__in=project_ids,
+        status__in=statuses
+    ).update(dirty=True)
+
+
+def recompute_extent(project_id, status):
+    """
+    Recomputes the extent of the contributions of a project with a status
+    from all its contributions.
+    """
+    ProjectExtent.objects.get_or_create(project_id=project_id, status=status)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            RECOMPUTE_SQL,
+            [project_id, status, project_id, status]
+        )
+
+
+def recompute_extents(all_extents=False):
+    """
+    Recomputes all extents marked dirty, or the extents of all projects.
+
+    Returns
+    -------
+    int
+        Number of extents recomputed.
+    """
+    if all_extents:
+        extents = [
+            (project_id, status)
+            for project_id in Project.objects.values_list('id', flat=True)
+            for status in EXTENT_STATUSES
+        ]
+    else:
+        extents = list(ProjectExtent.objects.filter(
+            dirty=True
+        ).values_list('project_id', 'status'))
+
+    for project_id, status in extents:
+        recompute_extent(project_id, status)
+
+    return len(extents)
+
+
+def get_live_hulls(project, user):
+    """
+    Computes the convex hulls per status of the contributions a user can
+    access, for users whose access is restricted by filters of user groups.
+
+    Returns
+    -------
+    dict
+        GEOS geometries of the hulls by status.
+    """
+    contributions = project.get_all_contributions(user).order_by()
+    sql, params = contributions.values('id').query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(LIVE_SQL % sql, params)
+        return dict(
+            (status, GEOSGeometry(hull))
+            for status, hull in cursor.fetchall()
+            if hull is not None
+        )
+
+
+def get_data_extent(project, user):
+    """
+    Returns the extent of the contributions of a project visible to a user:
+    all statuses for moderators, active and in review for others. The
+    extents of all contributions are used unless the access of the user is
+    restricted by filters of user groups; the extent of the contributions
+    the user can access is computed then.
+
+    Returns
+    -------
+    dict
+        Bounding box of all visible contributions, and bounding box and
+        convex hull per status.
+    """
+    if project.can_moderate(user):
+        statuses = EXTENT_STATUSES
+    else:
+        statuses = (OBSERVATION_STATUS.active, OBSERVATION_STATUS.review)
+
+    if has_data_filters(project, user):
+        hulls = get_live_hulls(project, user)
+    else:
+        hulls = dict(
+            (extent.status, extent.hull)
+            for extent in project.extents.filter(status__in=statuses)
+            if extent.hull is not None
+        )
+
+    extents = {}
+    bbox = None
+
+    for status, hull in hulls.items():
+        if status not in statuses:
+            continue
+
+        extent = list(hull.extent)
+        extents[status] = {
+            'bbox': extent,
+            'hull': json.loads(hull.json)
+        }
+
+        if bbox is None:
+            bbox = extent
+        else:
+            bbox = [
+                min(bbox[0], extent[0]),
+                min(bbox[1], extent[1]),
+                max(bbox[2], extent[2]),
+                max(bbox[3], extent[3])
+            ]
+
+    return {'bbox': bbox, 'statuses': extents}
@@ -0,0 +1,234 @@
+"""Facet counts of the properties of contributions."""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from geokey.categories.base import STATUS
+from geokey.categories.models import (
+    Field,
+    LookupField,
+    MultipleLookupField,
+    NumericField
+)
+
+from .sync import get_cache_key
+
+
+FACET_KINDS = (
+    (LookupField, 'lookup'),
+    (MultipleLookupField, 'multiple'),
+    (NumericField, 'numeric')
+)
+
+# Contributions filtered are materialised once, all facets are computed from
+# that set: values of lookup fields, items of multiple lookup fields, and
+# numbers of numeric fields binned between their minimum and maximum
+FACETS_SQL = (
+    'WITH filtered AS ('
+    'SELECT category_id, properties FROM contributions_observation '
+    'WHERE id IN ({contributions})'
+    '), facet AS ('
+    'SELECT value.field_id, value.kind, value.value FROM filtered, '
+    'LATERAL (VALUES {values}) AS value(field_id, kind, value) '
+    'WHERE value.value IS NOT NULL'
+    '), bounds AS ('
+    'SELECT field_id, MIN(value::double precision) AS low, '
+    'MAX(value::double precision) AS high FROM facet '
+    'WHERE kind = \'numeric\' GROUP BY field_id'
+    ') '
+    'SELECT NULL::int, \'total\', NULL::text, COUNT(*), NULL::float, '
+    'NULL::float FROM filtered '
+    'UNION ALL '
+    'SELECT field_id, kind, value, COUNT(*), NULL, NULL FROM facet '
+    'WHERE kind = \'lookup\' GROUP BY field_id, kind, value '
+    'UNION ALL '
+    'SELECT field_id, kind, btrim(item), COUNT(*), NULL, NULL FROM facet, '
+    'unnest(string_to_array(btrim(value, \'[]\'), \',\')) AS item '
+    'WHERE kind = \'multiple\' GROUP BY field_id, kind, btrim(item) '
+    'UNION ALL '
+    'SELECT facet.field_id, facet.kind, (CASE WHEN low = high THEN 1 '
+    'ELSE LEAST(width_bucket(value::double precision, low, high, %s), %s) '
+    'END)::text AS bin, COUNT(*), low, high FROM facet '
+    'JOIN bounds ON bounds.field_id = facet.field_id '
+    'WHERE kind = \'numeric\' GROUP BY facet.field_id, facet.kind, bin, '
+    'low, high'
+)
+
+FACET_VALUE = (
+    '(%s, %s, CASE WHEN category_id = %s THEN properties ->> %s END)'
+)
+
+NUMERIC_VALUE = (
+    '(%s, %s, CASE WHEN category_id = %s AND (properties ->> %s) ~ '
+    '\'^-?[0-9]+(\\.[0-9]+)?$\' THEN properties ->> %s END)'
+)
+
+
+def get_facet_fields(project):
+    """
+    Returns the active lookup, multiple lookup and numeric fields of the
+    active categories of a project.
+
+    Returns
+    -------
+    list
+        Tuples of the field and the kind of facet.
+    """
+    fields = Field.objects.filter(
+        category__project=project,
+        category__status=STATUS.active,
+        status=STATUS.active
+    ).select_related('category')
+
+    facet_fields = []
+    for field in fields:
+        for field_class, kind in FACET_KINDS:
+            if isinstance(field, field_class):
+                facet_fields.append((field, kind))
+
+    return facet_fields
+
+
+def count_facets(contributions, facet_fields, bins):
+    """
+    Counts the values of the fields in one query over the contributions.
+
+    Parameters
+    ----------
+    contributions : django.db.models.query.QuerySet
+        Contributions filtered.
+    facet_fields : list
+        Tuples of the field and the kind of facet.
+    bins : int
+        Number of bins of histograms of numeric fields.
+
+    Returns
+    -------
+    list
+        Rows of field ID, kind, value, count, and minimum and maximum of
+        numeric fields.
+    """
+    sql, params = contributions.order_by().values('id').query.sql_with_params()
+    params = list(params)
+
+    values = []
+    for field, kind in facet_fields:
+        if kind == 'numeric':
+            values.append(NUMERIC_VALUE)
+            params.extend(
+                [field.id, kind, field.category_id, field.key, field.key])
+        else:
+            values.append(FACET_VALUE)
+            params.extend([field.id, kind, field.category_id, field.key])
+
+    if not values:
+        values.append('(NULL::int, NULL::text, NULL::text)')
+
+    params.extend([bins, bins])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            FACETS_SQL.format(contributions=sql, values=', '.join(values)),
+            params
+        )
+        return cursor.fetchall()
+
+
+def serialize_facets(rows, facet_fields, bins):
+    """
+    Returns the counts of all values of the fields, including those not
+    used by any contribution.
+
+    Returns
+    -------
+    dict
+        Total number of contributions and facets of each field.
+    """
+    counts = {}
+    bounds = {}
+    total = 0
+
+    for field_id, kind, value, count, low, high in rows:
+        if kind == 'total':
+            total = count
+            continue
+
+        counts.setdefault(field_id, {})[value] = count
+
+        if kind == 'numeric':
+            bounds[field_id] = (low, high)
+
+    facets = []
+    for field, kind in facet_fields:
+        field_counts = counts.get(field.id, {})
+        facet = {
+            'id': field.id,
+            'key': field.key,
+            'name': field.name,
+            'category': field.category_id,
+            'fieldtype': field.fieldtype
+        }
+
+        if kind == 'numeric':
+            low, high = bounds.get(field.id, (None, None))
+            facet['min'] = low
+            facet['max'] = high
+            facet['bins'] = []
+
+            if low is not None:
+                count = 1 if low == high else bins
+                width = (high - low) / count
+
+                facet['bins'] = [{
+                    'from': low + width * index,
+                    'to': high if index == count - 1 else
+                    low + width * (index + 1),
+                    'count': field_counts.get(str(index + 1), 0)
+                } for index in range(count)]
+        else:
+            facet['values'] = [{
+                'id': value.id,
+                'name': value.name,
+                'count': field_counts.get(str(value.id), 0)
+            } for value in field.lookupvalues.filter(status=STATUS.active)]
+
+        facets.append(facet)
+
+    return {'total': total, 'facets': facets}
+
+
+def get_facets(project, contributions, bins=None):
+    """
+    Returns counts of the values of lookup and multiple lookup fields, and
+    histograms of numeric fields, for contributions. Results are cached for
+    `settings.FACETS_CACHE_TIMEOUT` seconds per project, filters and version
+    of the data.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        The project.
+    contributions : django.db.models.query.QuerySet
+        Contributions accessible to the user, filtered, e.g. from
+        `Project.get_all_contributions`.
+    bins : int
+        Number of bins of histograms; `settings.FACETS_HISTOGRAM_BINS` if
+        not set.
+
+    Returns
+    -------
+    dict
+        Total number of contributions and facets of each field.
+    """
+    bins = bins or settings.FACETS_HISTOGRAM_BINS
+    key = get_cache_key('facets', project, contributions, bins)
+    facets = cache.get(key)
+
+    if facets is None:
+        facet_fields = get_facet_fields(project)
+        rows = count_facets(contributions, facet_fields, bins)
+        facets = serialize_facets(rows, facet_fields, bins)
+        cache.set(key, facets, settings.FACETS_CACHE_TIMEOUT)
+
+    return facets
@@ -0,0 +1,55 @@
+"""Command `assign_regions`."""
+
+from django.core.management.base import BaseCommand
+
+from geokey.projects.models import RegionLayer
+from geokey.contributions.regions import assign_layer, assign_queued_layers
+
+
+class Command(BaseCommand):
+    """A command to assign locations of contributions to regions."""
+
+    help = 'Assigns locations of contributions to the regions of layers ' \
+           'imported since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project',
+            action='append',
+            type=int,
+            dest='projects',
+            default=None,
+            help='Assign to the layers of a project only (repeatable).')
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='all',
+            default=False,
+            help='Assign to all layers again, not only to imported ones.')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            dest='workers',
+            default=None,
+            help='Number of worker processes.')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            layers = RegionLayer.objects.all()
+
+            if options['projects']:
+                layers = layers.filter(project_id__in=options['projects'])
+
+            assigned = [
+                (layer, assign_layer(layer, workers=options['workers']))
+                for layer in layers
+            ]
+        else:
+            assigned = assign_queued_layers(
+                workers=options['workers'],
+                project_ids=options['projects']
+            )
+
+        for layer, count in assigned:
+            self.stdout.write('%s: %s locations assigned.' % (
+                layer.name, count))
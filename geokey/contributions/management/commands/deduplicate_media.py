@@ -0,0 +1,131 @@
+"""Command `deduplicate_media`."""
+
+import time
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from geokey.contributions.models import (
+    ImageFile,
+    DocumentFile,
+    VideoFile,
+    AudioFile,
+    MediaContent
+)
+
+
+MEDIA_FIELDS = (
+    (ImageFile, 'image'),
+    (DocumentFile, 'document'),
+    (VideoFile, 'video'),
+    (AudioFile, 'audio'),
+)
+
+
+class Command(BaseCommand):
+    """A command to move media files to content-addressed storage."""
+
+    help = 'Moves media files stored before to content-addressed storage, ' \
+           'so identical files are only stored once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of files moved at once.')
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches, to limit the load.')
+
+    def move_file(self, model, field, file_id, name):
+        storage = model._meta.get_field(field).storage
+
+        if not storage.exists(name):
+            return 0
+
+        size = storage.size(name)
+
+        with storage.open(name, 'rb') as the_file:
+            new_name = storage.save(name, File(the_file))
+
+        # Deleted files still reference their content, so the base manager
+        # is used instead of the default one
+        model._base_manager.filter(pk=file_id).update(**{field: new_name})
+
+        reclaimed = 0
+        if not model._base_manager.filter(**{field: name}).exists():
+            storage.delete(name)
+            reclaimed += size
+
+        if MediaContent.objects.get(name=new_name).references == 1:
+            # Content was not stored yet, it has been written again
+            reclaimed -= size
+
+        return reclaimed
+
+    def deduplicate(self, model, field, batch_size=100, pause=0):
+        """
+        Move files of a model that are not content-addressed yet.
+
+        Files are processed in batches of their IDs, so the command can run
+        in the background alongside the platform.
+
+        Parameters
+        ----------
+        model : django.db.models.Model
+            Model of media files, e.g. `ImageFile`.
+        field : str
+            File field of the model.
+        batch_size : int
+            Number of files moved at once.
+        pause : float
+            Seconds to pause between batches.
+
+        Returns
+        -------
+        int, int
+            Number of files moved, and number of bytes reclaimed.
+        """
+        storage = model._meta.get_field(field).storage
+        moved = 0
+        reclaimed = 0
+        last_id = 0
+
+        while True:
+            files = list(model._base_manager.filter(
+                id__gt=last_id
+            ).order_by('id').values_list('id', field)[:batch_size])
+
+            if not files:
+                break
+
+            for file_id, name in files:
+                if name and not storage.is_content_addressed(name):
+                    reclaimed += self.move_file(model, field, file_id, name)
+                    moved += 1
+
+            last_id = files[-1][0]
+
+            if pause:
+                time.sleep(pause)
+
+        return moved, reclaimed
+
+    def handle(self, *args, **options):
+        total = 0
+
+        for model, field in MEDIA_FIELDS:
+            moved, reclaimed = self.deduplicate(
+                model,
+                field,
+                batch_size=options['batch_size'],
+                pause=options['pause'])
+            total += reclaimed
+
+            self.stdout.write('%s: %s files moved, %s bytes reclaimed.' % (
+                model.__name__, moved, reclaimed))
+
+        self.stdout.write('%s bytes reclaimed in total.' % total)
@@ -0,0 +1,23 @@
+"""Command `expire_contributions`."""
+
+from django.core.management.base import BaseCommand
+
+from geokey.contributions.expiry import expire_contributions
+
+
+class Command(BaseCommand):
+    """A command to expire contributions."""
+
+    help = 'Expires contributions that are past their expiry date.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=None,
+            help='Number of contributions expired at once.')
+
+    def handle(self, *args, **options):
+        expired = expire_contributions(batch_size=options['batch_size'])
+        self.stdout.write('%s contributions expired.' % expired)
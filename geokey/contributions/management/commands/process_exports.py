@@ -0,0 +1,36 @@
+"""Command `process_exports`."""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from geokey.contributions.exports.jobs import process_queued_exports
+
+
+class Command(BaseCommand):
+    """A command to run queued export jobs."""
+
+    help = 'Generates the files of queued export jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.EXPORT_JOB_WORKERS,
+            help='Number of chunks of a job written in parallel.')
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Keep running and check the queue every number of seconds.')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_queued_exports(workers=options['workers'])
+            self.stdout.write('%s export jobs run.' % processed)
+
+            if options['interval'] is None:
+                break
+
+            time.sleep(options['interval'])
@@ -0,0 +1,37 @@
+"""Command `process_media`."""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from geokey.contributions.processing import process_queued_media
+
+
+class Command(BaseCommand):
+    """A command to process queued media files."""
+
+    help = 'Transcodes queued audio files, uploads queued videos and ' \
+           'creates queued thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.MEDIA_PROCESSING_WORKERS,
+            help='Number of files processed in parallel.')
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Keep running and check the queue every number of seconds.')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_queued_media(workers=options['workers'])
+            self.stdout.write('%s media files processed.' % processed)
+
+            if options['interval'] is None:
+                break
+
+            time.sleep(options['interval'])
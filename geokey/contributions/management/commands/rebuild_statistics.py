@@ -0,0 +1,24 @@
+"""Command `rebuild_statistics`."""
+
+from django.core.management.base import BaseCommand
+
+from geokey.contributions.statistics import rebuild_statistics
+
+
+class Command(BaseCommand):
+    """A command to rebuild statistics of contributions."""
+
+    help = 'Rebuilds the daily counts of contributions from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project',
+            action='append',
+            type=int,
+            dest='projects',
+            default=None,
+            help='Rebuild the counts of a project only (repeatable).')
+
+    def handle(self, *args, **options):
+        rebuild_statistics(project_ids=options['projects'])
+        self.stdout.write('Statistics rebuilt.')
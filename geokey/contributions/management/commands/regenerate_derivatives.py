@@ -0,0 +1,97 @@
+"""Command `regenerate_derivatives`."""
+
+from multiprocessing import Pool, cpu_count
+
+from django.db import connection, connections
+from django.core.management.base import BaseCommand
+
+from geokey.contributions.base import MEDIA_STATUS
+from geokey.contributions.models import ImageFile
+from geokey.contributions.derivatives import regenerate_derivatives
+
+
+def regenerate_in_process(image_file_id):
+    """
+    Regenerates the derivatives of an image within a worker process, and
+    closes the database connection of the process when done.
+    """
+    try:
+        return regenerate_derivatives(image_file_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    """A command to regenerate derivatives of images."""
+
+    help = 'Creates derivatives of all images again, e.g. after the sizes or ' \
+           'formats have been changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=cpu_count(),
+            help='Number of worker processes, defaults to the number of CPUs.')
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            default=False,
+            help='Only create derivatives for images that have none.')
+
+    def regenerate(self, image_file_ids, workers=1):
+        """
+        Regenerate derivatives of images.
+
+        Resizing and encoding is bound by the CPU, so images are processed
+        by a pool of processes. Database connections are closed before the
+        workers are forked, so each process opens its own.
+
+        Parameters
+        ----------
+        image_file_ids : list
+            IDs of images to create derivatives for.
+        workers : int
+            Number of worker processes; images are processed in the current
+            process when set to 1.
+
+        Returns
+        -------
+        int
+            Number of images with derivatives created.
+        """
+        if workers <= 1:
+            return len([
+                image_file_id for image_file_id in image_file_ids
+                if regenerate_derivatives(image_file_id)
+            ])
+
+        for conn in connections.all():
+            conn.close()
+
+        pool = Pool(workers)
+        try:
+            regenerated = pool.imap_unordered(
+                regenerate_in_process,
+                image_file_ids,
+                chunksize=10
+            )
+            return len([result for result in regenerated if result])
+        finally:
+            pool.close()
+            pool.join()
+
+    def handle(self, *args, **options):
+        image_files = ImageFile.objects.filter(
+            status=MEDIA_STATUS.active).order_by('id')
+
+        image_file_ids = [
+            image_file_id for image_file_id, derivatives
+            in image_files.values_list('id', 'derivatives')
+            if not (options['missing'] and derivatives)
+        ]
+
+        regenerated = self.regenerate(
+            image_file_ids, workers=options['workers'])
+
+        self.stdout.write('%s images regenerated.' % regenerated)
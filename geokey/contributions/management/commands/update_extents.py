@@ -0,0 +1,23 @@
+"""Command `update_extents`."""
+
+from django.core.management.base import BaseCommand
+
+from geokey.contributions.extents import recompute_extents
+
+
+class Command(BaseCommand):
+    """A command to recompute extents of contributions."""
+
+    help = 'Recomputes extents of contributions that might have shrunk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='all',
+            default=False,
+            help='Recompute the extents of all projects.')
+
+    def handle(self, *args, **options):
+        recomputed = recompute_extents(all_extents=options['all'])
+        self.stdout.write('%s extents recomputed.' % recomputed)
@@ -4,14 +4,14 @@ import os
 import re
 
 import magic
-from django.core.files import File
-from pytz import utc
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.contrib.gis.db import models
+from django.contrib.gis.measure import D
 from django.db.models import Q
 from django.core.exceptions import PermissionDenied
 from django.conf import settings
+from django.utils import timezone
 from django.template.defaultfilters import slugify
 
 from model_utils.managers import InheritanceManager
@@ -19,16 +19,13 @@ from model_utils.managers import InheritanceManager
 from geokey.core.exceptions import FileTypeError, InputError
 from geokey.projects.models import Project
 
+from .spatial import parse_bbox
+from .temporal import parse_time
 from .base import (
-    OBSERVATION_STATUS, COMMENT_STATUS, MEDIA_STATUS, ACCEPTED_FILE_TYPES,
+    OBSERVATION_STATUS, COMMENT_STATUS, MEDIA_STATUS, MEDIA_PROCESSING,
+    ACCEPTED_FILE_TYPES,
     ACCEPTED_AUDIO_TYPES, ACCEPTED_VIDEO_TYPES, ACCEPTED_IMAGE_TYPES, ACCEPTED_DOC_TYPES)
 
-from .utils import (
-    get_args,
-    get_authenticated_service,
-    initialize_upload
-)
-
 FILE_NAME_TRUNC = 60 - len(settings.MEDIA_URL)
 
 
@@ -56,6 +53,70 @@ class LocationQuerySet(models.query.QuerySet):
             Q(private_for_project=project)
         )
 
+    def search(self, query):
+        """
+        Returns locations where the name or description contains the query,
+        ignoring the case. Both are backed by trigram indexes.
+
+        Parameters
+        ----------
+        query : str
+            Query that needs to be matched
+
+        Return
+        ------
+        django.db.models.Queryset
+            Locations matching the query
+        """
+        if query:
+            return self.filter(
+                Q(name__icontains=query) | Q(description__icontains=query)
+            )
+
+        return self
+
+    def get_by_bbox(self, bbox):
+        """
+        Returns locations overlapping with a bounding box.
+
+        Parameters
+        ----------
+        bbox : str
+            Str that provides the xmin,ymin,xmax,ymax
+
+        Return
+        ------
+        django.db.models.Queryset
+            Locations in the bounding box
+
+        Raises
+        ------
+        InputError
+            If the bbox is not valid
+        """
+        if bbox:
+            return self.filter(geometry__bboverlaps=parse_bbox(bbox))
+
+        return self
+
+    def get_by_radius(self, point, radius):
+        """
+        Returns locations within a radius of a point.
+
+        Parameters
+        ----------
+        point : django.contrib.gis.geos.Point
+            Centre of the radius
+        radius : float
+            Radius in metres
+
+        Return
+        ------
+        django.db.models.Queryset
+            Locations within the radius
+        """
+        return self.filter(geometry__dwithin=(point, D(m=radius)))
+
 
 class LocationManager(models.GeoManager):
     """
@@ -156,12 +217,15 @@ class ObservationQuerySet(models.query.QuerySet):
         Returns all observations for viewer, i.e. users who have no moderation
         permissions on the projects.
 
-        If the user is anonymous, it returns only contributions that haven't
-        expired yet with status `active` or `review`.
+        If the user is anonymous, it returns only contributions with status
+        `active` or `review`.
 
         If the user is not anonymous, it returns only contributions with status
-        `active` or `review` as well as `pending` when the given user is
-        creator of those contributions.
+        `active` or `review` as well as `pending` and `expired` when the given
+        user is creator of those contributions.
+
+        Contributions expire in the background (see
+        `geokey.contributions.expiry`), so viewers are not filtered by time.
 
         Parameters
         ----------
@@ -174,16 +238,12 @@ class ObservationQuerySet(models.query.QuerySet):
             List of observations for viewer
         """
         if user.is_anonymous():
-            return self.exclude(
-                Q(expiry_field__isnull=False),
-                Q(expiry_field__lte=datetime.utcnow().replace(tzinfo=utc)),
-            ).exclude(status__in=['draft', 'pending'])
+            return self.exclude(status__in=['draft', 'pending', 'expired'])
         else:
             return self.for_moderator(user).exclude(
                 ~Q(creator=user),
-                Q(expiry_field__isnull=False),
-                Q(expiry_field__lte=datetime.utcnow().replace(tzinfo=utc)),
-            ).exclude(~Q(creator=user), status='pending')
+                status__in=['pending', 'expired']
+            )
 
     def search(self, query):
         """
@@ -229,20 +289,175 @@ class ObservationQuerySet(models.query.QuerySet):
         ------
         django.db.models.Queryset
             List of search results matching the query
-        """
 
+        Raises
+        ------
+        InputError
+            If the bbox is not valid
+        """
         if bbox:
-            try:
-                # created bbox to Polygon
-                from django.contrib.gis.geos import Polygon
-                bbox = bbox.split(',')  # Split by ','
-                geom_bbox = Polygon.from_bbox(bbox)
-                # Filtering observations where
-                return self.filter(location__geometry__bboverlaps=geom_bbox)
-            except Exception as e:
-                raise InputError(str(e) + '. Please, check the coordinates'
-                                          ' you attached to bbox parameters, they should follow'
-                                          'the OSGeo standards (e.g:bbox=xmin,ymin,xmax,ymax).')
+            return self.filter(
+                location__geometry__bboverlaps=parse_bbox(bbox))
+
+        return self
+
+    def get_by_region(self, region):
+        """
+        Returns a subset of the queryset containing observations where the
+        location intersects with a region, joining the assignments of
+        locations to regions instead of comparing geometries.
+
+        Parameters
+        ----------
+        region : int
+            Identifies the region in the database
+
+        Return
+        ------
+        django.db.models.Queryset
+            List of observations in the region
+
+        Raises
+        ------
+        InputError
+            If the region is not a number
+        """
+        try:
+            region = int(region)
+        except (TypeError, ValueError):
+            raise InputError('The parameter region must be the ID of a '
+                             'region.')
+
+        return self.filter(location__regions=region)
+
+    def get_by_time(self, created_after=None, created_before=None,
+                    updated_after=None, updated_before=None):
+        """
+        Returns a subset of the queryset containing observations created or
+        updated within a period; `after` includes the time, `before`
+        excludes it. Filters use the indexes on the project and `created_at`
+        or `updated_at`.
+
+        Parameters
+        ----------
+        created_after : str
+            Date or date and time in ISO 8601
+        created_before : str
+            Date or date and time in ISO 8601
+        updated_after : str
+            Date or date and time in ISO 8601
+        updated_before : str
+            Date or date and time in ISO 8601
+
+        Return
+        ------
+        django.db.models.Queryset
+            List of observations within the period
+
+        Raises
+        ------
+        InputError
+            If a date is not valid
+        """
+        filters = {}
+
+        if created_after:
+            filters['created_at__gte'] = parse_time(
+                created_after, 'created_after')
+
+        if created_before:
+            filters['created_at__lt'] = parse_time(
+                created_before, 'created_before')
+
+        if updated_after:
+            filters['updated_at__gte'] = parse_time(
+                updated_after, 'updated_after')
+
+        if updated_before:
+            filters['updated_at__lt'] = parse_time(
+                updated_before, 'updated_before')
+
+        return self.filter(**filters)
+
+    def get_by_geometry(self, geometry, predicate='intersects'):
+        """
+        Returns a subset of the queryset containing observations where the
+        geometry of the location intersects with or is within a polygon.
+        Both use the spatial index of locations.
+
+        Parameters
+        ----------
+        geometry : django.contrib.gis.geos.GEOSGeometry
+            Polygon the observations are filtered by
+        predicate : str
+            `intersects` or `within`
+
+        Return
+        ------
+        django.db.models.Queryset
+            List of observations matching the polygon
+        """
+        queryset = self.filter(location__geometry__intersects=geometry)
+
+        if predicate == 'within':
+            # `ST_CoveredBy` on geography only supports points before PostGIS
+            # 3.0, so the geometries are compared instead; intersecting
+            # locations are found with the index first
+            queryset = queryset.extra(
+                where=[
+                    'ST_CoveredBy("contributions_location"."geometry"'
+                    '::geometry, ST_GeomFromEWKT(%s))'
+                ],
+                params=[geometry.ewkt]
+            )
+
+        return queryset
+
+    def get_by_radius(self, point, radius):
+        """
+        Returns a subset of the queryset containing observations where the
+        location is within a radius of a point, using `ST_DWithin` on the
+        geography column.
+
+        Parameters
+        ----------
+        point : django.contrib.gis.geos.Point
+            Centre of the radius
+        radius : float
+            Radius in metres
+
+        Return
+        ------
+        django.db.models.Queryset
+            List of observations within the radius
+        """
+        return self.filter(
+            location__geometry__dwithin=(point, D(m=radius)))
+
+    def order_by_distance(self, point):
+        """
+        Orders the queryset by the distance of the location to a point. The
+        `<->` operator lets the spatial index return nearest locations first;
+        the distance in metres is selected as `distance`.
+
+        Parameters
+        ----------
+        point : django.contrib.gis.geos.Point
+            Point the distance is measured to
+
+        Return
+        ------
+        django.db.models.Queryset
+            List of observations, nearest first
+        """
+        return self.select_related('location').extra(
+            select={
+                'distance': '"contributions_location"."geometry" <-> '
+                            'ST_GeogFromText(%s)'
+            },
+            select_params=[point.ewkt],
+            order_by=['distance', 'id']
+        )
 
 
 class ObservationManager(models.Manager):
@@ -263,6 +478,37 @@ class ObservationManager(models.Manager):
             'location', 'category', 'creator', 'updator').exclude(
             status=OBSERVATION_STATUS.deleted)
 
+    def get_changes(self, project, updated_at=None, observation_id=None):
+        """
+        Returns all observations of a project, including deleted ones, that
+        changed after a position, ordered by the time of the change. The
+        position is the update time and ID of the last observation synced;
+        the ID resolves ties between observations updated at the same time.
+
+        Parameters
+        ----------
+        project : geokey.projects.models.Project
+            Project observations are queried for
+        updated_at : datetime.datetime
+            Update time of the last observation synced
+        observation_id : int
+            ID of the last observation synced
+
+        Return
+        ------
+        django.db.models.Queryset
+            All changed observations
+        """
+        changes = ObservationQuerySet(self.model).filter(project=project)
+
+        if updated_at is not None:
+            changes = changes.filter(
+                Q(updated_at__gt=updated_at) |
+                Q(updated_at=updated_at, id__gt=observation_id or 0)
+            )
+
+        return changes.order_by('updated_at', 'id')
+
     def for_moderator(self, user):
         """
         Returns all observations for moderators; see
@@ -315,6 +561,32 @@ class CommentManager(models.Manager):
         return super(CommentManager, self).get_queryset().exclude(
             status=COMMENT_STATUS.deleted)
 
+    def get_tree(self, contribution):
+        """
+        Loads all comments of a contribution with their creators in one
+        query, and groups them by the comment they respond to.
+
+        Parameters
+        ----------
+        contribution : geokey.contributions.models.Observation
+            Contribution the comments are loaded for
+
+        Return
+        ------
+        dict
+            Lists of comments by the ID of the comment they respond to; the
+            comments to the contribution itself are listed under `None`
+        """
+        comments = self.get_queryset().filter(
+            commentto=contribution
+        ).select_related('creator').order_by('id')
+
+        tree = {}
+        for comment in comments:
+            tree.setdefault(comment.respondsto_id, []).append(comment)
+
+        return tree
+
 
 class MediaFileManager(InheritanceManager):
     """
@@ -384,7 +656,9 @@ class MediaFileManager(InheritanceManager):
     def _create_image_file(self, name, description, creator, contribution,
                            the_file):
         """
-        Creates an ImageFile and returns the instance.
+        Creates an ImageFile and returns the instance. The thumbnail is
+        created in the background when `settings.MEDIA_PROCESSING_BACKGROUND`
+        is set.
 
         Parameter
         ---------
@@ -410,7 +684,7 @@ class MediaFileManager(InheritanceManager):
         filename = self._normalise_filename(filename)
         the_file.name = filename[:FILE_NAME_TRUNC] + extension
 
-        return ImageFile.objects.create(
+        image_file = ImageFile.objects.create(
             name=name,
             description=description,
             creator=creator,
@@ -418,10 +692,14 @@ class MediaFileManager(InheritanceManager):
             image=the_file
         )
 
+        return self._process(image_file)
+
     def _create_document_file(self, name, description, creator, contribution,
                               the_file):
         """
-        Creates an DocumentFile and returns the instance.
+        Creates an DocumentFile and returns the instance. The thumbnail is
+        created in the background when `settings.MEDIA_PROCESSING_BACKGROUND`
+        is set.
 
         Parameter
         ---------
@@ -447,7 +725,7 @@ class MediaFileManager(InheritanceManager):
         filename = self._normalise_filename(filename)
         the_file.name = filename[:FILE_NAME_TRUNC] + extension
 
-        return DocumentFile.objects.create(
+        document_file = DocumentFile.objects.create(
             name=name,
             description=description,
             creator=creator,
@@ -455,12 +733,16 @@ class MediaFileManager(InheritanceManager):
             document=the_file
         )
 
+        return self._process(document_file)
+
     def _create_audio_file(self, name, description, creator, contribution,
                            the_file, content_type):
         """
         Creates an AudioFile and returns the instance.
 
-        All files that are not mp3 get converted using avconv.
+        All files that are not mp3 get converted using avconv. The conversion
+        runs in the background when `settings.MEDIA_PROCESSING_BACKGROUND` is
+        set; the file is queued for processing until then.
 
         Parameter
         ---------
@@ -482,112 +764,31 @@ class MediaFileManager(InheritanceManager):
         """
         from geokey.contributions.models import AudioFile
 
-        converted_file = None
-
-        # Convert using avconv
-        if content_type[1] != 'mp3':
-            import time
-            import shlex
-            import subprocess
-            from django.core.files import File
-            from django.core.files.storage import default_storage
-            from django.core.files.base import ContentFile
-
-            filename, extension = os.path.splitext(the_file.name)
-            filename = self._normalise_filename(filename)
-
-            path = default_storage.save(
-                'tmp/' + filename + extension,
-                ContentFile(the_file.read())
-            )
-            tmp_file = os.path.join(settings.MEDIA_ROOT, path)
-
-            cmd = shlex.split('avconv -i %s' % tmp_file)
-            pipe = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            output, error = pipe.communicate()
-
-            video_stream = re.compile(
-                r"Stream #\d*\.\d*.*:\s*Video",
-                re.MULTILINE
-            )
-
-            # Using error because output file is not specified
-            if not video_stream.search(error.decode()):
-                converted_file = os.path.join(
-                    settings.MEDIA_ROOT,
-                    'tmp',
-                    '%s_%s.mp3' % (filename, int(time.time()))
-                )
-
-                cmd = shlex.split(
-                    'avconv -nostats -loglevel 0 -y -i %s -c:a libmp3lame -q:a 4 -ar 44100 %s' % (
-                        tmp_file,
-                        converted_file
-                    )
-                )
-                pipe = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
-                output, error = pipe.communicate()
-
-                if not error:
-                    the_file = File(open(converted_file, 'rb'))
-                    the_file.name = '%s.mp3' % filename
-
-            os.remove(tmp_file)
-
         filename, extension = os.path.splitext(the_file.name)
         filename = self._normalise_filename(filename)
         the_file.name = filename[:FILE_NAME_TRUNC] + extension
 
+        processing_status = MEDIA_PROCESSING.ready
+        if content_type[1] != 'mp3':
+            processing_status = MEDIA_PROCESSING.queued
+
         audio_file = AudioFile.objects.create(
             name=name,
             description=description,
             creator=creator,
             contribution=contribution,
-            audio=the_file
+            audio=the_file,
+            processing_status=processing_status
         )
 
-        if converted_file is not None and os.path.isfile(converted_file):
-            os.remove(converted_file)
-
-        return audio_file
-
-    @staticmethod
-    def _upload_to_youtube(name, path):
-        """
-        Uploads the file from the given path to youtube
-
-        Parameter
-        ---------
-        name : str
-            Name of the file (short caption)
-        path : str
-            Path to tempory file
-
-        Return
-        ------
-        str, str
-            Youtube video id, Youtube SWF url
-        """
-
-        youtube = get_authenticated_service()
-        args = get_args(name, path)
-        video_id = initialize_upload(youtube, args)
-
-        return video_id, 'swf_wtf'
+        return self._process(audio_file)
 
     def _create_video_file(self, name, description, creator, contribution,
                            the_file):
         """
-        Creates a new video file. Uploads the video to Youtube and returns the
-        VideoFile instance.
+        Creates a new video file and returns the VideoFile instance. The
+        video gets uploaded to the video host (Youtube by default), in the
+        background when `settings.MEDIA_PROCESSING_BACKGROUND` is set.
 
         Parameter
         ---------
@@ -608,34 +809,50 @@ class MediaFileManager(InheritanceManager):
             File created
         """
         from geokey.contributions.models import VideoFile
-        from django.core.files.storage import default_storage
-        from django.core.files.base import ContentFile
 
         filename, extension = os.path.splitext(the_file.name)
         filename = self._normalise_filename(filename)
+        the_file.name = filename[:FILE_NAME_TRUNC] + extension
 
-        path = default_storage.save(
-            'tmp/' + filename + extension,
-            ContentFile(the_file.read())
-        )
-
-        tmp_file = os.path.join(settings.MEDIA_ROOT, path)
-
-        video_id, swf_link = self._upload_to_youtube(
-            name,
-            tmp_file
-        )
-        os.remove(tmp_file)
-
-        return VideoFile.objects.create(
+        video_file = VideoFile.objects.create(
             name=name,
             description=description,
             creator=creator,
             contribution=contribution,
             video=the_file,
-            youtube_id=video_id,
-            youtube_link='https://www.youtube.com/embed/' + video_id,
-            swf_link=swf_link
+            processing_status=MEDIA_PROCESSING.queued
+        )
+
+        return self._process(video_file)
+
+    @staticmethod
+    def _process(media_file):
+        """
+        Processes a queued file and creates its thumbnail right away, unless
+        processing should happen in the background.
+
+        Parameter
+        ---------
+        media_file : geokey.contributions.models.MediaFile
+            File created
+
+        Return
+        ------
+        geokey.contributions.models.MediaFile
+            File created, processed if not in the background
+        """
+        from geokey.contributions.processing import (
+            process_media_file,
+            process_thumbnail
+        )
+
+        if settings.MEDIA_PROCESSING_BACKGROUND:
+            return media_file
+
+        return (
+            process_media_file(media_file.id) or
+            process_thumbnail(media_file.id) or
+            media_file
         )
 
     def create(self, the_file=None, **kwargs):
@@ -703,3 +920,55 @@ class MediaFileManager(InheritanceManager):
         else:
             raise FileTypeError(
                 'Files of type {} ({}) are currently not supported.'.format(id_info, name))
+
+
+class MediaUploadManager(models.Manager):
+    """
+    Manager for MediaUpload model
+    """
+
+    def remove_expired(self):
+        """
+        Removes uploads that have not been continued within
+        `settings.MEDIA_UPLOAD_EXPIRY` hours, including their partial files.
+
+        Return
+        ------
+        int
+            Number of uploads removed
+        """
+        cutoff = timezone.now() - timedelta(
+            hours=settings.MEDIA_UPLOAD_EXPIRY)
+
+        removed = 0
+        for upload in self.get_queryset().filter(updated_at__lt=cutoff):
+            upload.delete()
+            removed += 1
+
+        return removed
+
+
+class ExportJobManager(models.Manager):
+    """
+    Manager for ExportJob model
+    """
+
+    def remove_expired(self):
+        """
+        Removes export jobs created more than `settings.EXPORT_JOB_EXPIRY`
+        hours ago, including their files.
+
+        Return
+        ------
+        int
+            Number of jobs removed
+        """
+        cutoff = timezone.now() - timedelta(
+            hours=settings.EXPORT_JOB_EXPIRY)
+
+        removed = 0
+        for job in self.get_queryset().filter(created_at__lt=cutoff):
+            job.delete()
+            removed += 1
+
+        return removed
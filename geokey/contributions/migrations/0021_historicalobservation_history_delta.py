@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0020_update_media_and_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalobservation',
+            name='history_delta',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0021_historicalobservation_history_delta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='processing_status',
+            field=models.CharField(choices=[('queued', 'queued'), ('processing', 'processing'), ('ready', 'ready'), ('failed', 'failed')], default='ready', max_length=20),
+        ),
+    ]
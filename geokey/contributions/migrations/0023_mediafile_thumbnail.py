@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from easy_thumbnails.files import get_thumbnailer
+
+
+def get_existing_thumbnail(source):
+    if not source:
+        return None
+
+    # Thumbnails were created with these options during serialization
+    try:
+        return get_thumbnailer(source).get_existing_thumbnail({
+            'crop': True,
+            'size': (300, 300)
+        })
+    except Exception:
+        return None
+
+
+def update_thumbnail_status(apps, schema_editor):
+    ImageFile = apps.get_model('contributions', 'ImageFile')
+    DocumentFile = apps.get_model('contributions', 'DocumentFile')
+    VideoFile = apps.get_model('contributions', 'VideoFile')
+    AudioFile = apps.get_model('contributions', 'AudioFile')
+
+    # Audio files have no thumbnail, nothing needs to be created for them
+    AudioFile.objects.update(thumbnail_status='ready')
+
+    sources = [
+        (ImageFile, 'image'),
+        (DocumentFile, 'thumbnail'),
+        (VideoFile, 'thumbnail')
+    ]
+
+    # Files with a thumbnail created already are ready, the others stay
+    # queued for the `process_media` command
+    for model, field in sources:
+        for media_file in model.objects.all().iterator():
+            thumb = get_existing_thumbnail(getattr(media_file, field))
+
+            if thumb is not None:
+                model.objects.filter(pk=media_file.pk).update(
+                    thumb=thumb.name,
+                    thumbnail_status='ready'
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0022_mediafile_processing_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='thumbnail_status',
+            field=models.CharField(choices=[('queued', 'queued'), ('processing', 'processing'), ('ready', 'ready'), ('failed', 'failed')], default='queued', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='thumb',
+            field=models.ImageField(max_length=500, null=True, upload_to='user-uploads/thumbnails', blank=True),
+        ),
+        migrations.RunPython(
+            update_thumbnail_status,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+try:
+    from django.contrib.postgres.fields import JSONField
+except ImportError:
+    from django_pgjson.fields import JsonBField as JSONField
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0023_mediafile_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagefile',
+            name='derivatives',
+            field=JSONField(default=list, blank=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import uuid
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contributions', '0024_imagefile_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaUpload',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, default=uuid.uuid4, serialize=False, editable=False)),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(null=True, blank=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('content_type', models.CharField(max_length=100)),
+                ('size', models.BigIntegerField()),
+                ('offset', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contribution', models.ForeignKey(related_name='media_uploads', to='contributions.Observation')),
+                ('creator', models.ForeignKey(to=settings.AUTH_USER_MODEL)),
+                ('media_file', models.ForeignKey(related_name='+', blank=True, to='contributions.MediaFile', null=True)),
+            ],
+        ),
+    ]
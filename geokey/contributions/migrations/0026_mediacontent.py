@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+import geokey.contributions.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0025_mediaupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaContent',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('name', models.CharField(unique=True, max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('references', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='imagefile',
+            name='image',
+            field=models.ImageField(storage=geokey.contributions.storage.ContentAddressedStorage(), upload_to='user-uploads/images'),
+        ),
+        migrations.AlterField(
+            model_name='documentfile',
+            name='document',
+            field=models.FileField(storage=geokey.contributions.storage.ContentAddressedStorage(), upload_to='user-uploads/documents'),
+        ),
+        migrations.AlterField(
+            model_name='documentfile',
+            name='thumbnail',
+            field=models.ImageField(max_length=255, null=True, upload_to='user-uploads/documents'),
+        ),
+        migrations.AlterField(
+            model_name='videofile',
+            name='video',
+            field=models.ImageField(storage=geokey.contributions.storage.ContentAddressedStorage(), upload_to='user-uploads/videos'),
+        ),
+        migrations.AlterField(
+            model_name='audiofile',
+            name='audio',
+            field=models.FileField(storage=geokey.contributions.storage.ContentAddressedStorage(), upload_to='user-uploads/audio'),
+        ),
+    ]
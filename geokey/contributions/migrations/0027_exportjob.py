@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import uuid
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0008_historicalproject'),
+        ('contributions', '0026_mediacontent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, default=uuid.uuid4, serialize=False, editable=False)),
+                ('export_format', models.CharField(max_length=10)),
+                ('search', models.CharField(max_length=255, null=True, blank=True)),
+                ('subset', models.IntegerField(null=True, blank=True)),
+                ('bbox', models.CharField(max_length=255, null=True, blank=True)),
+                ('fingerprint', models.CharField(max_length=40)),
+                ('status', models.CharField(default='queued', max_length=20, choices=[('queued', 'queued'), ('processing', 'processing'), ('ready', 'ready'), ('failed', 'failed')])),
+                ('chunks_total', models.IntegerField(default=0)),
+                ('chunks_done', models.IntegerField(default=0)),
+                ('file', models.FileField(max_length=255, null=True, upload_to='exports', blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('creator', models.ForeignKey(blank=True, to=settings.AUTH_USER_MODEL, null=True)),
+                ('project', models.ForeignKey(related_name='export_jobs', to='projects.Project')),
+            ],
+        ),
+    ]
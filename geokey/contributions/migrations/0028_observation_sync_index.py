@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_historicalproject'),
+        ('contributions', '0027_exportjob'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'UPDATE contributions_observation SET updated_at = created_at '
+            'WHERE updated_at IS NULL;',
+            migrations.RunSQL.noop
+        ),
+        migrations.AlterIndexTogether(
+            name='observation',
+            index_together=set([('project', 'updated_at', 'id')]),
+        ),
+    ]
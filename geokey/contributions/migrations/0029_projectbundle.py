@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0008_historicalproject'),
+        ('contributions', '0028_observation_sync_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectBundle',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('thumbnails', models.BooleanField(default=False)),
+                ('token', models.CharField(max_length=255, null=True, blank=True)),
+                ('access', models.CharField(max_length=40, null=True, blank=True)),
+                ('media', models.CharField(max_length=40, null=True, blank=True)),
+                ('etag', models.CharField(max_length=40, null=True, blank=True)),
+                ('file', models.FileField(max_length=255, null=True, upload_to='bundles', blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(related_name='bundles', to='projects.Project')),
+                ('user', models.ForeignKey(blank=True, to=settings.AUTH_USER_MODEL, null=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='projectbundle',
+            unique_together=set([('project', 'user', 'thumbnails')]),
+        ),
+    ]
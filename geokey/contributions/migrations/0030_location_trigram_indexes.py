@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0029_projectbundle'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm;',
+            migrations.RunSQL.noop
+        ),
+        # Case-insensitive lookups compare `UPPER(column)`
+        migrations.RunSQL(
+            'CREATE INDEX contributions_location_name_trgm '
+            'ON contributions_location USING gin (UPPER(name) gin_trgm_ops);',
+            'DROP INDEX IF EXISTS contributions_location_name_trgm;'
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX contributions_location_description_trgm '
+            'ON contributions_location '
+            'USING gin (UPPER(description) gin_trgm_ops);',
+            'DROP INDEX IF EXISTS contributions_location_description_trgm;'
+        ),
+    ]
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0009_projectextent'),
+        ('categories', '0020_category_updated_at'),
+        ('contributions', '0030_location_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContributionStatistic',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('status', models.CharField(max_length=20)),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(related_name='statistics', to='categories.Category')),
+                ('creator', models.ForeignKey(related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(related_name='statistics', to='projects.Project')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='contributionstatistic',
+            unique_together=set([('project', 'category', 'status', 'creator', 'day')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='contributionstatistic',
+            index_together=set([('project', 'day')]),
+        ),
+        migrations.RunSQL(
+            "INSERT INTO contributions_contributionstatistic "
+            "(project_id, category_id, status, creator_id, day, count) "
+            "SELECT project_id, category_id, status, creator_id, "
+            "(created_at AT TIME ZONE 'UTC')::date, COUNT(*) "
+            "FROM contributions_observation "
+            "WHERE status != 'deleted' "
+            "GROUP BY project_id, category_id, status, creator_id, "
+            "(created_at AT TIME ZONE 'UTC')::date;",
+            migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# Rules of subsets and user groups filtering by the creation of
+# contributions compared `created_at` with `to_date()`, which dropped the
+# time; they now compare it with a time in UTC
+DATE_RULES_SQL = (
+    r"UPDATE {table} SET where_clause = regexp_replace(where_clause, "
+    r"'to_date\(''([^'']*)'', ''YYYY-MM-DD HH24:MI''\)', "
+    r"'(''\1''::timestamp AT TIME ZONE ''UTC'')', 'g') "
+    r"WHERE where_clause LIKE '%to_date(''%';"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subsets', '0002_historicalsubset'),
+        ('users', '0009_auto_20180502_1258'),
+        ('contributions', '0031_contributionstatistic'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='observation',
+            index_together=set([
+                ('project', 'updated_at', 'id'),
+                ('project', 'created_at')
+            ]),
+        ),
+        migrations.RunSQL(
+            DATE_RULES_SQL.format(table='subsets_subset'),
+            migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            DATE_RULES_SQL.format(table='users_usergroup'),
+            migrations.RunSQL.noop
+        ),
+    ]
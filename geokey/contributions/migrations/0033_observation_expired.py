@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+STATUS_CHOICES = [
+    ('active', 'active'),
+    ('draft', 'draft'),
+    ('review', 'review'),
+    ('pending', 'pending'),
+    ('deleted', 'deleted'),
+    ('expired', 'expired')
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_projectextent'),
+        ('contributions', '0032_observation_created_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='observation',
+            name='status',
+            field=models.CharField(default='active', max_length=20, choices=STATUS_CHOICES),
+        ),
+        migrations.AlterField(
+            model_name='historicalobservation',
+            name='status',
+            field=models.CharField(default='active', max_length=20, choices=STATUS_CHOICES),
+        ),
+        # Contributions already past their expiry date expire now; counts
+        # are rebuilt and extents recomputed
+        migrations.RunSQL(
+            "UPDATE contributions_observation SET status = 'expired', "
+            "updated_at = now() WHERE status IN ('active', 'review') "
+            "AND expiry_field <= now();",
+            migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            "DELETE FROM contributions_contributionstatistic; "
+            "INSERT INTO contributions_contributionstatistic "
+            "(project_id, category_id, status, creator_id, day, count) "
+            "SELECT project_id, category_id, status, creator_id, "
+            "(created_at AT TIME ZONE 'UTC')::date, COUNT(*) "
+            "FROM contributions_observation "
+            "WHERE status != 'deleted' "
+            "GROUP BY project_id, category_id, status, creator_id, "
+            "(created_at AT TIME ZONE 'UTC')::date; "
+            "UPDATE projects_projectextent SET dirty = true;",
+            migrations.RunSQL.noop
+        ),
+        # Live contributions, without expired ones, are read the most
+        migrations.RunSQL(
+            "CREATE INDEX contributions_observation_active_idx "
+            "ON contributions_observation (project_id, id) "
+            "WHERE status = 'active';",
+            "DROP INDEX contributions_observation_active_idx;"
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_regionlayer_region'),
+        ('contributions', '0033_observation_expired'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='regions',
+            field=models.ManyToManyField(related_name='locations', to='projects.Region'),
+        ),
+    ]
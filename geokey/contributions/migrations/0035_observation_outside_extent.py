@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0034_location_regions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='observation',
+            name='outside_extent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='historicalobservation',
+            name='outside_extent',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0035_observation_outside_extent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='processing_at',
+            field=models.DateTimeField(null=True, blank=True),
+        ),
+    ]
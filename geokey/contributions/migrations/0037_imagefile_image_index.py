@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import geokey.contributions.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0036_mediafile_processing_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagefile',
+            name='image',
+            field=models.ImageField(storage=geokey.contributions.storage.ContentAddressedStorage(), upload_to='user-uploads/images', db_index=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import geokey.contributions.storage
+
+
+def delete_public_bundles(apps, schema_editor):
+    ProjectBundle = apps.get_model('contributions', 'ProjectBundle')
+
+    # Bundles were stored under `MEDIA_ROOT`; they are removed and written
+    # again to private storage when requested next
+    for bundle in ProjectBundle.objects.all().iterator():
+        if bundle.file:
+            bundle.file.delete(save=False)
+
+    ProjectBundle.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0037_imagefile_image_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_public_bundles, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='projectbundle',
+            name='version',
+            field=models.CharField(max_length=40, null=True, blank=True),
+        ),
+        migrations.AddField(
+            model_name='projectbundle',
+            name='previous_file',
+            field=models.CharField(max_length=255, null=True, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='projectbundle',
+            name='file',
+            field=models.FileField(storage=geokey.contributions.storage.PrivateStorage(), upload_to='bundles', max_length=255, null=True, blank=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0038_projectbundle_private_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='observation',
+            name='status_before_expiry',
+            field=models.CharField(max_length=20, null=True, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalobservation',
+            name='status_before_expiry',
+            field=models.CharField(max_length=20, null=True, blank=True),
+        ),
+    ]
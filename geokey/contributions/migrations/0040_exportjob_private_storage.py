@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import geokey.contributions.storage
+
+
+def delete_public_exports(apps, schema_editor):
+    ExportJob = apps.get_model('contributions', 'ExportJob')
+
+    # Exports were stored under `MEDIA_ROOT`; they are removed and written
+    # again to private storage when requested next
+    for job in ExportJob.objects.all().iterator():
+        if job.file:
+            job.file.delete(save=False)
+
+    ExportJob.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0039_observation_status_before_expiry'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_public_exports, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file',
+            field=models.FileField(storage=geokey.contributions.storage.PrivateStorage(), upload_to='exports', max_length=255, null=True, blank=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 """Models for contributions."""
 
+import os
 import re
+import uuid
 
 from pytz import utc
 from datetime import datetime
@@ -10,9 +12,11 @@ from iso8601.iso8601 import ParseError
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.dispatch import receiver
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.contrib.gis.db import models as gis
+from django.contrib.auth.models import AnonymousUser
 
 try:
     from django.contrib.postgres.fields import JSONField
@@ -20,20 +24,33 @@ except ImportError:
     from django_pgjson.fields import JsonBField as JSONField
 from simple_history.models import HistoricalRecords
 
-from geokey.core.exceptions import InputError
+from geokey.core.exceptions import InputError, FileTypeError
+from geokey.core.history import (
+    HistoricalDeltaModel,
+    rebuild_record,
+    store_delta_on_pre_save
+)
 
 from .base import (
     OBSERVATION_STATUS,
     COMMENT_STATUS,
     COMMENT_REVIEW,
     LOCATION_STATUS,
-    MEDIA_STATUS
+    MEDIA_STATUS,
+    MEDIA_PROCESSING,
+    EXPORT_STATUS,
+    EXPIRING_STATUSES,
+    ACCEPTED_FILE_TYPES
 )
+from .storage import media_storage, private_storage
+from .enforcement import enforce_extent
 from .managers import (
     ObservationManager,
     LocationManager,
     CommentManager,
-    MediaFileManager
+    MediaFileManager,
+    MediaUploadManager,
+    ExportJobManager
 )
 
 
@@ -55,6 +72,10 @@ class Location(models.Model):
         default=LOCATION_STATUS.active,
         max_length=20
     )
+    regions = models.ManyToManyField(
+        'projects.Region',
+        related_name='locations'
+    )
 
     objects = LocationManager()
 
@@ -91,14 +112,24 @@ class Observation(models.Model):
     search_index = models.TextField(null=True, blank=True)
     display_field = models.TextField(null=True, blank=True)
     expiry_field = models.DateTimeField(null=True, blank=True)
+    status_before_expiry = models.CharField(
+        max_length=20,
+        null=True,
+        blank=True
+    )
     num_media = models.IntegerField(default=0)
     num_comments = models.IntegerField(default=0)
+    outside_extent = models.BooleanField(default=False)
 
-    history = HistoricalRecords()
+    history = HistoricalRecords(bases=[HistoricalDeltaModel])
     objects = ObservationManager()
 
     class Meta:
         ordering = ['-updated_at', 'id']
+        index_together = [
+            ('project', 'updated_at', 'id'),
+            ('project', 'created_at')
+        ]
 
     @classmethod
     def validate_partial(cls, category, data):
@@ -170,7 +201,9 @@ class Observation(models.Model):
         """
         Creates and returns a new observation. Validates all fields first and
         raises a ValidationError if at least one field did not validate.
-        Creates the object if all fields are valid.
+        Creates the object if all fields are valid. The geographic extent of
+        the project is enforced on the location, as set with
+        `settings.EXTENT_ENFORCEMENT`.
 
         Parameter
         ---------
@@ -195,6 +228,8 @@ class Observation(models.Model):
         if not properties:
             properties = {}
 
+        status, outside_extent = enforce_extent(project, location, status)
+
         location.save()
         observation = cls.objects.create(
             location=location,
@@ -202,7 +237,8 @@ class Observation(models.Model):
             project=project,
             properties=properties,
             creator=creator,
-            status=status
+            status=status,
+            outside_extent=outside_extent
         )
         return observation
 
@@ -268,6 +304,26 @@ class Observation(models.Model):
 
         self.expiry_field = value
 
+    def update_expiry_status(self):
+        """
+        Updates the status if the contribution is saved after the expiry
+        date: it expires, or it gets the status it had before it expired
+        again if the expiry date has been moved to the future (the default
+        status of the category if that is not known). Contributions expiring
+        later are processed in the background by
+        `geokey.contributions.expiry`.
+        """
+        now = datetime.utcnow().replace(tzinfo=utc)
+        expired = self.expiry_field is not None and self.expiry_field <= now
+
+        if expired and self.status in EXPIRING_STATUSES:
+            self.status_before_expiry = self.status
+            self.status = OBSERVATION_STATUS.expired
+        elif not expired and self.status == OBSERVATION_STATUS.expired:
+            self.status = (
+                self.status_before_expiry or self.category.default_status)
+            self.status_before_expiry = None
+
     def update_count(self):
         """
         Updates the count of media files attached and comments. Should be
@@ -276,7 +332,32 @@ class Observation(models.Model):
         instance = self.__class__._default_manager.get(pk=self.pk)  # refresh
         instance.num_media = instance.files_attached.count()
         instance.num_comments = instance.comments.count()
-        instance.save()
+        # Counts are derived data, there's no need to keep them in history
+        instance.save_without_historical_record()
+
+    def get_version(self, version):
+        """
+        Returns the observation as it was at the given version. Properties are
+        rebuilt when the history stores them as deltas.
+
+        Parameter
+        ---------
+        version : int
+            Version of the observation
+
+        Return
+        ------
+        HistoricalObservation
+            The latest historical record of the version
+
+        Raises
+        ------
+        HistoricalObservation.DoesNotExist
+            when the version does not exist
+        """
+        return rebuild_record(
+            self.history.filter(version=version).latest('history_id')
+        )
 
     def create_search_index(self):
         search_index = []
@@ -316,24 +397,153 @@ class Observation(models.Model):
 
     def delete(self):
         """
-        Deletes the observation by setting it's status to DELETED
+        Deletes the observation by setting it's status to DELETED. Updates
+        `updated_at`, so clients syncing the project remove it.
         """
         self.status = OBSERVATION_STATUS.deleted
+        self.updated_at = datetime.utcnow().replace(tzinfo=utc)
         self.save()
 
 
+# Properties are stored as deltas in the history, when compaction is enabled
+pre_save.connect(store_delta_on_pre_save, sender=Observation.history.model)
+
+
 @receiver(pre_save, sender=Observation)
 def pre_save_observation_update(sender, **kwargs):
     """
     Receiver that is called before an observation is saved. Updates
-    `search_index`, `display_field`, `expiry_field` properties.
+    `search_index`, `display_field`, `expiry_field` properties, and the
+    status if the contribution expired.
     """
     observation = kwargs.get('instance')
     observation.update_display_field()
     observation.update_expiry_field()
+    observation.update_expiry_status()
     observation.create_search_index()
 
 
+@receiver(pre_save, sender=Observation)
+def pre_save_observation_previous(sender, instance, **kwargs):
+    """
+    Receiver that is called before an observation is saved. Remembers the
+    stored status, location and category, to update the extents and
+    statistics of the project.
+    """
+    instance._previous = None
+
+    if instance.pk:
+        instance._previous = Observation._base_manager.filter(
+            pk=instance.pk
+        ).values_list('status', 'location_id', 'category_id').first()
+
+
+@receiver(post_save, sender=Observation)
+def post_save_observation_extent(sender, instance, created, **kwargs):
+    """
+    Receiver that is called after an observation is saved. Expands the
+    extent of its status; the extent of the previous status is recomputed
+    in the background if the status or location changed.
+    """
+    from .extents import expand_extent, mark_dirty
+
+    previous = getattr(instance, '_previous', None)
+
+    if previous and previous[:2] == (instance.status, instance.location_id):
+        return
+
+    expand_extent(instance.project_id, instance.status, instance.location_id)
+
+    if previous is not None:
+        mark_dirty([instance.project_id], [previous[0]])
+
+
+@receiver(post_save, sender=Observation)
+def post_save_observation_statistics(sender, instance, created, **kwargs):
+    """
+    Receiver that is called after an observation is saved. Moves the
+    observation between the counts of the statistics if its status or
+    category changed.
+    """
+    from .statistics import count_contribution
+
+    previous = getattr(instance, '_previous', None)
+    current = (instance.status, instance.category_id)
+
+    if previous is not None:
+        if (previous[0], previous[2]) == current:
+            return
+
+        count_contribution(instance, previous[0], previous[2], -1)
+
+    count_contribution(instance, instance.status, instance.category_id, 1)
+
+
+@receiver(post_save, sender=Observation)
+def post_save_observation_regions(sender, instance, created, **kwargs):
+    """
+    Receiver that is called after an observation is saved. Assigns its
+    location to the regions of the project if it is new or has been moved
+    to another location.
+    """
+    from .regions import assign_location
+
+    previous = getattr(instance, '_previous', None)
+
+    if previous is None or previous[1] != instance.location_id:
+        assign_location(instance.location, [instance.project_id])
+
+
+@receiver(post_delete, sender=Observation)
+def post_delete_observation_statistics(sender, instance, **kwargs):
+    """
+    Receiver that is called after an observation is removed from the
+    database, e.g. with its category.
+    """
+    from .statistics import count_contribution
+
+    count_contribution(instance, instance.status, instance.category_id, -1)
+
+
+@receiver(post_save, sender=Location)
+def post_save_location_extent(sender, instance, created, **kwargs):
+    """
+    Receiver that is called after a location is saved. Extents of projects
+    with contributions at the location are expanded, and recomputed in the
+    background as the geometry might have moved.
+    """
+    from .extents import expand_extent, mark_dirty
+
+    if created:
+        return
+
+    extents = set(Observation._base_manager.filter(
+        location=instance
+    ).values_list('project_id', 'status'))
+
+    for project_id, status in extents:
+        expand_extent(project_id, status, instance.id)
+
+    mark_dirty(set(project_id for project_id, status in extents))
+
+
+@receiver(post_save, sender=Location)
+def post_save_location_regions(sender, instance, created, **kwargs):
+    """
+    Receiver that is called after a location is saved. The location is
+    assigned to the regions of the projects with contributions at the
+    location again, as the geometry might have moved.
+    """
+    from .regions import assign_location
+
+    if created:
+        return
+
+    assign_location(instance, set(Observation._base_manager.filter(
+        location=instance
+    ).values_list('project_id', flat=True)))
+
+
 class Comment(models.Model):
     """
     A comment that is added to a contribution.
@@ -392,6 +602,23 @@ class MediaFile(models.Model):
         default=MEDIA_STATUS.active,
         max_length=20
     )
+    processing_status = models.CharField(
+        choices=MEDIA_PROCESSING,
+        default=MEDIA_PROCESSING.ready,
+        max_length=20
+    )
+    thumbnail_status = models.CharField(
+        choices=MEDIA_PROCESSING,
+        default=MEDIA_PROCESSING.queued,
+        max_length=20
+    )
+    processing_at = models.DateTimeField(null=True, blank=True)
+    thumb = models.ImageField(
+        upload_to='user-uploads/thumbnails',
+        max_length=500,
+        null=True,
+        blank=True
+    )
 
     objects = MediaFileManager()
 
@@ -422,7 +649,12 @@ class ImageFile(MediaFile):
     """
     Stores images uploaded by users.
     """
-    image = models.ImageField(upload_to='user-uploads/images')
+    image = models.ImageField(
+        upload_to='user-uploads/images',
+        storage=media_storage,
+        db_index=True
+    )
+    derivatives = JSONField(default=list, blank=True)
 
     class Meta:
         ordering = ['id']
@@ -445,8 +677,15 @@ class DocumentFile(MediaFile):
     """
     Stores documents uploaded by users.
     """
-    document = models.FileField(upload_to='user-uploads/documents')
-    thumbnail = models.ImageField(upload_to='user-uploads/documents', null=True)
+    document = models.FileField(
+        upload_to='user-uploads/documents',
+        storage=media_storage
+    )
+    thumbnail = models.ImageField(
+        upload_to='user-uploads/documents',
+        max_length=255,
+        null=True
+    )
 
     class Meta:
         ordering = ['id']
@@ -469,7 +708,10 @@ class VideoFile(MediaFile):
     """
     Stores videos uploaded by users.
     """
-    video = models.ImageField(upload_to='user-uploads/videos')
+    video = models.ImageField(
+        upload_to='user-uploads/videos',
+        storage=media_storage
+    )
     youtube_id = models.CharField(max_length=100)
     thumbnail = models.ImageField(upload_to='user-uploads/videos', null=True)
     youtube_link = models.URLField(max_length=255, null=True, blank=True)
@@ -496,7 +738,10 @@ class AudioFile(MediaFile):
     """
     Stores audio files uploaded by users.
     """
-    audio = models.FileField(upload_to='user-uploads/audio')
+    audio = models.FileField(
+        upload_to='user-uploads/audio',
+        storage=media_storage
+    )
 
     class Meta:
         ordering = ['id']
@@ -515,6 +760,363 @@ class AudioFile(MediaFile):
         return 'AudioFile'
 
 
+class MediaContent(models.Model):
+    """
+    Counts the references to content stored by
+    `geokey.contributions.storage.ContentAddressedStorage`, which is shared
+    by all media files with identical bytes.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    references = models.IntegerField(default=0)
+
+
+class MediaUpload(models.Model):
+    """
+    Stores a resumable upload of a media file. Chunks are appended to a
+    partial file until all bytes have been received, then the media file is
+    created from it.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    description = models.TextField(null=True, blank=True)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    contribution = models.ForeignKey(
+        'contributions.Observation', related_name='media_uploads'
+    )
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL)
+    media_file = models.ForeignKey(
+        'contributions.MediaFile',
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MediaUploadManager()
+
+    @property
+    def path(self):
+        """
+        Returns the path of the partial file.
+
+        Returns
+        -------
+        str
+            Path within `settings.MEDIA_ROOT`
+        """
+        return os.path.join(
+            settings.MEDIA_ROOT,
+            'user-uploads/partial',
+            '%s.part' % self.id
+        )
+
+    @property
+    def is_complete(self):
+        """
+        Returns `True` if all bytes have been received and the media file has
+        been created.
+        """
+        return self.media_file_id is not None
+
+    def append(self, stream, offset):
+        """
+        Appends a chunk to the partial file. The chunk is streamed to disk in
+        blocks of `CHUNK_SIZE`, so memory use does not depend on its size.
+        The file type is detected from the first bytes received, and the
+        media file is created once all bytes have been received.
+
+        Parameters
+        ----------
+        stream : file-like object
+            Stream the chunk is read from, e.g. the request body
+        offset : int
+            Offset the chunk starts at, must match the bytes received so far
+
+        Returns
+        -------
+        geokey.contributions.models.MediaFile
+            File created; None if the upload is not complete yet
+
+        Raises
+        ------
+        InputError
+            if the upload has been completed already, the offset does not
+            match or the chunk exceeds the size of the upload
+        FileTypeError
+            if the file type is not supported
+        """
+        if self.is_complete:
+            raise InputError('The upload has been completed already.')
+
+        if offset != self.offset:
+            raise InputError(
+                'Offset %s does not match the %s bytes received so far.' % (
+                    offset,
+                    self.offset
+                )
+            )
+
+        if not os.path.isdir(os.path.dirname(self.path)):
+            os.makedirs(os.path.dirname(self.path))
+
+        received = self.offset
+        with open(self.path, 'ab') as partial:
+            # Drop bytes written by an interrupted request
+            partial.truncate(self.offset)
+
+            while True:
+                block = stream.read(self.CHUNK_SIZE) if stream else None
+                if not block:
+                    break
+
+                received += len(block)
+                if received > self.size:
+                    partial.truncate(self.offset)
+                    raise InputError(
+                        'The chunk exceeds the size of the upload.'
+                    )
+
+                partial.write(block)
+
+        previous = self.offset
+        self.offset = received
+        self.save()
+
+        if previous < 1024 and (self.offset >= 1024 or
+                                self.offset == self.size):
+            self.check_file_type()
+
+        if self.offset == self.size:
+            return self.finish()
+
+    def check_file_type(self):
+        """
+        Detects the file type from the first bytes received, so unsupported
+        files are rejected before they are uploaded completely.
+
+        Raises
+        ------
+        FileTypeError
+            if the file type is not supported
+        """
+        with open(self.path, 'rb') as partial:
+            id_info, extension = MediaFileManager._get_file_id_data(partial)
+
+        if not any(i[0] in id_info for i in ACCEPTED_FILE_TYPES):
+            raise FileTypeError(
+                'Files of type {} ({}) are currently not supported.'.format(
+                    id_info,
+                    self.name
+                )
+            )
+
+    def finish(self):
+        """
+        Creates the media file from the partial file, which is removed.
+
+        Returns
+        -------
+        geokey.contributions.models.MediaFile
+            File created
+
+        Raises
+        ------
+        FileTypeError
+            if the file type is not supported
+        """
+        with open(self.path, 'rb') as partial:
+            the_file = File(partial, name=self.file_name)
+            the_file.content_type = self.content_type
+
+            media_file = MediaFile.objects.create(
+                name=self.name,
+                description=self.description,
+                contribution=self.contribution,
+                creator=self.creator,
+                the_file=the_file
+            )
+
+        os.remove(self.path)
+
+        self.media_file = media_file
+        self.save()
+
+        return media_file
+
+    def delete(self, *args, **kwargs):
+        """
+        Deletes the upload and its partial file.
+        """
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+        super(MediaUpload, self).delete(*args, **kwargs)
+
+
+class ExportJob(models.Model):
+    """
+    Stores an export of contributions generated in the background. The file
+    is reused for further exports with the same parameters, until the
+    contributions exported have changed. Files are kept in private storage
+    under a random name.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(
+        'projects.Project', related_name='export_jobs'
+    )
+    creator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True
+    )
+    export_format = models.CharField(max_length=10)
+    search = models.CharField(max_length=255, null=True, blank=True)
+    subset = models.IntegerField(null=True, blank=True)
+    bbox = models.CharField(max_length=255, null=True, blank=True)
+    fingerprint = models.CharField(max_length=40)
+    status = models.CharField(
+        choices=EXPORT_STATUS,
+        default=EXPORT_STATUS.queued,
+        max_length=20
+    )
+    chunks_total = models.IntegerField(default=0)
+    chunks_done = models.IntegerField(default=0)
+    file = models.FileField(
+        upload_to='exports',
+        storage=private_storage,
+        max_length=255,
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ExportJobManager()
+
+    @property
+    def progress(self):
+        """
+        Returns the share of chunks generated, between 0 and 1.
+        """
+        if self.status == EXPORT_STATUS.ready:
+            return 1.0
+
+        if not self.chunks_total:
+            return 0.0
+
+        return float(self.chunks_done) / self.chunks_total
+
+    @property
+    def user(self):
+        """
+        Returns the user the contributions are exported for; jobs of
+        anonymous users have no creator.
+        """
+        return self.creator or AnonymousUser()
+
+    def get_contributions(self):
+        """
+        Returns the contributions exported, with the same visibility and
+        filters as when listing them.
+
+        Returns
+        -------
+        django.db.models.query.QuerySet
+            geokey.contributions.models.Observation instances
+        """
+        return self.project.get_all_contributions(
+            self.user,
+            search=self.search,
+            subset=self.subset,
+            bbox=self.bbox
+        )
+
+    def delete(self, *args, **kwargs):
+        """
+        Deletes the job and its file.
+        """
+        if self.file:
+            self.file.delete(save=False)
+
+        super(ExportJob, self).delete(*args, **kwargs)
+
+
+class ContributionStatistic(models.Model):
+    """
+    Counts the contributions of a project created on a day, per category,
+    status and contributor. Counts are kept up to date when contributions
+    are saved or removed, so statistics are read from these rows only.
+    """
+    project = models.ForeignKey('projects.Project', related_name='statistics')
+    category = models.ForeignKey(
+        'categories.Category',
+        related_name='statistics'
+    )
+    status = models.CharField(max_length=20)
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('project', 'category', 'status', 'creator', 'day')
+        index_together = [('project', 'day')]
+
+
+class ProjectBundle(models.Model):
+    """
+    Stores a snapshot of a project for offline use, as a GeoPackage with the
+    project, its categories and the contributions accessible to the user.
+    The bundle is updated with the changes since the last sync, until the
+    access of the user changes. Files are kept in private storage under a
+    random name; the previous file is kept until the bundle is written again,
+    so downloads of it can finish.
+    """
+    project = models.ForeignKey('projects.Project', related_name='bundles')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True
+    )
+    thumbnails = models.BooleanField(default=False)
+    token = models.CharField(max_length=255, null=True, blank=True)
+    access = models.CharField(max_length=40, null=True, blank=True)
+    media = models.CharField(max_length=40, null=True, blank=True)
+    version = models.CharField(max_length=40, null=True, blank=True)
+    etag = models.CharField(max_length=40, null=True, blank=True)
+    file = models.FileField(
+        upload_to='bundles',
+        storage=private_storage,
+        max_length=255,
+        null=True,
+        blank=True
+    )
+    previous_file = models.CharField(max_length=255, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('project', 'user', 'thumbnails')
+
+    def delete(self, *args, **kwargs):
+        """
+        Deletes the bundle and its files.
+        """
+        if self.previous_file:
+            self.file.storage.delete(self.previous_file)
+
+        if self.file:
+            self.file.delete(save=False)
+
+        super(ProjectBundle, self).delete(*args, **kwargs)
+
+
 @receiver(post_save)
 def post_save_count_update(sender, instance, created, **kwargs):
     """
@@ -0,0 +1,499 @@
+"""Background processing of media files."""
+
+import os
+import re
+import logging
+import requests
+import tempfile
+import subprocess
+
+from pytz import utc
+from datetime import datetime, timedelta
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from easy_thumbnails.files import get_thumbnailer
+
+from geokey.core.signals import media_processed
+
+from .base import MEDIA_PROCESSING, THUMBNAIL_SIZE
+from .derivatives import create_derivatives, share_derivatives
+from .models import (
+    MediaFile,
+    ImageFile,
+    DocumentFile,
+    AudioFile,
+    VideoFile,
+    MediaUpload
+)
+from .utils import get_args, get_authenticated_service, initialize_upload
+
+
+logger = logging.getLogger(__name__)
+
+
+class YouTubeHost(object):
+    """
+    Publishes videos on YouTube.
+    """
+
+    def upload(self, video_file):
+        """
+        Uploads the video to YouTube
+
+        Parameter
+        ---------
+        video_file : geokey.contributions.models.VideoFile
+            The video file to be uploaded
+
+        Return
+        ------
+        str, str, str
+            Video ID, link to embed the video, SWF link
+        """
+        youtube = get_authenticated_service()
+        args = get_args(video_file.name, video_file.video.path)
+        video_id = initialize_upload(youtube, args)
+
+        return (
+            video_id,
+            'https://www.youtube.com/embed/%s' % video_id,
+            'https://www.youtube.com/v/%s' % video_id
+        )
+
+    def get_thumbnail_url(self, video_id):
+        """
+        Returns the URL of the preview image YouTube creates for the video
+        """
+        return 'http://img.youtube.com/vi/%s/0.jpg' % video_id
+
+
+class LocalVideoHost(object):
+    """
+    Stand-in for a video host, serving videos from the media storage. To be
+    used for tests and development.
+    """
+
+    def upload(self, video_file):
+        """
+        Returns the links to the stored video
+
+        Parameter
+        ---------
+        video_file : geokey.contributions.models.VideoFile
+            The video file to be "uploaded"
+
+        Return
+        ------
+        str, str, str
+            Video ID, link to embed the video, SWF link
+        """
+        video_id = os.path.splitext(os.path.basename(video_file.video.name))[0]
+        return video_id, video_file.video.url, None
+
+    def get_thumbnail_url(self, video_id):
+        """
+        Returns None, no preview images are created for stored videos
+        """
+        return None
+
+
+def get_video_host():
+    """
+    Returns the video host set in `settings.VIDEO_HOST`.
+    """
+    return import_string(settings.VIDEO_HOST)()
+
+
+def convert_audio(path):
+    """
+    Converts an audio file to MP3 using avconv.
+
+    Parameter
+    ---------
+    path : str
+        Path to the audio file
+
+    Return
+    ------
+    str
+        Path to the converted (temporary) file; None if the file contains a
+        video stream or the conversion failed
+    """
+    pipe = subprocess.Popen(
+        ['avconv', '-i', path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    output, error = pipe.communicate()
+
+    video_stream = re.compile(
+        r"Stream #\d*\.\d*.*:\s*Video",
+        re.MULTILINE
+    )
+
+    # Using error because output file is not specified
+    if video_stream.search(error.decode()):
+        return None
+
+    handle, converted_file = tempfile.mkstemp(suffix='.mp3')
+    os.close(handle)
+
+    pipe = subprocess.Popen(
+        [
+            'avconv', '-nostats', '-loglevel', '0', '-y', '-i', path,
+            '-c:a', 'libmp3lame', '-q:a', '4', '-ar', '44100',
+            converted_file
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    output, error = pipe.communicate()
+
+    if error:
+        os.remove(converted_file)
+        return None
+
+    return converted_file
+
+
+def process_audio_file(audio_file):
+    """
+    Converts the audio file to MP3 and replaces the original.
+
+    Parameter
+    ---------
+    audio_file : geokey.contributions.models.AudioFile
+        The audio file to be processed
+    """
+    converted_file = convert_audio(audio_file.audio.path)
+
+    if converted_file is not None:
+        original = audio_file.audio.name
+        filename = os.path.splitext(os.path.basename(original))[0]
+
+        with open(converted_file, 'rb') as the_file:
+            audio_file.audio.save(
+                '%s.mp3' % filename,
+                File(the_file),
+                save=False
+            )
+
+        audio_file.audio.storage.delete(original)
+        os.remove(converted_file)
+
+
+def process_video_file(video_file):
+    """
+    Uploads the video file to the video host.
+
+    Parameter
+    ---------
+    video_file : geokey.contributions.models.VideoFile
+        The video file to be processed
+    """
+    video_id, link, swf_link = get_video_host().upload(video_file)
+
+    video_file.youtube_id = video_id
+    video_file.youtube_link = link
+    video_file.swf_link = swf_link
+
+
+def create_document_thumbnail(document_file):
+    """
+    Renders the first page of the document as an image using ImageMagick.
+
+    Parameter
+    ---------
+    document_file : geokey.contributions.models.DocumentFile
+        The document the image is rendered for
+
+    Return
+    ------
+    django.db.models.fields.files.ImageFieldFile
+        The rendered image
+
+    Raises
+    ------
+    IOError
+        if the document can not be rendered
+    """
+    thumbnail_name = '%s_thumbnail.png' % document_file.document.name
+    storage = document_file.document.storage
+
+    document_file.thumbnail = thumbnail_name
+    if storage.exists(thumbnail_name):
+        # Rendered already for another file with identical content
+        return document_file.thumbnail
+
+    pipe = subprocess.Popen(
+        [
+            'convert', '-quality', '95', '-thumbnail', '500',
+            '%s[0]' % document_file.document.path,
+            storage.path(thumbnail_name)
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    output, error = pipe.communicate()
+
+    if pipe.returncode != 0:
+        raise IOError(error)
+
+    return document_file.thumbnail
+
+
+def download_video_thumbnail(video_file):
+    """
+    Downloads the preview image of the video from the video host.
+
+    Parameter
+    ---------
+    video_file : geokey.contributions.models.VideoFile
+        The video the preview image is downloaded for
+
+    Return
+    ------
+    django.db.models.fields.files.ImageFieldFile
+        The downloaded image; None if the video host does not provide one
+    """
+    url = get_video_host().get_thumbnail_url(video_file.youtube_id)
+    if url is None:
+        return None
+
+    request = requests.get(url, stream=True)
+    if request.status_code != requests.codes.ok:
+        return None
+
+    with tempfile.NamedTemporaryFile() as temporary_file:
+        # Read the streamed image in sections
+        for block in request.iter_content(1024 * 8):
+            temporary_file.write(block)
+
+        video_file.thumbnail.save(
+            '%s.jpg' % video_file.youtube_id,
+            File(temporary_file),
+            save=False
+        )
+
+    return video_file.thumbnail
+
+
+def create_thumbnail(media_file):
+    """
+    Creates the thumbnail of a media file, cropped to `THUMBNAIL_SIZE`. The
+    derivatives of images are created at the same time.
+
+    Parameter
+    ---------
+    media_file : geokey.contributions.models.MediaFile
+        The file the thumbnail is created for
+    """
+    source = None
+
+    if isinstance(media_file, ImageFile):
+        source = media_file.image
+        media_file.derivatives = (
+            share_derivatives(media_file) or
+            create_derivatives(media_file)
+        )
+    elif isinstance(media_file, DocumentFile):
+        source = media_file.thumbnail or create_document_thumbnail(media_file)
+    elif isinstance(media_file, VideoFile):
+        source = media_file.thumbnail or download_video_thumbnail(media_file)
+
+    if source:
+        thumb = get_thumbnailer(source).get_thumbnail({
+            'crop': True,
+            'size': THUMBNAIL_SIZE
+        })
+        media_file.thumb = thumb.name
+
+
+def process_thumbnail(media_file_id):
+    """
+    Creates the thumbnail of a media file. Files are claimed first, like in
+    `process_media_file`, and only once they have been processed.
+
+    Parameter
+    ---------
+    media_file_id : int
+        Identifies the media file in the database
+
+    Return
+    ------
+    geokey.contributions.models.MediaFile
+        The file; None if the thumbnail is not queued
+    """
+    claimed = MediaFile.objects.filter(
+        pk=media_file_id,
+        processing_status=MEDIA_PROCESSING.ready,
+        thumbnail_status=MEDIA_PROCESSING.queued
+    ).update(
+        thumbnail_status=MEDIA_PROCESSING.processing,
+        processing_at=datetime.utcnow().replace(tzinfo=utc)
+    )
+
+    if not claimed:
+        return None
+
+    media_file = MediaFile.objects.get(pk=media_file_id)
+
+    try:
+        create_thumbnail(media_file)
+        media_file.thumbnail_status = MEDIA_PROCESSING.ready
+    except Exception:
+        logger.exception(
+            'Creating the thumbnail of media file %s failed.', media_file_id)
+        media_file.thumbnail_status = MEDIA_PROCESSING.failed
+
+    media_file.save()
+
+    return media_file
+
+
+def process_media_file(media_file_id):
+    """
+    Processes a queued media file; transcodes audio files and uploads videos
+    to the video host, then creates the thumbnail. Sends the
+    `media_processed` signal when done.
+
+    The file is claimed first, so it is processed only once when several
+    workers are running.
+
+    Parameter
+    ---------
+    media_file_id : int
+        Identifies the media file in the database
+
+    Return
+    ------
+    geokey.contributions.models.MediaFile
+        The processed file; None if the file is not queued
+    """
+    claimed = MediaFile.objects.filter(
+        pk=media_file_id,
+        processing_status=MEDIA_PROCESSING.queued
+    ).update(
+        processing_status=MEDIA_PROCESSING.processing,
+        processing_at=datetime.utcnow().replace(tzinfo=utc)
+    )
+
+    if not claimed:
+        return None
+
+    media_file = MediaFile.objects.get(pk=media_file_id)
+
+    try:
+        if isinstance(media_file, AudioFile):
+            process_audio_file(media_file)
+        elif isinstance(media_file, VideoFile):
+            process_video_file(media_file)
+
+        media_file.processing_status = MEDIA_PROCESSING.ready
+    except Exception:
+        logger.exception('Processing media file %s failed.', media_file_id)
+        media_file.processing_status = MEDIA_PROCESSING.failed
+        media_file.thumbnail_status = MEDIA_PROCESSING.failed
+
+    media_file.save()
+    media_file = process_thumbnail(media_file_id) or media_file
+
+    media_processed.send(sender=media_file.__class__, mediafile=media_file)
+
+    return media_file
+
+
+def process_in_thread(media_file_id):
+    """
+    Processes a queued media file or thumbnail within a worker thread, and
+    closes the database connection of the thread when done.
+    """
+    try:
+        return (
+            process_media_file(media_file_id) or
+            process_thumbnail(media_file_id)
+        )
+    finally:
+        connection.close()
+
+
+def requeue_stale_media():
+    """
+    Queues media files and thumbnails again that have been processing for
+    longer than `settings.MEDIA_PROCESSING_TIMEOUT` minutes, e.g. because
+    the worker processing them died.
+
+    Return
+    ------
+    int
+        Number of files queued again
+    """
+    stale = Q(processing_at__isnull=True) | Q(
+        processing_at__lt=datetime.utcnow().replace(tzinfo=utc) -
+        timedelta(minutes=settings.MEDIA_PROCESSING_TIMEOUT)
+    )
+
+    return (
+        MediaFile.objects.filter(stale).filter(
+            processing_status=MEDIA_PROCESSING.processing
+        ).update(processing_status=MEDIA_PROCESSING.queued) +
+        MediaFile.objects.filter(stale).filter(
+            thumbnail_status=MEDIA_PROCESSING.processing
+        ).update(thumbnail_status=MEDIA_PROCESSING.queued)
+    )
+
+
+def process_queued_media(workers=None):
+    """
+    Processes all queued media files and thumbnails using a pool of worker
+    threads, after queueing stale ones again. Transcoding and uploads wait on
+    other processes or the network, so threads are sufficient.
+
+    Parameter
+    ---------
+    workers : int
+        Number of worker threads, defaults to
+        `settings.MEDIA_PROCESSING_WORKERS`
+
+    Return
+    ------
+    int
+        Number of files processed
+    """
+    requeue_stale_media()
+
+    media_file_ids = list(MediaFile.objects.filter(
+        Q(processing_status=MEDIA_PROCESSING.queued) |
+        Q(thumbnail_status=MEDIA_PROCESSING.queued)
+    ).order_by('id').values_list('id', flat=True))
+
+    if not media_file_ids:
+        return 0
+
+    pool = ThreadPool(workers or settings.MEDIA_PROCESSING_WORKERS)
+    try:
+        processed = pool.map(process_in_thread, media_file_ids)
+    finally:
+        pool.close()
+        pool.join()
+
+    return len([media_file for media_file in processed if media_file])
+
+
+def remove_expired_uploads():
+    """
+    Removes resumable uploads that have not been continued within
+    `settings.MEDIA_UPLOAD_EXPIRY` hours.
+
+    Return
+    ------
+    int
+        Number of uploads removed
+    """
+    return MediaUpload.objects.remove_expired()
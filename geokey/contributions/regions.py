@@ -0,0 +1,375 @@
+"""Region layers of projects, and assignment of locations to regions."""
+
+import json
+
+from pytz import utc
+from datetime import datetime
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count, Min, Max
+from django.contrib.gis.geos import MultiPolygon
+
+from geokey.core.exceptions import InputError
+from geokey.projects.models import RegionLayer, Region
+
+from .models import Location
+from .spatial import parse_polygon
+
+
+LocationRegion = Location.regions.through
+
+# Locations of contributions of the project within a range of IDs are
+# assigned to the intersecting regions of a layer, found with the spatial
+# index of regions
+ASSIGN_SQL = (
+    'INSERT INTO {table} (location_id, region_id) '
+    'SELECT DISTINCT l.id, r.id FROM contributions_location l '
+    'JOIN contributions_observation o ON o.location_id = l.id '
+    'JOIN projects_region r ON r.layer_id = %s '
+    'AND ST_Intersects(r.geometry, l.geometry::geometry) '
+    'WHERE o.project_id = %s AND l.id BETWEEN %s AND %s'
+)
+
+
+def parse_regions(features, name_property='name'):
+    """
+    Parses the regions of a layer from GeoJSON features.
+
+    Parameters
+    ----------
+    features : dict or list
+        GeoJSON feature collection, or list of features, of polygons.
+    name_property : str
+        Property the names of the regions are read from.
+
+    Returns
+    -------
+    list
+        Regions, not saved yet.
+
+    Raises
+    ------
+    InputError
+        When a feature is not a valid polygon.
+    """
+    if isinstance(features, dict):
+        features = features.get('features')
+
+    if not isinstance(features, list) or not features:
+        raise InputError('The regions must be a GeoJSON feature collection.')
+
+    regions = []
+    for index, feature in enumerate(features):
+        if not isinstance(feature, dict):
+            raise InputError('The regions must be GeoJSON features.')
+
+        geometry = parse_polygon(feature.get('geometry'))
+        if geometry.geom_type == 'Polygon':
+            geometry = MultiPolygon(geometry, srid=4326)
+
+        properties = feature.get('properties') or {}
+        regions.append(Region(
+            name=str(properties.get(name_property) or index + 1)[:100],
+            properties=properties,
+            geometry=geometry
+        ))
+
+    return regions
+
+
+def import_regions(project, user, name, features, name_property='name',
+                   description=None):
+    """
+    Imports a layer of regions. Locations of contributions of the project
+    are assigned to them in the background by the `assign_regions` command,
+    see `assign_queued_layers`.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        The project.
+    user : geokey.users.models.User
+        User importing the layer.
+    name : str
+        Name of the layer.
+    features : dict or list
+        GeoJSON features of the regions.
+    name_property : str
+        Property the names of the regions are read from.
+    description : str
+        Description of the layer.
+
+    Returns
+    -------
+    geokey.projects.models.RegionLayer
+        The layer.
+
+    Raises
+    ------
+    InputError
+        When the name or a feature is not valid.
+    """
+    if not name:
+        raise InputError('The layer must have a name.')
+
+    regions = parse_regions(features, name_property=name_property)
+
+    with transaction.atomic():
+        layer = RegionLayer.objects.create(
+            project=project,
+            creator=user,
+            name=name,
+            description=description
+        )
+
+        for region in regions:
+            region.layer = layer
+
+        Region.objects.bulk_create(regions)
+
+    return layer
+
+
+def get_location_chunks(project_id, chunk_size=None):
+    """
+    Splits the locations of contributions of a project into chunks of the
+    same number of locations, by their IDs.
+
+    Parameters
+    ----------
+    project_id : int
+        Identifies the project in the database.
+    chunk_size : int
+        Number of locations in each chunk;
+        `settings.REGION_ASSIGNMENT_CHUNK_SIZE` if not set.
+
+    Returns
+    -------
+    list
+        Tuples of the first and the last ID of each chunk.
+    """
+    chunk_size = chunk_size or settings.REGION_ASSIGNMENT_CHUNK_SIZE
+    locations = Location.objects.filter(
+        locations__project_id=project_id
+    ).distinct()
+    ids = locations.order_by().aggregate(
+        first_id=Min('id'),
+        last_id=Max('id')
+    )
+
+    if ids['first_id'] is None:
+        return []
+
+    chunks = []
+    first_id = ids['first_id']
+
+    while True:
+        last_id = locations.filter(id__gte=first_id).order_by(
+            'id').values_list('id', flat=True)[chunk_size - 1:chunk_size]
+        last_id = last_id[0] if last_id else ids['last_id']
+
+        chunks.append((first_id, last_id))
+
+        if last_id >= ids['last_id']:
+            return chunks
+
+        first_id = last_id + 1
+
+
+def assign_chunk(layer_id, project_id, first_id, last_id):
+    """
+    Assigns the locations of contributions of the project within a range of
+    IDs to the regions of a layer they intersect with, replacing their
+    previous assignments to the layer.
+
+    Parameters
+    ----------
+    layer_id : int
+        Identifies the layer in the database.
+    project_id : int
+        Identifies the project of the layer in the database.
+    first_id : int
+        ID of the first location.
+    last_id : int
+        ID of the last location.
+
+    Returns
+    -------
+    int
+        Number of assignments.
+    """
+    with transaction.atomic():
+        LocationRegion.objects.filter(
+            region__layer_id=layer_id,
+            location_id__gte=first_id,
+            location_id__lte=last_id
+        ).delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                ASSIGN_SQL.format(table=LocationRegion._meta.db_table),
+                [layer_id, project_id, first_id, last_id]
+            )
+            return cursor.rowcount
+
+
+def assign_chunk_in_process(args):
+    """
+    Assigns a chunk of locations within a worker process, and closes the
+    database connection of the process when done.
+    """
+    try:
+        return assign_chunk(*args)
+    finally:
+        connection.close()
+
+
+def assign_layer(layer, workers=None, chunk_size=None):
+    """
+    Assigns the locations of contributions to all regions of a layer, in
+    chunks of locations split across a pool of processes. Used by the
+    `assign_regions` command, not within requests.
+
+    Parameters
+    ----------
+    layer : geokey.projects.models.RegionLayer
+        The layer.
+    workers : int
+        Number of worker processes, defaults to `settings.REGION_WORKERS`;
+        chunks are assigned in the current process when set to 1.
+    chunk_size : int
+        Number of locations assigned at once.
+
+    Returns
+    -------
+    int
+        Number of assignments.
+    """
+    workers = workers or settings.REGION_WORKERS
+    chunks = [
+        (layer.id, layer.project_id, first_id, last_id)
+        for first_id, last_id in get_location_chunks(
+            layer.project_id,
+            chunk_size=chunk_size
+        )
+    ]
+
+    if workers <= 1 or len(chunks) <= 1:
+        assigned = sum(assign_chunk(*chunk) for chunk in chunks)
+    else:
+        for conn in connections.all():
+            conn.close()
+
+        pool = Pool(workers)
+        try:
+            assigned = sum(
+                pool.imap_unordered(assign_chunk_in_process, chunks))
+        finally:
+            pool.close()
+            pool.join()
+
+    RegionLayer.objects.filter(pk=layer.id).update(
+        assigned_at=datetime.utcnow().replace(tzinfo=utc))
+    return assigned
+
+
+def assign_queued_layers(workers=None, project_ids=None):
+    """
+    Assigns the locations of contributions to the regions of layers
+    imported since the last run.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes.
+    project_ids : list
+        Identify the projects whose layers are assigned; all if not set.
+
+    Returns
+    -------
+    list
+        Tuples of each layer and the number of assignments.
+    """
+    layers = RegionLayer.objects.filter(assigned_at__isnull=True)
+
+    if project_ids:
+        layers = layers.filter(project_id__in=project_ids)
+
+    return [
+        (layer, assign_layer(layer, workers=workers))
+        for layer in layers.order_by('id')
+    ]
+
+
+def assign_location(location, project_ids):
+    """
+    Assigns a location to the regions of projects it intersects with, e.g.
+    when it has been moved or used by a contribution. Assignments to
+    regions of other projects are kept.
+
+    Parameters
+    ----------
+    location : geokey.contributions.models.Location
+        The location.
+    project_ids : list
+        Identify the projects in the database.
+    """
+    project_ids = list(project_ids)
+
+    if not project_ids:
+        return
+
+    regions = Region.objects.filter(
+        layer__project_id__in=project_ids,
+        geometry__bboverlaps=location.geometry
+    ).only('id', 'geometry')
+    region_ids = set(
+        region.id for region in regions
+        if region.geometry.prepared.intersects(location.geometry)
+    )
+
+    assigned = LocationRegion.objects.filter(
+        location_id=location.id,
+        region__layer__project_id__in=project_ids
+    )
+    assigned.exclude(region_id__in=region_ids).delete()
+
+    region_ids -= set(assigned.values_list('region_id', flat=True))
+    LocationRegion.objects.bulk_create([
+        LocationRegion(location_id=location.id, region_id=region_id)
+        for region_id in region_ids
+    ])
+
+
+def get_region_counts(layer, contributions):
+    """
+    Counts contributions per region of a layer, joining the assignments.
+
+    Parameters
+    ----------
+    layer : geokey.projects.models.RegionLayer
+        The layer.
+    contributions : django.db.models.query.QuerySet
+        Contributions accessible to the user, e.g. from
+        `Project.get_all_contributions`.
+
+    Returns
+    -------
+    list
+        Regions, with ID, name, properties, geometry as GeoJSON and count.
+    """
+    counts = dict(contributions.filter(
+        location__regions__layer=layer
+    ).order_by().values_list('location__regions').annotate(
+        count=Count('id', distinct=True)
+    ))
+
+    return [{
+        'id': region.id,
+        'name': region.name,
+        'properties': region.properties,
+        'geometry': json.loads(region.geometry.json),
+        'count': counts.get(region.id, 0)
+    } for region in layer.regions.all()]
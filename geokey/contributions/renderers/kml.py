@@ -4,15 +4,22 @@ from django.template.loader import render_to_string
 
 from rest_framework.renderers import BaseRenderer
 
+from ..exports.schema import ExportSchema
+
 
 class KmlRenderer(BaseRenderer):
     media_type = 'application/vnd.google-earth.kml+xml'
     format = 'kml'
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Fields of all categories are loaded once for all placemarks
+        schema = ExportSchema(set(
+            place['meta']['category']['id'] for place in data
+        ))
+
         rendered = render_to_string(
             'geometries/placemarks.kml',
-            {'data': data}
+            {'data': data, 'schema': schema}
         )
 
         return rendered
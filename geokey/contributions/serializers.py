@@ -1,18 +1,9 @@
 """Serializers for contributions."""
 
-import requests
-import tempfile
-import subprocess
-
-from os.path import basename
-from PIL import Image
-
 from django.conf import settings
-from django.core import files
+from django.db import transaction
 from django.core.exceptions import PermissionDenied, ValidationError
-
-from easy_thumbnails.files import get_thumbnailer
-from easy_thumbnails.exceptions import InvalidImageFormatError
+from django.core.urlresolvers import reverse
 
 from rest_framework import serializers
 from rest_framework_gis import serializers as geoserializers
@@ -23,6 +14,8 @@ from geokey.categories.serializers import CategorySerializer
 from geokey.categories.models import Category
 from geokey.users.serializers import UserSerializer
 
+from .base import MEDIA_PROCESSING, EXPORT_STATUS, THUMBNAIL_PENDING
+from .delivery import get_derivative_key
 from .models import (
     Observation,
     Location,
@@ -31,7 +24,9 @@ from .models import (
     ImageFile,
     DocumentFile,
     VideoFile,
-    AudioFile
+    AudioFile,
+    MediaUpload,
+    ExportJob
 )
 
 
@@ -46,6 +41,16 @@ class LocationSerializer(geoserializers.GeoFeatureModelSerializer):
         write_only_fields = ('status',)
 
 
+class CompactLocationSerializer(geoserializers.GeoFeatureModelSerializer):
+    """
+    Serialiser for geokey.contribtions.models.Location, with the name only
+    """
+    class Meta:
+        model = Location
+        geo_field = 'geometry'
+        fields = ('id', 'name')
+
+
 class LocationContributionSerializer(serializers.ModelSerializer):
     """
     Serialiser for `Location`; to be used within `ContributionSerializer`.
@@ -295,22 +300,24 @@ class ContributionSerializer(BaseSerializer):
         project = self.context.get('project')
         meta = validated_data.pop('meta')
 
-        location_serializer = LocationContributionSerializer(
-            self.location,
-            data=validated_data.pop('location', None),
-            context=self.context
-        )
-        if location_serializer.is_valid():
-            location_serializer.save()
-
-        self.instance = Observation.create(
-            properties=validated_data.get('properties'),
-            creator=self.context.get('user'),
-            location=location_serializer.instance,
-            project=project,
-            category=meta.get('category'),
-            status=meta.pop('status', None)
-        )
+        # The location is not kept when the contribution is rejected
+        with transaction.atomic():
+            location_serializer = LocationContributionSerializer(
+                self.location,
+                data=validated_data.pop('location', None),
+                context=self.context
+            )
+            if location_serializer.is_valid():
+                location_serializer.save()
+
+            self.instance = Observation.create(
+                properties=validated_data.get('properties'),
+                creator=self.context.get('user'),
+                location=location_serializer.instance,
+                project=project,
+                category=meta.get('category'),
+                status=meta.pop('status', None)
+            )
 
         return self.instance
 
@@ -438,7 +445,8 @@ class ContributionSerializer(BaseSerializer):
                 'version': obj.version,
                 'isowner': isowner,
                 'num_media': obj.num_media,
-                'num_comments': obj.num_comments
+                'num_comments': obj.num_comments,
+                'outside_extent': obj.outside_extent
             },
             'location': {
                 'id': location.id,
@@ -463,17 +471,29 @@ class ContributionSerializer(BaseSerializer):
                 obj.category, context=self.context)
             feature['meta']['category'] = category_serializer.data
 
+            tree = Comment.objects.get_tree(obj)
+            context = dict(self.context)
+            context['tree'] = tree
+
             comment_serializer = CommentSerializer(
-                obj.comments.filter(respondsto=None),
+                tree.get(None, []),
                 many=True,
-                context=self.context
+                context=context
             )
             feature['comments'] = comment_serializer.data
 
             review_serializer = CommentSerializer(
-                obj.comments.filter(review_status='open'),
+                sorted(
+                    [
+                        comment
+                        for comments in tree.values()
+                        for comment in comments
+                        if comment.review_status == 'open'
+                    ],
+                    key=lambda comment: comment.id
+                ),
                 many=True,
-                context=self.context
+                context=context
             )
             feature['review_comments'] = review_serializer.data
 
@@ -502,7 +522,10 @@ class CommentSerializer(serializers.ModelSerializer):
 
     def to_representation(self, obj):
         """
-        Returns native represenation of the Comment. Adds responses to comment
+        Returns native represenation of the Comment. Adds responses to comment,
+        from `tree` in the context (see `CommentManager.get_tree`) if set, so
+        no queries are needed. Responses are nested up to `max_depth` levels
+        if set in the context.
 
         Parameter
         ---------
@@ -516,10 +539,25 @@ class CommentSerializer(serializers.ModelSerializer):
 
         """
         native = super(CommentSerializer, self).to_representation(obj)
+
+        depth = self.context.get('depth', 0)
+        max_depth = self.context.get('max_depth')
+        tree = self.context.get('tree')
+
+        if max_depth is not None and depth >= max_depth:
+            responses = []
+        elif tree is not None:
+            responses = tree.get(obj.id, [])
+        else:
+            responses = obj.responses.all()
+
+        context = dict(self.context)
+        context['depth'] = depth + 1
+
         native['responses'] = CommentSerializer(
-            obj.responses.all(),
+            responses,
             many=True,
-            context=self.context
+            context=context
         ).data
 
         return native
@@ -554,12 +592,14 @@ class FileSerializer(serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
     file_type = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
+    derivatives = serializers.SerializerMethodField()
 
     class Meta:
         model = MediaFile
         fields = (
             'id', 'name', 'description', 'created_at', 'creator', 'isowner',
-            'url', 'thumbnail_url', 'file_type'
+            'url', 'thumbnail_url', 'derivatives', 'file_type',
+            'processing_status', 'thumbnail_status'
         )
 
     def get_file_type(self, obj):
@@ -610,8 +650,14 @@ class FileSerializer(serializers.ModelSerializer):
         Returns
         -------
         str
-            The URL to embed the file on client side
+            The URL to embed the file on client side; the URL of the media
+            delivery API if `settings.MEDIA_PROTECTED` is set
         """
+        if settings.MEDIA_PROTECTED and not isinstance(obj, VideoFile):
+            return reverse('api:media_file_content', kwargs={
+                'file_id': obj.id
+            })
+
         if isinstance(obj, ImageFile):
             return obj.image.url
         if isinstance(obj, DocumentFile):
@@ -621,32 +667,56 @@ class FileSerializer(serializers.ModelSerializer):
         elif isinstance(obj, AudioFile):
             return obj.audio.url
 
-    def _get_thumb(self, image, size=(300, 300)):
+    def get_derivatives(self, obj):
         """
-        Returns the thumbnail of the media file base on the size privoded
+        Returns the manifest of scaled-down variants of an image, so clients
+        can download the variant closest to the size it is displayed at
 
         Parameter
         ---------
-        image : Image
-            The image to be thumbnailed
-        size : tuple
-            Width and height of the thumbnail, defaults to 300 by 300
+        obj : geokey.contributions.models.MediaFile
+            The instance that is serialised
 
         Returns
         -------
-        Image
-            The thumbnail
-        """
-        thumbnailer = get_thumbnailer(image)
-        thumb = thumbnailer.get_thumbnail({
-            'crop': True,
-            'size': size
-        })
-        return thumb
+        list
+            Variants with `size`, `width`, `height`, `format` and `url`; empty
+            if the file is not an image or no variants have been created. The
+            URLs are of the media delivery API if `settings.MEDIA_PROTECTED`
+            is set
+        """
+        if not isinstance(obj, ImageFile):
+            return []
+
+        storage = obj.image.storage
+        derivatives = []
+
+        for derivative in obj.derivatives or []:
+            if settings.MEDIA_PROTECTED:
+                url = '%s?derivative=%s' % (
+                    reverse('api:media_file_content', kwargs={
+                        'file_id': obj.id
+                    }),
+                    get_derivative_key(derivative)
+                )
+            else:
+                url = storage.url(derivative['name'])
+
+            derivatives.append({
+                'size': derivative['size'],
+                'width': derivative['width'],
+                'height': derivative['height'],
+                'format': derivative['format'],
+                'url': url
+            })
+
+        return derivatives
 
     def get_thumbnail_url(self, obj):
         """
-        Creates and returns a thumbnail for the MediaFile object
+        Returns the URL of the thumbnail for the MediaFile object. Thumbnails
+        are created when files are processed; a placeholder is returned while
+        the thumbnail is pending.
 
         Parameter
         ---------
@@ -658,89 +728,95 @@ class FileSerializer(serializers.ModelSerializer):
         str
             The url to embed thumbnails on client side
         """
-        if isinstance(obj, ImageFile):
-            # Some of the imported image files in the original community maps
-            # seem to be broken. The error thrown when the image can not be
-            # read is caught here.
-            try:
-                return self._get_thumb(obj.image).url
-            except (
-                IOError,
-                InvalidImageFormatError
-            ):
-                return ''
-
-        elif isinstance(obj, DocumentFile):
-            if obj.thumbnail:
-                # thumbnail has been generated, return the link
-                return self._get_thumb(obj.thumbnail).url
-
-            thumbnail_name = '%s_thumbnail.png' % obj.document
-
-            # Save placeholder for current thumb which will be generated
-            obj.thumbnail = thumbnail_name
-            obj.save()
-
-            pipe = subprocess.Popen(
-                'convert -quality 95 -thumbnail %s %s/%s[0] %s/%s' % (
-                    500,  # width of a generated thumb
-                    settings.MEDIA_ROOT,
-                    obj.document,
-                    settings.MEDIA_ROOT,
-                    '%s_thumbnail.png' % obj.document
-                ),
-                shell=True,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            output, error = pipe.communicate()
+        if obj.thumbnail_status == MEDIA_PROCESSING.ready and obj.thumb:
+            if settings.MEDIA_PROTECTED:
+                return '%s?variant=thumbnail' % reverse(
+                    'api:media_file_content',
+                    kwargs={'file_id': obj.id}
+                )
 
-            if error:
-                return None
+            return obj.thumb.url
 
-            w, h = Image.open(obj.thumbnail).size
+        if isinstance(obj, (VideoFile, AudioFile)):
+            return '/static/img/play.png'
 
-            # Crop and replace thumb based on whether height or width is smaller
-            thumb = self._get_thumb(obj.thumbnail, size=(min(w, h), min(w, h)))
-            obj.thumbnail.save(basename(obj.document.name), thumb)
+        if obj.thumbnail_status in [
+            MEDIA_PROCESSING.queued,
+            MEDIA_PROCESSING.processing
+        ]:
+            return THUMBNAIL_PENDING
 
-            return self._get_thumb(obj.thumbnail).url
+        # Some of the imported image files in the original community maps
+        # seem to be broken, no thumbnail can be created for them.
+        return ''
 
-        elif isinstance(obj, VideoFile):
-            if obj.thumbnail:
-                # thumbnail has been downloaded, return the link
-                return self._get_thumb(obj.thumbnail).url
 
-            request = requests.get(
-                'http://img.youtube.com/vi/%s/0.jpg' % obj.youtube_id,
-                stream=True
-            )
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """
+    Serialiser for geokey.contributions.models.MediaUpload instances
+    """
+    file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MediaUpload
+        fields = (
+            'id', 'name', 'description', 'file_name', 'content_type', 'size',
+            'offset', 'created_at', 'file'
+        )
 
-            if request.status_code != requests.codes.ok:
-                # Image not found, return placeholder thumbnail
-                return '/static/img/play.png'
+    def get_file(self, obj):
+        """
+        Returns the media file created, once the upload is complete
+
+        Parameter
+        ---------
+        obj : geokey.contributions.models.MediaUpload
+            The instance that is serialised
+
+        Returns
+        -------
+        dict
+            The serialised media file; None if the upload is not complete
+        """
+        if not obj.is_complete:
+            return None
 
-            lf = tempfile.NamedTemporaryFile()
-            # Read the streamed image in sections
-            for block in request.iter_content(1024 * 8):
+        media_file = MediaFile.objects.get(pk=obj.media_file_id)
+        return FileSerializer(media_file, context=self.context).data
 
-                # If no more file then stop
-                if not block:
-                    break
 
-                # Write image block to temporary file
-                lf.write(block)
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Serialiser for geokey.contributions.models.ExportJob instances
+    """
+    progress = serializers.ReadOnlyField()
+    url = serializers.SerializerMethodField()
 
-            file_name = obj.youtube_id + '.jpg'
-            obj.thumbnail.save(file_name, files.File(lf))
+    class Meta:
+        model = ExportJob
+        fields = (
+            'id', 'export_format', 'search', 'subset', 'bbox', 'status',
+            'progress', 'created_at', 'url'
+        )
 
-            w, h = Image.open(obj.thumbnail).size
+    def get_url(self, obj):
+        """
+        Returns the URL the file is downloaded from, once the job is ready
 
-            thumb = self._get_thumb(obj.thumbnail, size=(h, h))
-            obj.thumbnail.save(file_name, thumb)
+        Parameter
+        ---------
+        obj : geokey.contributions.models.ExportJob
+            The instance that is serialised
 
-            return self._get_thumb(obj.thumbnail).url
+        Returns
+        -------
+        str
+            URL of the file; None if the job is not ready
+        """
+        if obj.status != EXPORT_STATUS.ready:
+            return None
 
-        elif isinstance(obj, AudioFile):
-            return '/static/img/play.png'
+        return reverse('api:project_export_job_file', kwargs={
+            'project_id': obj.project_id,
+            'job_id': obj.id
+        })
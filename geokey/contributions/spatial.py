@@ -0,0 +1,243 @@
+"""Parsing of spatial filters for contributions."""
+
+import json
+
+import six
+
+from django.contrib.gis.geos import GEOSGeometry, GEOSException, Point, Polygon
+
+from geokey.core.exceptions import InputError
+
+
+POLYGON_TYPES = ('Polygon', 'MultiPolygon')
+PREDICATES = ('intersects', 'within')
+
+
+def parse_numbers(value, count, name):
+    """
+    Parses a list of numbers, given as comma-separated string or list.
+
+    Parameters
+    ----------
+    value : str or list
+        The numbers.
+    count : int
+        Number of numbers expected.
+    name : str
+        Name of the parameter, used in the error message.
+
+    Returns
+    -------
+    list
+        Floats.
+
+    Raises
+    ------
+    InputError
+        When the value is not a list of `count` numbers.
+    """
+    if isinstance(value, six.string_types):
+        value = value.split(',')
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+
+    try:
+        numbers = [float(number) for number in value]
+    except (TypeError, ValueError):
+        numbers = []
+
+    if len(numbers) != count:
+        raise InputError(
+            'The parameter %s must be %s comma-separated numbers.' %
+            (name, count)
+        )
+
+    return numbers
+
+
+def parse_bbox(bbox):
+    """
+    Parses a bounding box.
+
+    Parameters
+    ----------
+    bbox : str
+        xmin,ymin,xmax,ymax
+
+    Returns
+    -------
+    django.contrib.gis.geos.Polygon
+        The bounding box.
+
+    Raises
+    ------
+    InputError
+        When the bounding box is not valid.
+    """
+    xmin, ymin, xmax, ymax = parse_numbers(bbox, 4, 'bbox')
+
+    if xmin > xmax or ymin > ymax:
+        raise InputError(
+            'The parameter bbox must follow the OSGeo standards '
+            '(e.g. bbox=xmin,ymin,xmax,ymax).'
+        )
+
+    polygon = Polygon.from_bbox((xmin, ymin, xmax, ymax))
+    polygon.srid = 4326
+    return polygon
+
+
+def parse_point(point):
+    """
+    Parses a point.
+
+    Parameters
+    ----------
+    point : str or list
+        Longitude and latitude, e.g. `-0.13,51.52`.
+
+    Returns
+    -------
+    django.contrib.gis.geos.Point
+        The point.
+
+    Raises
+    ------
+    InputError
+        When the point is not valid.
+    """
+    lng, lat = parse_numbers(point, 2, 'near')
+
+    if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+        raise InputError('The parameter near must be a longitude and '
+                         'latitude.')
+
+    return Point(lng, lat, srid=4326)
+
+
+def parse_polygon(geometry):
+    """
+    Parses a GeoJSON polygon.
+
+    Parameters
+    ----------
+    geometry : dict or str
+        GeoJSON geometry of type `Polygon` or `MultiPolygon`.
+
+    Returns
+    -------
+    django.contrib.gis.geos.GEOSGeometry
+        The polygon.
+
+    Raises
+    ------
+    InputError
+        When the geometry is not a valid polygon.
+    """
+    if isinstance(geometry, dict):
+        geometry = json.dumps(geometry)
+
+    try:
+        polygon = GEOSGeometry(geometry)
+    except (GEOSException, TypeError, ValueError):
+        polygon = None
+
+    if polygon is None or polygon.geom_type not in POLYGON_TYPES:
+        raise InputError('The parameter geometry must be a GeoJSON polygon.')
+
+    if not polygon.valid:
+        raise InputError('The polygon is not valid: %s.' %
+                         polygon.valid_reason)
+
+    polygon.srid = 4326
+    return polygon
+
+
+def parse_positive(value, name, cast=float):
+    """
+    Parses a positive number.
+
+    Raises
+    ------
+    InputError
+        When the value is not a positive number.
+    """
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        value = 0
+
+    if value <= 0:
+        raise InputError('The parameter %s must be a positive number.' % name)
+
+    return value
+
+
+def filter_spatially(contributions, params):
+    """
+    Applies spatial filters to contributions:
+
+    - `geometry` and `predicate`: contributions intersecting (default) or
+      within a GeoJSON polygon;
+    - `near` and `radius`: contributions within a radius in metres of a
+      point;
+    - `near` and `nearest`: the nearest contributions to a point.
+
+    Contributions are ordered by distance whenever `near` is set.
+
+    Parameters
+    ----------
+    contributions : geokey.contributions.managers.ObservationQuerySet
+        Contributions accessible to the user, e.g. from
+        `Project.get_all_contributions`.
+    params : dict
+        Parameters of the request, either the query string or the body.
+
+    Returns
+    -------
+    geokey.contributions.managers.ObservationQuerySet
+        Contributions filtered.
+
+    Raises
+    ------
+    InputError
+        When a parameter is not valid.
+    """
+    geometry = params.get('geometry')
+    if geometry:
+        predicate = params.get('predicate') or 'intersects'
+
+        if predicate not in PREDICATES:
+            raise InputError('The parameter predicate must be one of %s.' %
+                             ', '.join(PREDICATES))
+
+        contributions = contributions.get_by_geometry(
+            parse_polygon(geometry),
+            predicate
+        )
+
+    near = params.get('near')
+    radius = params.get('radius')
+    nearest = params.get('nearest')
+
+    if (radius or nearest) and not near:
+        raise InputError('The parameter near is required for radius and '
+                         'nearest.')
+
+    if near:
+        point = parse_point(near)
+
+        if radius:
+            contributions = contributions.get_by_radius(
+                point,
+                parse_positive(radius, 'radius')
+            )
+
+        contributions = contributions.order_by_distance(point)
+
+        if nearest:
+            contributions = contributions[
+                :parse_positive(nearest, 'nearest', cast=int)
+            ]
+
+    return contributions
@@ -0,0 +1,288 @@
+"""Statistics of the contributions of projects."""
+
+from pytz import utc
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Q, F, Sum, Count
+
+from geokey.core.exceptions import InputError
+
+from .base import OBSERVATION_STATUS
+from .models import ContributionStatistic
+
+
+REBUILD_SQL = (
+    'INSERT INTO contributions_contributionstatistic '
+    '(project_id, category_id, status, creator_id, day, count) '
+    'SELECT project_id, category_id, status, creator_id, '
+    '(created_at AT TIME ZONE \'UTC\')::date, COUNT(*) '
+    'FROM contributions_observation '
+    'WHERE status != %s{projects} '
+    'GROUP BY project_id, category_id, status, creator_id, '
+    '(created_at AT TIME ZONE \'UTC\')::date'
+)
+
+LIVE_DAY = (
+    'date("contributions_observation"."created_at" AT TIME ZONE \'UTC\')'
+)
+
+
+def count_contribution(observation, status, category_id, delta):
+    """
+    Adds a contribution to the counts of its day, or removes it. Deleted
+    contributions are not counted.
+
+    Parameters
+    ----------
+    observation : geokey.contributions.models.Observation
+        The contribution.
+    status : str
+        Status the contribution is counted for.
+    category_id : int
+        Category the contribution is counted for.
+    delta : int
+        1 to add the contribution, -1 to remove it.
+    """
+    if status == OBSERVATION_STATUS.deleted or observation.created_at is None:
+        return
+
+    lookup = {
+        'project_id': observation.project_id,
+        'category_id': category_id,
+        'status': status,
+        'creator_id': observation.creator_id,
+        'day': observation.created_at.astimezone(utc).date()
+    }
+    statistics = ContributionStatistic.objects.filter(**lookup)
+
+    if statistics.update(count=F('count') + delta):
+        return
+
+    try:
+        with transaction.atomic():
+            ContributionStatistic.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # Created by a concurrent request in the meantime
+        statistics.update(count=F('count') + delta)
+
+
+def rebuild_statistics(project_ids=None):
+    """
+    Rebuilds the counts from the contributions, e.g. when they were changed
+    without signals being sent.
+
+    Parameters
+    ----------
+    project_ids : list
+        Identify the projects in the database; all projects if not set.
+    """
+    params = [OBSERVATION_STATUS.deleted]
+    projects = ''
+    statistics = ContributionStatistic.objects.all()
+
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        params.append(project_ids)
+        projects = ' AND project_id = ANY(%s)'
+        statistics = statistics.filter(project_id__in=project_ids)
+
+    with transaction.atomic():
+        statistics.delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute(REBUILD_SQL.format(projects=projects), params)
+
+
+def parse_day(value, name):
+    """
+    Parses a day given as YYYY-MM-DD.
+
+    Raises
+    ------
+    InputError
+        When the value is not a valid day.
+    """
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise InputError('The parameter %s must be a date (YYYY-MM-DD).' %
+                         name)
+
+
+def get_visibility(project, user):
+    """
+    Returns the filter for counts of contributions the user can access, with
+    the same rules as `ObservationQuerySet.for_moderator` and `for_viewer`.
+    """
+    if project.is_admin(user) or project.can_moderate(user):
+        return ~Q(status=OBSERVATION_STATUS.draft) | Q(creator=user)
+
+    visible = Q(status__in=[
+        OBSERVATION_STATUS.active,
+        OBSERVATION_STATUS.review
+    ])
+
+    if user.is_anonymous():
+        return visible
+
+    return visible | Q(creator=user, status__in=[
+        OBSERVATION_STATUS.draft,
+        OBSERVATION_STATUS.pending,
+        OBSERVATION_STATUS.expired
+    ])
+
+
+def get_subset_categories(project, subset):
+    """
+    Returns the categories of a subset if it filters by categories only, so
+    it can be applied to the counts.
+
+    Returns
+    -------
+    list
+        IDs of the categories; None if the subset filters by field values or
+        dates as well.
+    """
+    filters = project.subsets.get(pk=subset).filters or {}
+
+    if any(rules for rules in filters.values()):
+        return None
+
+    return [int(category_id) for category_id in filters.keys()]
+
+
+def has_data_filters(project, user):
+    """
+    Checks if the access of the user is restricted by filters of user groups.
+    """
+    if project.is_admin(user) or not project.isprivate or \
+            user.is_anonymous():
+        return False
+
+    return project.usergroups.filter(
+        users=user,
+        where_clause__isnull=False
+    ).exists()
+
+
+def summarise(queryset, count, day):
+    """
+    Aggregates counts per category, status, contributor and day.
+
+    Parameters
+    ----------
+    queryset : django.db.models.query.QuerySet
+        Counts or contributions.
+    count : django.db.models.Aggregate
+        Aggregate counting the rows.
+    day : str
+        Name of the column with the day.
+
+    Returns
+    -------
+    dict
+        The statistics.
+    """
+    queryset = queryset.order_by()
+
+    categories = queryset.values('category_id').annotate(count=count)
+    statuses = queryset.values('status').annotate(count=count)
+    contributors = queryset.values(
+        'creator_id',
+        'creator__display_name'
+    ).annotate(count=count)
+    days = queryset.values(day).annotate(count=count).order_by(day)
+
+    return {
+        'total': sum(row['count'] for row in statuses),
+        'categories': [
+            {'id': row['category_id'], 'count': row['count']}
+            for row in categories
+        ],
+        'statuses': dict((row['status'], row['count']) for row in statuses),
+        'contributors': [
+            {
+                'id': row['creator_id'],
+                'display_name': row['creator__display_name'],
+                'count': row['count']
+            }
+            for row in sorted(contributors, key=lambda row: -row['count'])
+        ],
+        'days': [
+            {'day': str(row[day]), 'count': row['count']}
+            for row in days
+        ]
+    }
+
+
+def get_statistics(project, user, subset=None, date_from=None, date_to=None):
+    """
+    Returns statistics of the contributions of a project the user can
+    access, created within a range of days. They are read from the daily
+    counts unless the user's access or the subset filter by field values;
+    the contributions are aggregated in the database then.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        The project.
+    user : geokey.users.models.User
+        User the statistics are requested by.
+    subset : int
+        Subset the contributions are filtered by.
+    date_from : str
+        First day, as YYYY-MM-DD.
+    date_to : str
+        Last day, as YYYY-MM-DD.
+
+    Returns
+    -------
+    dict
+        Total and counts per category, status, contributor and day.
+
+    Raises
+    ------
+    InputError
+        When a day is not valid.
+    """
+    date_from = parse_day(date_from, 'from') if date_from else None
+    date_to = parse_day(date_to, 'to') if date_to else None
+
+    categories = None
+    if subset:
+        categories = get_subset_categories(project, subset)
+
+    if (subset and categories is None) or has_data_filters(project, user):
+        contributions = project.get_all_contributions(user, subset=subset)
+
+        if date_from:
+            contributions = contributions.filter(created_at__gte=datetime(
+                date_from.year, date_from.month, date_from.day, tzinfo=utc))
+
+        if date_to:
+            contributions = contributions.filter(created_at__lt=datetime(
+                date_to.year, date_to.month, date_to.day, tzinfo=utc
+            ) + timedelta(days=1))
+
+        return summarise(
+            contributions.extra(select={'day': LIVE_DAY}),
+            Count('id', distinct=True),
+            'day'
+        )
+
+    statistics = ContributionStatistic.objects.filter(
+        get_visibility(project, user),
+        project=project
+    )
+
+    if categories is not None:
+        statistics = statistics.filter(category_id__in=categories)
+
+    if date_from:
+        statistics = statistics.filter(day__gte=date_from)
+
+    if date_to:
+        statistics = statistics.filter(day__lte=date_to)
+
+    return summarise(statistics, Sum('count'), 'day')
@@ -0,0 +1,175 @@
+"""Content-addressed storage of media files, and storage of private files."""
+
+import os
+import re
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import F
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+CONTENT_ADDRESSED_NAME = re.compile(r'(^|/)[0-9a-f]{64}(\.[^/.]*)?$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores files under the SHA-256 hash of their content, so identical files
+    are only stored once, e.g. `user-uploads/images/<hash>.jpg`. The hash is
+    computed while the file is written.
+
+    Each save adds a reference to the stored content, and each delete removes
+    one; the file is only removed once no references remain. Files stored
+    before are removed right away.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        """
+        Returns the name as it is; the final name is derived from the content
+        when the file is saved.
+        """
+        return name
+
+    def is_content_addressed(self, name):
+        """
+        Returns `True` if the file has been stored under the hash of its
+        content.
+
+        Parameters
+        ----------
+        name : str
+            Name of the file in the storage.
+
+        Returns
+        -------
+        bool
+        """
+        return bool(CONTENT_ADDRESSED_NAME.search(name))
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+
+        full_directory = self.path(directory)
+        if not os.path.isdir(full_directory):
+            os.makedirs(full_directory)
+
+        handle, temporary = tempfile.mkstemp(dir=full_directory, prefix='.')
+        content_hash = hashlib.sha256()
+        size = 0
+
+        with os.fdopen(handle, 'wb') as temporary_file:
+            for chunk in content.chunks():
+                content_hash.update(chunk)
+                temporary_file.write(chunk)
+                size += len(chunk)
+
+        name = os.path.join(directory, content_hash.hexdigest() + extension)
+        path = self.path(name)
+
+        with transaction.atomic():
+            self._lock(name, size)
+
+            if os.path.exists(path):
+                os.remove(temporary)
+            else:
+                os.chmod(temporary, self.file_permissions_mode or 0o644)
+                os.rename(temporary, path)
+
+            self.add_reference(name)
+
+        return name
+
+    def _lock(self, name, size=0):
+        """
+        Locks the record of stored content, which is created first if needed.
+        Saves and deletes of the same content are serialised this way.
+        """
+        from .models import MediaContent
+
+        try:
+            with transaction.atomic():
+                MediaContent.objects.get_or_create(
+                    name=name,
+                    defaults={'size': size}
+                )
+        except IntegrityError:
+            # Created by another process at the same time
+            pass
+
+        return MediaContent.objects.select_for_update().get(name=name)
+
+    def add_reference(self, name):
+        """
+        Adds a reference to stored content, e.g. when a derivative is shared
+        by another file.
+
+        Parameters
+        ----------
+        name : str
+            Name of the file in the storage.
+        """
+        from .models import MediaContent
+
+        MediaContent.objects.filter(name=name).update(
+            references=F('references') + 1
+        )
+
+    def delete(self, name):
+        """
+        Removes a reference to stored content, and the file once no
+        references remain.
+
+        Parameters
+        ----------
+        name : str
+            Name of the file in the storage.
+        """
+        from .models import MediaContent
+
+        with transaction.atomic():
+            content = MediaContent.objects.select_for_update().filter(
+                name=name
+            ).first()
+
+            if content is not None:
+                if content.references > 1:
+                    MediaContent.objects.filter(pk=content.pk).update(
+                        references=F('references') - 1
+                    )
+                    return
+
+                content.delete()
+
+            super(ContentAddressedStorage, self).delete(name)
+
+
+@deconstructible
+class PrivateStorage(FileSystemStorage):
+    """
+    Stores files only delivered through the API, e.g. bundles of projects, in
+    `settings.PRIVATE_MEDIA_ROOT`, which is not served publicly. Defaults to
+    `private` next to `MEDIA_ROOT`.
+    """
+
+    def __init__(self):
+        location = settings.PRIVATE_MEDIA_ROOT or os.path.join(
+            os.path.dirname(settings.MEDIA_ROOT.rstrip(os.sep)),
+            'private'
+        )
+        super(PrivateStorage, self).__init__(location=location)
+
+    @property
+    def delivery_prefix(self):
+        """
+        Returns the internal location of the web server serving the files.
+        """
+        return settings.PRIVATE_DELIVERY_PREFIX
+
+
+media_storage = ContentAddressedStorage()
+private_storage = PrivateStorage()
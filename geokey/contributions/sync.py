@@ -0,0 +1,332 @@
+"""Delta sync of contributions for clients keeping a copy of a project."""
+
+import json
+import base64
+import hashlib
+import binascii
+
+from pytz import utc
+from datetime import datetime, timedelta
+from iso8601 import parse_date
+from iso8601.iso8601 import ParseError
+
+from django.conf import settings
+from django.db.models import Q, Max
+
+from geokey.core.exceptions import MalformedRequestData
+from geokey.categories.base import STATUS
+from geokey.categories.models import Category
+
+from .base import OBSERVATION_STATUS
+from .models import Observation
+
+
+def encode_token(updated_at, observation_id, categories_at):
+    """
+    Encodes the position of a sync as an opaque token.
+
+    Parameters
+    ----------
+    updated_at : datetime.datetime
+        Update time of the last contribution synced.
+    observation_id : int
+        ID of the last contribution synced.
+    categories_at : datetime.datetime
+        Time the categories were synced at.
+
+    Returns
+    -------
+    str
+        The token.
+    """
+    position = {
+        'c': [
+            updated_at.isoformat() if updated_at else None,
+            observation_id
+        ],
+        's': categories_at.isoformat()
+    }
+
+    return base64.urlsafe_b64encode(
+        json.dumps(position).encode('utf-8')
+    ).decode('ascii')
+
+
+def decode_token(token):
+    """
+    Decodes a token returned by `encode_token`.
+
+    Parameters
+    ----------
+    token : str
+        The token.
+
+    Returns
+    -------
+    tuple
+        Update time and ID of the last contribution synced, and the time the
+        categories were synced at.
+
+    Raises
+    ------
+    MalformedRequestData
+        When the token is not valid.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(
+            str(token)
+        ).decode('utf-8'))
+
+        updated_at, observation_id = position['c']
+        return (
+            parse_date(updated_at) if updated_at else None,
+            int(observation_id) if observation_id else None,
+            parse_date(position['s'])
+        )
+    except (TypeError, ValueError, KeyError, ParseError, binascii.Error):
+        raise MalformedRequestData('The sync token is not valid.')
+
+
+def get_cutoff():
+    """
+    Returns the time changes are synced up to. Update times are set before
+    the changes are committed, so changes of the last `settings.SYNC_LAG`
+    seconds are left for the next sync; otherwise changes committed late
+    would be skipped.
+    """
+    return datetime.utcnow().replace(tzinfo=utc) - timedelta(
+        seconds=settings.SYNC_LAG)
+
+
+def get_synced_changes(project, user, updated_at=None, observation_id=None):
+    """
+    Returns the contributions of a project that changed after a position and
+    up to the cutoff, without drafts of other users, and without pending
+    contributions of other users unless the user can moderate the project.
+    The user never sees those, so they are neither synced nor removed.
+    """
+    changes = Observation.objects.get_changes(
+        project,
+        updated_at=updated_at,
+        observation_id=observation_id
+    ).filter(updated_at__lt=get_cutoff())
+
+    if user.is_anonymous():
+        return changes.exclude(status__in=[
+            OBSERVATION_STATUS.draft,
+            OBSERVATION_STATUS.pending
+        ])
+
+    changes = changes.for_moderator(user)
+
+    if not project.is_admin(user) and not project.can_moderate(user):
+        changes = changes.exclude(
+            ~Q(creator=user),
+            status=OBSERVATION_STATUS.pending
+        )
+
+    return changes
+
+
+def get_changes(project, user, token=None, limit=None, subset=None):
+    """
+    Returns the changes of a project since a sync token. Contributions are
+    read in the order they changed, at most `settings.SYNC_PAGE_SIZE` at
+    once; the token returned continues after the last one. Contributions
+    that changed but cannot be accessed by the user anymore, e.g. because
+    they have been deleted or expired, are returned as IDs only, so clients
+    can remove them. Drafts and pending contributions of other users are
+    skipped. Category changes are returned with the first page.
+    Contributions of deleted categories are removed with the category.
+
+    Clients syncing for the first time do not get anything removed.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        Project synced.
+    user : geokey.users.models.User
+        User the project is synced for.
+    token : str
+        Token returned by the previous sync; all contributions are returned
+        if not set.
+    limit : int
+        Number of contributions returned at most; capped by
+        `settings.SYNC_PAGE_SIZE`.
+    subset : int
+        Subset the contributions are filtered by.
+
+    Returns
+    -------
+    dict
+        Contributions and categories that changed, IDs of those removed, the
+        token of the next sync and if there are more changes to sync.
+    """
+    synced_at = get_cutoff()
+    updated_at, observation_id, categories_at = (None, None, None)
+
+    if token:
+        updated_at, observation_id, categories_at = decode_token(token)
+
+    limit = min(limit or settings.SYNC_PAGE_SIZE, settings.SYNC_PAGE_SIZE)
+    changes = get_synced_changes(
+        project,
+        user,
+        updated_at=updated_at,
+        observation_id=observation_id
+    )
+
+    if categories_at is None:
+        changes = changes.exclude(status__in=[
+            OBSERVATION_STATUS.deleted,
+            OBSERVATION_STATUS.expired
+        ])
+
+    changes = list(changes.values_list('id', 'updated_at')[:limit + 1])
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    changed_ids = [change[0] for change in changes]
+    positions = dict((changed_id, index) for index, changed_id
+                     in enumerate(changed_ids))
+
+    contributions = project.get_all_contributions(
+        user,
+        subset=subset
+    ).filter(id__in=changed_ids).select_related(
+        'location', 'creator', 'updator', 'category'
+    )
+    contributions = sorted(
+        contributions,
+        key=lambda contribution: positions[contribution.id]
+    )
+    visible_ids = set(contribution.id for contribution in contributions)
+
+    if changes:
+        observation_id, updated_at = changes[-1]
+
+    changed_categories = Category.objects.get_changes(
+        project,
+        updated_at=categories_at
+    )
+    categories = project.categories.filter(
+        id__in=changed_categories.values('id')
+    )
+
+    if not project.is_admin(user):
+        categories = categories.filter(status=STATUS.active)
+
+    categories = list(categories.order_by('order', 'id'))
+    visible_category_ids = set(category.id for category in categories)
+
+    return {
+        'contributions': contributions,
+        'deleted': [
+            changed_id for changed_id in changed_ids
+            if changed_id not in visible_ids
+        ] if categories_at else [],
+        'categories': categories,
+        'deleted_categories': [
+            category_id for category_id
+            in changed_categories.values_list('id', flat=True)
+            if category_id not in visible_category_ids
+        ] if categories_at else [],
+        'token': encode_token(updated_at, observation_id, synced_at),
+        'has_more': has_more
+    }
+
+
+def has_changes(project, user, token):
+    """
+    Checks if a project changed since a sync token, without reading the
+    changes.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        Project synced.
+    user : geokey.users.models.User
+        User the project is synced for.
+    token : str
+        Token returned by the last sync.
+
+    Returns
+    -------
+    bool
+        True if contributions or categories changed.
+    """
+    updated_at, observation_id, categories_at = decode_token(token)
+
+    return get_synced_changes(
+        project,
+        user,
+        updated_at=updated_at,
+        observation_id=observation_id
+    ).exists() or Category.objects.get_changes(
+        project,
+        updated_at=categories_at
+    ).exists()
+
+
+def get_data_version(project):
+    """
+    Returns the version of the data of a project. It changes when
+    contributions or categories are added, updated or removed, so results
+    computed from the data can be cached with it. Read from the sync
+    indexes, without scanning the contributions.
+
+    Parameters
+    ----------
+    project : geokey.projects.models.Project
+        The project.
+
+    Returns
+    -------
+    str
+        Last updates of contributions and categories.
+    """
+    contributions = Observation._base_manager.filter(
+        project=project
+    ).aggregate(last_update=Max('updated_at'), last_id=Max('id'))
+    categories = Category.objects.filter(
+        project=project
+    ).aggregate(last_update=Max('updated_at'))
+
+    return '%s:%s:%s' % (
+        contributions['last_update'],
+        contributions['last_id'],
+        categories['last_update']
+    )
+
+
+def get_cache_key(name, project, contributions, *args):
+    """
+    Returns the key results computed from contributions are cached with. It
+    changes with the filters of the contributions, the arguments and the
+    version of the data.
+
+    Parameters
+    ----------
+    name : str
+        Name of the results, e.g. `facets`.
+    project : geokey.projects.models.Project
+        The project.
+    contributions : django.db.models.query.QuerySet
+        Contributions filtered.
+    *args
+        Further arguments the results are computed with.
+
+    Returns
+    -------
+    str
+        The key.
+    """
+    sql, params = contributions.order_by().values('id').query.sql_with_params()
+    signature = '%s:%s:%s' % (sql, params, ':'.join(str(arg) for arg in args))
+
+    return '%s:%s:%s:%s' % (
+        name,
+        project.id,
+        hashlib.sha1(signature.encode('utf-8')).hexdigest(),
+        hashlib.sha1(get_data_version(project).encode('utf-8')).hexdigest()
+    )
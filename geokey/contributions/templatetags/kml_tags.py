@@ -3,7 +3,7 @@ from osgeo import ogr
 from django import template
 from six import PY2
 
-from geokey.categories.models import Field, LookupField, MultipleLookupField
+from geokey.contributions.exports.schema import ExportSchema
 
 
 register = template.Library()
@@ -11,7 +11,13 @@ register = template.Library()
 
 @register.filter(name='kml_geom')
 def kml_geom(place):
-    geometry = place.get('location').get('geometry')
+    location = place.get('location')
+
+    # Exports let PostGIS render the geometry as KML
+    if location.get('kml'):
+        return location.get('kml')
+
+    geometry = location.get('geometry')
     json_geom = ogr.CreateGeometryFromJson(str(geometry))
     kml_geom = json_geom.ExportToKML()
     return kml_geom
@@ -31,7 +37,7 @@ def kml_name(place):
 
 
 @register.filter(name='kml_desc')
-def kml_desc(place):
+def kml_desc(place, schema=None):
     properties = place.get('properties')
     media = place.get('media')
     comments = place.get('comments')
@@ -39,29 +45,19 @@ def kml_desc(place):
     description = '<![CDATA['
 
     if properties:
+        category_id = place.get('meta').get('category').get('id')
+
+        if not schema:
+            schema = ExportSchema([category_id])
+
         description += '<table>'
 
         for key in properties:
-            name = key
-            value = properties[key]
+            name = schema.get_name(category_id, key)
+            value = schema.get_value(category_id, key, properties[key])
 
-            try:
-                field = Field.objects.get(
-                    key=key,
-                    category_id=place.get('meta').get('category').get('id')
-                )
-                name = field.name.encode('utf-8')
-
-                if value is not None:
-                    if isinstance(field, LookupField):
-                        value = field.lookupvalues.get(pk=value).name
-                    elif isinstance(field, MultipleLookupField):
-                        values = field.lookupvalues.filter(
-                            pk__in=value
-                        )
-                        value = '<br />'.join([v.name for v in values])
-            except Field.DoesNotExist:
-                pass
+            if isinstance(value, list):
+                value = '<br />'.join(value)
 
             if isinstance(value, str) and PY2:
                 value = value.encode('utf-8')
@@ -0,0 +1,64 @@
+"""Parsing of temporal filters for contributions."""
+
+from pytz import utc
+from iso8601 import parse_date
+from iso8601.iso8601 import ParseError
+
+from geokey.core.exceptions import InputError
+
+
+TIME_PARAMS = (
+    'created_after',
+    'created_before',
+    'updated_after',
+    'updated_before'
+)
+
+
+def parse_time(value, name):
+    """
+    Parses a date or date and time in ISO 8601, e.g. `2015-01-31` or
+    `2015-01-31T12:00:00+01:00`. Times without time zone are in UTC.
+
+    Parameters
+    ----------
+    value : str
+        The date or date and time.
+    name : str
+        Name of the parameter, used in the error message.
+
+    Returns
+    -------
+    datetime.datetime
+        The date and time, in UTC.
+
+    Raises
+    ------
+    InputError
+        When the value is not a valid date.
+    """
+    try:
+        return parse_date(value, default_timezone=utc).astimezone(utc)
+    except (ParseError, TypeError, ValueError):
+        raise InputError('The parameter %s must be a date or date and time '
+                         'in ISO 8601 (e.g. 2015-01-31T12:00:00Z).' % name)
+
+
+def get_time_params(params):
+    """
+    Returns the temporal filters set in the parameters of a request, to be
+    passed to `Project.get_all_contributions`.
+
+    Parameters
+    ----------
+    params : dict
+        Parameters of the request, either the query string or the body.
+
+    Returns
+    -------
+    dict
+        Temporal filters that are set.
+    """
+    return dict(
+        (name, params.get(name)) for name in TIME_PARAMS if params.get(name)
+    )
@@ -2,7 +2,9 @@
 
 import json
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import AnonymousUser
 from django.core.urlresolvers import reverse
 from django.core.exceptions import PermissionDenied
@@ -464,11 +466,12 @@ class GetProjectComments(APITestCase):
             'commentto': self.contribution
         })
 
-    def get_response(self, user):
+    def get_response(self, user, params=None):
         factory = APIRequestFactory()
         request = factory.get(
             '/api/projects/%s/contributions/%s/comments/' %
-            (self.project.id, self.contribution.id)
+            (self.project.id, self.contribution.id),
+            params
         )
         force_authenticate(request, user=user)
         view = CommentsAPIView.as_view()
@@ -482,6 +485,57 @@ class GetProjectComments(APITestCase):
         response = self.get_response(self.admin)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+        comments = json.loads(response.content)
+        self.assertEqual(len(comments), 2)
+        self.assertEqual(len(comments[0]['responses']), 2)
+        self.assertEqual(len(comments[0]['responses'][0]['responses']), 1)
+
+    def test_get_comments_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get_response(self.admin)
+        num_queries = len(context)
+
+        for i in range(5):
+            CommentFactory.create(**{
+                'commentto': self.contribution,
+                'respondsto': Comment.objects.filter(
+                    commentto=self.contribution).last()
+            })
+
+        with self.assertNumQueries(num_queries):
+            self.get_response(self.admin)
+
+    def test_get_comments_with_limit(self):
+        response = self.get_response(self.admin, {'limit': 1})
+        comments = json.loads(response.content)
+        self.assertEqual(len(comments), 1)
+        self.assertIn('after=%s' % comments[0]['id'], response['Link'])
+
+        response = self.get_response(
+            self.admin, {'limit': 1, 'after': comments[0]['id']})
+        next_comments = json.loads(response.content)
+        self.assertEqual(len(next_comments), 1)
+        self.assertNotEqual(next_comments[0]['id'], comments[0]['id'])
+        self.assertFalse(response.has_header('Link'))
+
+    def test_get_comments_with_depth(self):
+        response = self.get_response(self.admin, {'depth': 1})
+        comments = json.loads(response.content)
+        self.assertEqual(len(comments[0]['responses']), 2)
+        self.assertEqual(comments[0]['responses'][0]['responses'], [])
+
+        response = self.get_response(self.admin, {'depth': 0})
+        comments = json.loads(response.content)
+        self.assertEqual(comments[0]['responses'], [])
+
+    def test_get_comments_with_invalid_limit(self):
+        response = self.get_response(self.admin, {'limit': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_comments_with_zero_limit(self):
+        response = self.get_response(self.admin, {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_comments_with_contributor(self):
         response = self.get_response(self.contributor)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,166 @@
+"""Tests for bundles of projects."""
+
+import os
+import glob
+import sqlite3
+
+from django.test import TestCase, override_settings
+from django.core.urlresolvers import reverse
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    LookupFieldFactory,
+    LookupValueFactory
+)
+from geokey.contributions.storage import private_storage
+from geokey.contributions.exports.bundle import get_bundle
+from geokey.contributions.views.sync import ProjectBundleView
+
+from ..model_factories import ObservationFactory
+
+
+@override_settings(SYNC_LAG=0)
+class BundleTest(TestCase):
+    def setUp(self):
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.category = CategoryFactory.create(**{'project': self.project})
+        field = LookupFieldFactory.create(**{'category': self.category})
+        LookupValueFactory.create_batch(2, **{'field': field})
+        self.contributions = ObservationFactory.create_batch(3, **{
+            'project': self.project,
+            'category': self.category
+        })
+
+    def tearDown(self):
+        files = glob.glob(os.path.join(private_storage.path('bundles'), '*'))
+        for f in files:
+            os.remove(f)
+
+    def query(self, bundle, sql):
+        db = sqlite3.connect(bundle.file.path)
+        try:
+            return db.execute(sql).fetchall()
+        finally:
+            db.close()
+
+    def test_get_bundle(self):
+        bundle = get_bundle(self.project, self.admin)
+
+        self.assertEqual(
+            self.query(bundle, 'PRAGMA application_id'), [(1196444487,)])
+        self.assertEqual(
+            self.query(bundle, 'SELECT id FROM contributions ORDER BY id'),
+            [(contribution.id,) for contribution in self.contributions]
+        )
+        self.assertEqual(
+            self.query(bundle, 'SELECT id FROM categories'),
+            [(self.category.id,)]
+        )
+        self.assertEqual(
+            self.query(bundle, 'SELECT COUNT(*) FROM lookupvalues'), [(2,)])
+        self.assertEqual(
+            self.query(bundle, 'SELECT substr(geom, 1, 2) FROM contributions'
+                               ' LIMIT 1')[0][0],
+            b'GP'
+        )
+
+    def test_get_unchanged_bundle(self):
+        bundle = get_bundle(self.project, self.admin)
+        same = get_bundle(self.project, self.admin)
+
+        self.assertEqual(same.etag, bundle.etag)
+        self.assertEqual(same.file.name, bundle.file.name)
+
+    def test_update_bundle(self):
+        bundle = get_bundle(self.project, self.admin)
+
+        self.contributions[0].delete()
+        added = ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category
+        })
+
+        updated = get_bundle(self.project, self.admin)
+
+        self.assertNotEqual(updated.etag, bundle.etag)
+        self.assertNotEqual(updated.file.name, bundle.file.name)
+        self.assertTrue(os.path.isfile(bundle.file.path))
+        self.assertEqual(
+            self.query(updated, 'SELECT id FROM contributions ORDER BY id'),
+            [
+                (self.contributions[1].id,),
+                (self.contributions[2].id,),
+                (added.id,)
+            ]
+        )
+
+        self.contributions[1].delete()
+        get_bundle(self.project, self.admin)
+
+        self.assertFalse(os.path.isfile(bundle.file.path))
+        self.assertTrue(os.path.isfile(updated.file.path))
+
+    def test_update_bundle_with_project(self):
+        bundle = get_bundle(self.project, self.admin)
+
+        self.project.description = 'Changed'
+        self.project.save()
+
+        updated = get_bundle(self.project, self.admin)
+
+        self.assertNotEqual(updated.etag, bundle.etag)
+        self.assertIn(
+            'Changed',
+            self.query(updated, 'SELECT data FROM project')[0][0]
+        )
+
+    def test_private_file(self):
+        bundle = get_bundle(self.project, self.admin)
+
+        self.assertNotIn('project-', bundle.file.name)
+        self.assertTrue(
+            bundle.file.path.startswith(private_storage.location))
+
+
+@override_settings(SYNC_LAG=0)
+class ProjectBundleViewTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        ObservationFactory.create_batch(2, **{'project': self.project})
+
+    def tearDown(self):
+        files = glob.glob(os.path.join(private_storage.path('bundles'), '*'))
+        for f in files:
+            os.remove(f)
+
+    def get(self, user, etag=None):
+        url = reverse('api:project_bundle', kwargs={
+            'project_id': self.project.id
+        })
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = self.factory.get(url, **headers)
+        force_authenticate(request, user)
+        view = ProjectBundleView.as_view()
+        return view(request, project_id=self.project.id)
+
+    def test_get_with_etag(self):
+        response = self.get(self.admin)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="project-%s.gpkg"' % self.project.id
+        )
+
+        response = self.get(self.admin, etag=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_with_inaccessible_project(self):
+        response = self.get(UserFactory.create())
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,228 @@
+"""Tests for export jobs."""
+
+import os
+import csv
+import glob
+import pytz
+
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.contributions.base import EXPORT_STATUS
+from geokey.contributions.models import ExportJob
+from geokey.contributions.storage import private_storage
+from geokey.contributions.exports.jobs import (
+    get_chunks,
+    get_job,
+    run_job,
+    fail_stale_jobs
+)
+from geokey.contributions.views.exports import (
+    ProjectExportJobs,
+    SingleExportJob,
+    ExportJobFile
+)
+
+from ..model_factories import ObservationFactory
+
+
+class ExportJobTest(TestCase):
+    def setUp(self):
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.contributions = ObservationFactory.create_batch(
+            5, **{'project': self.project})
+
+    def tearDown(self):
+        files = glob.glob(os.path.join(private_storage.path('exports'), '*'))
+        for f in files:
+            os.remove(f)
+
+    def test_get_chunks(self):
+        first_id = self.contributions[0].id
+        chunks = get_chunks(
+            self.project.get_all_contributions(self.admin),
+            chunk_size=2
+        )
+
+        self.assertEqual(chunks, [
+            (first_id, first_id + 1),
+            (first_id + 2, first_id + 3),
+            (first_id + 4, first_id + 4)
+        ])
+
+    def test_get_chunks_with_gaps(self):
+        ObservationFactory.create_batch(3)
+        last = ObservationFactory.create(**{'project': self.project})
+        chunks = get_chunks(
+            self.project.get_all_contributions(self.admin),
+            chunk_size=3
+        )
+
+        self.assertEqual(chunks, [
+            (self.contributions[0].id, self.contributions[2].id),
+            (self.contributions[2].id + 1, last.id)
+        ])
+
+    def test_get_chunks_without_contributions(self):
+        project = ProjectFactory(add_admins=[self.admin])
+        chunks = get_chunks(project.get_all_contributions(self.admin))
+        self.assertEqual(chunks, [(0, 0)])
+
+    def test_get_job_is_reused(self):
+        job = get_job(self.project, self.admin, 'kml')
+        self.assertEqual(job.status, EXPORT_STATUS.queued)
+        self.assertEqual(get_job(self.project, self.admin, 'kml'), job)
+        self.assertNotEqual(get_job(self.project, self.admin, 'csv'), job)
+
+        ObservationFactory.create(**{'project': self.project})
+        self.assertNotEqual(get_job(self.project, self.admin, 'kml'), job)
+
+    def test_stale_job_is_not_reused(self):
+        job = get_job(self.project, self.admin, 'kml')
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=EXPORT_STATUS.processing,
+            updated_at=datetime.utcnow().replace(tzinfo=pytz.utc) -
+            timedelta(hours=2)
+        )
+
+        self.assertNotEqual(get_job(self.project, self.admin, 'kml'), job)
+        self.assertEqual(fail_stale_jobs(), 1)
+        self.assertEqual(
+            ExportJob.objects.get(pk=job.pk).status, EXPORT_STATUS.failed)
+
+    def test_run_kml_job(self):
+        job = get_job(self.project, self.admin, 'kml')
+        job = run_job(job.id, workers=1, chunk_size=2)
+
+        self.assertEqual(job.status, EXPORT_STATUS.ready)
+        self.assertEqual(job.chunks_total, 3)
+        self.assertEqual(job.progress, 1.0)
+
+        job.file.open('rb')
+        content = job.file.read().decode('utf-8')
+        job.file.close()
+
+        self.assertTrue(content.startswith('<?xml'))
+        self.assertEqual(content.count('<Placemark>'), 5)
+        self.assertNotIn('project-', job.file.name)
+        self.assertTrue(job.file.path.startswith(private_storage.location))
+        self.assertIsNone(run_job(job.id))
+
+    def test_run_csv_job(self):
+        job = get_job(self.project, self.admin, 'csv')
+        job = run_job(job.id, workers=1, chunk_size=2)
+
+        self.assertEqual(job.status, EXPORT_STATUS.ready)
+
+        job.file.open('rb')
+        rows = list(csv.DictReader(
+            job.file.read().decode('utf-8').splitlines()))
+        job.file.close()
+
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            [contribution.id for contribution in self.contributions]
+        )
+
+    def test_remove_expired(self):
+        job = get_job(self.project, self.admin, 'kml')
+        job = run_job(job.id, workers=1)
+        path = job.file.path
+
+        ExportJob.objects.filter(pk=job.id).update(
+            created_at='2000-01-01T00:00:00Z')
+
+        self.assertEqual(ExportJob.objects.remove_expired(), 1)
+        self.assertFalse(os.path.isfile(path))
+
+
+class ExportJobAPITest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        ObservationFactory.create_batch(3, **{'project': self.project})
+
+    def tearDown(self):
+        files = glob.glob(os.path.join(private_storage.path('exports'), '*'))
+        for f in files:
+            os.remove(f)
+
+    def post(self, user, data):
+        url = reverse('api:project_export_jobs', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.post(url, data, format='json')
+        force_authenticate(request, user)
+        view = ProjectExportJobs.as_view()
+        return view(request, project_id=self.project.id)
+
+    def get(self, user, view_class, url_name, job_id):
+        url = reverse(url_name, kwargs={
+            'project_id': self.project.id,
+            'job_id': job_id
+        })
+        request = self.factory.get(url)
+        force_authenticate(request, user)
+        view = view_class.as_view()
+        return view(request, project_id=self.project.id, job_id=job_id)
+
+    def test_submit_poll_and_download(self):
+        response = self.post(self.admin, {'export_format': 'kml'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['id']
+
+        response = self.get(
+            self.admin,
+            SingleExportJob,
+            'api:project_single_export_job',
+            job_id
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], EXPORT_STATUS.queued)
+        self.assertIsNone(response.data['url'])
+
+        response = self.get(
+            self.admin,
+            ExportJobFile,
+            'api:project_export_job_file',
+            job_id
+        )
+        self.assertEqual(response.status_code, 404)
+
+        run_job(job_id, workers=1)
+
+        response = self.post(self.admin, {'export_format': 'kml'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(str(response.data['id']), str(job_id))
+
+        response = self.get(
+            self.admin,
+            ExportJobFile,
+            'api:project_export_job_file',
+            job_id
+        )
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(content.count('<Placemark>'), 3)
+
+    def test_submit_unknown_format(self):
+        response = self.post(self.admin, {'export_format': 'doc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_poll_job_of_other_user(self):
+        response = self.post(self.admin, {'export_format': 'kml'})
+
+        response = self.get(
+            UserFactory.create(),
+            SingleExportJob,
+            'api:project_single_export_job',
+            response.data['id']
+        )
+        self.assertEqual(response.status_code, 404)
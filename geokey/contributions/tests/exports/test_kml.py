@@ -0,0 +1,205 @@
+"""Tests for KML exports of contributions."""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import AnonymousUser
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    TextFieldFactory,
+    LookupFieldFactory,
+    LookupValueFactory,
+    MultipleLookupFieldFactory,
+    MultipleLookupValueFactory
+)
+from geokey.contributions.exports.schema import ExportSchema
+from geokey.contributions.exports.kml import stream_kml
+from geokey.contributions.views.exports import ProjectContributionsExport
+
+from ..model_factories import ObservationFactory, CommentFactory
+
+
+class ExportSchemaTest(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory.create()
+        self.text_field = TextFieldFactory.create(**{
+            'key': 'name',
+            'name': 'Name',
+            'category': self.category
+        })
+        self.lookup_field = LookupFieldFactory.create(**{
+            'key': 'type',
+            'name': 'Type',
+            'category': self.category
+        })
+        self.lookup_value = LookupValueFactory.create(**{
+            'name': 'Pub',
+            'field': self.lookup_field
+        })
+        self.multiple_field = MultipleLookupFieldFactory.create(**{
+            'key': 'drinks',
+            'name': 'Drinks',
+            'category': self.category
+        })
+        self.beer = MultipleLookupValueFactory.create(**{
+            'name': 'Beer',
+            'order': 0,
+            'field': self.multiple_field
+        })
+        self.cider = MultipleLookupValueFactory.create(**{
+            'name': 'Cider',
+            'order': 1,
+            'field': self.multiple_field
+        })
+
+    def test_load_once(self):
+        with self.assertNumQueries(3):
+            schema = ExportSchema([self.category.id])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(schema.get_name(self.category.id, 'name'), 'Name')
+            self.assertEqual(
+                schema.get_name(self.category.id, 'unknown'),
+                'unknown'
+            )
+            self.assertEqual(
+                schema.get_value(
+                    self.category.id, 'type', self.lookup_value.id),
+                'Pub'
+            )
+            self.assertEqual(
+                schema.get_value(
+                    self.category.id,
+                    'drinks',
+                    [self.cider.id, self.beer.id]
+                ),
+                ['Beer', 'Cider']
+            )
+            self.assertEqual(
+                schema.get_value(self.category.id, 'name', 'The Grafton'),
+                'The Grafton'
+            )
+            self.assertIsNone(schema.get_value(self.category.id, 'type', None))
+
+    def test_unknown_lookup_value(self):
+        schema = ExportSchema([self.category.id])
+        self.assertEqual(schema.get_value(self.category.id, 'type', 999), 999)
+
+
+class StreamKmlTest(TestCase):
+    def setUp(self):
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.category = CategoryFactory.create(**{
+            'project': self.project,
+            'colour': '#ff0000'
+        })
+        TextFieldFactory.create(**{
+            'key': 'name',
+            'name': 'Name',
+            'category': self.category
+        })
+
+        self.contributions = []
+        for name in ['The Grafton', 'Pubs & Bars', 'The Boogaloo']:
+            self.contributions.append(ObservationFactory.create(**{
+                'project': self.project,
+                'category': self.category,
+                'properties': {'name': name}
+            }))
+
+    def get_kml(self, chunk_size=None):
+        return ''.join(stream_kml(
+            self.project.get_all_contributions(self.admin),
+            self.admin,
+            chunk_size=chunk_size
+        ))
+
+    def test_stream(self):
+        comment = CommentFactory.create(**{
+            'commentto': self.contributions[0],
+            'text': 'Nice pub'
+        })
+        CommentFactory.create(**{
+            'commentto': self.contributions[0],
+            'respondsto': comment,
+            'text': 'Indeed'
+        })
+
+        kml = self.get_kml(chunk_size=2)
+
+        self.assertTrue(kml.startswith('<?xml'))
+        self.assertTrue(kml.endswith('</kml>\n'))
+        self.assertEqual(kml.count('<Placemark>'), 3)
+        self.assertIn('<td>Name</td><td>The Grafton</td>', kml)
+        self.assertIn('<Point><coordinates>', kml)
+        self.assertIn('<color>ff0000</color>', kml)
+        self.assertIn('<br />Nice pub<table>', kml)
+        self.assertIn('<br />Indeed</td>', kml)
+
+    def test_stream_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get_kml(chunk_size=20)
+        num_queries = len(context)
+
+        for name in range(10):
+            ObservationFactory.create(**{
+                'project': self.project,
+                'category': self.category,
+                'properties': {'name': str(name)}
+            })
+
+        with self.assertNumQueries(num_queries):
+            self.get_kml(chunk_size=20)
+
+
+class ProjectContributionsExportTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.contribution = ObservationFactory.create(**{
+            'project': self.project
+        })
+
+    def get(self, user, export_format='kml'):
+        url = reverse('api:project_contributions_export', kwargs={
+            'project_id': self.project.id,
+            'export_format': export_format
+        })
+        request = self.factory.get(url)
+        force_authenticate(request, user)
+        view = ProjectContributionsExport.as_view()
+        return view(
+            request,
+            project_id=self.project.id,
+            export_format=export_format
+        )
+
+    def test_get_with_admin(self):
+        response = self.get(self.admin)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'],
+            'application/vnd.google-earth.kml+xml'
+        )
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="project-%s.kml"' % self.project.id
+        )
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(content.count('<Placemark>'), 1)
+
+    def test_get_unknown_format(self):
+        response = self.get(self.admin, export_format='doc')
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_with_anonymous(self):
+        response = self.get(AnonymousUser())
+        self.assertEqual(response.status_code, 404)
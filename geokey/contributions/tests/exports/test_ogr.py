@@ -0,0 +1,228 @@
+"""Tests for OGR exports of contributions."""
+
+import os
+import csv
+import shutil
+import zipfile
+import tempfile
+
+from io import BytesIO
+
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+
+from osgeo import ogr
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    TextFieldFactory,
+    NumericFieldFactory,
+    LookupFieldFactory,
+    LookupValueFactory
+)
+from geokey.contributions.exports.schema import ExportSchema
+from geokey.contributions.exports.ogr import get_columns, write_ogr
+from geokey.contributions.views.exports import ProjectContributionsExport
+
+from ..model_factories import ObservationFactory, LocationFactory
+
+
+class OgrExportTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+
+        self.category = CategoryFactory.create(**{'project': self.project})
+        TextFieldFactory.create(**{
+            'key': 'name',
+            'category': self.category
+        })
+        NumericFieldFactory.create(**{
+            'key': 'rating',
+            'category': self.category
+        })
+        lookup_field = LookupFieldFactory.create(**{
+            'key': 'id',
+            'category': self.category
+        })
+        self.lookup_value = LookupValueFactory.create(**{
+            'name': 'Pub',
+            'field': lookup_field
+        })
+
+        self.other_category = CategoryFactory.create(**{
+            'project': self.project
+        })
+        TextFieldFactory.create(**{
+            'key': 'rating',
+            'category': self.other_category
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_columns(self):
+        schema = ExportSchema([self.category.id])
+        self.assertEqual(get_columns(schema, 'csv'), [
+            ('id', 'p_id', ogr.OFTString),
+            ('name', 'name', ogr.OFTString),
+            ('rating', 'rating', ogr.OFTReal)
+        ])
+
+    def test_get_columns_with_conflicting_types(self):
+        schema = ExportSchema([self.category.id, self.other_category.id])
+        self.assertIn(
+            ('rating', 'rating', ogr.OFTString),
+            get_columns(schema, 'csv')
+        )
+
+    def test_write_csv(self):
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category,
+            'properties': {
+                'name': 'The Grafton',
+                'rating': 4.5,
+                'id': self.lookup_value.id
+            }
+        })
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category,
+            'location': LocationFactory.create(**{
+                'geometry': 'LINESTRING(-0.13 51.52, -0.14 51.53)'
+            }),
+            'properties': {'name': 'Along the canal', 'rating': 'bad'}
+        })
+
+        path = os.path.join(self.directory, 'contributions.csv')
+        write_ogr(
+            self.project.get_all_contributions(self.admin),
+            'csv',
+            path,
+            chunk_size=1
+        )
+
+        with open(path) as the_file:
+            rows = list(csv.DictReader(the_file))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['name'], 'The Grafton')
+        self.assertEqual(float(rows[0]['rating']), 4.5)
+        self.assertEqual(rows[0]['p_id'], 'Pub')
+        self.assertTrue(rows[0]['WKT'].startswith('POINT'))
+        self.assertEqual(rows[1]['rating'], '')
+        self.assertTrue(rows[1]['WKT'].startswith('LINESTRING'))
+
+    def test_write_shapefiles(self):
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category
+        })
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category,
+            'location': LocationFactory.create(**{
+                'geometry': 'LINESTRING(-0.13 51.52, -0.14 51.53)'
+            })
+        })
+
+        path = os.path.join(self.directory, 'contributions')
+        write_ogr(self.project.get_all_contributions(self.admin), 'shp', path)
+
+        data_source = ogr.Open(path)
+        self.assertEqual(data_source.GetLayerCount(), 2)
+        self.assertEqual(
+            data_source.GetLayerByName('points').GetFeatureCount(), 1)
+        self.assertEqual(
+            data_source.GetLayerByName('lines').GetFeatureCount(), 1)
+
+    def test_write_shapefiles_with_multi_geometries(self):
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category
+        })
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category,
+            'location': LocationFactory.create(**{
+                'geometry': 'MULTIPOINT(-0.13 51.52, -0.14 51.53)'
+            })
+        })
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category,
+            'location': LocationFactory.create(**{
+                'geometry': 'GEOMETRYCOLLECTION(POINT(-0.13 51.52), '
+                            'LINESTRING(-0.13 51.52, -0.14 51.53))'
+            })
+        })
+
+        path = os.path.join(self.directory, 'contributions')
+        write_ogr(self.project.get_all_contributions(self.admin), 'shp', path)
+
+        data_source = ogr.Open(path)
+        self.assertEqual(data_source.GetLayerCount(), 3)
+        self.assertEqual(
+            data_source.GetLayerByName('points').GetFeatureCount(), 2)
+        self.assertEqual(
+            data_source.GetLayerByName('multipoints').GetFeatureCount(), 1)
+        self.assertEqual(
+            data_source.GetLayerByName('lines').GetFeatureCount(), 1)
+
+
+class ProjectContributionsExportTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.viewer = UserFactory.create()
+        self.project = ProjectFactory(
+            add_admins=[self.admin],
+            add_viewer=[self.viewer]
+        )
+        ObservationFactory.create(**{'project': self.project})
+        ObservationFactory.create(**{
+            'project': self.project,
+            'status': 'draft'
+        })
+
+    def get(self, user, export_format):
+        url = reverse('api:project_contributions_export', kwargs={
+            'project_id': self.project.id,
+            'export_format': export_format
+        })
+        request = self.factory.get(url)
+        force_authenticate(request, user)
+        view = ProjectContributionsExport.as_view()
+        return view(
+            request,
+            project_id=self.project.id,
+            export_format=export_format
+        )
+
+    def test_get_csv(self):
+        response = self.get(self.viewer, 'csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        content = b''.join(response.streaming_content).decode('utf-8')
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 1)
+
+    def test_get_shapefile(self):
+        response = self.get(self.admin, 'shp')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="project-%s.zip"' % self.project.id
+        )
+
+        zip_file = zipfile.ZipFile(
+            BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('points.shp', zip_file.namelist())
+        self.assertIn('points.dbf', zip_file.namelist())
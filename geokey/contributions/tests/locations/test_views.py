@@ -124,6 +124,77 @@ class LocationQueryTest(TestCase):
         self.assertNotIn('Hyde Park', response.content.decode())
 
 
+class LocationFilterTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.project = ProjectFactory()
+        self.london = LocationFactory.create(**{
+            'name': 'UCL',
+            'geometry': 'POINT (-0.1340 51.5246)'
+        })
+        self.nearby = LocationFactory.create(**{
+            'name': 'British Museum',
+            'geometry': 'POINT (-0.1270 51.5194)'
+        })
+        self.paris = LocationFactory.create(**{
+            'name': 'Louvre',
+            'geometry': 'POINT (2.3376 48.8606)'
+        })
+
+        self.url = reverse(
+            'api:project_locations',
+            kwargs={
+                'project_id': self.project.id
+            }
+        )
+
+    def get(self, query):
+        request = self.factory.get(self.url + query)
+        force_authenticate(request, user=self.project.creator)
+        view = LocationsAPIView.as_view()
+        return view(request, project_id=self.project.id).render()
+
+    def get_ids(self, response):
+        return [
+            feature['id'] for feature in
+            json.loads(response.content).get('features')
+        ]
+
+    def test_bbox(self):
+        response = self.get('?bbox=-1,51,1,52')
+        self.assertEqual(
+            self.get_ids(response), [self.london.id, self.nearby.id])
+
+    def test_radius(self):
+        response = self.get('?near=-0.1340,51.5246&radius=200')
+        self.assertEqual(self.get_ids(response), [self.london.id])
+
+        response = self.get('?near=-0.1340,51.5246&radius=1000')
+        self.assertEqual(
+            self.get_ids(response), [self.london.id, self.nearby.id])
+
+    def test_radius_without_point(self):
+        response = self.get('?radius=1000')
+        self.assertEqual(response.status_code, 406)
+
+    def test_pages(self):
+        response = self.get('?limit=2')
+        self.assertEqual(
+            self.get_ids(response), [self.london.id, self.nearby.id])
+        self.assertIn('after=%s' % self.nearby.id, response['Link'])
+
+        response = self.get('?limit=2&after=%s' % self.nearby.id)
+        self.assertEqual(self.get_ids(response), [self.paris.id])
+        self.assertFalse(response.has_header('Link'))
+
+    def test_compact(self):
+        response = self.get('?compact=true&query=louvre')
+        feature = json.loads(response.content).get('features')[0]
+
+        self.assertEqual(feature['properties'], {'name': 'Louvre'})
+        self.assertEqual(feature['geometry']['type'], 'Point')
+
+
 class LocationUpdateApiTest(TestCase):
     def setUp(self):
         self.factory = APIRequestFactory()
@@ -0,0 +1,218 @@
+"""Tests for protected delivery of media files."""
+
+import os
+import glob
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+
+from nose.tools import raises
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.contributions.delivery import (
+    RangeNotSatisfiable,
+    parse_range,
+    can_access
+)
+from geokey.contributions.serializers import FileSerializer
+from geokey.contributions.views.media import MediaFileContentAPIView
+
+from ..model_factories import ObservationFactory
+from .model_factories import ImageFileFactory
+
+
+class ParseRangeTest(TestCase):
+    def test_without_header(self):
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range('', 1000))
+
+    def test_range(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=500-', 1000), (500, 999))
+        self.assertEqual(parse_range('bytes=900-2000', 1000), (900, 999))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-2000', 1000), (0, 999))
+
+    def test_unsupported_range(self):
+        self.assertIsNone(parse_range('bytes=0-99,200-299', 1000))
+        self.assertIsNone(parse_range('bytes=99-0', 1000))
+        self.assertIsNone(parse_range('items=0-99', 1000))
+
+    @raises(RangeNotSatisfiable)
+    def test_range_outside_of_file(self):
+        parse_range('bytes=1000-', 1000)
+
+
+class MediaFileContentAPIViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.contribution = ObservationFactory.create(
+            **{'project': self.project, 'creator': self.admin}
+        )
+        self.image_file = ImageFileFactory.create(
+            **{'contribution': self.contribution})
+        self.image_file.image.open('rb')
+        self.content = self.image_file.image.read()
+        self.image_file.image.close()
+
+    def tearDown(self):
+        cache.clear()
+
+        files = glob.glob(os.path.join(
+            settings.MEDIA_ROOT,
+            'user-uploads/images/*'
+        ))
+        for f in files:
+            os.remove(f)
+
+    def get(self, user, data=None, **extra):
+        url = reverse(
+            'api:media_file_content',
+            kwargs={'file_id': self.image_file.id}
+        )
+        request = self.factory.get(url, data, **extra)
+        force_authenticate(request, user)
+        view = MediaFileContentAPIView.as_view()
+        return view(request, file_id=self.image_file.id)
+
+    def test_get_with_admin(self):
+        response = self.get(self.admin)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_get_range(self):
+        response = self.get(self.admin, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            response['Content-Range'],
+            'bytes 10-19/%s' % len(self.content)
+        )
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            self.content[10:20]
+        )
+
+    def test_get_range_outside_of_file(self):
+        response = self.get(
+            self.admin,
+            HTTP_RANGE='bytes=%s-' % len(self.content)
+        )
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(
+            response['Content-Range'],
+            'bytes */%s' % len(self.content)
+        )
+
+    def test_get_with_some_dude(self):
+        response = self.get(UserFactory.create())
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_with_anonymous(self):
+        response = self.get(AnonymousUser())
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_DELIVERY='nginx')
+    def test_get_with_nginx(self):
+        response = self.get(self.admin)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected/%s' % self.image_file.image.name
+        )
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_DELIVERY='sendfile')
+    def test_get_with_sendfile(self):
+        response = self.get(self.admin)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sendfile'], self.image_file.image.path)
+
+    def test_access_is_cached(self):
+        user = UserFactory.create()
+        self.assertFalse(
+            can_access(user, self.project.id, self.contribution.id))
+
+        self.project.isprivate = False
+        self.project.save()
+
+        self.assertFalse(
+            can_access(user, self.project.id, self.contribution.id))
+
+        cache.clear()
+        self.assertTrue(
+            can_access(user, self.project.id, self.contribution.id))
+
+    @override_settings(MEDIA_PROTECTED=True)
+    def test_serialized_url(self):
+        serializer = FileSerializer(
+            self.image_file,
+            context={'user': self.admin}
+        )
+
+        self.assertEqual(
+            serializer.get_url(self.image_file),
+            reverse(
+                'api:media_file_content',
+                kwargs={'file_id': self.image_file.id}
+            )
+        )
+
+    def set_derivative(self):
+        self.image_file.derivatives = [{
+            'size': 150,
+            'width': 150,
+            'height': 150,
+            'format': 'png',
+            'name': self.image_file.image.name
+        }]
+        self.image_file.save()
+
+    def test_get_derivative(self):
+        self.set_derivative()
+
+        response = self.get(self.admin, {'derivative': '150.png'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+        response = self.get(self.admin, {'derivative': '600.png'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_derivative_with_some_dude(self):
+        self.set_derivative()
+
+        response = self.get(UserFactory.create(), {'derivative': '150.png'})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_PROTECTED=True)
+    def test_serialized_derivatives(self):
+        self.set_derivative()
+        serializer = FileSerializer(
+            self.image_file,
+            context={'user': self.admin}
+        )
+
+        self.assertEqual(
+            serializer.get_derivatives(self.image_file)[0]['url'],
+            '%s?derivative=150.png' % reverse(
+                'api:media_file_content',
+                kwargs={'file_id': self.image_file.id}
+            )
+        )
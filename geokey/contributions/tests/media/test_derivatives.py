@@ -0,0 +1,92 @@
+"""Tests for derivatives of images."""
+
+import os
+import glob
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from PIL import Image
+
+from geokey.contributions.models import ImageFile
+from geokey.contributions.derivatives import (
+    get_derivative_name,
+    create_derivatives,
+    regenerate_derivatives
+)
+from geokey.contributions.management.commands.regenerate_derivatives import (
+    Command
+)
+from geokey.core.tests.helpers.image_helpers import get_image
+
+from .model_factories import ImageFileFactory
+
+
+@override_settings(
+    IMAGE_DERIVATIVE_SIZES=[100, 150, 1200],
+    IMAGE_DERIVATIVE_FORMATS=['jpeg']
+)
+class DerivativesTest(TestCase):
+    def tearDown(self):
+        files = glob.glob(os.path.join(
+            settings.MEDIA_ROOT,
+            'user-uploads/images/*'
+        ))
+        for f in files:
+            os.remove(f)
+
+    def test_get_derivative_name(self):
+        self.assertEqual(
+            get_derivative_name('user-uploads/images/a.png', 600, 'webp'),
+            'user-uploads/images/a.png.600.webp'
+        )
+        self.assertEqual(
+            get_derivative_name('user-uploads/images/a.png', 600, 'jpeg'),
+            'user-uploads/images/a.png.600.jpg'
+        )
+
+    def test_create_derivatives(self):
+        image_file = ImageFileFactory.create(
+            **{'image': get_image(width=300, height=200)})
+
+        manifest = create_derivatives(image_file)
+
+        self.assertEqual(len(manifest), 2)
+        self.assertEqual(
+            [(derivative['size'], derivative['width'], derivative['height'])
+             for derivative in manifest],
+            [(100, 100, 67), (150, 150, 100)]
+        )
+
+        for derivative in manifest:
+            self.assertEqual(derivative['format'], 'jpeg')
+
+            path = image_file.image.storage.path(derivative['name'])
+            self.assertEqual(Image.open(path).format, 'JPEG')
+
+    def test_create_derivatives_replaces_existing(self):
+        image_file = ImageFileFactory.create(
+            **{'image': get_image(width=300, height=200)})
+
+        manifest = create_derivatives(image_file)
+        self.assertEqual(create_derivatives(image_file), manifest)
+
+    def test_create_derivatives_for_small_image(self):
+        image_file = ImageFileFactory.create(
+            **{'image': get_image(width=50, height=50)})
+
+        self.assertEqual(create_derivatives(image_file), [])
+
+    def test_regenerate(self):
+        image_file = ImageFileFactory.create(
+            **{'image': get_image(width=300, height=200)})
+        self.assertEqual(image_file.derivatives, [])
+
+        command = Command()
+        self.assertEqual(command.regenerate([image_file.id], workers=1), 1)
+
+        image_file = ImageFile.objects.get(pk=image_file.id)
+        self.assertEqual(len(image_file.derivatives), 2)
+
+    def test_regenerate_missing_image(self):
+        self.assertFalse(regenerate_derivatives(123456789))
@@ -1,9 +1,17 @@
 """Tests for models of contributions (media files)."""
 
+import os
+
+from io import BytesIO
+from os.path import dirname, normpath, abspath, join
+
 from django.test import TestCase
 
+from nose.tools import raises
+
+from geokey.core.exceptions import InputError, FileTypeError
 from geokey.contributions.models import (
-    ImageFile, DocumentFile, VideoFile, AudioFile,
+    ImageFile, DocumentFile, VideoFile, AudioFile, MediaUpload,
     post_save_count_update
 )
 from geokey.contributions.tests.model_factories import ObservationFactory
@@ -229,3 +237,74 @@ class AudioFileTest(TestCase):
         )
         audio_file.delete()
         self.assertEqual(audio_file.status, 'deleted')
+
+
+class MediaUploadTest(TestCase):
+    def setUp(self):
+        path = normpath(join(
+            dirname(abspath(__file__)), 'files', 'image_02.jpg'))
+        with open(path, 'rb') as the_file:
+            self.content = the_file.read()
+
+        self.upload = MediaUpload.objects.create(
+            name='Test name',
+            description='Test Description',
+            file_name='test.jpg',
+            content_type='image/jpeg',
+            size=len(self.content),
+            contribution=ObservationFactory.create(),
+            creator=UserFactory.create()
+        )
+
+    def tearDown(self):
+        if os.path.isfile(self.upload.path):
+            os.remove(self.upload.path)
+
+        for image_file in ImageFile.objects.all():
+            image_file.image.delete()
+
+    def test_append(self):
+        self.assertIsNone(
+            self.upload.append(BytesIO(self.content[:2000]), 0)
+        )
+        self.assertEqual(self.upload.offset, 2000)
+        self.assertEqual(os.path.getsize(self.upload.path), 2000)
+
+        media_file = self.upload.append(BytesIO(self.content[2000:]), 2000)
+
+        self.assertIsInstance(media_file, ImageFile)
+        self.assertEqual(media_file.name, 'Test name')
+        self.assertEqual(media_file.image.size, len(self.content))
+        self.assertTrue(self.upload.is_complete)
+        self.assertFalse(os.path.isfile(self.upload.path))
+
+    def test_append_drops_interrupted_chunk(self):
+        self.upload.append(BytesIO(self.content[:2000]), 0)
+
+        with open(self.upload.path, 'ab') as partial:
+            partial.write(self.content[2000:3000])
+
+        self.upload.append(BytesIO(self.content[2000:2500]), 2000)
+        self.assertEqual(os.path.getsize(self.upload.path), 2500)
+
+    @raises(InputError)
+    def test_append_with_wrong_offset(self):
+        self.upload.append(BytesIO(self.content[:2000]), 0)
+        self.upload.append(BytesIO(self.content[2000:]), 1000)
+
+    @raises(InputError)
+    def test_append_exceeding_size(self):
+        self.upload.append(BytesIO(self.content + b'extra'), 0)
+
+    @raises(FileTypeError)
+    def test_append_unsupported_type(self):
+        self.upload.append(BytesIO(b'Just some text. ' * 100), 0)
+
+    def test_delete(self):
+        self.upload.append(BytesIO(self.content[:2000]), 0)
+        self.upload.delete()
+
+        self.assertFalse(os.path.isfile(self.upload.path))
+        self.assertFalse(
+            MediaUpload.objects.filter(pk=self.upload.id).exists()
+        )
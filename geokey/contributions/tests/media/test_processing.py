@@ -0,0 +1,226 @@
+"""Tests for background processing of media files."""
+
+import os
+import glob
+import pytz
+
+from datetime import datetime, timedelta
+
+from os.path import dirname, normpath, abspath, join
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from geokey.core.signals import media_processed
+from geokey.contributions.models import MediaFile
+from geokey.contributions.processing import (
+    process_media_file,
+    process_thumbnail,
+    process_queued_media,
+    requeue_stale_media
+)
+from geokey.contributions.tests.model_factories import ObservationFactory
+from geokey.users.tests.model_factories import UserFactory
+
+
+class FailingVideoHost(object):
+    def upload(self, video_file):
+        raise IOError('Video host not available.')
+
+
+def get_file(file_name, content_type):
+    path = normpath(join(dirname(abspath(__file__)), 'files', file_name))
+    with open(path, 'rb') as the_file:
+        return SimpleUploadedFile(file_name, the_file.read(), content_type)
+
+
+def create_media_file(file_name, content_type):
+    return MediaFile.objects.create(
+        name='Test name',
+        description='Test Description',
+        contribution=ObservationFactory.create(),
+        creator=UserFactory.create(),
+        the_file=get_file(file_name, content_type)
+    )
+
+
+def remove_uploads():
+    for directory in ['audio', 'videos', 'images']:
+        files = glob.glob(os.path.join(
+            settings.MEDIA_ROOT,
+            'user-uploads/%s/*' % directory
+        ))
+        for f in files:
+            os.remove(f)
+
+
+@override_settings(
+    ENABLE_VIDEO=True,
+    VIDEO_HOST='geokey.contributions.processing.LocalVideoHost'
+)
+class ProcessingTest(TestCase):
+    def setUp(self):
+        self.processed = []
+        media_processed.connect(self.receive_processed)
+
+    def tearDown(self):
+        media_processed.disconnect(self.receive_processed)
+        remove_uploads()
+
+    def receive_processed(self, sender, mediafile, **kwargs):
+        self.processed.append(mediafile)
+
+    def test_mp3_is_not_queued(self):
+        audio_file = create_media_file('audio_1.mp3', 'audio/mpeg')
+
+        self.assertEqual(audio_file.processing_status, 'ready')
+        self.assertEqual(self.processed, [])
+
+    def test_audio_processed_right_away(self):
+        audio_file = create_media_file('audio_2.3gp', 'audio/3gpp')
+
+        self.assertEqual(audio_file.processing_status, 'ready')
+        self.assertTrue(audio_file.audio.name.endswith('.mp3'))
+        self.assertEqual(self.processed, [audio_file])
+
+    @override_settings(MEDIA_PROCESSING_BACKGROUND=True)
+    def test_audio_processed_in_background(self):
+        audio_file = create_media_file('audio_2.3gp', 'audio/3gpp')
+        original = audio_file.audio.path
+
+        self.assertEqual(audio_file.processing_status, 'queued')
+        self.assertTrue(audio_file.audio.name.endswith('.3gp'))
+        self.assertEqual(self.processed, [])
+
+        audio_file = process_media_file(audio_file.id)
+
+        self.assertEqual(audio_file.processing_status, 'ready')
+        self.assertTrue(audio_file.audio.name.endswith('.mp3'))
+        self.assertFalse(os.path.isfile(original))
+        self.assertEqual(self.processed, [audio_file])
+
+        self.assertIsNone(process_media_file(audio_file.id))
+
+    def test_video_uploaded_right_away(self):
+        video_file = create_media_file('video.MOV', 'video/quicktime')
+
+        self.assertEqual(video_file.processing_status, 'ready')
+        self.assertEqual(
+            video_file.youtube_id,
+            os.path.splitext(os.path.basename(video_file.video.name))[0]
+        )
+        self.assertEqual(video_file.youtube_link, video_file.video.url)
+
+    @override_settings(MEDIA_PROCESSING_BACKGROUND=True)
+    def test_video_uploaded_in_background(self):
+        video_file = create_media_file('video.MOV', 'video/quicktime')
+
+        self.assertEqual(video_file.processing_status, 'queued')
+        self.assertEqual(video_file.youtube_id, '')
+
+        video_file = process_media_file(video_file.id)
+
+        self.assertEqual(video_file.processing_status, 'ready')
+        self.assertEqual(video_file.youtube_link, video_file.video.url)
+        self.assertEqual(self.processed, [video_file])
+
+    @override_settings(
+        VIDEO_HOST='geokey.contributions.tests.media.test_processing.'
+                   'FailingVideoHost'
+    )
+    def test_video_upload_failed(self):
+        video_file = create_media_file('video.MOV', 'video/quicktime')
+
+        self.assertEqual(video_file.processing_status, 'failed')
+        self.assertEqual(self.processed, [video_file])
+
+    def test_thumbnail_created_right_away(self):
+        image_file = create_media_file('image_02.jpg', 'image/jpeg')
+
+        self.assertEqual(image_file.thumbnail_status, 'ready')
+        self.assertEqual(
+            image_file.thumb.name,
+            image_file.image.name + '.300x300_q85_crop.jpg'
+        )
+
+    @override_settings(MEDIA_PROCESSING_BACKGROUND=True)
+    def test_thumbnail_created_in_background(self):
+        image_file = create_media_file('image_02.jpg', 'image/jpeg')
+
+        self.assertEqual(image_file.thumbnail_status, 'queued')
+        self.assertFalse(image_file.thumb)
+
+        self.assertIsNone(process_media_file(image_file.id))
+        image_file = process_thumbnail(image_file.id)
+
+        self.assertEqual(image_file.thumbnail_status, 'ready')
+        self.assertEqual(
+            image_file.thumb.name,
+            image_file.image.name + '.300x300_q85_crop.jpg'
+        )
+
+        self.assertIsNone(process_thumbnail(image_file.id))
+
+    @override_settings(MEDIA_PROCESSING_BACKGROUND=True)
+    def test_thumbnail_waits_for_video_upload(self):
+        video_file = create_media_file('video.MOV', 'video/quicktime')
+
+        self.assertIsNone(process_thumbnail(video_file.id))
+
+        video_file = process_media_file(video_file.id)
+
+        self.assertEqual(video_file.processing_status, 'ready')
+        self.assertEqual(video_file.thumbnail_status, 'ready')
+        self.assertFalse(video_file.thumb)
+
+    def test_thumbnail_failed(self):
+        image_file = create_media_file('image_04.svg', 'image/svg+xml')
+
+        self.assertEqual(image_file.thumbnail_status, 'failed')
+        self.assertFalse(image_file.thumb)
+
+
+@override_settings(
+    ENABLE_VIDEO=True,
+    VIDEO_HOST='geokey.contributions.processing.LocalVideoHost',
+    MEDIA_PROCESSING_BACKGROUND=True
+)
+class ProcessQueuedMediaTest(TransactionTestCase):
+    def tearDown(self):
+        remove_uploads()
+
+    def test_process_queued_media(self):
+        media_files = [
+            create_media_file('audio_2.3gp', 'audio/3gpp'),
+            create_media_file('audio_7.wav', 'audio/wav'),
+            create_media_file('video.MOV', 'video/quicktime'),
+        ]
+
+        self.assertEqual(process_queued_media(workers=2), 3)
+
+        for media_file in media_files:
+            media_file = MediaFile.objects.get(pk=media_file.id)
+            self.assertEqual(media_file.processing_status, 'ready')
+            self.assertEqual(media_file.thumbnail_status, 'ready')
+
+        self.assertEqual(process_queued_media(workers=2), 0)
+
+    def test_requeue_stale_media(self):
+        media_file = create_media_file('audio_7.wav', 'audio/wav')
+        now = datetime.utcnow().replace(tzinfo=pytz.utc)
+
+        MediaFile.objects.filter(pk=media_file.id).update(
+            processing_status='processing',
+            processing_at=now - timedelta(minutes=5)
+        )
+        self.assertEqual(requeue_stale_media(), 0)
+
+        MediaFile.objects.filter(pk=media_file.id).update(
+            processing_at=now - timedelta(hours=2)
+        )
+        self.assertEqual(process_queued_media(workers=1), 1)
+        self.assertEqual(
+            MediaFile.objects.get(pk=media_file.id).processing_status,
+            'ready'
+        )
@@ -15,6 +15,7 @@ from .model_factories import (
     VideoFileFactory,
     AudioFileFactory
 )
+from geokey.contributions.processing import process_thumbnail
 from geokey.contributions.serializers import FileSerializer
 
 
@@ -47,7 +48,7 @@ class FileSerializerTest(TestCase):
         self.assertEqual(serializer.get_url(image), image.image.url)
 
     def test_get_image_thumb_url(self):
-        image = ImageFileFactory.create()
+        image = process_thumbnail(ImageFileFactory.create().id)
 
         serializer = FileSerializer(image, context={'user': image.creator})
         self.assertEqual(
@@ -55,6 +56,49 @@ class FileSerializerTest(TestCase):
             image.image.url + '.300x300_q85_crop.png'
         )
 
+    def test_get_pending_image_thumb_url(self):
+        image = ImageFileFactory.create()
+
+        serializer = FileSerializer(image, context={'user': image.creator})
+        self.assertEqual(
+            serializer.get_thumbnail_url(image),
+            '/static/img/ajax-loader.gif'
+        )
+        self.assertFalse(image.thumb)
+
+    def test_get_failed_image_thumb_url(self):
+        image = ImageFileFactory.create(**{'thumbnail_status': 'failed'})
+
+        serializer = FileSerializer(image, context={'user': image.creator})
+        self.assertEqual(serializer.get_thumbnail_url(image), '')
+
+    def test_get_image_derivatives(self):
+        image = ImageFileFactory.create(**{'derivatives': [{
+            'size': 150,
+            'width': 150,
+            'height': 100,
+            'format': 'webp',
+            'name': 'user-uploads/images/test.png.150.webp'
+        }]})
+
+        serializer = FileSerializer(image, context={'user': image.creator})
+        self.assertEqual(serializer.get_derivatives(image), [{
+            'size': 150,
+            'width': 150,
+            'height': 100,
+            'format': 'webp',
+            'url': image.image.storage.url(
+                'user-uploads/images/test.png.150.webp')
+        }])
+
+    def test_get_document_derivatives(self):
+        document = DocumentFileFactory.create()
+
+        serializer = FileSerializer(document, context={
+            'user': document.creator
+        })
+        self.assertEqual(serializer.get_derivatives(document), [])
+
     def test_get_document_url(self):
         document = DocumentFileFactory.create()
 
@@ -64,15 +108,18 @@ class FileSerializerTest(TestCase):
         self.assertEqual(serializer.get_url(document), document.document.url)
 
     def test_get_document_thumb_url(self):
-        document = DocumentFileFactory.create()
+        document = process_thumbnail(DocumentFileFactory.create().id)
 
         serializer = FileSerializer(document, context={
             'user': document.creator
         })
         self.assertEqual(
             serializer.get_thumbnail_url(document),
-            document.thumbnail.url + '.300x300_q85_crop.jpg'
+            document.thumb.url
         )
+        self.assertTrue(document.thumb.url.startswith(
+            document.thumbnail.url + '.300x300_q85_crop'
+        ))
 
     def test_get_youtube_link(self):
         video = VideoFileFactory.create()
@@ -91,6 +138,7 @@ class FileSerializerTest(TestCase):
 
     def test_get_youtube_thumb(self):
         video = VideoFileFactory.create(**{'youtube_id': '14emk_jPnrI'})
+        video = process_thumbnail(video.id)
 
         serializer = FileSerializer(video, context={'user': video.creator})
 
@@ -0,0 +1,128 @@
+"""Tests for content-addressed storage of media files."""
+
+import os
+import glob
+import hashlib
+
+from django.conf import settings
+from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from geokey.contributions.models import ImageFile, MediaContent
+from geokey.contributions.storage import ContentAddressedStorage
+from geokey.contributions.management.commands.deduplicate_media import (
+    Command
+)
+from geokey.core.tests.helpers.image_helpers import get_image
+
+from .model_factories import ImageFileFactory
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        self.storage = ContentAddressedStorage()
+
+    def tearDown(self):
+        files = glob.glob(os.path.join(
+            settings.MEDIA_ROOT,
+            'user-uploads/images/*'
+        ))
+        for f in files:
+            os.remove(f)
+
+    def test_save(self):
+        content = b'Some content'
+        name = self.storage.save(
+            'user-uploads/images/Photo.JPG', ContentFile(content))
+
+        self.assertEqual(
+            name,
+            'user-uploads/images/%s.jpg' % hashlib.sha256(content).hexdigest()
+        )
+        self.assertTrue(self.storage.is_content_addressed(name))
+        self.assertFalse(
+            self.storage.is_content_addressed('user-uploads/images/a.jpg'))
+
+        media_content = MediaContent.objects.get(name=name)
+        self.assertEqual(media_content.size, len(content))
+        self.assertEqual(media_content.references, 1)
+
+    def test_save_identical_content(self):
+        first = self.storage.save(
+            'user-uploads/images/a.jpg', ContentFile(b'Some content'))
+        second = self.storage.save(
+            'user-uploads/images/b.jpg', ContentFile(b'Some content'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(MediaContent.objects.get(name=first).references, 2)
+
+        self.storage.delete(first)
+        self.assertTrue(self.storage.exists(first))
+        self.assertEqual(MediaContent.objects.get(name=first).references, 1)
+
+        self.storage.delete(second)
+        self.assertFalse(self.storage.exists(second))
+        self.assertFalse(MediaContent.objects.filter(name=first).exists())
+
+    def test_images_share_content(self):
+        first = ImageFileFactory.create(**{'image': get_image()})
+        second = ImageFileFactory.create(**{'image': get_image()})
+
+        self.assertEqual(first.image.name, second.image.name)
+
+
+class DeduplicateMediaTest(TestCase):
+    def tearDown(self):
+        files = glob.glob(os.path.join(
+            settings.MEDIA_ROOT,
+            'user-uploads/images/*'
+        ))
+        for f in files:
+            os.remove(f)
+
+    def create_legacy_file(self, file_name):
+        name = FileSystemStorage().save(
+            'user-uploads/images/%s' % file_name,
+            get_image()
+        )
+        image_file = ImageFileFactory.create(
+            **{'image': get_image(width=10, height=10)})
+        ImageFile.objects.filter(pk=image_file.id).update(image=name)
+        return image_file.id, name
+
+    def test_deduplicate(self):
+        first_id, first_name = self.create_legacy_file('first.png')
+        second_id, second_name = self.create_legacy_file('second.png')
+        size = os.path.getsize(os.path.join(settings.MEDIA_ROOT, first_name))
+
+        moved, reclaimed = Command().deduplicate(ImageFile, 'image')
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(reclaimed, size)
+
+        first = ImageFile.objects.get(pk=first_id)
+        second = ImageFile.objects.get(pk=second_id)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.storage.exists(first.image.name))
+        self.assertFalse(os.path.isfile(
+            os.path.join(settings.MEDIA_ROOT, first_name)))
+        self.assertFalse(os.path.isfile(
+            os.path.join(settings.MEDIA_ROOT, second_name)))
+
+        self.assertEqual(Command().deduplicate(ImageFile, 'image'), (0, 0))
+
+    def test_deduplicate_with_deleted_file(self):
+        file_id, name = self.create_legacy_file('legacy.png')
+        deleted = ImageFileFactory.create(
+            **{'image': get_image(width=10, height=10)})
+        ImageFile.objects.filter(pk=deleted.id).update(
+            image=name, status='deleted')
+
+        moved, reclaimed = Command().deduplicate(ImageFile, 'image')
+        self.assertEqual(moved, 2)
+
+        deleted = ImageFile._base_manager.get(pk=deleted.id)
+        self.assertEqual(
+            deleted.image.name, ImageFile.objects.get(pk=file_id).image.name)
+        self.assertTrue(deleted.image.storage.exists(deleted.image.name))
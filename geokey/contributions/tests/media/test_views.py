@@ -24,13 +24,15 @@ from rest_framework.renderers import JSONRenderer
 from geokey.core.exceptions import MalformedRequestData, FileTypeError
 from geokey.core.tests.helpers.image_helpers import get_image
 from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
-from geokey.contributions.models import MediaFile
+from geokey.contributions.models import MediaFile, MediaUpload
 from geokey.users.models import User
 
 from geokey.contributions.views.media import (
     MediaAbstractAPIView,
     MediaAPIView,
-    SingleMediaAPIView
+    SingleMediaAPIView,
+    MediaUploadsAPIView,
+    SingleMediaUploadAPIView
 )
 
 from ..model_factories import ObservationFactory
@@ -864,3 +866,203 @@ class AllContributionsSingleMediaApiViewTest(TestCase):
         })
         response = self.delete(AnonymousUser(), image_id=image_file.id)
         self.assertEqual(response.status_code, 403)
+
+
+class MediaUploadAPIViewTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.creator = UserFactory.create()
+        self.project = ProjectFactory(
+            add_admins=[self.admin],
+            add_contributors=[self.creator]
+        )
+        self.contribution = ObservationFactory.create(
+            **{'project': self.project, 'creator': self.creator}
+        )
+
+        path = normpath(join(
+            dirname(abspath(__file__)), 'files', 'image_02.jpg'))
+        with open(path, 'rb') as the_file:
+            self.content = the_file.read()
+
+    def tearDown(self):
+        for upload in MediaUpload.objects.all():
+            upload.delete()
+
+        files = glob.glob(os.path.join(
+            settings.MEDIA_ROOT,
+            'user-uploads/images/*'
+        ))
+        for f in files:
+            os.remove(f)
+
+    def create(self, user, data=None):
+        if data is None:
+            data = {
+                'name': 'A test image',
+                'description': 'Test image description',
+                'file_name': 'test.jpg',
+                'content_type': 'image/jpeg',
+                'size': len(self.content)
+            }
+
+        url = reverse(
+            'api:project_media_uploads',
+            kwargs={
+                'project_id': self.project.id,
+                'contribution_id': self.contribution.id
+            }
+        )
+
+        request = self.factory.post(url, data)
+        force_authenticate(request, user)
+        view = MediaUploadsAPIView.as_view()
+        return view(
+            request,
+            project_id=self.project.id,
+            contribution_id=self.contribution.id
+        ).render()
+
+    def upload_url(self, upload_id):
+        return reverse(
+            'api:project_single_media_upload',
+            kwargs={
+                'project_id': self.project.id,
+                'contribution_id': self.contribution.id,
+                'upload_id': upload_id
+            }
+        )
+
+    def head(self, user, upload_id):
+        request = self.factory.head(self.upload_url(upload_id))
+        force_authenticate(request, user)
+        view = SingleMediaUploadAPIView.as_view()
+        return view(
+            request,
+            project_id=self.project.id,
+            contribution_id=self.contribution.id,
+            upload_id=upload_id
+        ).render()
+
+    def patch(self, user, upload_id, chunk, offset):
+        request = self.factory.patch(
+            self.upload_url(upload_id),
+            chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+        force_authenticate(request, user)
+        view = SingleMediaUploadAPIView.as_view()
+        return view(
+            request,
+            project_id=self.project.id,
+            contribution_id=self.contribution.id,
+            upload_id=upload_id
+        ).render()
+
+    def test_resumable_upload(self):
+        response = self.create(self.creator)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Upload-Offset'], '0')
+
+        upload_id = json.loads(response.content)['id']
+        self.assertEqual(response['Location'], self.upload_url(upload_id))
+
+        response = self.patch(
+            self.creator, upload_id, self.content[:10000], 0)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(json.loads(response.content)['file'])
+
+        response = self.head(self.creator, upload_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], '10000')
+
+        response = self.patch(
+            self.creator, upload_id, self.content[10000:], 10000)
+        self.assertEqual(response.status_code, 200)
+
+        media_file = json.loads(response.content)['file']
+        self.assertEqual(media_file['name'], 'A test image')
+        self.assertEqual(media_file['file_type'], 'ImageFile')
+        self.assertEqual(
+            MediaFile.objects.get(pk=media_file['id']).contribution,
+            self.contribution
+        )
+
+    def test_patch_with_wrong_offset(self):
+        response = self.create(self.creator)
+        upload_id = json.loads(response.content)['id']
+
+        self.patch(self.creator, upload_id, self.content[:10000], 0)
+        response = self.patch(
+            self.creator, upload_id, self.content[5000:], 5000)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '10000')
+
+    def test_patch_without_offset(self):
+        response = self.create(self.creator)
+        upload_id = json.loads(response.content)['id']
+
+        request = self.factory.patch(
+            self.upload_url(upload_id),
+            self.content,
+            content_type='application/offset+octet-stream'
+        )
+        force_authenticate(request, self.creator)
+        view = SingleMediaUploadAPIView.as_view()
+        response = view(
+            request,
+            project_id=self.project.id,
+            contribution_id=self.contribution.id,
+            upload_id=upload_id
+        ).render()
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_patch_unsupported_file_type(self):
+        response = self.create(self.creator)
+        upload_id = json.loads(response.content)['id']
+
+        response = self.patch(
+            self.creator, upload_id, b'Just some text. ' * 100, 0)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MediaUpload.objects.filter(pk=upload_id).exists())
+
+    def test_patch_with_other_user(self):
+        response = self.create(self.creator)
+        upload_id = json.loads(response.content)['id']
+
+        response = self.patch(self.admin, upload_id, self.content, 0)
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_without_size(self):
+        response = self.create(self.creator, data={
+            'name': 'A test image',
+            'file_name': 'test.jpg',
+            'content_type': 'image/jpeg'
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_with_some_dude(self):
+        response = self.create(UserFactory.create())
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_upload(self):
+        response = self.create(self.creator)
+        upload_id = json.loads(response.content)['id']
+
+        request = self.factory.delete(self.upload_url(upload_id))
+        force_authenticate(request, self.creator)
+        view = SingleMediaUploadAPIView.as_view()
+        response = view(
+            request,
+            project_id=self.project.id,
+            contribution_id=self.contribution.id,
+            upload_id=upload_id
+        ).render()
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(MediaUpload.objects.filter(pk=upload_id).exists())
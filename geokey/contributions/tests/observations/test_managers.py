@@ -2,6 +2,10 @@
 
 from django.test import TestCase
 
+from nose.tools import raises
+
+from geokey.core.exceptions import InputError
+
 from geokey.contributions.models import Observation
 
 from geokey.projects.tests.model_factories import ProjectFactory, UserFactory
@@ -183,3 +187,36 @@ class TestSearch(TestCase):
 
         for o in result:
             self.assertIn(kermit.id, o.properties.get('lookup'))
+
+
+class TestGetByTime(TestCase):
+    def setUp(self):
+        self.old = ObservationFactory.create()
+        self.new = ObservationFactory.create()
+        Observation.objects.filter(pk=self.old.pk).update(
+            created_at='2015-01-01T00:00:00Z',
+            updated_at='2015-01-01T00:00:00Z'
+        )
+
+    def test_get_by_time(self):
+        observations = Observation.objects.all()
+
+        self.assertEqual(
+            list(observations.get_by_time(created_before='2015-01-02')),
+            [self.old]
+        )
+        self.assertEqual(
+            list(observations.get_by_time(updated_after='2015-01-02')),
+            [self.new]
+        )
+        self.assertEqual(
+            list(observations.get_by_time(
+                created_after='2015-01-01T01:00:00+02:00',
+                created_before='2015-01-01T01:00:00Z'
+            )),
+            [self.old]
+        )
+
+    @raises(InputError)
+    def test_get_by_time_with_invalid_date(self):
+        Observation.objects.all().get_by_time(created_after='yesterday')
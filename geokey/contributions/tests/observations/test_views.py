@@ -25,9 +25,9 @@ from ..model_factories import (
 
 from geokey.contributions.views.observations import (
     SingleAllContributionAPIView, SingleContributionAPIView,
-    ProjectObservations
+    ProjectObservations, ProjectContributionsQuery
 )
-from geokey.contributions.models import Observation
+from geokey.contributions.models import Observation, Location
 
 
 class SingleContributionAPIViewTest(TestCase):
@@ -529,6 +529,20 @@ class ProjectPublicApiTest(TestCase):
         response = self._post(self.data, self.admin)
         self.assertEqual(response.status_code, 400)
 
+    def test_contribute_outside_extent(self):
+        self.data['geometry']['coordinates'] = [2.35, 48.85]
+        locations = Location.objects.count()
+
+        with self.settings(EXTENT_ENFORCEMENT='reject'):
+            response = self._post(self.data, self.admin)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Location.objects.count(), locations)
+
+        with self.settings(EXTENT_ENFORCEMENT='flag'):
+            response = self._post(self.data, self.admin)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(json.loads(response.content)['meta']['outside_extent'])
+
     def test_contribute_with_invalid(self):
         data = {
             "type": "Feature",
@@ -1250,6 +1264,10 @@ class TestProjectPublicApi(TestCase):
             error = True
         self.assertEqual(error, True)
 
+    def test_get_with_non_ascii_bbox(self):
+        response = self.get(self.admin, bbox='41,32,45,%C3%A9')
+        self.assertEqual(response.status_code, 406)
+
     def test_get_with_bbox_and_search(self):
         category = CategoryFactory(**{'project': self.project})
         TextFieldFactory.create(**{'key': 'text', 'category': category})
@@ -1285,6 +1303,55 @@ class TestProjectPublicApi(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(json.loads(response.content).get('features')), 1)
 
+    def test_get_near(self):
+        near = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (-0.1340 51.5246)'
+            })
+        })
+        nearer = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (-0.1339 51.5245)'
+            })
+        })
+        ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (2.3522 48.8566)'
+            })
+        })
+
+        url = reverse('api:project_observations', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.get(
+            url + '?near=-0.1339,51.5245&radius=1000')
+        force_authenticate(request, user=self.admin)
+        response = ProjectObservations.as_view()(
+            request,
+            project_id=self.project.id).render()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [feature['id'] for feature in
+             json.loads(response.content).get('features')],
+            [nearer.id, near.id]
+        )
+
+    def test_get_near_with_wrong_point(self):
+        url = reverse('api:project_observations', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.get(url + '?near=north&nearest=2')
+        force_authenticate(request, user=self.admin)
+        response = ProjectObservations.as_view()(
+            request,
+            project_id=self.project.id).render()
+
+        self.assertEqual(response.status_code, 406)
+
     def test_get_with_admin(self):
         response = self.get(self.admin)
         self.assertEqual(response.status_code, 200)
@@ -1301,3 +1368,170 @@ class TestProjectPublicApi(TestCase):
     def test_get_with_anonymous(self):
         response = self.get(AnonymousUser())
         self.assertEqual(response.status_code, 404)
+
+
+class ProjectContributionsQueryTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.contributor = UserFactory.create()
+
+        self.project = ProjectFactory.create(
+            add_admins=[self.admin],
+            add_contributors=[self.contributor]
+        )
+        self.inside = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (-0.13 51.52)'
+            })
+        })
+        self.crossing = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'LINESTRING (-0.13 51.52, -0.2 51.6)'
+            })
+        })
+        ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (2.35 48.85)'
+            })
+        })
+        self.polygon = {
+            'type': 'Polygon',
+            'coordinates': [[
+                [-0.15, 51.5], [-0.1, 51.5], [-0.1, 51.55], [-0.15, 51.55],
+                [-0.15, 51.5]
+            ]]
+        }
+
+    def post(self, user, data):
+        url = reverse('api:project_contributions_query', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.post(url, data, format='json')
+        force_authenticate(request, user=user)
+        theview = ProjectContributionsQuery.as_view()
+        return theview(
+            request,
+            project_id=self.project.id).render()
+
+    def get_ids(self, response):
+        return sorted(
+            feature['id'] for feature in
+            json.loads(response.content).get('features')
+        )
+
+    def test_intersects(self):
+        response = self.post(self.admin, {'geometry': self.polygon})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.get_ids(response),
+            sorted([self.inside.id, self.crossing.id])
+        )
+
+    def test_within(self):
+        response = self.post(self.admin, {
+            'geometry': self.polygon,
+            'predicate': 'within'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_ids(response), [self.inside.id])
+
+    def test_within_with_line(self):
+        line = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'LINESTRING (-0.14 51.51, -0.11 51.54)'
+            })
+        })
+        response = self.post(self.admin, {
+            'geometry': self.polygon,
+            'predicate': 'within'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.get_ids(response),
+            sorted([self.inside.id, line.id])
+        )
+
+    def test_nearest(self):
+        response = self.post(self.admin, {
+            'near': [-0.13, 51.52],
+            'nearest': 2
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.get_ids(response),
+            sorted([self.inside.id, self.crossing.id])
+        )
+
+    def test_with_invalid_geometry(self):
+        response = self.post(self.admin, {
+            'geometry': {'type': 'Point', 'coordinates': [-0.13, 51.52]}
+        })
+        self.assertEqual(response.status_code, 406)
+
+    def test_with_some_dude(self):
+        response = self.post(UserFactory.create(), {
+            'geometry': self.polygon
+        })
+        self.assertEqual(response.status_code, 404)
+
+
+class ProjectObservationsTimeTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory.create(add_admins=[self.admin])
+
+        self.old = ObservationFactory.create(**{'project': self.project})
+        self.new = ObservationFactory.create(**{'project': self.project})
+        Observation.objects.filter(pk=self.old.pk).update(
+            created_at='2015-01-01T12:00:00Z',
+            updated_at='2015-01-02T12:00:00Z'
+        )
+
+    def get(self, user, **params):
+        url = reverse('api:project_observations', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.get(url, params)
+        force_authenticate(request, user=user)
+        theview = ProjectObservations.as_view()
+        return theview(request, project_id=self.project.id).render()
+
+    def get_ids(self, response):
+        return [
+            feature['id'] for feature in
+            json.loads(response.content).get('features')
+        ]
+
+    def test_created(self):
+        response = self.get(self.admin, created_before='2015-01-01T12:00Z')
+        self.assertEqual(self.get_ids(response), [])
+
+        response = self.get(self.admin, created_after='2015-01-01T12:00Z',
+                            created_before='2015-01-02')
+        self.assertEqual(self.get_ids(response), [self.old.id])
+
+        response = self.get(self.admin, created_after='2015-01-02')
+        self.assertEqual(self.get_ids(response), [self.new.id])
+
+    def test_updated(self):
+        response = self.get(self.admin, updated_before='2016-01-01')
+        self.assertEqual(self.get_ids(response), [self.old.id])
+
+    def test_with_subset(self):
+        subset = SubsetFactory.create(**{
+            'project': self.project,
+            'filters': {str(self.old.category_id): {}}
+        })
+        response = self.get(self.admin, subset=subset.id,
+                            created_after='2015-01-01')
+        self.assertEqual(self.get_ids(response), [self.old.id])
+
+    def test_with_invalid_date(self):
+        response = self.get(self.admin, created_after='last week')
+        self.assertEqual(response.status_code, 406)
@@ -0,0 +1,104 @@
+"""Tests for the density of contributions."""
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.core.exceptions import InputError
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import CategoryFactory
+from geokey.contributions.density import get_density
+from geokey.contributions.views.density import ProjectDensity
+
+from .model_factories import ObservationFactory, LocationFactory
+
+
+class DensityTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.categories = CategoryFactory.create_batch(2, **{
+            'project': self.project
+        })
+
+        for geometry, category in [
+                ('POINT (-0.1301 51.5201)', self.categories[0]),
+                ('POINT (-0.1302 51.5202)', self.categories[1]),
+                ('POINT (2.35 48.85)', self.categories[0])]:
+            ObservationFactory.create(**{
+                'project': self.project,
+                'category': category,
+                'location': LocationFactory.create(**{'geometry': geometry})
+            })
+
+    def test_get_density(self):
+        for shape in ['hexagon', 'square']:
+            density = get_density(
+                self.project,
+                self.project.get_all_contributions(self.admin),
+                shape,
+                1000,
+                categories=True
+            )
+
+            self.assertEqual(density['type'], 'FeatureCollection')
+            self.assertEqual(
+                sorted(feature['properties']['count']
+                       for feature in density['features']),
+                [1, 2]
+            )
+
+            cell = [feature for feature in density['features']
+                    if feature['properties']['count'] == 2][0]
+            self.assertEqual(cell['geometry']['type'], 'Polygon')
+            self.assertEqual(cell['properties']['categories'], {
+                self.categories[0].id: 1,
+                self.categories[1].id: 1
+            })
+
+    def test_get_density_with_invalid_cells(self):
+        contributions = self.project.get_all_contributions(self.admin)
+
+        with self.assertRaises(InputError):
+            get_density(self.project, contributions, 'triangle', 1000)
+
+        with self.assertRaises(InputError):
+            get_density(self.project, contributions, 'hexagon', 1)
+
+
+class ProjectDensityTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        ObservationFactory.create_batch(2, **{'project': self.project})
+
+    def get(self, user, **params):
+        url = reverse('api:project_contributions_density', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.get(url, params)
+        force_authenticate(request, user)
+        view = ProjectDensity.as_view()
+        return view(request, project_id=self.project.id).render()
+
+    def test_get(self):
+        response = self.get(self.admin, size=500)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sum(feature['properties']['count']
+                for feature in response.data['features']),
+            2
+        )
+
+    def test_get_without_size(self):
+        response = self.get(self.admin)
+        self.assertEqual(response.status_code, 406)
+
+    def test_get_with_inaccessible_project(self):
+        response = self.get(UserFactory.create(), size=500)
+        self.assertEqual(response.status_code, 404)
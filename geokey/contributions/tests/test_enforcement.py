@@ -0,0 +1,102 @@
+"""Tests for enforcement of geographic extents of projects."""
+
+import pytz
+
+from datetime import datetime
+
+from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.contrib.gis.geos import GEOSGeometry
+
+from geokey.projects.models import Project
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import CategoryFactory
+from geokey.contributions.models import Observation, Location
+from geokey.contributions.enforcement import check_extent, _prepared_extents
+
+INSIDE = 'POINT (-0.134 51.524)'
+OUTSIDE = 'POINT (2.35 48.85)'
+
+
+class EnforcementTest(TestCase):
+    def setUp(self):
+        self.creator = UserFactory.create()
+        self.project = ProjectFactory(add_contributors=[self.creator])
+        self.category = CategoryFactory.create(**{'project': self.project})
+
+    def create(self, geometry):
+        return Observation.create(
+            properties={},
+            creator=self.creator,
+            location=Location(geometry=geometry, creator=self.creator),
+            project=self.project,
+            category=self.category,
+            status='active'
+        )
+
+    def test_check_extent(self):
+        self.assertEqual(
+            check_extent(self.project, [
+                GEOSGeometry(INSIDE), GEOSGeometry(OUTSIDE)
+            ]),
+            [True, False]
+        )
+
+        self.project.geographic_extent = None
+        self.project.save()
+        self.assertEqual(
+            check_extent(self.project, [GEOSGeometry(OUTSIDE)]), [True])
+
+    def test_invalidate_extent(self):
+        check_extent(self.project, [GEOSGeometry(INSIDE)])
+        self.assertIn(self.project.id, _prepared_extents)
+
+        self.project.geographic_extent = GEOSGeometry(
+            'POLYGON ((2 48, 3 48, 3 49, 2 49, 2 48))')
+        self.project.save()
+        self.assertNotIn(self.project.id, _prepared_extents)
+        self.assertEqual(
+            check_extent(self.project, [GEOSGeometry(OUTSIDE)]), [True])
+
+        # Changed in another process, without the cache being invalidated
+        Project.objects.filter(pk=self.project.pk).update(
+            geographic_extent=GEOSGeometry(
+                'POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))'),
+            updated_at=datetime.utcnow().replace(tzinfo=pytz.utc))
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual(
+            check_extent(project, [GEOSGeometry(OUTSIDE)]), [False])
+
+    def test_without_enforcement(self):
+        with self.settings(EXTENT_ENFORCEMENT=None):
+            observation = self.create(OUTSIDE)
+
+        self.assertEqual(observation.status, 'active')
+        self.assertFalse(observation.outside_extent)
+
+    def test_reject(self):
+        with self.settings(EXTENT_ENFORCEMENT='reject'):
+            with self.assertRaises(ValidationError):
+                self.create(OUTSIDE)
+
+            self.assertEqual(self.create(INSIDE).status, 'active')
+
+        self.assertEqual(Location.objects.count(), 1)
+
+    def test_flag(self):
+        with self.settings(EXTENT_ENFORCEMENT='flag'):
+            outside = self.create(OUTSIDE)
+            inside = self.create(INSIDE)
+
+        self.assertEqual(outside.status, 'active')
+        self.assertTrue(outside.outside_extent)
+        self.assertFalse(inside.outside_extent)
+
+    def test_review(self):
+        with self.settings(EXTENT_ENFORCEMENT='review'):
+            outside = self.create(OUTSIDE)
+            inside = self.create(INSIDE)
+
+        self.assertEqual(outside.status, 'review')
+        self.assertTrue(outside.outside_extent)
+        self.assertEqual(inside.status, 'active')
@@ -0,0 +1,127 @@
+"""Tests for expiry of contributions."""
+
+import pytz
+
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    DateTimeFieldFactory
+)
+from geokey.contributions.models import Observation, ContributionStatistic
+from geokey.contributions.expiry import expire_contributions
+
+from .model_factories import ObservationFactory
+
+
+class ExpiryTest(TestCase):
+    def setUp(self):
+        self.creator = UserFactory.create()
+        self.viewer = UserFactory.create()
+        self.project = ProjectFactory(
+            add_contributors=[self.creator],
+            add_viewer=[self.viewer]
+        )
+        self.category = CategoryFactory.create(**{'project': self.project})
+        self.field = DateTimeFieldFactory.create(**{
+            'category': self.category
+        })
+        self.category.expiry_field = self.field
+        self.category.save()
+
+        self.now = datetime.utcnow().replace(tzinfo=pytz.utc)
+        self.contributions = [
+            ObservationFactory.create(**{
+                'project': self.project,
+                'category': self.category,
+                'creator': self.creator,
+                'status': status,
+                'properties': {
+                    self.field.key: str(self.now + timedelta(days=1))
+                }
+            }) for status in ['active', 'review', 'pending']
+        ]
+
+    def get_statuses(self):
+        return [
+            Observation.objects.get(pk=contribution.pk).status
+            for contribution in self.contributions
+        ]
+
+    def test_expire_contributions(self):
+        Observation.objects.filter(project=self.project).update(
+            expiry_field=self.now - timedelta(minutes=1))
+
+        self.assertEqual(expire_contributions(batch_size=1), 2)
+        self.assertEqual(self.get_statuses(),
+                         ['expired', 'expired', 'pending'])
+        self.assertEqual(expire_contributions(), 0)
+
+        self.assertEqual(
+            sorted(ContributionStatistic.objects.filter(
+                project=self.project,
+                count__gt=0
+            ).values_list('status', 'count')),
+            [('expired', 2), ('pending', 1)]
+        )
+
+        self.assertEqual(
+            self.project.get_all_contributions(self.viewer).count(), 0)
+        self.assertEqual(
+            self.project.get_all_contributions(self.creator).count(), 3)
+
+    def test_save_expired(self):
+        contribution = self.contributions[0]
+        contribution.properties = {
+            self.field.key: str(self.now - timedelta(days=1))
+        }
+        contribution.save()
+        self.assertEqual(contribution.status, 'expired')
+
+        contribution.properties = {
+            self.field.key: str(self.now + timedelta(days=1))
+        }
+        contribution.save()
+        self.assertEqual(contribution.status, 'active')
+
+    def test_save_expired_in_review(self):
+        contribution = self.contributions[1]
+        contribution.properties = {
+            self.field.key: str(self.now - timedelta(days=1))
+        }
+        contribution.save()
+        self.assertEqual(contribution.status, 'expired')
+
+        contribution.properties = {
+            self.field.key: str(self.now + timedelta(days=1))
+        }
+        contribution.save()
+        self.assertEqual(contribution.status, 'review')
+
+    def test_save_expired_in_background(self):
+        Observation.objects.filter(project=self.project).update(
+            expiry_field=self.now - timedelta(minutes=1))
+        expire_contributions()
+
+        contribution = Observation.objects.get(pk=self.contributions[1].pk)
+        self.assertEqual(contribution.status_before_expiry, 'review')
+
+        contribution.properties = {
+            self.field.key: str(self.now + timedelta(days=1))
+        }
+        contribution.save()
+        self.assertEqual(contribution.status, 'review')
+
+    def test_save_expired_without_status(self):
+        self.category.default_status = 'pending'
+        self.category.save()
+
+        contribution = self.contributions[0]
+        Observation.objects.filter(pk=contribution.pk).update(
+            status='expired')
+        contribution = Observation.objects.get(pk=contribution.pk)
+        contribution.save()
+        self.assertEqual(contribution.status, 'pending')
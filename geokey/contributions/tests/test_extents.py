@@ -0,0 +1,114 @@
+"""Tests for extents of contributions."""
+
+from django.test import TestCase
+
+from geokey.projects.models import ProjectExtent
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import CategoryFactory
+from geokey.users.tests.model_factories import UserGroupFactory
+from geokey.contributions.extents import get_data_extent, recompute_extents
+
+from .model_factories import ObservationFactory, LocationFactory
+
+
+class ExtentTest(TestCase):
+    def setUp(self):
+        self.admin = UserFactory.create()
+        self.viewer = UserFactory.create()
+        self.project = ProjectFactory(
+            add_admins=[self.admin],
+            add_viewer=[self.viewer]
+        )
+        self.first = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (-0.13 51.52)'
+            })
+        })
+        self.second = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (-0.10 51.50)'
+            })
+        })
+
+    def get_extent(self, status='active'):
+        return ProjectExtent.objects.get(project=self.project, status=status)
+
+    def test_expand_on_create(self):
+        extent = self.get_extent()
+        self.assertEqual(extent.bbox, [-0.13, 51.50, -0.10, 51.52])
+        self.assertFalse(extent.dirty)
+
+    def test_status_change(self):
+        self.second.status = 'pending'
+        self.second.save()
+
+        self.assertTrue(self.get_extent().dirty)
+        self.assertEqual(
+            self.get_extent('pending').bbox,
+            [-0.10, 51.50, -0.10, 51.50]
+        )
+
+        self.assertEqual(recompute_extents(), 1)
+        extent = self.get_extent()
+        self.assertFalse(extent.dirty)
+        self.assertEqual(extent.bbox, [-0.13, 51.52, -0.13, 51.52])
+
+    def test_delete(self):
+        self.first.delete()
+        self.assertTrue(self.get_extent().dirty)
+
+        recompute_extents()
+        self.assertEqual(
+            self.get_extent().bbox,
+            [-0.10, 51.50, -0.10, 51.50]
+        )
+
+    def test_move_location(self):
+        location = self.first.location
+        location.geometry = 'POINT (-0.20 51.60)'
+        location.save()
+
+        extent = self.get_extent()
+        self.assertTrue(extent.dirty)
+        self.assertEqual(extent.bbox[2:], [-0.10, 51.60])
+
+    def test_get_data_extent(self):
+        self.second.status = 'pending'
+        self.second.save()
+
+        extent = get_data_extent(self.project, self.admin)
+        self.assertEqual(sorted(extent['statuses'].keys()),
+                         ['active', 'pending'])
+        self.assertEqual(extent['bbox'], [-0.13, 51.50, -0.10, 51.52])
+
+        extent = get_data_extent(self.project, self.viewer)
+        self.assertEqual(list(extent['statuses'].keys()), ['active'])
+        # Not recomputed yet, the hull of both points is a line
+        self.assertEqual(extent['statuses']['active']['hull']['type'],
+                         'LineString')
+
+    def test_get_data_extent_with_filters(self):
+        category = CategoryFactory.create(**{'project': self.project})
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': category,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (2.35 48.85)'
+            })
+        })
+        user = UserFactory.create()
+        usergroup = UserGroupFactory.create(**{
+            'project': self.project,
+            'add_users': [user]
+        })
+        usergroup.filters = {category.id: {}}
+        usergroup.save()
+
+        extent = get_data_extent(self.project, user)
+        self.assertEqual(list(extent['statuses'].keys()), ['active'])
+        self.assertEqual(extent['bbox'], [2.35, 48.85, 2.35, 48.85])
+
+        extent = get_data_extent(self.project, self.admin)
+        self.assertEqual(extent['bbox'], [-0.13, 48.85, 2.35, 51.52])
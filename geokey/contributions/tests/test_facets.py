@@ -0,0 +1,135 @@
+"""Tests for facet counts of contributions."""
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    LookupFieldFactory,
+    LookupValueFactory,
+    MultipleLookupFieldFactory,
+    MultipleLookupValueFactory,
+    NumericFieldFactory
+)
+from geokey.contributions.facets import get_facets
+from geokey.contributions.views.facets import ProjectFacets
+
+from .model_factories import ObservationFactory
+
+
+class FacetsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.category = CategoryFactory.create(**{'project': self.project})
+
+        self.lookup = LookupFieldFactory.create(**{
+            'category': self.category
+        })
+        self.values = LookupValueFactory.create_batch(2, **{
+            'field': self.lookup
+        })
+        self.multiple = MultipleLookupFieldFactory.create(**{
+            'category': self.category
+        })
+        self.items = MultipleLookupValueFactory.create_batch(2, **{
+            'field': self.multiple
+        })
+        self.numeric = NumericFieldFactory.create(**{
+            'category': self.category
+        })
+
+        for number, value, items in [
+                (0, self.values[0], self.items),
+                (5, self.values[0], self.items[:1]),
+                (10, self.values[1], [])]:
+            ObservationFactory.create(**{
+                'project': self.project,
+                'category': self.category,
+                'properties': {
+                    self.lookup.key: value.id,
+                    self.multiple.key: [item.id for item in items],
+                    self.numeric.key: number
+                }
+            })
+
+    def get_facet(self, facets, field):
+        return [
+            facet for facet in facets['facets'] if facet['id'] == field.id
+        ][0]
+
+    def test_get_facets(self):
+        facets = get_facets(
+            self.project,
+            self.project.get_all_contributions(self.admin),
+            bins=2
+        )
+        self.assertEqual(facets['total'], 3)
+
+        self.assertEqual(
+            dict((value['id'], value['count']) for value in
+                 self.get_facet(facets, self.lookup)['values']),
+            {self.values[0].id: 2, self.values[1].id: 1}
+        )
+        self.assertEqual(
+            dict((value['id'], value['count']) for value in
+                 self.get_facet(facets, self.multiple)['values']),
+            {self.items[0].id: 2, self.items[1].id: 1}
+        )
+
+        numeric = self.get_facet(facets, self.numeric)
+        self.assertEqual((numeric['min'], numeric['max']), (0, 10))
+        self.assertEqual(
+            [(b['from'], b['to'], b['count']) for b in numeric['bins']],
+            [(0, 5, 1), (5, 10, 2)]
+        )
+
+    def test_get_cached_facets(self):
+        contributions = self.project.get_all_contributions(self.admin)
+        facets = get_facets(self.project, contributions)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                get_facets(self.project, contributions), facets)
+
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category
+        })
+        self.assertEqual(get_facets(self.project, contributions)['total'], 4)
+
+
+class ProjectFacetsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        ObservationFactory.create_batch(2, **{'project': self.project})
+
+    def get(self, user, **params):
+        url = reverse('api:project_contributions_facets', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.get(url, params)
+        force_authenticate(request, user)
+        view = ProjectFacets.as_view()
+        return view(request, project_id=self.project.id).render()
+
+    def test_get(self):
+        response = self.get(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 2)
+
+    def test_get_with_invalid_bins(self):
+        response = self.get(self.admin, bins='many')
+        self.assertEqual(response.status_code, 406)
+
+    def test_get_with_inaccessible_project(self):
+        response = self.get(UserFactory.create())
+        self.assertEqual(response.status_code, 404)
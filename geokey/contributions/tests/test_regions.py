@@ -0,0 +1,255 @@
+"""Tests for region layers of projects."""
+
+from django.test import TestCase, TransactionTestCase
+from django.core.urlresolvers import reverse
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.core.exceptions import InputError
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.projects.models import RegionLayer
+from geokey.contributions.regions import (
+    import_regions,
+    assign_layer,
+    assign_queued_layers,
+    get_location_chunks,
+    get_region_counts
+)
+from geokey.contributions.views.regions import (
+    ProjectRegionLayers,
+    ProjectRegionLayer
+)
+
+from .model_factories import ObservationFactory, LocationFactory
+
+
+def get_square(xmin, ymin, xmax, ymax, name):
+    return {
+        'type': 'Feature',
+        'geometry': {
+            'type': 'Polygon',
+            'coordinates': [[
+                [xmin, ymin], [xmax, ymin], [xmax, ymax], [xmin, ymax],
+                [xmin, ymin]
+            ]]
+        },
+        'properties': {'name': name}
+    }
+
+
+FEATURES = {
+    'type': 'FeatureCollection',
+    'features': [
+        get_square(-1, 51, 0, 52, 'West'),
+        get_square(0, 51, 1, 52, 'East')
+    ]
+}
+
+
+class RegionsTest(TestCase):
+    def setUp(self):
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.west = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (-0.5 51.5)'
+            })
+        })
+        self.layer = import_regions(
+            self.project, self.admin, 'Sides', FEATURES)
+        assign_layer(self.layer, workers=1)
+        self.regions = list(self.layer.regions.all())
+
+    def get_regions(self, contribution):
+        return sorted(
+            contribution.location.regions.values_list('name', flat=True))
+
+    def test_import_regions(self):
+        self.assertEqual(
+            [region.name for region in self.regions], ['West', 'East'])
+        self.assertEqual(self.get_regions(self.west), ['West'])
+
+    def test_assign_queued_layers(self):
+        layer = import_regions(self.project, self.admin, 'Again', FEATURES)
+        self.assertIsNone(layer.assigned_at)
+        self.assertEqual(self.get_regions(self.west), ['West'])
+
+        self.assertEqual(
+            [(assigned.id, count)
+             for assigned, count in assign_queued_layers(workers=1)],
+            [(layer.id, 1)]
+        )
+        self.assertEqual(self.get_regions(self.west), ['West', 'West'])
+        self.assertIsNotNone(
+            RegionLayer.objects.get(pk=layer.id).assigned_at)
+        self.assertEqual(assign_queued_layers(workers=1), [])
+
+    def test_get_location_chunks(self):
+        locations = [self.west.location] + [
+            ObservationFactory.create(**{
+                'project': self.project
+            }).location for x in range(2)
+        ]
+        ObservationFactory.create()
+
+        self.assertEqual(
+            get_location_chunks(self.project.id, chunk_size=2),
+            [
+                (locations[0].id, locations[1].id),
+                (locations[2].id, locations[2].id)
+            ]
+        )
+
+    def test_import_invalid_regions(self):
+        with self.assertRaises(InputError):
+            import_regions(self.project, self.admin, 'Points', {
+                'type': 'FeatureCollection',
+                'features': [{
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [0, 51]}
+                }]
+            })
+
+    def test_assign_new_contribution(self):
+        contribution = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'LINESTRING (-0.5 51.5, 0.5 51.5)'
+            })
+        })
+        self.assertEqual(self.get_regions(contribution), ['East', 'West'])
+
+        outside = ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (2.35 48.85)'
+            })
+        })
+        self.assertEqual(self.get_regions(outside), [])
+
+    def test_move_location(self):
+        location = self.west.location
+        location.geometry = 'POINT (0.5 51.5)'
+        location.save()
+
+        self.assertEqual(self.get_regions(self.west), ['East'])
+
+    def test_filter_and_count(self):
+        contributions = self.project.get_all_contributions(self.admin)
+
+        self.assertEqual(
+            list(self.project.get_all_contributions(
+                self.admin, region=self.regions[0].id)),
+            [self.west]
+        )
+        self.assertEqual(
+            self.project.get_all_contributions(
+                self.admin, region=self.regions[1].id).count(),
+            0
+        )
+        self.assertEqual(
+            [region['count'] for region in
+             get_region_counts(self.layer, contributions)],
+            [1, 0]
+        )
+
+
+class ProjectRegionLayersTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.contributor = UserFactory.create()
+        self.project = ProjectFactory(
+            add_admins=[self.admin],
+            add_contributors=[self.contributor]
+        )
+        ObservationFactory.create(**{
+            'project': self.project,
+            'location': LocationFactory.create(**{
+                'geometry': 'POINT (0.5 51.5)'
+            })
+        })
+
+    def post(self, user, data):
+        url = reverse('api:project_region_layers', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.post(url, data, format='json')
+        force_authenticate(request, user)
+        view = ProjectRegionLayers.as_view()
+        return view(request, project_id=self.project.id).render()
+
+    def get_layer(self, user, layer_id):
+        url = reverse('api:project_region_layer', kwargs={
+            'project_id': self.project.id,
+            'layer_id': layer_id
+        })
+        request = self.factory.get(url)
+        force_authenticate(request, user)
+        view = ProjectRegionLayer.as_view()
+        return view(
+            request,
+            project_id=self.project.id,
+            layer_id=layer_id
+        ).render()
+
+    def test_import_and_get(self):
+        response = self.post(self.admin, {
+            'name': 'Sides',
+            'features': FEATURES
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['regions'], 2)
+        self.assertIsNone(response.data['assigned_at'])
+
+        assign_queued_layers(workers=1)
+
+        response = self.get_layer(self.contributor, response.data['id'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(region['name'], region['count'])
+             for region in response.data['regions']],
+            [('West', 0), ('East', 1)]
+        )
+
+    def test_import_with_invalid_features(self):
+        response = self.post(self.admin, {'name': 'Sides', 'features': []})
+        self.assertEqual(response.status_code, 406)
+
+    def test_import_as_contributor(self):
+        response = self.post(self.contributor, {
+            'name': 'Sides',
+            'features': FEATURES
+        })
+        self.assertEqual(response.status_code, 403)
+
+
+class AssignLayerTest(TransactionTestCase):
+    def setUp(self):
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        self.contributions = [
+            ObservationFactory.create(**{
+                'project': self.project,
+                'location': LocationFactory.create(**{
+                    'geometry': geometry
+                })
+            }) for geometry in [
+                'POINT (-0.5 51.5)',
+                'POINT (0.5 51.5)',
+                'LINESTRING (-0.5 51.5, 0.5 51.5)',
+                'POINT (2.35 48.85)'
+            ]
+        ]
+        self.layer = import_regions(
+            self.project, self.admin, 'Sides', FEATURES)
+
+    def test_assign_layer_in_processes(self):
+        self.assertEqual(
+            assign_layer(self.layer, workers=2, chunk_size=1), 4)
+        self.assertEqual(
+            [sorted(contribution.location.regions.values_list(
+                'name', flat=True)) for contribution in self.contributions],
+            [['West'], ['East'], ['East', 'West'], []]
+        )
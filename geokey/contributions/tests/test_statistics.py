@@ -0,0 +1,121 @@
+"""Tests for statistics of contributions."""
+
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.core.exceptions import InputError
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import CategoryFactory
+from geokey.contributions.models import ContributionStatistic
+from geokey.contributions.statistics import get_statistics, rebuild_statistics
+from geokey.contributions.views.statistics import ProjectStatistics
+
+from .model_factories import ObservationFactory
+
+
+class StatisticsTest(TestCase):
+    def setUp(self):
+        self.admin = UserFactory.create()
+        self.viewer = UserFactory.create()
+        self.project = ProjectFactory(
+            add_admins=[self.admin],
+            add_viewer=[self.viewer]
+        )
+        self.category = CategoryFactory.create(**{'project': self.project})
+        self.contributions = ObservationFactory.create_batch(3, **{
+            'project': self.project,
+            'category': self.category,
+            'creator': self.admin
+        })
+        self.pending = ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category,
+            'status': 'pending'
+        })
+
+    def get_counts(self):
+        return sorted(ContributionStatistic.objects.filter(
+            project=self.project
+        ).values_list('status', 'count'))
+
+    def test_count_on_save(self):
+        self.assertEqual(self.get_counts(), [('active', 3), ('pending', 1)])
+
+        self.pending.status = 'active'
+        self.pending.save()
+        self.assertEqual(self.get_counts(), [('active', 1), ('active', 3)])
+
+        self.contributions[0].delete()
+        self.assertEqual(self.get_counts(), [('active', 1), ('active', 2)])
+
+    def test_count_on_remove(self):
+        self.category.delete()
+        self.assertEqual(self.get_counts(), [('active', 0), ('pending', 0)])
+        self.assertEqual(get_statistics(self.project, self.admin)['total'], 0)
+
+    def test_rebuild_statistics(self):
+        counts = self.get_counts()
+        ContributionStatistic.objects.all().delete()
+
+        rebuild_statistics(project_ids=[self.project.id])
+        self.assertEqual(self.get_counts(), counts)
+
+    def test_get_statistics(self):
+        statistics = get_statistics(self.project, self.admin)
+        self.assertEqual(statistics['total'], 4)
+        self.assertEqual(statistics['statuses'], {'active': 3, 'pending': 1})
+        self.assertEqual(
+            statistics['categories'],
+            [{'id': self.category.id, 'count': 4}]
+        )
+        self.assertEqual(statistics['contributors'][0]['id'], self.admin.id)
+        self.assertEqual(statistics['contributors'][0]['count'], 3)
+        self.assertEqual(len(statistics['days']), 1)
+
+        statistics = get_statistics(self.project, self.viewer)
+        self.assertEqual(statistics['total'], 3)
+
+    def test_get_statistics_by_days(self):
+        day = self.contributions[0].created_at.strftime('%Y-%m-%d')
+
+        statistics = get_statistics(self.project, self.admin, date_from=day)
+        self.assertEqual(statistics['total'], 4)
+
+        statistics = get_statistics(
+            self.project, self.admin, date_to='2000-01-01')
+        self.assertEqual(statistics['total'], 0)
+
+        with self.assertRaises(InputError):
+            get_statistics(self.project, self.admin, date_from='yesterday')
+
+
+class ProjectStatisticsTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        ObservationFactory.create_batch(2, **{'project': self.project})
+
+    def get(self, user, **params):
+        url = reverse('api:project_statistics', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.get(url, params)
+        force_authenticate(request, user)
+        view = ProjectStatistics.as_view()
+        return view(request, project_id=self.project.id).render()
+
+    def test_get(self):
+        response = self.get(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 2)
+
+    def test_get_with_invalid_day(self):
+        response = self.get(self.admin, **{'from': '2015-13-01'})
+        self.assertEqual(response.status_code, 406)
+
+    def test_get_with_inaccessible_project(self):
+        response = self.get(UserFactory.create())
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,180 @@
+"""Tests for the delta sync of contributions."""
+
+import pytz
+
+from datetime import datetime
+
+from django.test import TestCase, override_settings
+from django.core.urlresolvers import reverse
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.core.exceptions import MalformedRequestData
+from geokey.projects.tests.model_factories import UserFactory, ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    TextFieldFactory
+)
+from geokey.contributions.models import Observation
+from geokey.contributions.sync import decode_token, get_changes
+from geokey.contributions.views.sync import ProjectSync
+
+from .model_factories import ObservationFactory
+
+
+@override_settings(SYNC_LAG=0)
+class GetChangesTest(TestCase):
+    def setUp(self):
+        self.admin = UserFactory.create()
+        self.contributor = UserFactory.create()
+        self.project = ProjectFactory(
+            add_admins=[self.admin],
+            add_contributors=[self.contributor]
+        )
+        self.category = CategoryFactory.create(**{'project': self.project})
+        self.contributions = ObservationFactory.create_batch(3, **{
+            'project': self.project,
+            'category': self.category
+        })
+
+    def test_first_sync(self):
+        deleted = ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category
+        })
+        deleted.delete()
+
+        changes = get_changes(self.project, self.admin)
+
+        self.assertEqual(
+            [contribution.id for contribution in changes['contributions']],
+            [contribution.id for contribution in self.contributions]
+        )
+        self.assertEqual(changes['deleted'], [])
+        self.assertEqual(changes['categories'], [self.category])
+        self.assertEqual(changes['deleted_categories'], [])
+        self.assertFalse(changes['has_more'])
+
+    def test_sync_in_pages(self):
+        changes = get_changes(self.project, self.admin, limit=2)
+        self.assertEqual(len(changes['contributions']), 2)
+        self.assertTrue(changes['has_more'])
+
+        changes = get_changes(
+            self.project, self.admin, token=changes['token'], limit=2)
+        self.assertEqual(
+            changes['contributions'],
+            [self.contributions[2]]
+        )
+        self.assertEqual(changes['categories'], [])
+        self.assertFalse(changes['has_more'])
+
+        changes = get_changes(self.project, self.admin, token=changes['token'])
+        self.assertEqual(changes['contributions'], [])
+
+    def test_sync_changes(self):
+        token = get_changes(self.project, self.admin)['token']
+
+        updated = self.contributions[0]
+        updated.update(properties={'name': 'Updated'}, updator=self.admin)
+        self.contributions[1].delete()
+        TextFieldFactory.create(**{'category': self.category})
+
+        changes = get_changes(self.project, self.admin, token=token)
+
+        self.assertEqual(changes['contributions'], [updated])
+        self.assertEqual(changes['deleted'], [self.contributions[1].id])
+        self.assertEqual(changes['categories'], [self.category])
+
+    def test_sync_removed_from_viewer(self):
+        token = get_changes(self.project, self.contributor)['token']
+
+        self.category.status = 'inactive'
+        self.category.save()
+
+        changes = get_changes(self.project, self.contributor, token=token)
+        self.assertEqual(changes['categories'], [])
+        self.assertEqual(changes['deleted_categories'], [self.category.id])
+
+    def test_sync_skips_contributions_never_seen(self):
+        token = get_changes(self.project, self.contributor)['token']
+
+        for status in ['draft', 'pending']:
+            ObservationFactory.create(**{
+                'project': self.project,
+                'category': self.category,
+                'creator': self.admin,
+                'status': status
+            })
+        expired = self.contributions[0]
+        Observation.objects.filter(pk=expired.pk).update(
+            status='expired',
+            updated_at=datetime.utcnow().replace(tzinfo=pytz.utc)
+        )
+
+        changes = get_changes(self.project, self.contributor, token=token)
+        self.assertEqual(changes['contributions'], [])
+        self.assertEqual(changes['deleted'], [expired.id])
+
+        changes = get_changes(self.project, self.contributor)
+        self.assertEqual(len(changes['contributions']), 2)
+        self.assertEqual(changes['deleted'], [])
+
+    def test_sync_lags_behind(self):
+        token = get_changes(self.project, self.admin)['token']
+        ObservationFactory.create(**{
+            'project': self.project,
+            'category': self.category
+        })
+
+        with self.settings(SYNC_LAG=60):
+            changes = get_changes(self.project, self.admin, token=token)
+        self.assertEqual(changes['contributions'], [])
+
+        changes = get_changes(self.project, self.admin, token=token)
+        self.assertEqual(len(changes['contributions']), 1)
+
+    def test_decode_invalid_token(self):
+        self.assertRaises(MalformedRequestData, decode_token, 'invalid')
+
+
+@override_settings(SYNC_LAG=0)
+class ProjectSyncTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = UserFactory.create()
+        self.project = ProjectFactory(add_admins=[self.admin])
+        ObservationFactory.create_batch(3, **{'project': self.project})
+
+    def get(self, user, params=None):
+        url = reverse('api:project_sync', kwargs={
+            'project_id': self.project.id
+        })
+        request = self.factory.get(url, params or {})
+        force_authenticate(request, user)
+        view = ProjectSync.as_view()
+        return view(request, project_id=self.project.id)
+
+    def test_get(self):
+        response = self.get(self.admin, {'limit': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['contributions']), 2)
+        self.assertTrue(response.data['has_more'])
+
+        response = self.get(self.admin, {'token': response.data['token']})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['contributions']), 1)
+        self.assertFalse(response.data['has_more'])
+
+    def test_get_with_invalid_parameters(self):
+        response = self.get(self.admin, {'token': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.get(self.admin, {'limit': 'all'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_with_inaccessible_project(self):
+        response = self.get(UserFactory.create())
+        self.assertEqual(response.status_code, 404)
@@ -1,5 +1,6 @@
 """Base for views of contributions."""
 
+from geokey.core.exceptions import MalformedRequestData
 from geokey.projects.models import Project
 
 
@@ -40,3 +41,42 @@ class SingleAllContribution(object):
                 .select_related('location', 'project')\
                 .prefetch_related('comments')\
                 .get(pk=contribution_id)
+
+
+def get_int_param(request, name):
+    """
+    Get a positive integer from the query string.
+
+    Parameters
+    ----------
+    request : rest_framework.request.Request
+        Object representing the request.
+    name : str
+        Name of the parameter.
+
+    Returns
+    -------
+    int
+        Value of the parameter; None if it is not set.
+
+    Raises
+    ------
+    MalformedRequestData
+        When the value is not a positive integer.
+    """
+    value = request.GET.get(name)
+
+    if value in (None, ''):
+        return None
+
+    try:
+        value = int(value)
+    except ValueError:
+        value = -1
+
+    if value < 0:
+        raise MalformedRequestData(
+            'The parameter %s must be a positive integer.' % name
+        )
+
+    return value
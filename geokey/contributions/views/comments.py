@@ -10,7 +10,7 @@ from geokey.core.decorators import handle_exceptions_for_ajax
 from geokey.core.exceptions import MalformedRequestData
 from geokey.users.models import User
 
-from .base import SingleAllContribution
+from .base import SingleAllContribution, get_int_param
 from ..models import Comment
 from ..serializers import CommentSerializer
 
@@ -66,6 +66,12 @@ class CommentAbstractAPIView(APIView):
         """
         Respond to a GET request with a list of all comments.
 
+        All comments of the contribution are loaded with one query and
+        serialised as threads. Threads can be paginated with `limit` and
+        `after` (ID of the last comment of the previous page), the `Link`
+        header contains the URL of the next page then. Responses are nested
+        up to `depth` levels if set.
+
         Parameters
         ----------
         request : rest_framework.request.Request
@@ -78,12 +84,45 @@ class CommentAbstractAPIView(APIView):
         rest_framework.response.Respones
             Contains the serialized comments.
         """
+        limit = get_int_param(request, 'limit')
+        after = get_int_param(request, 'after')
+        depth = get_int_param(request, 'depth')
+
+        if limit is not None and limit < 1:
+            raise MalformedRequestData(
+                'The parameter limit must be a positive integer.'
+            )
+
+        tree = Comment.objects.get_tree(contribution)
+        threads = tree.get(None, [])
+
+        if after is not None:
+            threads = [thread for thread in threads if thread.id > after]
+
+        has_next = limit is not None and len(threads) > limit
+        if limit is not None:
+            threads = threads[:limit]
+
         serializer = CommentSerializer(
-            contribution.comments.filter(respondsto=None),
+            threads,
             many=True,
-            context={'user': request.user}
+            context={
+                'user': request.user,
+                'tree': tree,
+                'max_depth': depth
+            }
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+
+        if has_next:
+            params = request.GET.copy()
+            params['after'] = threads[-1].id
+            response['Link'] = '<%s?%s>; rel="next"' % (
+                request.build_absolute_uri(request.path),
+                params.urlencode()
+            )
+
+        return response
 
     def create_and_respond(self, request, contribution):
         """
@@ -0,0 +1,65 @@
+"""Views for the density of contributions."""
+
+from django.views.decorators.gzip import gzip_page
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from geokey.core.decorators import handle_exceptions_for_ajax
+from geokey.core.exceptions import InputError
+from geokey.projects.models import Project
+
+from ..density import get_density
+from ..spatial import parse_positive
+
+
+class ProjectDensity(APIView):
+    """
+    Public API endpoint for the density of the contributions of a project
+    /api/projects/:project_id/contributions/density/
+    """
+
+    @gzip_page
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id):
+        """
+        Handle GET request.
+
+        Return the number of contributions accessible to the user in each
+        cell of a grid, as GeoJSON polygons. Cells are hexagons, or squares
+        with `shape=square`, of `size` metres; counts per category are added
+        with `categories=true`. Contributions are filtered with `search`,
+        `subset` and `bbox`, like the list of contributions.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the cells.
+        """
+        project = Project.objects.get_single(request.user, project_id)
+
+        try:
+            contributions = project.get_all_contributions(
+                request.user,
+                search=request.GET.get('search'),
+                subset=request.GET.get('subset'),
+                bbox=request.GET.get('bbox')
+            )
+            density = get_density(
+                project,
+                contributions,
+                request.GET.get('shape', 'hexagon'),
+                parse_positive(request.GET.get('size'), 'size'),
+                categories=request.GET.get('categories') == 'true'
+            )
+        except InputError as e:
+            return Response(e, status=406)
+
+        return Response(density)
@@ -0,0 +1,252 @@
+"""Views for exports of contributions."""
+
+from django.http import Http404, StreamingHttpResponse
+
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from geokey.core.decorators import handle_exceptions_for_ajax
+from geokey.core.exceptions import InputError
+from geokey.projects.models import Project
+
+from ..base import EXPORT_STATUS
+from ..delivery import deliver_file
+from ..exports.jobs import get_job
+from ..exports.kml import stream_kml
+from ..exports.ogr import OGR_FORMATS, get_formats, stream_ogr
+from ..models import ExportJob
+from ..serializers import ExportJobSerializer
+
+
+EXPORT_FORMATS = {
+    'kml': (stream_kml, 'application/vnd.google-earth.kml+xml', 'kml'),
+}
+
+for ogr_format in get_formats():
+    EXPORT_FORMATS[ogr_format] = (
+        stream_ogr(ogr_format),
+        OGR_FORMATS[ogr_format]['content_type'],
+        OGR_FORMATS[ogr_format]['extension']
+    )
+
+
+class ProjectContributionsExport(APIView):
+    """
+    Public API endpoint to export all contributions of a project
+    /api/projects/:project_id/contributions/export/:export_format/
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id, export_format):
+        """
+        Handle GET request.
+
+        Stream all contributions of the project accessible to the user in the
+        requested format. Contributions are filtered the same way as when
+        listing them, using `search`, `subset` and `bbox`.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+        export_format : str
+            Format of the export: `kml`, `csv`, `shp` or `gpkg`.
+
+        Returns
+        -------
+        django.http.StreamingHttpResponse
+            Streams the exported contributions.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise Http404('Export format "%s" is not supported.' %
+                          export_format)
+
+        project = Project.objects.get_single(request.user, project_id)
+        try:
+            contributions = project.get_all_contributions(
+                request.user,
+                search=request.GET.get('search'),
+                subset=request.GET.get('subset'),
+                bbox=request.GET.get('bbox')
+            )
+        except InputError as e:
+            return Response(e, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+        stream, content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            stream(contributions, request.user),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = \
+            'attachment; filename="project-%s.%s"' % (project.id, extension)
+        return response
+
+
+class ExportJobAbstractAPIView(APIView):
+    """Abstract class for export jobs."""
+
+    def get_job(self, request, project_id, job_id):
+        """
+        Returns an export job of the user.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+        job_id : str
+            Identifies the job in the database.
+
+        Returns
+        -------
+        geokey.contributions.models.ExportJob
+            The job.
+
+        Raises
+        ------
+        ExportJob.DoesNotExist
+            if the job does not exist or has been submitted by another user.
+        """
+        project = Project.objects.get_single(request.user, project_id)
+        creator = None if request.user.is_anonymous() else request.user
+
+        return ExportJob.objects.get(
+            pk=job_id,
+            project=project,
+            creator=creator
+        )
+
+
+class ProjectExportJobs(APIView):
+    """
+    Public API endpoint to submit export jobs
+    /api/projects/:project_id/contributions/export/jobs/
+    """
+
+    @handle_exceptions_for_ajax
+    def post(self, request, project_id):
+        """
+        Handle POST request.
+
+        Submit an export of all contributions of the project accessible to
+        the user, filtered by `search`, `subset` and `bbox`. The export is
+        generated in the background; a job with the same parameters is
+        returned instead if the contributions have not changed since.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the serialised job; status 200 if the file can be
+            downloaded already, 202 otherwise.
+        """
+        export_format = request.data.get('export_format')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': 'Export format "%s" is not supported.' %
+                    export_format},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        project = Project.objects.get_single(request.user, project_id)
+        try:
+            job = get_job(
+                project,
+                request.user,
+                export_format,
+                search=request.data.get('search') or None,
+                subset=request.data.get('subset') or None,
+                bbox=request.data.get('bbox') or None
+            )
+        except InputError as e:
+            return Response(e, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+        serializer = ExportJobSerializer(job)
+        return Response(
+            serializer.data,
+            status=status.HTTP_200_OK
+            if job.status == EXPORT_STATUS.ready
+            else status.HTTP_202_ACCEPTED
+        )
+
+
+class SingleExportJob(ExportJobAbstractAPIView):
+    """
+    Public API endpoint to poll the progress of an export job
+    /api/projects/:project_id/contributions/export/jobs/:job_id/
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id, job_id):
+        """
+        Handle GET request.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+        job_id : str
+            Identifies the job in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the serialised job, including its status and progress.
+        """
+        job = self.get_job(request, project_id, job_id)
+        serializer = ExportJobSerializer(job)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class ExportJobFile(ExportJobAbstractAPIView):
+    """
+    Public API endpoint to download the file of an export job
+    /api/projects/:project_id/contributions/export/jobs/:job_id/file/
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id, job_id):
+        """
+        Handle GET request.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+        job_id : str
+            Identifies the job in the database.
+
+        Returns
+        -------
+        django.http.HttpResponse
+            Delivers the file; status 404 if the job is not ready.
+        """
+        job = self.get_job(request, project_id, job_id)
+
+        if job.status != EXPORT_STATUS.ready or not job.file:
+            return Response(
+                {'error': 'The export is not ready.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        response = deliver_file(request, job.file)
+        response['Content-Disposition'] = \
+            'attachment; filename="project-%s.%s"' % (
+                job.project_id,
+                EXPORT_FORMATS[job.export_format][2]
+            )
+        return response
@@ -0,0 +1,62 @@
+"""Views for facet counts of contributions."""
+
+from django.views.decorators.gzip import gzip_page
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from geokey.core.decorators import handle_exceptions_for_ajax
+from geokey.core.exceptions import InputError
+from geokey.projects.models import Project
+
+from ..facets import get_facets
+from ..spatial import parse_positive
+
+
+class ProjectFacets(APIView):
+    """
+    Public API endpoint for facet counts of the contributions of a project
+    /api/projects/:project_id/contributions/facets/
+    """
+
+    @gzip_page
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id):
+        """
+        Handle GET request.
+
+        Return the number of contributions accessible to the user for each
+        value of lookup and multiple lookup fields, and histograms of numeric
+        fields with `bins` bins. Contributions are filtered with `search`,
+        `subset` and `bbox`, like the list of contributions.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the facets.
+        """
+        project = Project.objects.get_single(request.user, project_id)
+
+        try:
+            bins = request.GET.get('bins')
+            if bins:
+                bins = parse_positive(bins, 'bins', cast=int)
+
+            contributions = project.get_all_contributions(
+                request.user,
+                search=request.GET.get('search'),
+                subset=request.GET.get('subset'),
+                bbox=request.GET.get('bbox')
+            )
+            facets = get_facets(project, contributions, bins=bins)
+        except InputError as e:
+            return Response(e, status=406)
+
+        return Response(facets)
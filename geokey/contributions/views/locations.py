@@ -1,16 +1,19 @@
 """Views for locations of contributions."""
 
-from django.db.models import Q
+from django.conf import settings
 
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
 from geokey.core.decorators import handle_exceptions_for_ajax
+from geokey.core.exceptions import InputError
 from geokey.users.models import User
 
+from .base import get_int_param
 from ..models import Location
-from ..serializers import LocationSerializer
+from ..serializers import LocationSerializer, CompactLocationSerializer
+from ..spatial import parse_point, parse_positive
 
 
 class LocationAbstractAPIView(APIView):
@@ -47,7 +50,12 @@ class LocationsAPIView(LocationAbstractAPIView):
         Handle GET request.
 
         Return a list of all locations of the project, that can be used for
-        contributions.
+        contributions. Locations can be filtered by `query` (name or
+        description), `bbox`, and `near` a point within `radius` metres.
+        Pages of `limit` locations (at most `settings.LOCATIONS_PAGE_SIZE`)
+        are ordered by ID; the `Link` header contains the URL of the next
+        page, which starts `after` the last location. Only ID, name and
+        geometry are returned if `compact` is `true`.
 
         Parameters
         ----------
@@ -61,20 +69,55 @@ class LocationsAPIView(LocationAbstractAPIView):
         rest_framework.response.Respone
             Contains the serialised locations.
         """
-        query = request.GET.get('query')
-        locations = Location.objects.get_list(
-            self.get_user(request),
-            project_id
-        )
+        limit = get_int_param(request, 'limit')
+        after = get_int_param(request, 'after')
+        limit = min(limit or settings.LOCATIONS_PAGE_SIZE,
+                    settings.LOCATIONS_PAGE_SIZE)
+
+        try:
+            locations = Location.objects.get_list(
+                self.get_user(request),
+                project_id
+            ).search(
+                request.GET.get('query')
+            ).get_by_bbox(
+                request.GET.get('bbox')
+            )
 
-        if query:
-            query = query.lower()
-            locations = locations.filter(
-                Q(name__icontains=query) | Q(description__icontains=query)
+            near = request.GET.get('near')
+            radius = request.GET.get('radius')
+
+            if near or radius:
+                locations = locations.get_by_radius(
+                    parse_point(near),
+                    parse_positive(radius, 'radius')
+                )
+        except InputError as e:
+            return Response(e, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+        if after is not None:
+            locations = locations.filter(id__gt=after)
+
+        locations = list(locations.order_by('id')[:limit + 1])
+        has_next = len(locations) > limit
+        locations = locations[:limit]
+
+        if request.GET.get('compact') == 'true':
+            serializer = CompactLocationSerializer(locations, many=True)
+        else:
+            serializer = LocationSerializer(locations, many=True)
+
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+
+        if has_next:
+            params = request.GET.copy()
+            params['after'] = locations[-1].id
+            response['Link'] = '<%s?%s>; rel="next"' % (
+                request.build_absolute_uri(request.path),
+                params.urlencode()
             )
 
-        serializer = LocationSerializer(locations, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return response
 
 
 class SingleLocationAPIView(LocationAbstractAPIView):
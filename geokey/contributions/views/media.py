@@ -1,18 +1,25 @@
 """Views for media files of contributions."""
 
+from django.db import transaction
 from django.core.exceptions import PermissionDenied
+from django.core.urlresolvers import reverse
 
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
 from geokey.core.decorators import handle_exceptions_for_ajax
-from geokey.core.exceptions import MalformedRequestData
+from geokey.core.exceptions import (
+    InputError,
+    MalformedRequestData,
+    FileTypeError
+)
 from geokey.users.models import User
 
 from .base import SingleAllContribution
-from ..models import MediaFile
-from ..serializers import FileSerializer
+from ..delivery import can_access, get_file_field, deliver_file
+from ..models import MediaFile, MediaUpload
+from ..serializers import FileSerializer, MediaUploadSerializer
 
 
 class MediaAbstractAPIView(APIView):
@@ -326,3 +333,404 @@ class SingleMediaAPIView(SingleAllContribution, MediaAbstractAPIView):
         file = self.get_file(contribution, file_id)
 
         return self.delete_and_respond(request, contribution, file)
+
+
+class MediaUploadAbstractAPIView(MediaAbstractAPIView):
+    """Abstract class for resumable uploads of media."""
+
+    def get_upload(self, request, contribution, upload_id):
+        """
+        Get a resumable upload of a contribution. Uploads can only be
+        continued by the users who created them.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        contribution : geokey.contributions.models.Observation
+            Contribution the file is uploaded to.
+        upload_id : str
+            Identifies the upload in the database.
+
+        Returns
+        -------
+        geokey.contributions.models.MediaUpload
+            Upload of a contribution.
+        """
+        return contribution.media_uploads.select_for_update().get(
+            pk=upload_id,
+            creator=self.get_user(request)
+        )
+
+    def upload_response(self, request, upload, status_code):
+        """
+        Respond with the state of an upload. The offset and size are also set
+        as headers, so clients can use HEAD requests to resume.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        upload : geokey.contributions.models.MediaUpload
+            Upload to respond with.
+        status_code : int
+            Status code of the response.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Contains the serialized upload.
+        """
+        serializer = MediaUploadSerializer(
+            upload,
+            context={'user': request.user}
+        )
+        response = Response(serializer.data, status=status_code)
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.size)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def create_upload_and_respond(self, request, contribution):
+        """
+        Respond to a POST request by creating a resumable upload.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        contribution : geokey.contributions.models.Observation
+            Contribution the media file should be added to.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Contains the serialized upload.
+
+        Raises
+        ------
+        MalformedRequestData
+            When name, file name, content type or size is not set.
+        PermissionDenied
+            When user is not allowed to contribute to the project.
+        """
+        user = self.get_user(request)
+
+        data = request.data
+        name = data.get('name')
+        file_name = data.get('file_name')
+        content_type = data.get('content_type')
+
+        try:
+            size = int(data.get('size'))
+        except (TypeError, ValueError):
+            size = None
+
+        errors = []
+        if name is None:
+            errors.append('Property `name` is not set')
+        if file_name is None:
+            errors.append('Property `file_name` is not set')
+        if content_type is None or '/' not in content_type:
+            errors.append('Property `content_type` is not set')
+        if size is None or size <= 0:
+            errors.append('Property `size` is not set')
+        if errors:
+            raise MalformedRequestData('%s.' % ', '.join(errors))
+
+        if not contribution.project.can_contribute(user):
+            raise PermissionDenied(
+                'You are not allowed to contribute to the project.'
+            )
+
+        upload = MediaUpload.objects.create(
+            name=name,
+            description=data.get('description'),
+            file_name=file_name,
+            content_type=content_type,
+            size=size,
+            contribution=contribution,
+            creator=user
+        )
+
+        response = self.upload_response(
+            request,
+            upload,
+            status.HTTP_201_CREATED
+        )
+        response['Location'] = reverse(
+            'api:project_single_media_upload',
+            kwargs={
+                'project_id': contribution.project.id,
+                'contribution_id': contribution.id,
+                'upload_id': upload.id
+            }
+        )
+        return response
+
+    def append_and_respond(self, request, contribution, upload_id):
+        """
+        Respond to a PATCH request by appending the chunk in the request
+        body to the upload. The chunk must start at the offset set in the
+        `Upload-Offset` header. The media file is created when the last
+        chunk has been received.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        contribution : geokey.contributions.models.Observation
+            Contribution the file is uploaded to.
+        upload_id : str
+            Identifies the upload in the database.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Contains the serialized upload, including the media file once
+            it is complete. Status 409 if the offset does not match.
+
+        Raises
+        ------
+        MalformedRequestData
+            When the `Upload-Offset` header is not set.
+        FileTypeError
+            When the file type is not supported; the upload is removed.
+        """
+        try:
+            offset = int(request.META.get('HTTP_UPLOAD_OFFSET'))
+        except (TypeError, ValueError):
+            raise MalformedRequestData('Header `Upload-Offset` is not set.')
+
+        try:
+            with transaction.atomic():
+                upload = self.get_upload(request, contribution, upload_id)
+
+                if upload.is_complete or offset != upload.offset:
+                    response = self.upload_response(
+                        request,
+                        upload,
+                        status.HTTP_409_CONFLICT
+                    )
+                    response.data['error'] = 'Offset does not match.'
+                    return response
+
+                try:
+                    upload.append(request.stream, offset)
+                except InputError as error:
+                    raise MalformedRequestData(str(error))
+        except FileTypeError:
+            MediaUpload.objects.get(pk=upload_id).delete()
+            raise
+
+        return self.upload_response(request, upload, status.HTTP_200_OK)
+
+    def delete_upload_and_respond(self, request, contribution, upload_id):
+        """
+        Respond to a DELETE request by cancelling the upload.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        contribution : geokey.contributions.models.Observation
+            Contribution the file is uploaded to.
+        upload_id : str
+            Identifies the upload in the database.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Empty response indicating success.
+        """
+        with transaction.atomic():
+            self.get_upload(request, contribution, upload_id).delete()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MediaUploadsAPIView(SingleAllContribution, MediaUploadAbstractAPIView):
+    """Public API for resumable uploads of media."""
+
+    @handle_exceptions_for_ajax
+    def post(self, request, project_id, contribution_id):
+        """
+        Handle POST request.
+
+        Start a resumable upload of a media file.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        project_id : int
+            Identifies the project in the database.
+        contribution_id : int
+            Identifies the contribution in the database.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Contains the serialised upload.
+        """
+        contribution = self.get_contribution(
+            request.user,
+            project_id,
+            contribution_id
+        )
+
+        return self.create_upload_and_respond(request, contribution)
+
+
+class SingleMediaUploadAPIView(SingleAllContribution,
+                               MediaUploadAbstractAPIView):
+    """Public API for a single resumable upload of media."""
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id, contribution_id, upload_id):
+        """
+        Handle GET (and HEAD) request.
+
+        Return the state of the upload, to find the offset to resume from.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        project_id : int
+            Identifies the project in the database.
+        contribution_id : int
+            Identifies the contribution in the database.
+        upload_id : str
+            Identifies the upload in the database.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Contains the serialised upload.
+        """
+        contribution = self.get_contribution(
+            request.user,
+            project_id,
+            contribution_id
+        )
+        upload = contribution.media_uploads.get(
+            pk=upload_id,
+            creator=self.get_user(request)
+        )
+
+        return self.upload_response(request, upload, status.HTTP_200_OK)
+
+    @handle_exceptions_for_ajax
+    def patch(self, request, project_id, contribution_id, upload_id):
+        """
+        Handle PATCH request.
+
+        Append a chunk to the upload.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        project_id : int
+            Identifies the project in the database.
+        contribution_id : int
+            Identifies the contribution in the database.
+        upload_id : str
+            Identifies the upload in the database.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Contains the serialised upload.
+        """
+        contribution = self.get_contribution(
+            request.user,
+            project_id,
+            contribution_id
+        )
+
+        return self.append_and_respond(request, contribution, upload_id)
+
+    @handle_exceptions_for_ajax
+    def delete(self, request, project_id, contribution_id, upload_id):
+        """
+        Handle DELETE request.
+
+        Cancel the upload.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        project_id : int
+            Identifies the project in the database.
+        contribution_id : int
+            Identifies the contribution in the database.
+        upload_id : str
+            Identifies the upload in the database.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Empty response indicating success.
+        """
+        contribution = self.get_contribution(
+            request.user,
+            project_id,
+            contribution_id
+        )
+
+        return self.delete_upload_and_respond(
+            request,
+            contribution,
+            upload_id
+        )
+
+
+class MediaFileContentAPIView(APIView):
+    """Public API for the stored content of a media file."""
+
+    @handle_exceptions_for_ajax
+    def get(self, request, file_id):
+        """
+        Handle GET request.
+
+        Deliver the stored file if the user can access the contribution the
+        file is attached to. Set `variant=thumbnail` to deliver the
+        thumbnail, or `derivative` to deliver a derivative of an image, e.g.
+        `derivative=600.webp`.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Object representing the request.
+        file_id : int
+            Identifies the media file in the database.
+
+        Returns
+        -------
+        django.http.HttpResponse
+            Delivers the file, or hands the transfer to the web server.
+        """
+        media_file = MediaFile.objects.select_related(
+            'contribution'
+        ).get(pk=file_id)
+
+        if not can_access(
+                request.user,
+                media_file.contribution.project_id,
+                media_file.contribution_id):
+            raise MediaFile.DoesNotExist(
+                'MediaFile matching query does not exist.'
+            )
+
+        field_file = get_file_field(
+            media_file,
+            variant=request.GET.get('variant'),
+            derivative=request.GET.get('derivative')
+        )
+        if field_file is None:
+            raise MediaFile.DoesNotExist('No file is stored for the media.')
+
+        return deliver_file(request, field_file)
@@ -6,6 +6,7 @@ from django.views.decorators.gzip import gzip_page
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser
 
 from geokey.core.decorators import handle_exceptions_for_ajax
 from geokey.users.models import User
@@ -17,6 +18,8 @@ from ..parsers.geojson import GeoJsonParser
 
 from .base import SingleAllContribution
 from ..serializers import ContributionSerializer
+from ..spatial import filter_spatially
+from ..temporal import get_time_params
 
 
 class GZipView(object):
@@ -83,7 +86,11 @@ class ProjectObservations(GZipView, GeoJsonView):
         Handle GET request.
 
         Return a list of all contributions of the project accessible to the
-        user.
+        user. Contributions near a point are returned with `near`, and can be
+        limited with `radius` (in metres) or `nearest`. Contributions created
+        or updated within a period are returned with `created_after`,
+        `created_before`, `updated_after` and `updated_before`, and those in
+        a region of a region layer with `region`.
 
         Parameters
         ----------
@@ -103,8 +110,11 @@ class ProjectObservations(GZipView, GeoJsonView):
                 request.user,
                 search=request.GET.get('search'),
                 subset=request.GET.get('subset'),
-                bbox=request.GET.get('bbox')
-            ).select_related('location', 'creator', 'updator', 'category') 
+                bbox=request.GET.get('bbox'),
+                region=request.GET.get('region'),
+                **get_time_params(request.GET)
+            ).select_related('location', 'creator', 'updator', 'category')
+            contributions = filter_spatially(contributions, request.GET)
         except InputError as e:
             return Response(e, status=status.HTTP_406_NOT_ACCEPTABLE)
         serializer = ContributionSerializer(
@@ -120,6 +130,63 @@ class ProjectObservations(GZipView, GeoJsonView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class ProjectContributionsQuery(GZipView, GeoJsonView):
+    """
+    Public API endpoint to query contributions of a project spatially
+    /api/projects/:project_id/contributions/query/
+    """
+    parser_classes = (JSONParser,)
+
+    @gzip_page
+    @handle_exceptions_for_ajax
+    def post(self, request, project_id):
+        """
+        Handle POST request.
+
+        Return a list of all contributions of the project accessible to the
+        user that match the query in the body: contributions intersecting or
+        within a GeoJSON polygon (`geometry` and `predicate`), and near a
+        point (`near`, `radius` and `nearest`). The query can be combined
+        with `search`, `subset`, `region` and periods (`created_after`,
+        `created_before`, `updated_after` and `updated_before`).
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        rest_framework.response.Respone
+            Contains the serialized contributions.
+        """
+        project = Project.objects.get_single(request.user, project_id)
+        try:
+            contributions = project.get_all_contributions(
+                request.user,
+                search=request.data.get('search'),
+                subset=request.data.get('subset'),
+                region=request.data.get('region'),
+                **get_time_params(request.data)
+            ).select_related('location', 'creator', 'updator', 'category')
+            contributions = filter_spatially(contributions, request.data)
+        except InputError as e:
+            return Response(e, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+        serializer = ContributionSerializer(
+            contributions,
+            many=True,
+            context={
+                'user': request.user,
+                'project': project,
+                'search': request.data.get('search')
+            }
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 # ############################################################################
 #
 # SINGLE CONTRIBUTION
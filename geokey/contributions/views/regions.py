@@ -0,0 +1,170 @@
+"""Views for region layers of projects."""
+
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.parsers import JSONParser
+
+from geokey.core.decorators import handle_exceptions_for_ajax
+from geokey.core.exceptions import InputError
+from geokey.projects.models import Project
+
+from ..regions import import_regions, get_region_counts
+
+
+def serialize_layer(layer):
+    """
+    Returns the native representation of a region layer, without regions.
+    """
+    return {
+        'id': layer.id,
+        'name': layer.name,
+        'description': layer.description,
+        'created_at': str(layer.created_at),
+        'assigned_at': str(layer.assigned_at) if layer.assigned_at else None,
+        'regions': layer.regions.count()
+    }
+
+
+class ProjectRegionLayers(APIView):
+    """
+    Public API endpoint for region layers of a project
+    /api/projects/:project_id/regions/
+    """
+    parser_classes = (JSONParser,)
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id):
+        """
+        Handle GET request.
+
+        Return all region layers of the project.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the layers.
+        """
+        project = Project.objects.get_single(request.user, project_id)
+
+        return Response([
+            serialize_layer(layer) for layer in project.region_layers.all()
+        ])
+
+    @handle_exceptions_for_ajax
+    def post(self, request, project_id):
+        """
+        Handle POST request.
+
+        Import a region layer from the GeoJSON polygons in `features`, named
+        with `name`; names of regions are read from the property
+        `name_property`. Locations of contributions are assigned to the
+        regions in the background by the `assign_regions` command;
+        `assigned_at` is set once they are.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the layer.
+        """
+        project = Project.objects.as_admin(request.user, project_id)
+
+        try:
+            layer = import_regions(
+                project,
+                request.user,
+                request.data.get('name'),
+                request.data.get('features'),
+                name_property=request.data.get('name_property') or 'name',
+                description=request.data.get('description')
+            )
+        except InputError as e:
+            return Response(e, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+        return Response(
+            serialize_layer(layer),
+            status=status.HTTP_201_CREATED
+        )
+
+
+class ProjectRegionLayer(APIView):
+    """
+    Public API endpoint for a single region layer of a project
+    /api/projects/:project_id/regions/:layer_id/
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id, layer_id):
+        """
+        Handle GET request.
+
+        Return the layer with its regions and the number of contributions
+        accessible to the user in each region, filtered with `search` and
+        `subset`.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+        layer_id : int
+            Identifies the layer in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the layer.
+        """
+        project = Project.objects.get_single(request.user, project_id)
+        layer = project.region_layers.get(pk=layer_id)
+
+        contributions = project.get_all_contributions(
+            request.user,
+            search=request.GET.get('search'),
+            subset=request.GET.get('subset')
+        )
+
+        data = serialize_layer(layer)
+        data['regions'] = get_region_counts(layer, contributions)
+        return Response(data)
+
+    @handle_exceptions_for_ajax
+    def delete(self, request, project_id, layer_id):
+        """
+        Handle DELETE request.
+
+        Remove the layer, with its regions and their assignments.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+        layer_id : int
+            Identifies the layer in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Empty response indicating success.
+        """
+        project = Project.objects.as_admin(request.user, project_id)
+        project.region_layers.get(pk=layer_id).delete()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
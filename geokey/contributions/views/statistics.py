@@ -0,0 +1,54 @@
+"""Views for statistics of contributions."""
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from geokey.core.decorators import handle_exceptions_for_ajax
+from geokey.core.exceptions import InputError
+from geokey.projects.models import Project
+
+from ..statistics import get_statistics
+
+
+class ProjectStatistics(APIView):
+    """
+    Public API endpoint for statistics of the contributions of a project
+    /api/projects/:project_id/statistics/
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id):
+        """
+        Handle GET request.
+
+        Return the number of contributions the user can access, in total and
+        per category, status, contributor and day. Contributions can be
+        limited to those created between the days `from` and `to`
+        (YYYY-MM-DD) and filtered by `subset`.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the statistics.
+        """
+        project = Project.objects.get_single(request.user, project_id)
+
+        try:
+            statistics = get_statistics(
+                project,
+                request.user,
+                subset=request.GET.get('subset'),
+                date_from=request.GET.get('from'),
+                date_to=request.GET.get('to')
+            )
+        except InputError as e:
+            return Response(e, status=406)
+
+        return Response(statistics)
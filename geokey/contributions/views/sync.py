@@ -0,0 +1,132 @@
+"""Views for the delta sync of contributions."""
+
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from geokey.core.decorators import handle_exceptions_for_ajax
+from geokey.core.exceptions import MalformedRequestData
+from geokey.projects.models import Project
+from geokey.categories.serializers import CategorySerializer
+
+from ..delivery import deliver_file
+from ..exports.bundle import get_bundle
+from ..serializers import ContributionSerializer
+from ..sync import get_changes
+
+
+class ProjectSync(APIView):
+    """
+    Public API endpoint to sync contributions of a project
+    /api/projects/:project_id/sync/
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id):
+        """
+        Handle GET request.
+
+        Return the contributions and categories of the project that changed
+        since the sync identified by `token`, and the IDs of those removed.
+        Requests are repeated with the token returned until `has_more` is
+        false; the number of contributions returned at once can be limited
+        with `limit`.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        rest_framework.response.Response
+            Contains the changes and the token of the next sync.
+        """
+        limit = request.GET.get('limit')
+
+        if limit:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+
+            if limit < 1:
+                raise MalformedRequestData(
+                    'The parameter limit must be a positive integer.'
+                )
+
+        project = Project.objects.get_single(request.user, project_id)
+        changes = get_changes(
+            project,
+            request.user,
+            token=request.GET.get('token'),
+            limit=limit or None,
+            subset=request.GET.get('subset')
+        )
+
+        contributions = ContributionSerializer(
+            changes['contributions'],
+            many=True,
+            context={'user': request.user, 'project': project}
+        )
+        categories = CategorySerializer(changes['categories'], many=True)
+
+        return Response({
+            'contributions': contributions.data,
+            'deleted': changes['deleted'],
+            'categories': categories.data,
+            'deleted_categories': changes['deleted_categories'],
+            'token': changes['token'],
+            'has_more': changes['has_more']
+        }, status=status.HTTP_200_OK)
+
+
+class ProjectBundleView(APIView):
+    """
+    Public API endpoint to download a bundle of a project for offline use
+    /api/projects/:project_id/bundle/
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id):
+        """
+        Handle GET request.
+
+        Deliver a GeoPackage with the project, its categories and all
+        contributions accessible to the user; thumbnails of media files are
+        included when `thumbnails` is `true`. The bundle is updated with the
+        changes since it was last written. Clients sending the ETag of the
+        bundle they have in `If-None-Match` get status 304 if it did not
+        change.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        django.http.HttpResponse
+            Delivers the bundle.
+        """
+        project = Project.objects.get_single(request.user, project_id)
+        bundle = get_bundle(
+            project,
+            request.user,
+            thumbnails=request.GET.get('thumbnails') == 'true'
+        )
+        etag = '"%s"' % bundle.etag
+
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = deliver_file(request, bundle.file)
+            response['Content-Disposition'] = \
+                'attachment; filename="project-%s.gpkg"' % project.id
+
+        response['ETag'] = etag
+        return response
@@ -87,3 +87,6 @@ LOG_MODELS = {
     ],
 }
 LOG_M2M_RELATIONS = ['UserGroup_users']
+HISTORY_DELTA_FIELDS = {
+    'contributions.Observation': 'properties',
+}
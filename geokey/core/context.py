@@ -0,0 +1,21 @@
+"""Core request context."""
+
+import threading
+
+
+_context = threading.local()
+
+
+def set_request(request):
+    """Set the request handled by the current thread."""
+    _context.request = request
+
+
+def get_request():
+    """Get the request handled by the current thread."""
+    return getattr(_context, 'request', None)
+
+
+def clear_request():
+    """Clear the request handled by the current thread."""
+    _context.request = None
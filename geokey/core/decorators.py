@@ -17,7 +17,7 @@ from geokey.categories.models import (
 )
 from geokey.applications.models import Application
 from geokey.contributions.models import (
-    Observation, Comment, Location, MediaFile
+    Observation, Comment, Location, MediaFile, MediaUpload, ExportJob
 )
 from geokey.subsets.models import Subset
 
@@ -79,7 +79,9 @@ def handle_exceptions_for_ajax(func):
             Observation.DoesNotExist,
             Location.DoesNotExist,
             Comment.DoesNotExist,
-            MediaFile.DoesNotExist
+            MediaFile.DoesNotExist,
+            MediaUpload.DoesNotExist,
+            ExportJob.DoesNotExist
         ) as error:
             return Response(
                 {"error": str(error)},
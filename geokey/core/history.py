@@ -0,0 +1,194 @@
+"""Core history compaction."""
+
+from django.db import models
+from django.conf import settings
+from .base import HISTORY_DELTA_FIELDS
+
+
+class HistoricalDeltaModel(models.Model):
+    """
+    Abstract base for historical models that can store deltas.
+
+    When `history_delta` is set, the field registered in `HISTORY_DELTA_FIELDS`
+    only stores the changes made to the previous historical record, and the
+    full value needs to be rebuilt from the closest snapshot before.
+    """
+
+    history_delta = models.BooleanField(default=False)
+
+    class Meta:
+        abstract = True
+
+
+def get_delta(old_value, new_value):
+    """
+    Get the delta between two dict values.
+
+    Parameters
+    ----------
+    old_value : dict
+        Value of the previous version.
+    new_value : dict
+        Value of the new version.
+
+    Returns
+    -------
+    dict
+        Keys that are set (with their new values) and keys that are unset.
+    """
+    old_value = old_value or {}
+    new_value = new_value or {}
+
+    return {
+        'set': dict(
+            (key, value) for key, value in new_value.items()
+            if key not in old_value or old_value[key] != value
+        ),
+        'unset': [key for key in old_value if key not in new_value],
+    }
+
+
+def apply_delta(value, delta):
+    """
+    Apply a delta to a dict value.
+
+    Parameters
+    ----------
+    value : dict
+        Value of the previous version.
+    delta : dict
+        Delta as returned by `get_delta`.
+
+    Returns
+    -------
+    dict
+        Value of the new version.
+    """
+    value = dict(value or {})
+    value.update(delta.get('set', {}))
+
+    for key in delta.get('unset', []):
+        value.pop(key, None)
+
+    return value
+
+
+def get_delta_field(history_model):
+    """Get the field stored as delta for a historical model, if any."""
+    instance_type = getattr(history_model, 'instance_type', None)
+    if instance_type is None:
+        return None
+
+    return HISTORY_DELTA_FIELDS.get('%s.%s' % (
+        instance_type._meta.app_label,
+        instance_type._meta.object_name
+    ))
+
+
+def get_chain(history_model, object_id, history_id):
+    """
+    Get records needed to rebuild a historical record.
+
+    Returns the closest snapshot at or before the record, followed by all
+    deltas up to the record, in the order they were created. Takes two
+    queries: one for the closest snapshot, one for the records.
+    """
+    records = history_model.objects.filter(
+        id=object_id,
+        history_id__lte=history_id
+    ).order_by('-history_id')
+
+    snapshot = records.filter(history_delta=False).values_list(
+        'history_id', flat=True).first()
+
+    if snapshot is not None:
+        records = records.filter(history_id__gte=snapshot)
+
+    return list(records)[::-1]
+
+
+def rebuild(records, field):
+    """Rebuild the full value of the last record in a chain of records."""
+    value = None
+
+    for record in records:
+        if record.history_delta:
+            value = apply_delta(value, getattr(record, field))
+        else:
+            value = getattr(record, field)
+
+    return value
+
+
+def rebuild_record(record):
+    """
+    Rebuild the full value of the delta field of a historical record.
+
+    Parameters
+    ----------
+    record : django.db.models.Model
+        Historical record, e.g. `HistoricalObservation`.
+
+    Returns
+    -------
+    django.db.models.Model
+        The historical record; never a delta.
+    """
+    field = get_delta_field(record.__class__)
+
+    if field is not None and record.history_delta:
+        chain = get_chain(record.__class__, record.id, record.history_id)
+        setattr(record, field, rebuild(chain, field))
+        record.history_delta = False
+
+    return record
+
+
+def get_historical_record(history_model, history_id):
+    """
+    Get a historical record with the full value of its delta field.
+
+    Parameters
+    ----------
+    history_model : django.db.models.Model
+        Historical model, e.g. `Observation.history.model`.
+    history_id : int
+        Identifies the historical record in the database.
+
+    Returns
+    -------
+    django.db.models.Model
+        The historical record; never a delta.
+    """
+    return rebuild_record(history_model.objects.get(history_id=history_id))
+
+
+def store_delta_on_pre_save(sender, instance, **kwargs):
+    """
+    Store the delta instead of full value for a new historical record.
+
+    Connected to the `pre_save` signal of each historical model registered
+    in `HISTORY_DELTA_FIELDS`, e.g. `Observation.history.model`.
+    """
+    if not settings.HISTORY_COMPACTION or instance.pk is not None:
+        return
+
+    field = get_delta_field(sender)
+    if field is None or instance.history_type != '~':
+        return
+
+    previous = sender.objects.filter(id=instance.id).order_by(
+        '-history_id').values_list('history_id', flat=True).first()
+    if previous is None:
+        return
+
+    chain = get_chain(sender, instance.id, previous)
+    if len(chain) >= settings.HISTORY_SNAPSHOT_INTERVAL:
+        # Store a full snapshot periodically, so rebuilding stays cheap
+        return
+
+    setattr(instance, field, get_delta(
+        rebuild(chain, field),
+        getattr(instance, field)
+    ))
+    instance.history_delta = True
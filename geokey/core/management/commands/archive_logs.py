@@ -0,0 +1,97 @@
+"""Command `archive_logs`."""
+
+import json
+import gzip
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from geokey.core.models import LoggerHistory
+
+
+class Command(BaseCommand):
+    """A command to archive and remove logs past the retention period."""
+
+    help = 'Archives and removes history logs older than the retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.LOGGER_RETENTION_DAYS,
+            help='Number of days logs are kept for.')
+        parser.add_argument(
+            '--archive',
+            default=None,
+            help='Gzipped file logs are appended to (as JSON lines) before '
+                 'they are removed. Logs are not archived when not set.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of logs archived and removed at once.')
+
+    def write_logs(self, archive, logs):
+        fields = [field.attname for field in LoggerHistory._meta.fields]
+
+        with gzip.open(archive, 'ab') as archive_file:
+            for log in logs:
+                line = json.dumps(
+                    dict((field, getattr(log, field)) for field in fields),
+                    cls=DjangoJSONEncoder)
+                archive_file.write((line + '\n').encode('utf-8'))
+
+    def archive_logs(self, cutoff, archive=None, batch_size=5000):
+        """
+        Archive and remove logs created before the cutoff date.
+
+        Logs are read in the order of their IDs, which follows the order they
+        were created in, so each batch is read from the start of the primary
+        key index and no scan of the whole table is needed.
+
+        Parameters
+        ----------
+        cutoff : datetime.datetime
+            Logs created before are archived and removed.
+        archive : str
+            Path of the archive file, logs are not archived when not set.
+        batch_size : int
+            Number of logs archived and removed at once.
+
+        Returns
+        -------
+        int
+            Number of logs removed.
+        """
+        removed = 0
+
+        while True:
+            with transaction.atomic():
+                logs = list(LoggerHistory.objects.filter(
+                    created__lt=cutoff).order_by('id')[:batch_size])
+
+                if not logs:
+                    break
+
+                if archive:
+                    self.write_logs(archive, logs)
+
+                LoggerHistory.objects.filter(
+                    id__in=[log.id for log in logs]).delete()
+                removed += len(logs)
+
+        return removed
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        removed = self.archive_logs(
+            cutoff,
+            archive=options['archive'],
+            batch_size=options['batch_size'])
+
+        self.stdout.write('%s logs removed.' % removed)
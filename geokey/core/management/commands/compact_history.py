@@ -0,0 +1,131 @@
+"""Command `compact_history`."""
+
+from itertools import groupby
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.core.management.base import BaseCommand
+
+from geokey.core.base import HISTORY_DELTA_FIELDS
+from geokey.core.history import get_delta, apply_delta
+
+
+class Command(BaseCommand):
+    """A command to store existing history as deltas."""
+
+    help = 'Compacts existing history by storing changes as deltas, with a ' \
+           'full snapshot every interval.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=settings.HISTORY_SNAPSHOT_INTERVAL,
+            help='Number of historical records between full snapshots.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of objects whose history is compacted at once.')
+
+    def compact_records(self, history_model, field, records, interval):
+        compacted = 0
+        since_snapshot = 0
+        previous = None
+
+        for record in records:
+            value = getattr(record, field)
+            if record.history_delta:
+                value = apply_delta(previous, value)
+
+            if (since_snapshot == 0 or since_snapshot >= interval or
+                    record.history_type != '~'):
+                if record.history_delta:
+                    history_model.objects.filter(
+                        history_id=record.history_id
+                    ).update(**{field: value, 'history_delta': False})
+
+                since_snapshot = 1
+            else:
+                if not record.history_delta:
+                    history_model.objects.filter(
+                        history_id=record.history_id
+                    ).update(**{
+                        field: get_delta(previous, value),
+                        'history_delta': True
+                    })
+                    compacted += 1
+
+                since_snapshot += 1
+
+            previous = value
+
+        return compacted
+
+    def compact_history(self, model, field, interval, batch_size=500):
+        """
+        Compact the history of all objects of a model.
+
+        Objects are processed in batches of their IDs, each batch within its
+        own transaction.
+
+        Parameters
+        ----------
+        model : django.db.models.Model
+            Model that history is compacted for.
+        field : str
+            Field stored as delta.
+        interval : int
+            Number of historical records between full snapshots.
+        batch_size : int
+            Number of objects whose history is compacted at once.
+
+        Returns
+        -------
+        int
+            Number of historical records compacted.
+        """
+        history_model = model.history.model
+        compacted = 0
+        last_id = None
+
+        while True:
+            object_ids = history_model.objects.order_by('id')
+            if last_id is not None:
+                object_ids = object_ids.filter(id__gt=last_id)
+
+            object_ids = list(object_ids.values_list(
+                'id', flat=True).distinct()[:batch_size])
+
+            if not object_ids:
+                break
+
+            with transaction.atomic():
+                records = history_model.objects.filter(
+                    id__in=object_ids
+                ).order_by('id', 'history_id')
+
+                for object_id, object_records in groupby(
+                        records, lambda record: record.id):
+                    compacted += self.compact_records(
+                        history_model,
+                        field,
+                        object_records,
+                        interval
+                    )
+
+            last_id = object_ids[-1]
+
+        return compacted
+
+    def handle(self, *args, **options):
+        for label, field in HISTORY_DELTA_FIELDS.items():
+            compacted = self.compact_history(
+                apps.get_model(label),
+                field,
+                options['interval'],
+                batch_size=options['batch_size'])
+
+            self.stdout.write(
+                '%s: %s historical records compacted.' % (label, compacted))
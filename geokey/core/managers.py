@@ -0,0 +1,142 @@
+"""Core managers."""
+
+from django.db import models
+
+
+class LogPage(object):
+    """A single page of logs, retrieved using keyset pagination."""
+
+    def __init__(self, logs, has_previous, has_next):
+        """Initiate the page."""
+        self.logs = logs
+        self.has_previous = has_previous
+        self.has_next = has_next
+
+    def __iter__(self):
+        """Iterate over the logs of the page."""
+        return iter(self.logs)
+
+    def __len__(self):
+        """Return the number of logs on the page."""
+        return len(self.logs)
+
+    @property
+    def has_other_pages(self):
+        """Return `True` if there are newer or older logs."""
+        return self.has_previous or self.has_next
+
+    @property
+    def previous_cursor(self):
+        """Return the cursor to retrieve newer logs (`after`)."""
+        if self.has_previous and self.logs:
+            return self.logs[0].id
+
+    @property
+    def next_cursor(self):
+        """Return the cursor to retrieve older logs (`before`)."""
+        if self.has_next and self.logs:
+            return self.logs[-1].id
+
+
+class LoggerHistoryQuerySet(models.query.QuerySet):
+    """Custom QuerySet for geokey.core.models.LoggerHistory."""
+
+    def for_project(self, project_id):
+        """
+        Return logs of a project.
+
+        Uses the extracted `project_id` column, which is indexed together with
+        the primary key, so that recent activity of a single project can be
+        read using a bounded index scan.
+
+        Parameters
+        ----------
+        project_id : int
+            Identifies the project in the database.
+
+        Returns
+        -------
+        django.db.models.query.QuerySet
+            List of geokey.core.models.LoggerHistory.
+        """
+        return self.filter(project_id=project_id)
+
+    def for_observation(self, observation_id):
+        """
+        Return logs of an observation.
+
+        Parameters
+        ----------
+        observation_id : int
+            Identifies the observation in the database.
+
+        Returns
+        -------
+        django.db.models.query.QuerySet
+            List of geokey.core.models.LoggerHistory.
+        """
+        return self.filter(observation_id=observation_id)
+
+    def get_page(self, before=None, after=None, limit=20):
+        """
+        Return a page of logs, newest first.
+
+        Pages are identified by the ID of the log they continue from instead
+        of the page number, so that no count of all logs is needed and the
+        query cost does not grow with the page number.
+
+        Parameters
+        ----------
+        before : int
+            Only logs older than the log with this ID are returned.
+        after : int
+            Only logs newer than the log with this ID are returned. Ignored
+            when `before` is set.
+        limit : int
+            Maximum number of logs on the page.
+
+        Returns
+        -------
+        geokey.core.managers.LogPage
+            The page of logs.
+        """
+        if before is not None:
+            logs = list(self.filter(id__lt=before).order_by('-id')[:limit + 1])
+            has_next = len(logs) > limit
+            logs = logs[:limit]
+            has_previous = True
+        elif after is not None:
+            logs = list(self.filter(id__gt=after).order_by('id')[:limit + 1])
+            has_previous = len(logs) > limit
+            logs = logs[:limit][::-1]
+            has_next = True
+        else:
+            logs = list(self.order_by('-id')[:limit + 1])
+            has_next = len(logs) > limit
+            logs = logs[:limit]
+            has_previous = False
+
+        return LogPage(logs, has_previous, has_next)
+
+
+class LoggerHistoryManager(models.Manager):
+    """Custom Manager for geokey.core.models.LoggerHistory."""
+
+    def get_queryset(self):
+        """
+        Return the QuerySet.
+
+        Returns
+        -------
+        django.db.models.query.QuerySet
+            List of geokey.core.models.LoggerHistory.
+        """
+        return LoggerHistoryQuerySet(self.model)
+
+    def for_project(self, project_id):
+        """Return logs of a project; see `LoggerHistoryQuerySet`."""
+        return self.get_queryset().for_project(project_id)
+
+    def for_observation(self, observation_id):
+        """Return logs of an observation; see `LoggerHistoryQuerySet`."""
+        return self.get_queryset().for_observation(observation_id)
@@ -4,7 +4,7 @@
 from django import http
 from django.db import connection
 
-from .signals import request_accessor
+from .context import set_request, clear_request
 
 try:
     from . import settings
@@ -57,16 +57,24 @@ class TerminalLogging(object):
 
 
 class RequestProvider(object):
-    def __init__(self):
-        self._request = None
-        request_accessor.connect(self)
+    """
+    Provide the current request to code outside views, e.g. the logger.
+
+    The request is stored for the thread handling it, so the middleware is
+    safe to use with threaded workers.
+    """
 
     def process_view(self, request, view_func, view_args, view_kwargs):
-        self._request = request
+        set_request(request)
         return None
 
-    def __call__(self, **kwargs):
-        return self._request
+    def process_response(self, request, response):
+        clear_request()
+        return response
+
+    def process_exception(self, request, exception):
+        clear_request()
+        return None
 
 
 def show_debug_toolbar(request):
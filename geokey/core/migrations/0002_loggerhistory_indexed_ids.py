@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loggerhistory',
+            name='project_id',
+            field=models.IntegerField(null=True, blank=True),
+        ),
+        migrations.AddField(
+            model_name='loggerhistory',
+            name='observation_id',
+            field=models.IntegerField(null=True, blank=True),
+        ),
+        migrations.RunSQL(
+            "UPDATE core_loggerhistory "
+            "SET project_id = (project -> 'id')::integer "
+            "WHERE project ? 'id';",
+            migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            "UPDATE core_loggerhistory "
+            "SET observation_id = (observation -> 'id')::integer "
+            "WHERE observation ? 'id';",
+            migrations.RunSQL.noop
+        ),
+        migrations.AlterIndexTogether(
+            name='loggerhistory',
+            index_together=set([
+                ('project_id', 'id'),
+                ('observation_id', 'id'),
+            ]),
+        ),
+    ]
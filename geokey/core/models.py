@@ -6,6 +6,7 @@ from django.db.models.signals import (
     post_delete,
     m2m_changed,
 )
+from django.db import models
 from django.dispatch import receiver
 from django.contrib.postgres.fields import HStoreField
 
@@ -14,6 +15,7 @@ from model_utils.models import TimeStampedModel
 from geokey.core.signals import get_request
 
 from .base import STATUS_ACTION, LOG_MODELS, LOG_M2M_RELATIONS
+from .managers import LoggerHistoryManager
 
 
 class LoggerHistory(TimeStampedModel):
@@ -31,6 +33,31 @@ class LoggerHistory(TimeStampedModel):
     subset = HStoreField(null=True, blank=True)
     action = HStoreField(null=True, blank=True)
     historical = HStoreField(null=True, blank=True)
+    project_id = models.IntegerField(null=True, blank=True)
+    observation_id = models.IntegerField(null=True, blank=True)
+
+    objects = LoggerHistoryManager()
+
+    class Meta:
+        index_together = [
+            ('project_id', 'id'),
+            ('observation_id', 'id'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Overwrite `save` to extract indexed IDs from the HStore fields."""
+        self.project_id = get_id(self.project)
+        self.observation_id = get_id(self.observation)
+
+        super(LoggerHistory, self).save(*args, **kwargs)
+
+
+def get_id(value):
+    """Get the ID stored in a HStore field value."""
+    try:
+        return int(value.get('id'))
+    except (AttributeError, TypeError, ValueError):
+        return None
 
 
 def get_class_name(instance_class):
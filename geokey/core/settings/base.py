@@ -184,6 +184,102 @@ TEMPLATES = [
 # endabled by overwriting in local settings
 ENABLE_VIDEO = False
 
+# Host uploaded videos are published on
+VIDEO_HOST = 'geokey.contributions.processing.YouTubeHost'
+
+# Transcode audio, upload videos and create thumbnails in the background,
+# instead of during the upload request. Queued files are processed by the
+# `process_media` command. Files processing for longer than the timeout (in
+# minutes) are queued again
+MEDIA_PROCESSING_BACKGROUND = False
+MEDIA_PROCESSING_WORKERS = 2
+MEDIA_PROCESSING_TIMEOUT = 60
+
+# Maximum widths and heights of image derivatives, created in each format
+# alongside the original; clients pick the variant closest to the display size
+IMAGE_DERIVATIVE_SIZES = [150, 600, 1200]
+IMAGE_DERIVATIVE_FORMATS = ['webp', 'jpeg']
+IMAGE_DERIVATIVE_QUALITY = 80
+
+# Number of hours a resumable upload is kept for without receiving a chunk
+MEDIA_UPLOAD_EXPIRY = 24
+
+# Return URLs of the media delivery API instead of `MEDIA_URL`, which should
+# not be served publicly then. The API checks access to the contribution and
+# hands the transfer to the web server: `nginx` (X-Accel-Redirect to
+# `MEDIA_DELIVERY_PREFIX`, an internal location serving `MEDIA_ROOT`),
+# `sendfile` (X-Sendfile) or `django` (streamed by Django, for development)
+MEDIA_PROTECTED = False
+MEDIA_DELIVERY = 'django'
+MEDIA_DELIVERY_PREFIX = '/protected/'
+MEDIA_ACCESS_CACHE_TIMEOUT = 60
+
+# Files only delivered through the API, e.g. bundles of projects, are stored
+# in `PRIVATE_MEDIA_ROOT` (`private` next to `MEDIA_ROOT` when not set), which
+# must not be served publicly; with `nginx` delivery, `PRIVATE_DELIVERY_PREFIX`
+# is an internal location serving it
+PRIVATE_MEDIA_ROOT = None
+PRIVATE_DELIVERY_PREFIX = '/protected-private/'
+
+# Number of contributions read from the database at once when exporting
+EXPORT_CHUNK_SIZE = 500
+
+# Export jobs split contributions into chunks of this size, which are written
+# by a pool of worker processes. Files of jobs are reused while the
+# contributions do not change, and removed after the number of hours. Jobs
+# without progress for the number of minutes of the timeout have failed
+EXPORT_JOB_CHUNK_SIZE = 5000
+EXPORT_JOB_WORKERS = 2
+EXPORT_JOB_EXPIRY = 24
+EXPORT_JOB_TIMEOUT = 60
+
+# Number of changed contributions returned at most by one sync request, and
+# number of seconds changes are synced behind, so changes committed late are
+# not skipped
+SYNC_PAGE_SIZE = 500
+SYNC_LAG = 10
+
+# Number of locations returned at most by one request
+LOCATIONS_PAGE_SIZE = 1000
+
+# Number of bins of histograms of numeric fields in facets, and number of
+# seconds facets are cached for (they are recomputed when data changes)
+FACETS_HISTOGRAM_BINS = 10
+FACETS_CACHE_TIMEOUT = 600
+
+# Smallest size of grid cells of the density of contributions in metres, and
+# number of seconds densities are cached for
+DENSITY_MIN_CELL_SIZE = 10
+DENSITY_CACHE_TIMEOUT = 600
+
+# Number of contributions past their expiry date expired at once
+EXPIRY_BATCH_SIZE = 1000
+
+# Number of processes assigning locations of contributions to the regions of
+# imported region layers with the `assign_regions` command, and number of
+# locations each assigns at once
+REGION_WORKERS = 2
+REGION_ASSIGNMENT_CHUNK_SIZE = 10000
+
+# Enforcement of geographic extents of projects on new contributions outside
+# them: 'reject', 'flag', 'review' (flag and send to review), or None
+EXTENT_ENFORCEMENT = None
+
+# Number of days history logs are kept for, before the `archive_logs` command
+# archives and removes them
+LOGGER_RETENTION_DAYS = 365
+
+# Store changes to contribution properties as deltas in the history, with a
+# full snapshot every `HISTORY_SNAPSHOT_INTERVAL` records
+HISTORY_COMPACTION = False
+HISTORY_SNAPSHOT_INTERVAL = 20
+
 CRONJOBS = [
     ('*/5 * * * *', 'geokey.socialinteractions.utils.start2pull'),
+    ('* * * * *', 'geokey.contributions.processing.process_queued_media'),
+    ('0 * * * *', 'geokey.contributions.processing.remove_expired_uploads'),
+    ('* * * * *', 'geokey.contributions.exports.jobs.process_queued_exports'),
+    ('30 * * * *', 'geokey.contributions.exports.jobs.remove_expired_exports'),
+    ('*/5 * * * *', 'geokey.contributions.extents.recompute_extents'),
+    ('* * * * *', 'geokey.contributions.expiry.expire_contributions'),
 ]
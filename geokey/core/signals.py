@@ -2,28 +2,7 @@
 
 from django.dispatch import Signal
 
-delete_project = Signal(providing_args=["project"])
-
-class RequestAccessorSignal(Signal):
-    """Request accessor signal."""
-
-    def __init__(self, providing_args=None):
-        """Initiate the signal."""
-        return Signal.__init__(self, providing_args)
-
-    def connect(self, receiver, sender=None, weak=True, dispatch_uid=None):
-        """Connect the signal."""
-        Signal.connect(self, receiver, sender, weak, dispatch_uid)
+from .context import get_request  # noqa
 
-
-request_accessor = RequestAccessorSignal()
-
-
-def get_request():
-    """Get the current request."""
-    entry = request_accessor.send(None)
-    if entry:
-        entry = entry[0]
-        if entry:
-            return entry[1]
-    return None
+delete_project = Signal(providing_args=["project"])
+media_processed = Signal(providing_args=["mediafile"])
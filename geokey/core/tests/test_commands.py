@@ -0,0 +1,74 @@
+"""Tests for commands of core."""
+
+import os
+import gzip
+import json
+import tempfile
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from geokey.core.models import LoggerHistory
+from geokey.core.management.commands.archive_logs import Command as ArchiveLogs
+
+
+class ArchiveLogsTest(TestCase):
+    """Test command `archive_logs`."""
+
+    def setUp(self):
+        """Set up test."""
+        self.old_logs = []
+        for index in range(3):
+            log = LoggerHistory.objects.create(
+                project={'id': '1', 'name': 'Project'},
+                action={'id': 'created', 'class': 'Observation'})
+            LoggerHistory.objects.filter(pk=log.pk).update(
+                created=timezone.now() - timedelta(days=400))
+            self.old_logs.append(log)
+
+        self.recent_log = LoggerHistory.objects.create(
+            project={'id': '1', 'name': 'Project'},
+            action={'id': 'updated', 'class': 'Observation'})
+
+        self.archive = os.path.join(
+            tempfile.mkdtemp(), 'logs.jsonl.gz')
+
+    def tearDown(self):
+        """Tear down test."""
+        if os.path.isfile(self.archive):
+            os.remove(self.archive)
+
+    def test_archive_logs(self):
+        """Test old logs are archived and removed in batches."""
+        command = ArchiveLogs()
+        removed = command.archive_logs(
+            timezone.now() - timedelta(days=365),
+            archive=self.archive,
+            batch_size=2)
+
+        self.assertEqual(removed, 3)
+        self.assertEqual(
+            list(LoggerHistory.objects.all()),
+            [self.recent_log])
+
+        with gzip.open(self.archive, 'rb') as archive_file:
+            archived = [
+                json.loads(line.decode('utf-8')) for line in archive_file
+            ]
+
+        self.assertEqual(
+            [log['id'] for log in archived],
+            [log.id for log in self.old_logs])
+        self.assertEqual(archived[0]['project'], {'id': '1', 'name': 'Project'})
+        self.assertEqual(archived[0]['project_id'], 1)
+
+    def test_remove_logs_without_archive(self):
+        """Test old logs are removed when no archive is set."""
+        command = ArchiveLogs()
+        removed = command.archive_logs(timezone.now() - timedelta(days=365))
+
+        self.assertEqual(removed, 3)
+        self.assertFalse(os.path.isfile(self.archive))
+        self.assertEqual(LoggerHistory.objects.count(), 1)
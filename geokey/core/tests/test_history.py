@@ -0,0 +1,139 @@
+"""Tests for history compaction."""
+
+from django.test import TestCase, override_settings
+
+from geokey.core.history import (
+    get_delta,
+    apply_delta,
+    get_historical_record,
+)
+from geokey.core.management.commands.compact_history import (
+    Command as CompactHistory
+)
+from geokey.contributions.models import Observation
+from geokey.contributions.tests.model_factories import (
+    ObservationFactory,
+    CommentFactory,
+)
+
+
+class DeltaTest(TestCase):
+    """Test deltas of dict values."""
+
+    def test_get_delta(self):
+        """Test delta contains changed and removed keys."""
+        delta = get_delta(
+            {'a': 1, 'b': 2, 'c': 3},
+            {'a': 1, 'b': 5, 'd': 4})
+
+        self.assertEqual(delta['set'], {'b': 5, 'd': 4})
+        self.assertEqual(delta['unset'], ['c'])
+
+    def test_apply_delta(self):
+        """Test applying a delta rebuilds the new value."""
+        old_value = {'a': 1, 'b': 2, 'c': 3}
+        new_value = {'a': 1, 'b': 5, 'd': 4}
+
+        self.assertEqual(
+            apply_delta(old_value, get_delta(old_value, new_value)),
+            new_value)
+        self.assertEqual(old_value, {'a': 1, 'b': 2, 'c': 3})
+
+
+@override_settings(HISTORY_COMPACTION=True, HISTORY_SNAPSHOT_INTERVAL=3)
+class HistoryCompactionTest(TestCase):
+    """Test history of contributions stored as deltas."""
+
+    def setUp(self):
+        """Set up test."""
+        self.observation = ObservationFactory.create(
+            properties={'key_1': 'value', 'key_2': 0})
+
+        for index in range(1, 5):
+            self.observation.update(
+                properties={'key_1': 'value', 'key_2': index},
+                updator=self.observation.creator)
+
+    def test_records_stored_as_deltas(self):
+        """Test deltas are stored with periodic snapshots."""
+        records = self.observation.history.order_by('history_id')
+
+        self.assertEqual(
+            [record.history_delta for record in records],
+            [False, True, True, False, True])
+        self.assertEqual(
+            records[1].properties,
+            {'set': {'key_2': 1}, 'unset': []})
+
+    def test_get_historical_record(self):
+        """Test full properties are rebuilt."""
+        records = self.observation.history.order_by('history_id')
+
+        for index, record in enumerate(records):
+            record = get_historical_record(
+                Observation.history.model,
+                record.history_id)
+
+            self.assertFalse(record.history_delta)
+            self.assertEqual(
+                record.properties,
+                {'key_1': 'value', 'key_2': index})
+
+    def test_get_version(self):
+        """Test observation versions are rebuilt."""
+        record = self.observation.get_version(3)
+
+        self.assertEqual(record.version, 3)
+        self.assertEqual(record.properties, {'key_1': 'value', 'key_2': 2})
+
+        with self.assertRaises(Observation.history.model.DoesNotExist):
+            self.observation.get_version(10)
+
+    def test_count_update_not_stored(self):
+        """Test updating counts does not add history."""
+        history_count = self.observation.history.count()
+        CommentFactory.create(commentto=self.observation)
+
+        self.assertEqual(self.observation.history.count(), history_count)
+
+
+class CompactHistoryTest(TestCase):
+    """Test command `compact_history`."""
+
+    def setUp(self):
+        """Set up test."""
+        self.observation = ObservationFactory.create(
+            properties={'key_1': 'value', 'key_2': 0})
+
+        for index in range(1, 6):
+            self.observation.update(
+                properties={'key_1': 'value', 'key_2': index},
+                updator=self.observation.creator)
+
+    def test_compact_history(self):
+        """Test existing history is compacted."""
+        command = CompactHistory()
+        compacted = command.compact_history(
+            Observation,
+            'properties',
+            interval=3,
+            batch_size=1)
+
+        self.assertEqual(compacted, 4)
+
+        records = self.observation.history.order_by('history_id')
+        self.assertEqual(
+            [record.history_delta for record in records],
+            [False, True, True, False, True, True])
+
+        for index, record in enumerate(records):
+            record = get_historical_record(
+                Observation.history.model,
+                record.history_id)
+            self.assertEqual(
+                record.properties,
+                {'key_1': 'value', 'key_2': index})
+
+        self.assertEqual(
+            command.compact_history(Observation, 'properties', interval=3),
+            0)
@@ -0,0 +1,89 @@
+"""Tests for core managers."""
+
+from django.test import TestCase
+
+from geokey.core.models import LoggerHistory
+
+
+class LoggerHistoryManagerTest(TestCase):
+    """Test manager of logs."""
+
+    def setUp(self):
+        """Set up test."""
+        self.logs = [
+            LoggerHistory.objects.create(
+                project={'id': '1', 'name': 'Project'},
+                observation={'id': str(index)},
+                action={'id': 'created', 'class': 'Observation'})
+            for index in range(5)
+        ]
+        LoggerHistory.objects.create(
+            project={'id': '2', 'name': 'Other project'},
+            action={'id': 'created', 'class': 'Project'})
+
+    def test_extracted_ids(self):
+        """Test IDs are extracted from the HStore fields."""
+        log = self.logs[3]
+        self.assertEqual(log.project_id, 1)
+        self.assertEqual(log.observation_id, 3)
+
+        log = LoggerHistory.objects.create(
+            action={'id': 'created', 'class': 'Project'})
+        self.assertIsNone(log.project_id)
+        self.assertIsNone(log.observation_id)
+
+    def test_for_project(self):
+        """Test logs are filtered by project."""
+        logs = LoggerHistory.objects.for_project(1)
+        self.assertEqual(logs.count(), 5)
+
+    def test_for_observation(self):
+        """Test logs are filtered by observation."""
+        logs = LoggerHistory.objects.for_observation(2)
+        self.assertEqual(list(logs), [self.logs[2]])
+
+    def test_get_first_page(self):
+        """Test the first page contains newest logs."""
+        page = LoggerHistory.objects.for_project(1).get_page(limit=2)
+
+        self.assertEqual(list(page), [self.logs[4], self.logs[3]])
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
+        self.assertIsNone(page.previous_cursor)
+        self.assertEqual(page.next_cursor, self.logs[3].id)
+
+    def test_get_page_before(self):
+        """Test older logs are returned."""
+        page = LoggerHistory.objects.for_project(1).get_page(
+            before=self.logs[3].id,
+            limit=2)
+
+        self.assertEqual(list(page), [self.logs[2], self.logs[1]])
+        self.assertTrue(page.has_previous)
+        self.assertTrue(page.has_next)
+
+        page = LoggerHistory.objects.for_project(1).get_page(
+            before=self.logs[1].id,
+            limit=2)
+
+        self.assertEqual(list(page), [self.logs[0]])
+        self.assertTrue(page.has_previous)
+        self.assertFalse(page.has_next)
+
+    def test_get_page_after(self):
+        """Test newer logs are returned."""
+        page = LoggerHistory.objects.for_project(1).get_page(
+            after=self.logs[0].id,
+            limit=2)
+
+        self.assertEqual(list(page), [self.logs[2], self.logs[1]])
+        self.assertTrue(page.has_previous)
+        self.assertTrue(page.has_next)
+
+        page = LoggerHistory.objects.for_project(1).get_page(
+            after=self.logs[2].id,
+            limit=2)
+
+        self.assertEqual(list(page), [self.logs[4], self.logs[3]])
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
@@ -0,0 +1,109 @@
+"""Tests for core middleware."""
+
+import threading
+
+from django.test import TestCase
+from django.http import HttpRequest, HttpResponse
+
+from geokey.core.middleware import RequestProvider
+from geokey.core.signals import get_request
+from geokey.core.models import generate_log
+from geokey.projects.models import Project
+from geokey.users.tests.model_factories import UserFactory
+from geokey.projects.tests.model_factories import ProjectFactory
+
+
+class RequestProviderTest(TestCase):
+    """Test middleware providing the current request."""
+
+    def setUp(self):
+        """Set up test."""
+        self.middleware = RequestProvider()
+
+    def run_in_parallel(self, requests, func):
+        """
+        Run `func` for each request in its own thread.
+
+        All threads first let the middleware process their request, and only
+        call `func` once every other thread has done so too, so that requests
+        of all threads are provided at the same time.
+        """
+        results = {}
+        condition = threading.Condition()
+        processed = []
+
+        def handle(index, request):
+            self.middleware.process_view(request, None, None, None)
+
+            with condition:
+                processed.append(index)
+                condition.notify_all()
+                while len(processed) < len(requests):
+                    condition.wait()
+
+            results[index] = func(request)
+            self.middleware.process_response(request, HttpResponse())
+
+        threads = [
+            threading.Thread(target=handle, args=(index, request))
+            for index, request in enumerate(requests)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return results
+
+    def test_request_is_provided(self):
+        """Test request is provided until the response is processed."""
+        request = HttpRequest()
+
+        self.middleware.process_view(request, None, None, None)
+        self.assertEqual(get_request(), request)
+
+        self.middleware.process_response(request, HttpResponse())
+        self.assertIsNone(get_request())
+
+    def test_request_is_cleared_on_exception(self):
+        """Test request is not provided after an exception."""
+        request = HttpRequest()
+
+        self.middleware.process_view(request, None, None, None)
+        self.middleware.process_exception(request, Exception())
+        self.assertIsNone(get_request())
+
+    def test_parallel_requests(self):
+        """Test each thread gets its own request."""
+        requests = [HttpRequest() for index in range(10)]
+
+        results = self.run_in_parallel(
+            requests,
+            lambda request: get_request() is request)
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(results.values()))
+        self.assertIsNone(get_request())
+
+    def test_parallel_logs(self):
+        """Test logs get the user of the request in the same thread."""
+        project = ProjectFactory.create()
+        requests = []
+
+        for index in range(10):
+            request = HttpRequest()
+            request.user = UserFactory.create()
+            requests.append(request)
+
+        results = self.run_in_parallel(
+            requests,
+            lambda request: generate_log(
+                Project,
+                project,
+                {'id': 'updated', 'class': 'Project'}
+            ).user)
+
+        for index, request in enumerate(requests):
+            self.assertEqual(results[index], {
+                'id': str(request.user.id),
+                'display_name': str(request.user)})
@@ -138,8 +138,7 @@ class LoggerListTest(TestCase):
         project = ProjectFactory.create()
         user = project.creator
 
-        logs = LoggerHistory.objects.filter(
-            project__contains={'id': str(project.id)})
+        logs = LoggerHistory.objects.for_project(project.id)
 
         logger_list = LoggerList()
 
@@ -154,8 +153,9 @@ class LoggerListTest(TestCase):
                 'PLATFORM_NAME': get_current_site(self.request).name,
                 'GEOKEY_VERSION': version.get_version(),
                 'logs': logger_list.paginate_logs(
-                    logs[::-1],
-                    self.request.GET.get('page'))
+                    logs,
+                    self.request.GET.get('before'),
+                    self.request.GET.get('after'))
             }
         )
         self.assertEqual(response.status_code, 200)
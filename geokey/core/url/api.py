@@ -7,7 +7,10 @@ from geokey.core.views import InfoAPIView
 from geokey.projects import views as project_views
 from geokey.categories import views as category_views
 
-from geokey.contributions.views import observations, comments, locations, media
+from geokey.contributions.views import (
+    observations, comments, locations, media, exports, sync, statistics,
+    facets, density, regions
+)
 from geokey.users.views import UserAPIView, ChangePasswordView
 
 
@@ -61,11 +64,71 @@ urlpatterns = [
         r'contributions/$',
         observations.ProjectObservations.as_view(),
         name='project_observations'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/query/$',
+        observations.ProjectContributionsQuery.as_view(),
+        name='project_contributions_query'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/facets/$',
+        facets.ProjectFacets.as_view(),
+        name='project_contributions_facets'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/density/$',
+        density.ProjectDensity.as_view(),
+        name='project_contributions_density'),
     url(
         r'^projects/(?P<project_id>[0-9]+)/'
         r'contributions/(?P<observation_id>[0-9]+)/$',
         observations.SingleAllContributionAPIView.as_view(),
         name='project_single_observation'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/export/jobs/$',
+        exports.ProjectExportJobs.as_view(),
+        name='project_export_jobs'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/export/jobs/(?P<job_id>[0-9a-f-]+)/$',
+        exports.SingleExportJob.as_view(),
+        name='project_single_export_job'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/export/jobs/(?P<job_id>[0-9a-f-]+)/file/$',
+        exports.ExportJobFile.as_view(),
+        name='project_export_job_file'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/export/(?P<export_format>[a-z]+)/$',
+        exports.ProjectContributionsExport.as_view(),
+        name='project_contributions_export'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'sync/$',
+        sync.ProjectSync.as_view(),
+        name='project_sync'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'bundle/$',
+        sync.ProjectBundleView.as_view(),
+        name='project_bundle'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'statistics/$',
+        statistics.ProjectStatistics.as_view(),
+        name='project_statistics'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'regions/$',
+        regions.ProjectRegionLayers.as_view(),
+        name='project_region_layers'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'regions/(?P<layer_id>[0-9]+)/$',
+        regions.ProjectRegionLayer.as_view(),
+        name='project_region_layer'),
 
     # ###########################
     # LOCATIONS
@@ -112,4 +175,20 @@ urlpatterns = [
         r'media/(?P<file_id>[0-9]+)/$',
         media.SingleMediaAPIView.as_view(),
         name='project_single_media'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/(?P<contribution_id>[0-9]+)/'
+        r'media/uploads/$',
+        media.MediaUploadsAPIView.as_view(),
+        name='project_media_uploads'),
+    url(
+        r'^projects/(?P<project_id>[0-9]+)/'
+        r'contributions/(?P<contribution_id>[0-9]+)/'
+        r'media/uploads/(?P<upload_id>[0-9a-f-]+)/$',
+        media.SingleMediaUploadAPIView.as_view(),
+        name='project_single_media_upload'),
+    url(
+        r'^media/(?P<file_id>[0-9]+)/content/$',
+        media.MediaFileContentAPIView.as_view(),
+        name='media_file_content'),
 ]
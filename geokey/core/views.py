@@ -12,8 +12,6 @@ from geokey.extensions.base import extensions
 from geokey.projects.views import ProjectContext
 from geokey.core.models import LoggerHistory
 
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-
 
 class LoggerList(LoginRequiredMixin, ProjectContext, TemplateView):
     """A list of all history logs."""
@@ -39,27 +37,22 @@ class LoggerList(LoginRequiredMixin, ProjectContext, TemplateView):
             **kwargs
         )
 
-        logs = LoggerHistory.objects.filter(
-            project__contains={'id': str(project_id)})
-
         context['logs'] = self.paginate_logs(
-            logs[::-1],
-            self.request.GET.get('page'))
+            LoggerHistory.objects.for_project(project_id),
+            self.request.GET.get('before'),
+            self.request.GET.get('after'))
 
         return context
 
-    def paginate_logs(self, logs, page):
-            """Paginate all logs."""
-            paginator = Paginator(logs, 20)
-
-            try:
-                logs = paginator.page(page)
-            except PageNotAnInteger:
-                logs = paginator.page(1)
-            except EmptyPage:
-                logs = paginator.page(paginator.num_pages)
+    def paginate_logs(self, logs, before=None, after=None):
+        """Paginate all logs, newest first."""
+        try:
+            before = int(before) if before else None
+            after = int(after) if after else None
+        except ValueError:
+            before = after = None
 
-            return logs
+        return logs.get_page(before=before, after=after, limit=20)
 
 
 # ############################################################################
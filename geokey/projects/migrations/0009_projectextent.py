@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_historicalproject'),
+        ('contributions', '0030_location_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectExtent',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('status', models.CharField(max_length=20)),
+                ('hull', django.contrib.gis.db.models.fields.GeometryField(null=True, srid=4326)),
+                ('dirty', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(related_name='extents', to='projects.Project')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='projectextent',
+            unique_together=set([('project', 'status')]),
+        ),
+        migrations.RunSQL(
+            'INSERT INTO projects_projectextent '
+            '(project_id, status, hull, dirty, updated_at) '
+            'SELECT o.project_id, o.status, '
+            'ST_ConvexHull(ST_Collect(l.geometry::geometry)), false, now() '
+            'FROM contributions_observation o '
+            'JOIN contributions_location l ON l.id = o.location_id '
+            'WHERE o.status IN (\'active\', \'review\', \'pending\') '
+            'GROUP BY o.project_id, o.status;',
+            migrations.RunSQL.noop
+        ),
+    ]
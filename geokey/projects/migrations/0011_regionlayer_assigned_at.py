@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_regionlayer_region'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='regionlayer',
+            name='assigned_at',
+            field=models.DateTimeField(null=True, blank=True),
+        ),
+        # Layers imported before were assigned during the import
+        migrations.RunSQL(
+            'UPDATE projects_regionlayer SET assigned_at = created_at;',
+            migrations.RunSQL.noop
+        ),
+    ]
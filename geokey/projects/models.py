@@ -4,6 +4,11 @@ from django.db import models
 from django.conf import settings
 from django.contrib.gis.db import models as gis
 
+try:
+    from django.contrib.postgres.fields import JSONField
+except ImportError:
+    from django_pgjson.fields import JsonBField as JSONField
+
 from geokey.core import signals
 from simple_history.models import HistoricalRecords
 
@@ -20,6 +25,7 @@ class Project(models.Model):
     isprivate = models.BooleanField(default=False)
     islocked = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     creator = models.ForeignKey(settings.AUTH_USER_MODEL)
     everyone_contributes = models.CharField(
         choices=EVERYONE_CONTRIBUTES,
@@ -265,7 +271,10 @@ class Project(models.Model):
             not user.is_anonymous() and (
                 self.usergroups.filter(users=user).exists()))
 
-    def get_all_contributions(self, user, search=None, subset=None, bbox=None):
+    def get_all_contributions(self, user, search=None, subset=None, bbox=None,
+                              created_after=None, created_before=None,
+                              updated_after=None, updated_before=None,
+                              region=None):
         """
         Returns all contributions a user can access in a project. It gets
         the SQL clauses of all data groupings in the project and combines them
@@ -275,6 +284,23 @@ class Project(models.Model):
         ----------
         user : geokey.users.models.User
             User that contributions are queried for
+        search : str
+            Query the properties of contributions are matched with
+        subset : int
+            Identifies the subset contributions are filtered by
+        bbox : str
+            Bounding box contributions are filtered by
+        created_after : str
+            Date contributions are created at or after
+        created_before : str
+            Date contributions are created before
+        updated_after : str
+            Date contributions are updated at or after
+        updated_before : str
+            Date contributions are updated before
+        region : int
+            Identifies the region of a region layer contributions are
+            filtered by
 
         Returns
         -------
@@ -316,6 +342,16 @@ class Project(models.Model):
         if bbox:
             data = data.get_by_bbox(bbox)
 
+        if region:
+            data = data.get_by_region(region)
+
+        data = data.get_by_time(
+            created_after=created_after,
+            created_before=created_before,
+            updated_after=updated_after,
+            updated_before=updated_before
+        )
+
         return data.distinct()
 
 
@@ -334,3 +370,66 @@ class Admins(models.Model):
     class Meta:
         ordering = ['project__name']
         unique_together = ('project', 'user')
+
+
+class ProjectExtent(models.Model):
+    """
+    Stores the convex hull of all contributions of a project with a status.
+    It is expanded when contributions are added, and recomputed when it
+    might have shrunk, e.g. when a contribution has been deleted.
+    """
+    project = models.ForeignKey('Project', related_name='extents')
+    status = models.CharField(max_length=20)
+    hull = gis.GeometryField(null=True, srid=4326)
+    dirty = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('project', 'status')
+
+    @property
+    def bbox(self):
+        """
+        Returns the bounding box of the contributions.
+
+        Returns
+        -------
+        list
+            xmin, ymin, xmax, ymax; None if there are no contributions.
+        """
+        if self.hull is None:
+            return None
+
+        return list(self.hull.extent)
+
+
+class RegionLayer(models.Model):
+    """
+    Stores a layer of regions of a project, e.g. administrative areas or
+    survey zones, that contributions can be filtered and counted by. Layers
+    are assigned locations in the background after they are imported.
+    """
+    project = models.ForeignKey('Project', related_name='region_layers')
+    name = models.CharField(max_length=100)
+    description = models.TextField(null=True, blank=True)
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    assigned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+
+class Region(models.Model):
+    """
+    Stores a single region of a layer. Locations of contributions are
+    assigned to the regions they intersect in advance, see
+    `geokey.contributions.regions`.
+    """
+    layer = models.ForeignKey('RegionLayer', related_name='regions')
+    name = models.CharField(max_length=100)
+    properties = JSONField(default={})
+    geometry = gis.MultiPolygonField(srid=4326)
+
+    class Meta:
+        ordering = ['id']
@@ -10,6 +10,7 @@ from geokey.core.serializers import FieldSelectorSerializer
 from geokey.categories.serializers import CategorySerializer
 from geokey.subsets.serializers import SubsetSerializer
 from geokey.contributions.models import Location
+from geokey.contributions.extents import get_data_extent
 
 from .models import Project
 
@@ -23,6 +24,7 @@ class ProjectSerializer(FieldSelectorSerializer):
     contribution_info = serializers.SerializerMethodField()
     user_info = serializers.SerializerMethodField()
     geographic_extent = serializers.SerializerMethodField()
+    data_extent = serializers.SerializerMethodField()
     subsets = serializers.SerializerMethodField()
 
     class Meta:
@@ -31,7 +33,7 @@ class ProjectSerializer(FieldSelectorSerializer):
         fields = ('id', 'name', 'description', 'isprivate', 'islocked',
                   'status', 'created_at', 'categories', 'subsets',
                   'contribution_info', 'user_info', 'num_locations',
-                  'geographic_extent')
+                  'geographic_extent', 'data_extent')
         read_only_fields = ('id', 'name')
 
     def get_subsets(self, project):
@@ -88,6 +90,29 @@ class ProjectSerializer(FieldSelectorSerializer):
         else:
             return None
 
+    def get_data_extent(self, project):
+        """
+        Returns the extent of the contributions the user can access, so maps
+        can be fitted before loading them.
+
+        Parameters
+        ----------
+        project : geokey.projects.models.Project
+            Project that is serialised
+
+        Returns
+        -------
+        dict
+            bounding box of all contributions, and bounding box and convex
+            hull as geojson per status
+        """
+        user = self.context.get('user')
+
+        if user is None:
+            return None
+
+        return get_data_extent(project, user)
+
     def get_num_locations(self, project):
         """
         Method for SerializerMethodField `num_locations`. Returns the number
@@ -1,6 +1,7 @@
 """Views for projects."""
 
 from django.db import IntegrityError
+from django.db.models import Sum
 from django.views.generic import CreateView, TemplateView
 from django.shortcuts import redirect
 from django.core.urlresolvers import reverse
@@ -167,7 +168,8 @@ class ProjectOverview(LoginRequiredMixin, ProjectContext, TemplateView):
 
         if project:
             contributions = project.observations.all()
-            project.contributions_count = len(contributions)
+            project.contributions_count = project.statistics.aggregate(
+                count=Sum('count'))['count'] or 0
             project.comments_count = Comment.objects.filter(
                 commentto__in=contributions).count()
             project.media_count = MediaFile.objects.filter(
@@ -3,6 +3,7 @@ import os
 
 from django.conf import settings
 from django.apps import apps
+from django.core.exceptions import ValidationError
 
 import django
 
@@ -74,13 +75,17 @@ def start2pull():
                     socialaccount)
                 for geo_tweet in geo_tweets:
                     if not Observation.objects.filter(project=project, status='active', properties__contains=geo_tweet['id']):
-                        create_new_observation(
-                            si_pull,
-                            geo_tweet,
-                            tweet_category,
-                            text_field,
-                            tweet_id_field
-                        )
+                        try:
+                            create_new_observation(
+                                si_pull,
+                                geo_tweet,
+                                tweet_category,
+                                text_field,
+                                tweet_id_field
+                            )
+                        except ValidationError:
+                            # Outside the geographic extent of the project
+                            continue
             si_pull.save()
 
 